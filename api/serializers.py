@@ -0,0 +1,271 @@
+"""
+Declarative serializers for the JSON API (api, learn).
+
+A Serializer declares its output fields, and each Field declares the database access its value needs:
+related objects to join (select), relations to prefetch (prefetch), aggregates to annotate (annotate),
+and lookups loaded for all serialized instances at once (batch). The serializer compiles these into a single
+queryset plan, so that serializing a page costs a fixed number of queries whatever its size, which is
+declared as its queryBudget and asserted by tests.
+
+Listings are paginated by keyset (cursor): instances are ordered by the serializer's keyset fields, and
+the cursor returned with a page encodes the keyset values of its last instance, from where the next page
+continues, instead of counting an offset from the start on every page.
+"""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from json import dumps as json_dumps
+from json import loads as json_loads
+
+from django.db.models import Q
+from management.models import Management
+from people.models import Profile
+
+API_PAGE_SIZE = 10
+"""Default number of instances per page"""
+
+API_PAGE_MAX = 50
+"""Maximum number of instances per page"""
+
+
+class InvalidCursor(Exception):
+    """The given pagination cursor is malformed"""
+    pass
+
+
+class Field():
+    """A serialized field, with the database access its value needs"""
+
+    def __init__(self, value: callable, select: tuple = (), prefetch: tuple = (), annotate: dict = None, batch: callable = None):
+        """
+        Args:
+            value (callable): Returns the serialized value from an instance, or from an instance and
+                its batched lookup if batch is given.
+            select (tuple<str>, optional): Paths to select_related. Defaults to ().
+            prefetch (tuple<str>, optional): Paths to prefetch_related. Defaults to ().
+            annotate (dict, optional): Annotations by name. Defaults to None.
+            batch (callable, optional): Loads lookups for all instances at once, given the instances and the context,
+                returning the lookup of each instance by its primary key. Defaults to None.
+        """
+        self.value = value
+        self.select = tuple(select)
+        self.prefetch = tuple(prefetch)
+        self.annotate = annotate or dict()
+        self.batch = batch
+
+    def nested(self, path: str) -> "Field":
+        """Returns the relation paths of this field for instances reached via the given relation path.
+
+        Args:
+            path (str): The relation path from the outer instance
+
+        Returns:
+            Field: The field with prefixed relation paths (its batch lookup is run by its own serializer)
+        """
+        return Field(self.value, select=tuple(map(lambda s: f"{path}__{s}", self.select)),
+                     prefetch=tuple(map(lambda p: f"{path}__{p}", self.prefetch)))
+
+
+class Nested(Field):
+    """A serialized related instance (forward foreign key), serialized by another serializer.
+    The related instances of all instances are serialized together, sharing their batched lookups."""
+
+    def __init__(self, serializer: "Serializer", attr: str):
+        """
+        Args:
+            serializer (Serializer): The serializer class of the related instance
+            attr (str): The foreign key attribute of the instance
+        """
+        select, prefetch = [attr], []
+        for field in serializer.fields.values():
+            if field.annotate:
+                raise ValueError(
+                    f"Annotated fields cannot be nested: {serializer.__name__}")
+            field = field.nested(attr)
+            select.extend(field.select)
+            prefetch.extend(field.prefetch)
+        super().__init__(lambda instance, serialized: serialized, select=select, prefetch=prefetch,
+                         batch=lambda instances, context: self._serializeRelated(instances, context))
+        self.serializer = serializer
+        self.attr = attr
+
+    def _serializeRelated(self, instances: list, context: dict) -> dict:
+        related = list(filter(lambda r: r[1] is not None, map(
+            lambda i: (i.pk, getattr(i, self.attr)), instances)))
+        serialized = self.serializer.serialize(
+            list(map(lambda r: r[1], related)), context)
+        return dict(map(lambda r: (r[0][0], r[1]), zip(related, serialized)))
+
+
+class Serializer():
+    """Base of serializers, to be subclassed with model, fields, keyset and queryBudget"""
+
+    model = None
+    """The serialized model"""
+
+    fields: dict = dict()
+    """Field by output name"""
+
+    keyset: tuple = ('-id',)
+    """Ordering fields for keyset pagination, ending with a unique field"""
+
+    queryBudget: int = None
+    """Maximum number of queries to serialize any page (including the page query itself)"""
+
+    @classmethod
+    def plan(cls, queryset=None):
+        """Applies the joins, prefetches and annotations needed by all fields to the queryset.
+
+        Args:
+            queryset (QuerySet, optional): Instances to serialize. Defaults to all instances of model.
+
+        Returns:
+            QuerySet: The planned queryset
+        """
+        queryset = cls.model.objects.all() if queryset is None else queryset
+        select, prefetch, annotate = [], [], dict()
+        for field in cls.fields.values():
+            select.extend(filter(lambda s: s not in select, field.select))
+            prefetch.extend(
+                filter(lambda p: p not in prefetch, field.prefetch))
+            annotate.update(field.annotate)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if annotate:
+            queryset = queryset.annotate(**annotate)
+        return queryset
+
+    @classmethod
+    def serialize(cls, instances: list, context: dict = dict()) -> list:
+        """Serializes instances of a planned queryset.
+
+        Args:
+            instances (list): The instances
+            context (dict, optional): Request specific values for batch lookups. Defaults to dict().
+
+        Returns:
+            list<dict>: The serialized instances
+        """
+        instances = list(instances)
+        batched = dict()
+        for name, field in cls.fields.items():
+            if field.batch:
+                batched[name] = field.batch(instances, context)
+        return list(map(lambda instance: dict(map(lambda f: (f[0], f[1].value(instance, batched[f[0]].get(instance.pk)) if f[1].batch else f[1].value(instance)),
+                                                  cls.fields.items())), instances))
+
+    @classmethod
+    def one(cls, queryset, context: dict = dict()) -> dict:
+        """Serializes the first instance of the queryset.
+
+        Args:
+            queryset (QuerySet): The unplanned queryset
+            context (dict, optional): Request specific values for batch lookups. Defaults to dict().
+
+        Returns:
+            dict: The serialized instance, None if not found
+        """
+        instance = cls.plan(queryset).first()
+        return cls.serialize([instance], context)[0] if instance else None
+
+    @classmethod
+    def _keyValues(cls, instance) -> list:
+        return list(map(lambda k: getattr(instance, k.lstrip('-')), cls.keyset))
+
+    @classmethod
+    def encodeCursor(cls, instance) -> str:
+        """Returns the cursor to the page following the given instance
+
+        Args:
+            instance (Model): The last instance of a page
+
+        Returns:
+            str: The cursor
+        """
+        # isoformat keeps microseconds, for exact keyset comparisons
+        return urlsafe_b64encode(json_dumps(cls._keyValues(instance), default=lambda v: v.isoformat() if hasattr(v, 'isoformat') else str(v)).encode()).decode()
+
+    @classmethod
+    def decodeCursor(cls, cursor: str) -> list:
+        """Returns the keyset values encoded in a cursor
+
+        Args:
+            cursor (str): The cursor
+
+        Raises:
+            InvalidCursor: If the cursor is malformed
+
+        Returns:
+            list: The keyset values
+        """
+        try:
+            values = json_loads(urlsafe_b64decode(cursor.encode()).decode())
+            if len(values) != len(cls.keyset):
+                raise ValueError(values)
+            return list(map(lambda kv: cls.model._meta.get_field(kv[0].lstrip('-')).to_python(kv[1]), zip(cls.keyset, values)))
+        except Exception as e:
+            raise InvalidCursor(cursor, e)
+
+    @classmethod
+    def _after(cls, values: list) -> Q:
+        after = Q()
+        for i, key in enumerate(cls.keyset):
+            name = key.lstrip('-')
+            step = Q(**{f"{name}__{'lt' if key.startswith('-') else 'gt'}": values[i]})
+            for prev in range(i):
+                step &= Q(**{cls.keyset[prev].lstrip('-'): values[prev]})
+            after |= step
+        return after
+
+    @classmethod
+    def page(cls, queryset=None, cursor: str = None, size: int = API_PAGE_SIZE, offset: int = 0, context: dict = dict()) -> tuple:
+        """Serializes one page of the queryset in keyset order.
+
+        Args:
+            queryset (QuerySet, optional): The unplanned queryset. Defaults to all instances of model.
+            cursor (str, optional): The cursor returned with the previous page. Defaults to None, the first page.
+            size (int, optional): Instances per page, at most API_PAGE_MAX. Defaults to API_PAGE_SIZE.
+            offset (int, optional): Instances to skip, only without cursor, for legacy page numbers. Defaults to 0.
+            context (dict, optional): Request specific values for batch lookups. Defaults to dict().
+
+        Raises:
+            InvalidCursor: If the cursor is malformed
+
+        Returns:
+            tuple<list<dict>, str>: The serialized instances, and the cursor of the next page (None if this is the last)
+        """
+        size = max(1, min(int(size), API_PAGE_MAX))
+        queryset = cls.plan(queryset).order_by(*cls.keyset)
+        if cursor:
+            queryset = queryset.filter(cls._after(cls.decodeCursor(cursor)))
+        else:
+            queryset = queryset[max(0, int(offset)):]
+        instances = list(queryset[:size+1])
+        nextCursor = cls.encodeCursor(
+            instances[size-1]) if len(instances) > size else None
+        return cls.serialize(instances[:size], context), nextCursor
+
+
+def _managerProfileIDs(profiles: list, context: dict) -> dict:
+    managers = set(Management.objects.filter(profile__in=list(map(
+        lambda p: p.pk, profiles))).values_list('profile_id', flat=True))
+    return dict(map(lambda p: (p.pk, p.pk in managers), profiles))
+
+
+class ProfileSerializer(Serializer):
+    """Serializes profiles as people.models.Profile.get_dict does"""
+    model = Profile
+    fields = dict(
+        id=Field(lambda p: p.get_userid, select=('user',)),
+        name=Field(lambda p: p.get_name, select=('user',)),
+        is_moderator=Field(lambda p: p.is_moderator),
+        is_mentor=Field(lambda p: p.is_mentor),
+        is_verified=Field(lambda p: p.is_verified),
+        is_manager=Field(lambda p, is_manager: is_manager,
+                         batch=_managerProfileIDs),
+        nickname=Field(lambda p: p.nickname),
+        picture=Field(lambda p: p.get_abs_dp),
+        profile=Field(lambda p: p.get_abs_link),
+    )
+    keyset = ('-createdOn', '-id')
+    queryBudget = 2
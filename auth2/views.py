@@ -209,7 +209,7 @@ def accountActivation(request: WSGIRequest) -> JsonResponse:
         if not done:
             return respondJson(Code.NO)
         else:
-            Profile.objects.get(user=request.user).clearCache()
+            Profile.objects.get(user=request.user).invalidateCache('is_active')
         if is_active:
             accountReactiveAlert(request.user.profile)
         else:
@@ -1,15 +1,22 @@
+from hashlib import sha1
 from os import path as os_path
+from os import remove as os_remove
 from uuid import UUID, uuid4
 
 from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.handlers.wsgi import WSGIRequest
+from django.db.models import Q
 from django.http.response import HttpResponse
 from django.utils import timezone
-from main.env import ISTESTING, SITE
-from main.methods import errorLog, renderString, renderView
-from main.strings import Compete, Message, url
+from django.utils.translation import get_language
+from main.env import ASYNC_CLUSTER, ISTESTING, SITE
+from main.exceptions import IllegalMarking
+from main.methods import (addMethodToAsyncQueue, errorLog, renderString,
+                          renderView)
+from main.search import SearchDoc, rankedByHits, searchIndex
+from main.strings import Code, Compete, Message, url
 from people.models import Profile, User
 from PIL import Image, ImageDraw, ImageFont
 from qrcode import make
@@ -221,9 +228,41 @@ def getCompetitionSectionHTML(competition: Competition, section: str, request: W
     return rendererstr(request, f'profile/{section}', data)
 
 
-def generateCertificate(certname: str, certID: str, userdisplayname: str, compname: str, abouttext: str, associate: str = None, template: str = 'certificate') -> str:
+_CERT_FONTS = dict()
+"""Fonts for rendering certificates, loaded once per process"""
+
+
+def _certificateFonts() -> dict:
+    fonts = _CERT_FONTS.get('fonts', None)
+    if not fonts:
+        font_dir = os_path.join(settings.BASE_DIR, 'templates/poppins-500.ttf')
+        body_font_dir = os_path.join(
+            settings.BASE_DIR, 'templates/questrial-400.ttf')
+        fonts = dict(
+            name=ImageFont.truetype(font_dir, 225),
+            comp=ImageFont.truetype(font_dir, 175),
+            about=ImageFont.truetype(font_dir, 88),
+            id=ImageFont.truetype(body_font_dir, 58),
+        )
+        _CERT_FONTS['fonts'] = fonts
+    return fonts
+
+
+def _certificateImage(assets: dict, key: str, path: str, size: tuple = None) -> Image.Image:
+    image = assets.get(key, None)
+    if not image:
+        image = Image.open(path)
+        image.load()
+        if size:
+            image = image.resize(size, Image.ANTIALIAS)
+        assets[key] = image
+    return image
+
+
+def generateCertificate(certname: str, certID: str, userdisplayname: str, compname: str, abouttext: str, associate: str = None, template: str = 'certificate', assets: dict = None) -> str:
     """
     Generates a certificate for the given user.
+    Fonts are loaded once per process, the template and associate images once per assets (see renderCertificateChunk).
     NOTE: This method depends on dimensions of the template images. If they're changed, then the coordinates utilized in this method
         will also require modifications accordingly.
 
@@ -235,26 +274,19 @@ def generateCertificate(certname: str, certID: str, userdisplayname: str, compna
         abouttext (str): The sub-text to be displayed in the certificate. Can be the date of the competition.
         associate (ImageFile, optional): The associate image file instance. Defaults to None.
         template (str, optional): The certificate template name. Defaults to 'certificate'. Expects the file at templates/<template>.jpg
+        assets (dict, optional): The images loaded for certificates rendered together, to be released with them. Defaults to None, i.e. loaded for this certificate only.
 
     Returns:
         str: Path of generated certificate, pdf. (similar for jpg format)
     """
+    if assets is None:
+        assets = dict()
     imagex = 5100
     imagey = 3300
-    font_dir = 'templates/poppins-500.ttf'
-    body_font_dir = 'templates/questrial-400.ttf'
-    cert_dir = f'templates/{template}.jpg'
-    name_font = ImageFont.truetype(
-        os_path.join(settings.BASE_DIR, font_dir), 225)
-    comp_font = ImageFont.truetype(
-        os_path.join(settings.BASE_DIR, font_dir), 175)
-    about_font = ImageFont.truetype(
-        os_path.join(settings.BASE_DIR, font_dir), 88)
-    id_font = ImageFont.truetype(os_path.join(
-        settings.BASE_DIR, body_font_dir), 58)
-    namexy = (imagex-name_font.getsize(userdisplayname)[0]-240, 688)
-    compxy = (imagex-comp_font.getsize(compname)[0]-240, 1284)
-    aboutxy = (imagex-about_font.getsize(abouttext)[0]-240, 1610)
+    fonts = _certificateFonts()
+    namexy = (imagex-fonts['name'].getsize(userdisplayname)[0]-240, 688)
+    compxy = (imagex-fonts['comp'].getsize(compname)[0]-240, 1284)
+    aboutxy = (imagex-fonts['about'].getsize(abouttext)[0]-240, 1610)
     idxy = (44, 3188)
     qrxy = (44, 44)
     certpath = f"{APPNAME}/certificates/{certname}.pdf"
@@ -263,29 +295,45 @@ def generateCertificate(certname: str, certID: str, userdisplayname: str, compna
         f"{SITE}{url.getRoot(APPNAME)}{url.compete.CERT_VERIFY}?id={certID}")
     qrimage = qrimage.resize((694, 694), Image.ANTIALIAS)
     if not ISTESTING:
-        certimage = Image.open(os_path.join(settings.BASE_DIR, cert_dir))
+        certimage = _certificateImage(assets, f"template_{template}", os_path.join(
+            settings.BASE_DIR, f'templates/{template}.jpg')).copy()
         image_editable = ImageDraw.Draw(certimage)
         image_editable.text(xy=namexy, text=userdisplayname, fill=(
-            0, 0, 0), font=name_font, align='right')
+            0, 0, 0), font=fonts['name'], align='right')
         image_editable.text(xy=compxy, text=compname, fill=(
-            0, 0, 0), font=comp_font, align='right')
+            0, 0, 0), font=fonts['comp'], align='right')
         image_editable.text(xy=aboutxy, text=abouttext, fill=(
-            0, 0, 0), font=about_font, align='right')
+            0, 0, 0), font=fonts['about'], align='right')
         image_editable.text(xy=idxy, text=str(
-            certID).upper(), fill=(0, 0, 0), font=id_font)
+            certID).upper(), fill=(0, 0, 0), font=fonts['id'])
         certimage.paste(qrimage, qrxy)
         if associate:
             assxy = (2425, 2825)
-            assimage = Image.open(os_path.join(
-                settings.MEDIA_ROOT, str(associate)))
-            assimage = assimage.resize((1482, 450), Image.ANTIALIAS)
-            certimage.paste(assimage, assxy)
+            certimage.paste(_certificateImage(assets, f"associate_{associate}", os_path.join(
+                settings.MEDIA_ROOT, str(associate)), (1482, 450)), assxy)
         certimage.save(os_path.join(
             settings.MEDIA_ROOT, certpath), save_all=True)
         certimage.save(os_path.join(settings.MEDIA_ROOT, certpathimg))
     return certpath
 
 
+def renderCertificateJob(job: dict, assets: dict = None) -> str:
+    """Renders one certificate job (keyword arguments of generateCertificate).
+
+    Args:
+        job (dict): The keyword arguments of generateCertificate
+        assets (dict, optional): The images loaded for certificates rendered together (see generateCertificate). Defaults to None.
+
+    Returns:
+        str, bool: Path of generated certificate, pdf, if successful. False otherwise.
+    """
+    try:
+        return generateCertificate(**job, assets=assets)
+    except Exception as e:
+        errorLog(e)
+        return False
+
+
 def prepareNameForCertificate(name: str, fname: str, lname: str) -> str:
     """
     Prepares the display name of user for certificate. (Long names are shortened to initials, and are capitalized)
@@ -317,6 +365,240 @@ def prepareNameForCertificate(name: str, fname: str, lname: str) -> str:
     return name
 
 
+def _certificateCompTexts(competition: Competition) -> tuple:
+    comp = competition.title
+    if len(comp) > 39:
+        comp = comp[:(39-len(comp))]
+    about = f"from {competition.startAt.strftime('%B')} {competition.startAt.day}, {competition.startAt.year} to {competition.endAt.strftime('%B')} {competition.endAt.day}, {competition.endAt.year}"
+    return comp, about
+
+
+CERT_RENDER_REVISION = 1
+"""To be increased whenever generateCertificate renders differently, so that existing certificates get re-rendered on regeneration"""
+
+
+def certificateJob(profile: Profile, competition: Competition, certID: UUID, template: str = 'certificate') -> dict:
+    """Prepares the certificate job (keyword arguments of generateCertificate) of the given profile for the given competition.
+    The certificate file name is content addressed, i.e. the hash of the template and every text rendered on it,
+    so that a certificate needs to be rendered again only if any of those change.
+
+    Args:
+        profile (Profile): The profile instance of the certificate holder.
+        competition (Competition): The competition instance.
+        certID (UUID): The ID of the certificate.
+        template (str, optional): The certificate template name. Defaults to 'certificate' (participant).
+
+    Returns:
+        dict: The certificate job
+    """
+    comp, about = _certificateCompTexts(competition)
+    job = dict(
+        certID=certID,
+        userdisplayname=prepareNameForCertificate(
+            profile.getName(), profile.getFName(), profile.getLName()),
+        compname=comp,
+        abouttext=about,
+        associate=str(competition.associate) if competition.associate else None,
+        template=template
+    )
+    job['certname'] = sha1("\n".join(map(lambda k: str(job[k]), sorted(job.keys())) + [
+                           str(CERT_RENDER_REVISION)]).encode()).hexdigest()
+    return job
+
+
+def certificateRecordJob(cert: "ParticipantCertificate|AppreciationCertificate") -> dict:
+    """Prepares the certificate job of the given certificate record.
+
+    Args:
+        cert (ParticipantCertificate, AppreciationCertificate): The certificate record.
+
+    Returns:
+        dict: The certificate job (see certificateJob)
+    """
+    if isinstance(cert, ParticipantCertificate):
+        return certificateJob(cert.profile, cert.result.competition, cert.get_id, 'certificate')
+    template = 'certificate-judge' if cert.competition.isJudge(
+        cert.appreciatee) else 'certificate-mod'
+    return certificateJob(cert.appreciatee, cert.competition, cert.get_id, template)
+
+
+def certificateFileExists(certpath: str) -> bool:
+    """Checks if the given certificate path has been rendered.
+
+    Args:
+        certpath (str): The certificate path (pdf), relative to MEDIA_ROOT
+
+    Returns:
+        bool: True if rendered
+    """
+    return bool(certpath) and os_path.exists(os_path.join(settings.MEDIA_ROOT, str(certpath)))
+
+
+def removeCertificateFiles(certpath: str):
+    """Removes the rendered files (pdf and jpg) of the given certificate path, if any.
+
+    Args:
+        certpath (str): The certificate path (pdf), relative to MEDIA_ROOT
+    """
+    if not certpath:
+        return
+    for path in (str(certpath), str(certpath).replace('.pdf', '.jpg')):
+        try:
+            os_remove(os_path.join(settings.MEDIA_ROOT, path))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            errorLog(e)
+
+
+def ensureCertificate(cert: "ParticipantCertificate|AppreciationCertificate", refresh: bool = False, assets: dict = None) -> str:
+    """Renders the certificate of the given record if it has not been rendered yet,
+    or if its content changed since it was rendered (with refresh). The files of the superseded certificate are removed.
+    Renders synchronously, so to be called from queued tasks (see queueCertificate) or commands only, never from views
+    (unless there is no queue cluster to render it, as before lazy rendering).
+
+    Args:
+        cert (ParticipantCertificate, AppreciationCertificate): The certificate record.
+        refresh (bool, optional): Whether to check for changes in content of an already rendered certificate. Defaults to False.
+        assets (dict, optional): The images loaded for certificates rendered together (see generateCertificate). Defaults to None.
+
+    Returns:
+        str, bool: Path of the certificate, pdf, if rendered. False otherwise.
+    """
+    try:
+        if not refresh and certificateFileExists(cert.certificate):
+            return cert.certificate
+        job = certificateRecordJob(cert)
+        certpath = f"{APPNAME}/certificates/{job['certname']}.pdf"
+        if not certificateFileExists(certpath):
+            certpath = renderCertificateJob(job, assets)
+            if not certpath:
+                return False
+        if cert.certificate != certpath:
+            previous = cert.certificate
+            cert.certificate = certpath
+            type(cert).objects.filter(id=cert.id).update(certificate=certpath)
+            removeCertificateFiles(previous)
+        return certpath
+    except Exception as e:
+        errorLog(e)
+        return False
+
+
+def certificateRenderLockKey(certID: UUID) -> str:
+    """Returns the cache key locking the rendering of a certificate, held from its queueing until it is rendered.
+
+    Args:
+        certID (UUID): The ID of the certificate record.
+
+    Returns:
+        str: The cache key
+    """
+    return f"{APPNAME}_certificate_render_{certID}"
+
+
+def queueCertificate(cert: "ParticipantCertificate|AppreciationCertificate") -> str:
+    """Returns the path of the certificate of the given record if it has been rendered, otherwise queues its rendering
+    (lazy rendering on first request), once at a time per certificate, under a cache lock (see certificateRenderLockKey).
+    Without a queue cluster, renders it right away instead.
+
+    Args:
+        cert (ParticipantCertificate, AppreciationCertificate): The certificate record.
+
+    Returns:
+        str, bool: Path of the certificate, pdf, if rendered. False if it is yet to be rendered.
+    """
+    if certificateFileExists(cert.certificate):
+        return cert.certificate
+    lockKey = certificateRenderLockKey(cert.id)
+    if cache.add(lockKey, True, settings.CACHE_MIN):
+        if not ASYNC_CLUSTER:
+            try:
+                return ensureCertificate(cert)
+            finally:
+                cache.delete(lockKey)
+        if not addMethodToAsyncQueue(f"{APPNAME}.methods.{renderQueuedCertificate.__name__}", cert.id, isinstance(cert, AppreciationCertificate)):
+            cache.delete(lockKey)
+    return False
+
+
+def renderQueuedCertificate(certID: UUID, appreciation: bool = False) -> bool:
+    """Renders the certificate of the given record, as queued by queueCertificate, and releases its render lock.
+
+    Args:
+        certID (UUID): The ID of the certificate record.
+        appreciation (bool, optional): Whether the record is an AppreciationCertificate, else a ParticipantCertificate. Defaults to False.
+
+    Returns:
+        bool: True if the certificate is rendered
+    """
+    try:
+        model = AppreciationCertificate if appreciation else ParticipantCertificate
+        cert = model.objects.filter(id=certID).first()
+        return bool(cert and ensureCertificate(cert))
+    finally:
+        cache.delete(certificateRenderLockKey(certID))
+
+
+def queueCertificateChunks(certs: list, refresh: bool = False) -> int:
+    """Queues the rendering of the given certificate records as one task per settings.CERT_RENDER_CHUNK records of a kind
+    (see renderCertificateChunk), so that the queue cluster workers render them in parallel. Without a queue cluster,
+    renders the chunks right away instead.
+
+    Args:
+        certs (list<ParticipantCertificate, AppreciationCertificate>): The certificate records.
+        refresh (bool, optional): Whether to render again the already rendered certificates whose content changed (see ensureCertificate). Defaults to False.
+
+    Returns:
+        int: The number of rendering tasks queued (or chunks rendered)
+    """
+    queued = 0
+    for appreciation in (True, False):
+        certIDs = list(map(lambda cert: cert.id, filter(lambda cert: isinstance(
+            cert, AppreciationCertificate) == appreciation, certs)))
+        for i in range(0, len(certIDs), settings.CERT_RENDER_CHUNK):
+            chunk = certIDs[i:i+settings.CERT_RENDER_CHUNK]
+            if not ASYNC_CLUSTER:
+                renderCertificateChunk(chunk, appreciation, refresh)
+                queued += 1
+            elif addMethodToAsyncQueue(f"{APPNAME}.methods.{renderCertificateChunk.__name__}", chunk, appreciation, refresh):
+                queued += 1
+    return queued
+
+
+def renderCertificateChunk(certIDs: list, appreciation: bool = False, refresh: bool = False) -> int:
+    """Renders the certificates of the given records, as queued by queueCertificateChunks.
+    The template and associate images are shared by the certificates of the chunk only, and released with it.
+    Certificates being rendered by another task (see certificateRenderLockKey) are skipped.
+
+    Args:
+        certIDs (list<UUID>): The IDs of the certificate records.
+        appreciation (bool, optional): Whether the records are AppreciationCertificates, else ParticipantCertificates. Defaults to False.
+        refresh (bool, optional): Whether to render again the already rendered certificates whose content changed (see ensureCertificate). Defaults to False.
+
+    Returns:
+        int: The number of certificates rendered
+    """
+    if appreciation:
+        certs = AppreciationCertificate.objects.filter(
+            id__in=certIDs).select_related('competition', 'appreciatee__user')
+    else:
+        certs = ParticipantCertificate.objects.filter(
+            id__in=certIDs).select_related('result__competition', 'profile__user')
+    assets = dict()
+    rendered = 0
+    for cert in certs:
+        lockKey = certificateRenderLockKey(cert.id)
+        if not cache.add(lockKey, True, settings.CACHE_MIN):
+            continue
+        try:
+            if ensureCertificate(cert, refresh, assets):
+                rendered += 1
+        finally:
+            cache.delete(lockKey)
+    return rendered
+
+
 def generateParticipantCertificate(profile: Profile, result: Result, certID: UUID) -> str:
     """
     Generates a certificate for the given participant.
@@ -330,22 +612,7 @@ def generateParticipantCertificate(profile: Profile, result: Result, certID: UUI
         str, bool: Path of generated certificate, pdf. (similar for jpg format), if successful. False otherwise.
     """
     try:
-        name = prepareNameForCertificate(
-            profile.getName(), profile.getFName(), profile.getLName())
-
-        comp = result.competition.title
-        if len(comp) > 39:
-            comp = comp[:(39-len(comp))]
-        about = f"from {result.competition.startAt.strftime('%B')} {result.competition.startAt.day}, {result.competition.startAt.year} to {result.competition.endAt.strftime('%B')} {result.competition.endAt.day}, {result.competition.endAt.year}"
-        return generateCertificate(
-            certname=f"{result.competition.getID()}-{profile.getUserID()}",
-            certID=certID,
-            userdisplayname=name,
-            compname=comp,
-            abouttext=about,
-            associate=result.competition.associate,
-            template='certificate'
-        )
+        return generateCertificate(**certificateJob(profile, result.competition, certID, 'certificate'))
     except Exception as e:
         errorLog(e)
         return False
@@ -364,21 +631,7 @@ def generateJudgeCertificate(judge: Profile, competition: Competition, certID: U
         str, bool: Path of generated certificate, pdf. (similar for jpg format), if successful. False otherwise.
     """
     try:
-        name = prepareNameForCertificate(
-            judge.getName(), judge.getFName(), judge.getLName())
-        comp = competition.title
-        if len(comp) > 39:
-            comp = comp[:(39-len(comp))]
-        about = f"from {competition.startAt.strftime('%B')} {competition.startAt.day}, {competition.startAt.year} to {competition.endAt.strftime('%B')} {competition.endAt.day}, {competition.endAt.year}"
-        return generateCertificate(
-            certname=f"{competition.getID()}-{judge.getUserID()}",
-            certID=certID,
-            userdisplayname=name,
-            compname=comp,
-            abouttext=about,
-            associate=competition.associate,
-            template='certificate-judge'
-        )
+        return generateCertificate(**certificateJob(judge, competition, certID, 'certificate-judge'))
     except Exception as e:
         errorLog(e)
         return False
@@ -395,28 +648,61 @@ def generateModCertificate(competition: Competition, certID: UUID) -> str:
         str, bool: Path of generated certificate, pdf. (similar for jpg format), if successful. False otherwise.
     """
     try:
-        mod = competition.moderator()
-        name = prepareNameForCertificate(
-            mod.getName(), mod.getFName(), mod.getLName())
-
-        comp = competition.title
-        if len(comp) > 39:
-            comp = comp[:(39-len(comp))]
-        about = f"from {competition.startAt.strftime('%B')} {competition.startAt.day}, {competition.startAt.year} to {competition.endAt.strftime('%B')} {competition.endAt.day}, {competition.endAt.year}"
-        return generateCertificate(
-            certname=f"{competition.getID()}-{mod.getUserID()}",
-            certID=certID,
-            userdisplayname=name,
-            compname=comp,
-            abouttext=about,
-            associate=competition.associate,
-            template='certificate-mod'
-        )
+        return generateCertificate(**certificateJob(competition.moderator(), competition, certID, 'certificate-mod'))
     except Exception as e:
         errorLog(e)
         return False
 
 
+def _markingID(value) -> UUID:
+    return value if isinstance(value, UUID) else UUID(str(value).strip())
+
+
+def validateJudgeMarkings(markings: list, submissionIDs: set, topicIDs: set, maxPoint: int = None) -> dict:
+    """Validates the score matrix submitted by a judge in a single pass, against indexes of valid submissions and topics.
+
+    Args:
+        markings (list<dict>): Submission dicts, each with subID and topics (list of dicts with topicID and points).
+        submissionIDs (set<UUID>): IDs of the valid submissions of the competition.
+        topicIDs (set<UUID>): IDs of the topics of the competition.
+        maxPoint (int, optional): The maximum points allowed for each topic. Defaults to None, i.e. unbounded.
+
+    Raises:
+        IllegalMarking: With the error message, submission id and topic id of the first illegal marking.
+
+    Returns:
+        dict<tuple<UUID, UUID>, int>: Points by (submission id, topic id).
+    """
+    points = dict()
+    if not isinstance(markings, list):
+        raise IllegalMarking(Message.SUBMISSION_MARKING_INVALID, None, None)
+    for marking in markings:
+        try:
+            rawSubID, topics = marking['subID'], marking['topics']
+            subID = _markingID(rawSubID)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise IllegalMarking(Message.SUBMISSION_MARKING_INVALID, None, None)
+        if subID not in submissionIDs:
+            raise IllegalMarking(Message.SUBMISSION_MARKING_UNKNOWN, str(rawSubID), None)
+        if not isinstance(topics, list):
+            raise IllegalMarking(Message.SUBMISSION_MARKING_INVALID, str(subID), None)
+        for topic in topics:
+            try:
+                rawTopicID = topic['topicID']
+                topicID = _markingID(rawTopicID)
+                point = int(topic['points'])
+            except (KeyError, TypeError, ValueError, AttributeError):
+                raise IllegalMarking(Message.SUBMISSION_MARKING_INVALID, str(subID), None)
+            if topicID not in topicIDs:
+                raise IllegalMarking(Message.SUBMISSION_MARKING_TOPIC, str(subID), str(rawTopicID))
+            if point < 0 or (maxPoint and point > maxPoint):
+                raise IllegalMarking(Message.SUBMISSION_MARKING_POINTS, str(subID), str(topicID))
+            if (subID, topicID) in points:
+                raise IllegalMarking(Message.SUBMISSION_MARKING_DUPLICATE, str(subID), str(topicID))
+            points[(subID, topicID)] = point
+    return points
+
+
 def DeclareResults(competition: Competition) -> str:
     """Declairs the results of the competition, adds results alerts email task to the queue.
 
@@ -438,6 +724,8 @@ def DeclareResults(competition: Competition) -> str:
 
 def AllotCompetitionCertificates(results: list, competition: Competition) -> bool:
     """Allots certificates to the participants of the competition and also to the judges and moderator.
+    Certificates already rendered with the same content are reused. With settings.CERT_LAZY_RENDER, each of the rest is queued for rendering
+    on its first request (see queueCertificate), otherwise all of them are queued for rendering in chunks (see queueCertificateChunks).
 
     Args:
         results (list): List of results instances of the competition.
@@ -448,62 +736,39 @@ def AllotCompetitionCertificates(results: list, competition: Competition) -> boo
     """
     try:
         taskKey = competition.CACHE_KEYS.certificates_allotment_task
-        cache.set(taskKey,
-                  Message.CERTS_GENERATING, settings.CACHE_ETERNAL)
         appreciateeCerts = []
+        participantCerts = []
+        jobs = []
+        moderator = competition.moderator()
         id = uuid4()
-        certificate = generateModCertificate(competition, id.hex)
-        if not certificate:
-            cache.delete(taskKey)
-            raise Exception(f"Couldn't generate certificate (mod)!",
-                            competition.moderator(), competition)
-        appreciateeCerts.append(
-            AppreciationCertificate(
-                id=id,
-                competition=competition,
-                appreciatee=competition.moderator(),
-                certificate=certificate
-            )
-        )
+        jobs.append(certificateJob(moderator, competition,
+                    id.hex, 'certificate-mod'))
+        appreciateeCerts.append(AppreciationCertificate(
+            id=id, competition=competition, appreciatee=moderator))
         for judge in competition.getJudges():
             id = uuid4()
-            certificate = generateJudgeCertificate(judge, competition, id.hex)
-            if not certificate:
-                cache.delete(
-                    taskKey)
-                raise Exception(
-                    f"Couldn't generate certificate (judge)!", judge, competition)
-            appreciateeCerts.append(
-                AppreciationCertificate(
-                    id=id,
-                    competition=competition,
-                    appreciatee=judge,
-                    certificate=certificate
-                )
-            )
+            jobs.append(certificateJob(judge, competition,
+                        id.hex, 'certificate-judge'))
+            appreciateeCerts.append(AppreciationCertificate(
+                id=id, competition=competition, appreciatee=judge))
+        results = dict(map(lambda result: (result.submission_id, result), results))
+        for participant in SubmissionParticipant.objects.filter(submission__id__in=list(results.keys()), confirmed=True).select_related('profile__user'):
+            id = uuid4()
+            jobs.append(certificateJob(participant.profile,
+                        competition, id.hex, 'certificate'))
+            participantCerts.append(ParticipantCertificate(
+                id=id, result=results[participant.submission_id], profile=participant.profile))
+
+        for cert, job in zip(appreciateeCerts + participantCerts, jobs):
+            certpath = f"{APPNAME}/certificates/{job['certname']}.pdf"
+            cert.certificate = certpath if certificateFileExists(certpath) else ''
         AppreciationCertificate.objects.bulk_create(
             appreciateeCerts, ignore_conflicts=True)
-        participantCerts = []
-        for result in results:
-            for member in result.getMembers():
-                id = uuid4()
-                certificate = generateParticipantCertificate(
-                    member, result, id.hex)
-                if not certificate:
-                    cache.delete(
-                        taskKey)
-                    raise Exception(
-                        f"Couldn't generate certificate (participant)!", member, competition)
-                participantCerts.append(
-                    ParticipantCertificate(
-                        id=id,
-                        result=result,
-                        profile=member,
-                        certificate=certificate
-                    )
-                )
         ParticipantCertificate.objects.bulk_create(
             participantCerts, batch_size=100, ignore_conflicts=True)
+        if not settings.CERT_LAZY_RENDER:
+            queueCertificateChunks(list(filter(lambda cert: not cert.certificate,
+                                   appreciateeCerts + participantCerts)))
         cache.set(taskKey,
                   Message.CERTS_GENERATED, settings.CACHE_ETERNAL)
         certsAllotedAlert(competition)
@@ -512,3 +777,88 @@ def AllotCompetitionCertificates(results: list, competition: Competition) -> boo
         errorLog(e)
         cache.delete(taskKey)
         return False
+
+
+def searchCompetitions(query: str, profileID: UUID = None, limit: int = 10) -> list:
+    """Returns the competitions matching the search query, ranked by the search index if available, else by a database query,
+    cached for the active language. Special parts of the query (topic:, manager:, judge:, status:) filter by the respective attributes.
+
+    Args:
+        query (str): The search query
+        profileID (UUID, optional): The id of the searching profile, if any. Defaults to None.
+        limit (int, optional): The maximum number of results. Defaults to 10.
+
+    Returns:
+        list<Competition>: The matching competitions
+    """
+    cachekey = f"compete_browse_search_{query}{get_language()}{profileID or ''}"
+    competitions = cache.get(cachekey, [])
+
+    if not len(competitions):
+        specials = ('topic:', 'manager:', 'judge:', 'status:')
+        pquery = None
+        hits = None
+        dbquery = Q()
+        invalidQuery = False
+        if query.startswith(specials):
+            def specquerieslist(q):
+                return [Q(topics__name__iexact=q), Q(creator__user__first_name__istartswith=q), Q(judges__user__first_name__istartswith=q, resultDeclared=True), Q()]
+            commaparts = query.split(",")
+            for cpart in commaparts:
+                if cpart.strip().lower().startswith(specials):
+                    special, specialq = cpart.split(':')
+                    if special.strip().lower() == 'status':
+                        status = specialq.strip().lower()
+
+                        if status == Code.ACTIVE:
+                            dbquery = Q(
+                                dbquery, startAt__lte=timezone.now(), endAt__gte=timezone.now())
+                        if status == Code.HISTORY:
+                            dbquery = Q(dbquery, endAt__lt=timezone.now())
+                        if status == Code.UPCOMING:
+                            dbquery = Q(
+                                dbquery, startAt__gt=timezone.now())
+                        if status not in [Code.ACTIVE, Code.HISTORY, Code.UPCOMING]:
+                            invalidQuery = True
+                            break
+                    else:
+                        dbquery = Q(dbquery, specquerieslist(specialq.strip())[
+                                    list(specials).index(f"{special.strip()}:")])
+                else:
+                    pquery = cpart.strip()
+                    break
+        else:
+            pquery = query
+
+        if pquery and not invalidQuery:
+            hits = searchIndex(pquery)
+        if hits is not None:
+            dbquery = Q(dbquery, id__in=hits[SearchDoc.COMPETITION])
+        elif pquery and not invalidQuery:
+            dbquery = Q(dbquery, Q(
+                Q(title__istartswith=pquery)
+                | Q(tagline__istartswith=pquery)
+                | Q(nickname__istartswith=pquery)
+                | Q(shortdescription__istartswith=pquery)
+                | Q(topics__name__istartswith=pquery)
+                | Q(title__icontains=pquery)
+                | Q(nickname__icontains=pquery)
+                | Q(tagline__icontains=pquery)
+                | Q(shortdescription__icontains=pquery)
+                | Q(creator__user__first_name__istartswith=pquery)
+                | Q(creator__user__last_name__istartswith=pquery)
+                | Q(creator__user__email__istartswith=pquery)
+                | Q(creator__nickname__istartswith=pquery)
+                | Q(qualifier__title__istartswith=pquery)
+                | Q(qualifier__tagline__istartswith=pquery)
+                | Q(qualifier__topics__name__istartswith=pquery)
+            ))
+
+        if not invalidQuery:
+            competitions = Competition.objects.filter(dbquery).exclude(
+                hidden=True).exclude(is_draft=True).distinct()
+            competitions = competitions[:limit] if hits is None else rankedByHits(
+                competitions, hits[SearchDoc.COMPETITION], limit)
+            if len(competitions):
+                cache.set(cachekey, competitions, settings.CACHE_SHORT)
+    return competitions
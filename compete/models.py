@@ -6,10 +6,10 @@ from django.conf import settings
 from django.core.cache import cache
 from django.core.files.base import File
 from djongo import models
-from django.db.models import Sum
+from django.db.models import Count, Sum
 from django.utils import timezone
 from main.env import SITE
-from main.methods import errorLog, filterNickname, getNumberSuffix
+from main.methods import compareAndSet, errorLog, filterNickname, getNumberSuffix
 from main.strings import MANAGEMENT, Message, url
 from management.models import Invitation
 from people.models import Profile, Topic
@@ -17,6 +17,7 @@ from projects.models import FreeProject
 from howto.models import Article
 
 from .apps import APPNAME
+from .ranking import TieBreak, rankSubmissions
 
 
 def competeBannerPath(instance: "Competition", rawFilename: str) -> str:
@@ -792,6 +793,63 @@ class Competition(models.Model):
         """
         return f"{url.getRoot(APPNAME)}{url.compete.submitPoints(compID=self.get_id)}"
 
+    def recountJudgingProgress(self) -> dict:
+        """Recounts the topic points marked by each judge for valid submissions of this competition, in one query,
+        and stores them in CompetitionJudge.markedPoints.
+
+        Returns:
+            dict<UUID, int>: The number of marked topic points by judge profile id
+        """
+        marked = dict(SubmissionTopicPoint.objects.filter(submission__competition=self, submission__valid=True).values(
+            'judge').annotate(total=Count('id')).values_list('judge', 'total'))
+        progress = dict()
+        for compjudge in CompetitionJudge.objects.filter(competition=self):
+            compjudge.markedPoints = marked.get(compjudge.judge_id, 0)
+            compjudge.save()
+            progress[compjudge.judge_id] = compjudge.markedPoints
+        return progress
+
+    def judgingProgress(self) -> dict:
+        """Get the number of topic points marked by each judge of this competition, from the maintained counters.
+        Counters not yet initialized (or reset, after marked points were deleted) are recounted once.
+
+        Returns:
+            dict<UUID, int>: The number of marked topic points by judge profile id
+        """
+        progress = dict(CompetitionJudge.objects.filter(
+            competition=self).values_list('judge', 'markedPoints'))
+        if None in progress.values():
+            return self.recountJudgingProgress()
+        return progress
+
+    def recordMarkedPoints(self, judge: Profile, count: int) -> bool:
+        """Increments the marked topic points counter of the given judge, to be called after the judge's points are created.
+
+        Args:
+            judge (Profile): The judge who marked the points.
+            count (int): The number of topic points created.
+
+        Returns:
+            bool: True if the counter was updated
+        """
+        try:
+            _, values = compareAndSet(CompetitionJudge.objects.filter(competition=self, judge=judge, markedPoints__isnull=False),
+                                      ['markedPoints'], lambda c: dict(markedPoints=c['markedPoints'] + count))
+            if values is None:
+                self.recountJudgingProgress()
+            return True
+        except Exception as e:
+            errorLog(e)
+            return False
+
+    def judgePointsToMark(self) -> int:
+        """Get the number of topic points each judge has to mark, i.e. for every topic of every valid submission.
+
+        Returns:
+            int: The number of topic points each judge has to mark.
+        """
+        return self.totalValidSubmissions()*self.totalTopics()
+
     def allSubmissionsMarkedByJudge(self, judge: Profile) -> bool:
         """Check if all submissions of this competition are marked by the given judge.
 
@@ -802,10 +860,8 @@ class Competition(models.Model):
             bool: Whether all submissions of this competition are marked by the given judge.
         """
         try:
-            subslist = self.getValidSubmissions()
-            judgeTopicPointsCount = SubmissionTopicPoint.objects.filter(
-                submission__in=subslist, judge=judge).count()
-            return (len(subslist) > 0) and judgeTopicPointsCount == (len(subslist)*self.totalTopics())
+            toMark = self.judgePointsToMark()
+            return toMark > 0 and self.judgingProgress().get(judge.id, 0) == toMark
         except Exception as e:
             errorLog(e)
             return False
@@ -817,22 +873,31 @@ class Competition(models.Model):
             bool: Whether all submissions of this competition are marked.
         """
         try:
-            subslist = self.getValidSubmissions()
-            topicPointsCount = SubmissionTopicPoint.objects.filter(
-                submission__competition=self,
-                submission__in=subslist).count()
-            return (len(subslist) > 0) and topicPointsCount == (len(subslist)*self.totalTopics()*self.totalJudges())
+            toMark = self.judgePointsToMark()
+            progress = self.judgingProgress()
+            return toMark > 0 and len(progress) > 0 and all(map(lambda marked: marked == toMark, progress.values()))
         except Exception as e:
             errorLog(e)
             return False
 
+    def judgeIDsWhoMarkedSubmissions(self) -> list:
+        """Get the list of profile ids of judges who marked submissions of this competition.
+
+        Returns:
+            list<UUID>: The list of profile ids of judges who marked submissions of this competition.
+        """
+        toMark = self.judgePointsToMark()
+        if not toMark:
+            return []
+        return [judgeID for judgeID, marked in self.judgingProgress().items() if marked == toMark]
+
     def judgesWhoMarkedSubmissions(self) -> list:
         """Get the list of judge profile instances who marked submissions of this competition.
 
         Returns:
             list<Profile>: The list of judge profile instances who marked submissions of this competition.
         """
-        return list(filter(lambda j: self.allSubmissionsMarkedByJudge(j), self.getJudges()))
+        return list(self.judges.filter(id__in=self.judgeIDsWhoMarkedSubmissions()))
 
     def judgesWhoNotMarkedSubmissions(self) -> list:
         """Get the list of judge profile instances who did not mark submissions of this competition.
@@ -840,7 +905,7 @@ class Competition(models.Model):
         Returns:
             list<Profile>: The list of judge profile instances who did not mark submissions of this competition.
         """
-        return list(filter(lambda j: not self.allSubmissionsMarkedByJudge(j), self.getJudges()))
+        return list(self.judges.exclude(id__in=self.judgeIDsWhoMarkedSubmissions()))
 
     def countJudgesWhoMarkedSubmissions(self) -> int:
         """Get the number of judges who marked submissions of this competition.
@@ -848,7 +913,7 @@ class Competition(models.Model):
         Returns:
             int: The number of judges who marked submissions of this competition.
         """
-        return len(self.judgesWhoMarkedSubmissions())
+        return len(self.judgeIDsWhoMarkedSubmissions())
 
     def countJudgesWhoNotMarkedSubmissions(self) -> int:
         """Get the number of judges who did not mark submissions of this competition.
@@ -856,7 +921,7 @@ class Competition(models.Model):
         Returns:
             int: The number of judges who did not mark submissions of this competition.
         """
-        return len(self.judgesWhoNotMarkedSubmissions())
+        return self.totalJudges() - self.countJudgesWhoMarkedSubmissions()
 
     def declareResultsLink(self) -> str:
         """Get the link to declare the results of this competition, to be used by the creator via POST.
@@ -866,11 +931,15 @@ class Competition(models.Model):
         """
         return f"{url.getRoot(APPNAME)}{url.compete.declareResults(compID=self.getID())}"
 
-    def declareResults(self) -> bool:
+    def declareResults(self, tiebreak: str = TieBreak.SUBMITTED) -> bool:
         """Declares results by aggregating each valid submission's topic point and calculates final score to create Result instance for each valid submission.
         Also sets resultDeclared = True
         Invoking this method should be considered as final step of a competition cycle.
 
+        Args:
+            tiebreak (str, optional): The tie break policy among submissions with equal points, an attribute of compete.ranking.TieBreak.
+                Defaults to TieBreak.SUBMITTED (earlier submission ranks higher).
+
         Returns:
             bool: Whether the results were declared successfully.
         """
@@ -881,33 +950,29 @@ class Competition(models.Model):
             if not self.allSubmissionsMarked():
                 raise Exception(
                     f"Cannot declare results of {self.title} unless all valid submissions have been marked.", self)
-            subs = self.getValidSubmissions()
-            submissionPoints = SubmissionTopicPoint.objects.filter(submission__in=subs).values('submission', 'submission__submitOn').annotate(
-                totalPoints=Sum('points')).order_by('-totalPoints', 'submission__submitOn')
+            subs = dict(map(lambda sub: (sub.id, sub), self.getValidSubmissions()))
+            ranking = rankSubmissions(
+                list(map(lambda sub: (sub.id, sub.submitOn), subs.values())),
+                SubmissionTopicPoint.objects.filter(submission__competition=self, submission__valid=True).values_list(
+                    'submission', 'topic', 'judge', 'points'),
+                tiebreak
+            )
+            topicnames = dict(self.getTopics().values_list('id', 'name'))
 
             resultsList = []
-
-            rank = 1
-            for submissionpoint in submissionPoints:
-                subm = None
-                for sub in subs:
-                    if str(sub.id) == str(submissionpoint['submission']):
-                        subm = sub
-                        break
-                if subm:
-                    resultsList.append(
-                        Result(
-                            competition=self,
-                            submission=subm,
-                            points=submissionpoint['totalPoints'],
-                            rank=rank
-                        )
-                    )
-                    rank = rank + 1
-                else:
-                    raise Exception(
-                        f"Results declaration: Submission not found (valid) but submission points found! subID: {submissionpoint['submission']}", submissionpoint, self)
+            topicscores = dict()
+            for entry in ranking:
+                result = Result(
+                    competition=self,
+                    submission=subs[entry['submission']],
+                    points=entry['points'],
+                    rank=entry['rank']
+                )
+                resultsList.append(result)
+                topicscores[f"submission_topic_score_result_{result.id}"] = list(map(lambda topic: dict(
+                    topic__id=topic[0], topic__name=topicnames.get(topic[0]), score=topic[1]), entry['topics'].items()))
             Result.objects.bulk_create(resultsList)
+            cache.set_many(topicscores, settings.CACHE_MAX)
             self.resultDeclared = True
             self.resultDeclaredOn = timezone.now()
             self.save()
@@ -964,6 +1029,17 @@ class Competition(models.Model):
         """
         return f"{url.getRoot(APPNAME)}{url.compete.generateCert(compID=self.getID())}"
 
+    def certificatesAllotmentStatus(self) -> dict:
+        """Get the status of the certificates allotment task of this competition, with its progress if generating.
+
+        Returns:
+            dict: status (str, None) main.strings.Message.CERTS_GENERATING or CERTS_GENERATED, done (int) and total (int) certificates rendered.
+        """
+        status = cache.get(self.CACHE_KEYS.certificates_allotment_task, None)
+        if isinstance(status, dict):
+            return status
+        return dict(status=status, done=0, total=0)
+
     def totalParticipantCertificates(self) -> int:
         """Get the total number of participant certificates of this competition.
 
@@ -1057,6 +1133,8 @@ class CompetitionJudge(models.Model):
     """competition (ForeignKey<Competition>): The competition of this relation."""
     judge: Profile = models.ForeignKey(Profile, on_delete=models.PROTECT)
     """judge (ForeignKey<Profile>): The judge of this relation."""
+    markedPoints: int = models.IntegerField(null=True, blank=True, default=None)
+    """markedPoints (IntegerField): The number of topic points marked by the judge for valid submissions, None until first counted."""
 
     class Meta:
         unique_together = ("competition", "judge")
@@ -1147,7 +1225,15 @@ class Submission(models.Model):
 
     def save(self, *args, **kwargs):
         self.modifiedOn = timezone.now()
-        return super(Submission, self).save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields', None)
+        revalidated = False
+        if not self._state.adding and (update_fields is None or 'valid' in update_fields):
+            revalidated = Submission.objects.filter(id=self.id).exclude(valid=self.valid).exists()
+        saved = super(Submission, self).save(*args, **kwargs)
+        if revalidated:
+            # the marked points of judges count valid submissions only
+            Competition(id=self.competition_id).recountJudgingProgress()
+        return saved
 
     def saveLink(self) -> str:
         """Get the link to save the submission, to be used by members via POST.
@@ -0,0 +1,81 @@
+"""
+Ranking engine for result declaration of competitions (Competition.declareResults).
+
+Submissions are ranked by their total points, summed over every topic point marked by every judge.
+As ranks are unique per competition, submissions tied on total points are ordered by a tie break policy.
+Totals, per topic breakdowns and tie break measures are all computed in a single pass over the point matrix.
+"""
+from datetime import datetime
+
+
+class TieBreak():
+    """Tie break policies among submissions with equal total points"""
+    SUBMITTED = "submitted"
+    """Earlier submission ranks higher"""
+    TOPIC_MAX = "topicmax"
+    """Higher best topic score ranks higher, then earlier submission"""
+    CONSENSUS = "consensus"
+    """Lower spread among the totals given by each judge ranks higher, then earlier submission"""
+
+    ALL = (SUBMITTED, TOPIC_MAX, CONSENSUS)
+
+
+def _submittedKey(submitOn: datetime) -> float:
+    return submitOn.timestamp() if submitOn else float('inf')
+
+
+def _spread(values: list) -> float:
+    if not values:
+        return 0
+    mean = sum(values)/len(values)
+    return sum(map(lambda v: (v - mean) ** 2, values))/len(values)
+
+
+def rankSubmissions(submissions: list, points: list, tiebreak: str = TieBreak.SUBMITTED) -> list:
+    """Ranks submissions by their total points.
+
+    Args:
+        submissions (list<tuple<UUID, datetime>>): (submission id, submitOn) of every valid submission
+        points (list<tuple<UUID, UUID, UUID, int>>): (submission id, topic id, judge id, points) of every marked topic point
+        tiebreak (str, optional): An attribute of TieBreak. Defaults to TieBreak.SUBMITTED.
+
+    Raises:
+        ValueError: If the tiebreak policy is invalid, or a point belongs to none of the submissions.
+
+    Returns:
+        list<dict>: Ranked entries in order, each with submission (UUID), points (int), rank (int),
+            topics (dict<UUID, int> points by topic id), and tied (bool, whether other submissions had equal points)
+    """
+    if tiebreak not in TieBreak.ALL:
+        raise ValueError(f"Invalid tie break policy: {tiebreak}")
+    entries = dict(map(lambda sub: (sub[0], dict(
+        submission=sub[0], submitOn=sub[1], points=0, topics=dict(), judges=dict())), submissions))
+    for subID, topicID, judgeID, point in points:
+        entry = entries.get(subID, None)
+        if entry is None:
+            raise ValueError(
+                f"Topic point of a submission not among valid submissions: {subID}")
+        entry['points'] += point
+        entry['topics'][topicID] = entry['topics'].get(topicID, 0) + point
+        entry['judges'][judgeID] = entry['judges'].get(judgeID, 0) + point
+
+    def sortKey(entry):
+        if tiebreak == TieBreak.TOPIC_MAX:
+            measure = -max(entry['topics'].values(), default=0)
+        elif tiebreak == TieBreak.CONSENSUS:
+            measure = _spread(list(entry['judges'].values()))
+        else:
+            measure = 0
+        return (-entry['points'], measure, _submittedKey(entry['submitOn']))
+
+    ranked = sorted(entries.values(), key=sortKey)
+    totals = dict()
+    for entry in ranked:
+        totals[entry['points']] = totals.get(entry['points'], 0) + 1
+    return [dict(
+        submission=entry['submission'],
+        points=entry['points'],
+        rank=rank,
+        topics=entry['topics'],
+        tied=totals[entry['points']] > 1,
+    ) for rank, entry in enumerate(ranked, start=1)]
@@ -2,10 +2,14 @@ from os import path as os_path
 from os import remove as os_remove
 
 from django.conf import settings
-from django.db.models.signals import post_delete
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
+from main.search import (SearchDoc, queueIndexDocument, queueIndexRelation,
+                         queueRemoveDocument)
 
-from .models import AppreciationCertificate, ParticipantCertificate
+from .models import (AppreciationCertificate, Competition, CompetitionJudge,
+                     CompetitionTopic, ParticipantCertificate, Submission,
+                     SubmissionTopicPoint)
 
 
 @receiver(post_delete, sender=ParticipantCertificate)
@@ -34,3 +38,44 @@ def on_appcert_delete(sender, instance: AppreciationCertificate, **kwargs):
                       instance.certficateImage))
     except:
         pass
+
+
+@receiver(post_save, sender=Competition)
+def on_competition_index(sender, instance: Competition, **kwargs):
+    """To update the search index on competition save
+    """
+    queueIndexDocument(SearchDoc.COMPETITION, instance.id)
+
+
+@receiver(post_save, sender=CompetitionTopic)
+@receiver(post_delete, sender=CompetitionTopic)
+def on_competition_topic_index(sender, instance: CompetitionTopic, **kwargs):
+    """To update the search index on competition topic addition or removal
+    """
+    queueIndexDocument(SearchDoc.COMPETITION, instance.competition_id)
+
+
+@receiver(m2m_changed, sender=Competition.topics.through)
+def on_competition_topics_index(sender, instance, action, reverse, pk_set, **kwargs):
+    """To update the search index of the affected competitions on topic changes in bulk
+    """
+    queueIndexRelation(SearchDoc.COMPETITION, instance, action, reverse, pk_set)
+
+
+@receiver(post_delete, sender=Competition)
+def on_competition_unindex(sender, instance: Competition, **kwargs):
+    """To remove the competition from search index on deletion
+    """
+    queueRemoveDocument(SearchDoc.COMPETITION, instance.id)
+
+
+@receiver(post_delete, sender=SubmissionTopicPoint)
+def on_topic_point_delete(sender, instance: SubmissionTopicPoint, **kwargs):
+    """To reset the marked points counter of the judge on marked point deletion, recounted when next read,
+    so that deleting many points at once does not recount once for each
+    """
+    competitionID = Submission.objects.filter(
+        id=instance.submission_id).values_list('competition_id', flat=True).first()
+    if competitionID:
+        CompetitionJudge.objects.filter(
+            competition_id=competitionID, judge_id=instance.judge_id).update(markedPoints=None)
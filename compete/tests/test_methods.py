@@ -1,16 +1,20 @@
 from datetime import timedelta
 from random import randint
+from unittest import mock
 from uuid import uuid4
 
 from auth2.tests.utils import getTestEmail, getTestName, getTestPassword
 from compete.apps import APPNAME
 from compete.methods import *
 from compete.models import SubmissionTopicPoint
+from compete.ranking import TieBreak, rankSubmissions
+from django.core.cache import cache
 from django.db.models.query import QuerySet
 from django.test import TestCase, tag
 from django.utils import timezone
 from main.env import BOTMAIL
-from main.strings import Code
+from main.exceptions import IllegalMarking
+from main.strings import Code, Message
 from main.tests.utils import getRandomStr
 from moderation.methods import assignModeratorToObject
 from moderation.models import Moderation
@@ -144,3 +148,126 @@ class CompeteMethodsTest(TestCase):
             certID=uuid4().hex,
         )
         self.assertTrue(cert.endswith('.pdf'))
+
+    def test_render_certificate_chunk(self):
+        self.comp.endAt = timezone.now()
+        self.comp.save()
+        self.comp.declareResults()
+        result = Result.objects.get(
+            submission=self.subm2, competition=self.comp)
+        partcert = ParticipantCertificate.objects.create(
+            result=result, profile=self.user2)
+        appcert = AppreciationCertificate.objects.create(
+            competition=self.comp, appreciatee=self.judge)
+        with self.settings(CERT_RENDER_CHUNK=1), mock.patch('compete.methods.ASYNC_CLUSTER', True), \
+                mock.patch('compete.methods.addMethodToAsyncQueue', return_value='task') as queue:
+            self.assertEqual(queueCertificateChunks([partcert, appcert]), 2)
+        self.assertEqual(queue.call_count, 2)
+        self.assertEqual(renderCertificateChunk([partcert.id]), 1)
+        self.assertEqual(renderCertificateChunk([appcert.id], True), 1)
+        self.assertTrue(ParticipantCertificate.objects.get(
+            id=partcert.id).certificate.endswith('.pdf'))
+        self.assertTrue(AppreciationCertificate.objects.get(
+            id=appcert.id).certificate.endswith('.pdf'))
+        cache.add(certificateRenderLockKey(partcert.id), True)
+        self.assertEqual(renderCertificateChunk([partcert.id], refresh=True), 0)
+        cache.delete(certificateRenderLockKey(partcert.id))
+
+    def test_lazy_certificate(self):
+        self.comp.endAt = timezone.now()
+        self.comp.save()
+        self.comp.declareResults()
+        result = Result.objects.get(
+            submission=self.subm2, competition=self.comp)
+        partcert = ParticipantCertificate.objects.create(
+            result=result, profile=self.user2)
+        self.assertFalse(partcert.certificate)
+        certpath = ensureCertificate(partcert)
+        self.assertTrue(certpath.endswith(
+            f"{certificateRecordJob(partcert)['certname']}.pdf"))
+        self.assertEqual(ParticipantCertificate.objects.get(
+            id=partcert.id).certificate, certpath)
+
+    def test_queued_certificate(self):
+        self.comp.endAt = timezone.now()
+        self.comp.save()
+        self.comp.declareResults()
+        result = Result.objects.get(
+            submission=self.subm2, competition=self.comp)
+        partcert = ParticipantCertificate.objects.create(
+            result=result, profile=self.user2)
+        with mock.patch('compete.methods.ASYNC_CLUSTER', True), \
+                mock.patch('compete.methods.addMethodToAsyncQueue', return_value='task'):
+            self.assertFalse(queueCertificate(partcert))
+        self.assertFalse(ParticipantCertificate.objects.get(
+            id=partcert.id).certificate)
+        self.assertTrue(renderQueuedCertificate(partcert.id))
+        self.assertIsNone(cache.get(certificateRenderLockKey(partcert.id)))
+        self.assertTrue(ParticipantCertificate.objects.get(
+            id=partcert.id).certificate.endswith('.pdf'))
+
+    def test_certificate_without_cluster(self):
+        self.comp.endAt = timezone.now()
+        self.comp.save()
+        self.comp.declareResults()
+        result = Result.objects.get(
+            submission=self.subm2, competition=self.comp)
+        partcert = ParticipantCertificate.objects.create(
+            result=result, profile=self.user2)
+        appcert = AppreciationCertificate.objects.create(
+            competition=self.comp, appreciatee=self.judge)
+        with mock.patch('compete.methods.ASYNC_CLUSTER', False):
+            certpath = queueCertificate(partcert)
+            self.assertTrue(certpath.endswith('.pdf'))
+            self.assertEqual(ParticipantCertificate.objects.get(
+                id=partcert.id).certificate, certpath)
+            self.assertIsNone(cache.get(certificateRenderLockKey(partcert.id)))
+            self.assertEqual(queueCertificateChunks([appcert]), 1)
+        self.assertTrue(AppreciationCertificate.objects.get(
+            id=appcert.id).certificate.endswith('.pdf'))
+
+    def test_rank_submissions(self):
+        now = timezone.now()
+        early, late, last = uuid4(), uuid4(), uuid4()
+        topicA, topicB, judgeA, judgeB = uuid4(), uuid4(), uuid4(), uuid4()
+        subs = [(late, now), (early, now-timedelta(hours=1)), (last, now)]
+        points = [
+            (early, topicA, judgeA, 5), (early, topicB, judgeB, 5),
+            (late, topicA, judgeA, 8), (late, topicB, judgeA, 2),
+            (last, topicA, judgeA, 1),
+        ]
+        ranked = rankSubmissions(subs, points)
+        self.assertEqual(list(map(lambda r: r['submission'], ranked)), [early, late, last])
+        self.assertEqual(list(map(lambda r: r['rank'], ranked)), [1, 2, 3])
+        self.assertEqual(ranked[0]['topics'], {topicA: 5, topicB: 5})
+        self.assertTrue(ranked[0]['tied'] and ranked[1]['tied'])
+        self.assertFalse(ranked[2]['tied'])
+        ranked = rankSubmissions(subs, points, TieBreak.TOPIC_MAX)
+        self.assertEqual(ranked[0]['submission'], late)
+        ranked = rankSubmissions(subs, points, TieBreak.CONSENSUS)
+        self.assertEqual(ranked[0]['submission'], early)
+        with self.assertRaises(ValueError):
+            rankSubmissions(subs, [(uuid4(), topicA, judgeA, 1)])
+
+    def test_validate_judge_markings(self):
+        subA, subB, topicA, topicB = uuid4(), uuid4(), uuid4(), uuid4()
+        subIDs, topicIDs = {subA, subB}, {topicA, topicB}
+        markings = validateJudgeMarkings([
+            dict(subID=str(subA), topics=[dict(topicID=str(topicA), points=3), dict(topicID=topicB, points="10")]),
+            dict(subID=f" {subB} ", topics=[dict(topicID=str(topicA), points=0)]),
+        ], subIDs, topicIDs, 10)
+        self.assertDictEqual(markings, {(subA, topicA): 3, (subA, topicB): 10, (subB, topicA): 0})
+        cases = (
+            ([dict(subID=str(uuid4()), topics=[])], Message.SUBMISSION_MARKING_UNKNOWN),
+            ([dict(subID=str(subA), topics=[dict(topicID=str(uuid4()), points=1)])], Message.SUBMISSION_MARKING_TOPIC),
+            ([dict(subID=str(subA), topics=[dict(topicID=str(topicA), points=11)])], Message.SUBMISSION_MARKING_POINTS),
+            ([dict(subID=str(subA), topics=[dict(topicID=str(topicA), points=-1)])], Message.SUBMISSION_MARKING_POINTS),
+            ([dict(subID=str(subA), topics=[dict(topicID=str(topicA), points=1)]),
+              dict(subID=str(subA), topics=[dict(topicID=str(topicA), points=2)])], Message.SUBMISSION_MARKING_DUPLICATE),
+            ([dict(subID="invalid", topics=[])], Message.SUBMISSION_MARKING_INVALID),
+            ([dict(subID=str(subA), topics=[dict(topicID=str(topicA), points="x")])], Message.SUBMISSION_MARKING_INVALID),
+        )
+        for marking, message in cases:
+            with self.assertRaises(IllegalMarking) as ctx:
+                validateJudgeMarkings(marking, subIDs, topicIDs, 10)
+            self.assertEqual(ctx.exception.args[0], message)
@@ -173,6 +173,22 @@ class CompetitionAttributeTest(TestCase):
             submission=subm, judge=judge, topic=topic)
         self.assertTrue(self.comp.allSubmissionsMarkedByJudge(judge=judge))
         self.assertEqual(self.comp.countJudgesWhoMarkedSubmissions(), 1)
+        self.assertEqual(self.comp.judgingProgress(), {judge.id: 1})
+        subm2 = Submission.objects.create(competition=self.comp)
+        point = SubmissionTopicPoint.objects.create(
+            submission=subm2, judge=judge, topic=topic)
+        self.assertTrue(self.comp.recordMarkedPoints(judge, 1))
+        self.assertEqual(self.comp.judgingProgress(), {judge.id: 2})
+        self.assertEqual(self.comp.judgingProgress(), self.comp.recountJudgingProgress())
+        subm2.valid = False
+        subm2.save()
+        self.assertEqual(self.comp.judgingProgress(), {judge.id: 1})
+        subm2.valid = True
+        subm2.save()
+        self.assertEqual(self.comp.judgingProgress(), {judge.id: 2})
+        point.delete()
+        self.assertEqual(self.comp.judgingProgress(), {judge.id: 1})
+        self.assertEqual(self.comp.judgingProgress(), self.comp.recountJudgingProgress())
 
 
 @tag(Code.Test.MODEL, APPNAME)
@@ -15,7 +15,7 @@ from django.views.decorators.cache import cache_control
 from django.views.decorators.http import require_GET, require_POST
 from main.decorators import (decode_JSON, manager_only, mentor_only,
                              normal_profile_required, require_JSON)
-from main.exceptions import InactiveCompetitionError
+from main.exceptions import IllegalMarking, InactiveCompetitionError
 from main.methods import (addMethodToAsyncQueue, errorLog, respondJson,
                           respondRedirect, updatePresentLists)
 from main.strings import URL, Action, Code, Message, Template, Browse
@@ -29,8 +29,9 @@ from .mailers import (participantInviteAlert, participantWelcomeAlert,
                       participationWithdrawnAlert, submissionConfirmedAlert,
                       submissionsJudgedAlert, competitionAdmireNotification, competitonXpClaimed)
 from .methods import (AllotCompetitionCertificates, DeclareResults,
-                      competitionProfileData, getCompetitionSectionHTML,
-                      getIndexSectionHTML, renderer, rendererstrResponse)
+                      competitionProfileData, queueCertificate,
+                      getCompetitionSectionHTML, getIndexSectionHTML,
+                      renderer, rendererstrResponse, searchCompetitions, validateJudgeMarkings)
 from .models import (AppreciationCertificate, Competition,
                      ParticipantCertificate, Result, Submission,
                      SubmissionParticipant, SubmissionTopicPoint)
@@ -577,103 +578,81 @@ def submitPoints(request: WSGIRequest, compID: UUID) -> JsonResponse:
         request (WSGIRequest): The request object.
         compID (UUID): The competition UUID.
 
-        request.POST.submissions (dict): A list of submission dicts, containing:
+        request.POST.submissions (list): A list of submission dicts, containing:
             subID: submission UUID
             topics: list of topic dicts, containing:
                 topicID: topic UUID
                 points: points awarded for the topic to the submission
+        request.POST.partial (bool, optional): If true, saves the given markings without requiring every submission to be marked,
+            so that markings can be saved in batches. The markings are final (and XP is alloted) once every topic of every submission is marked.
 
     Returns:
-        JsonResponse: response main.strings.Code.OK if points are alloted successfully, else main.strings.Code.NO
+        JsonResponse: response main.strings.Code.OK with complete (bool), marked (int) & total (int) points of the judge if points are saved successfully,
+            else main.strings.Code.NO with subID & topicID of the first illegal marking, if any.
     """
     try:
         subs: list = request.POST.get('submissions', None)
+        partial: bool = bool(request.POST.get('partial', False))
         if not subs:
             return respondJson(Code.NO, error=Message.SUBMISSION_MARKING_INVALID)
+        judge: Profile = request.user.profile
+        competition: Competition = Competition.objects.get(
+            id=compID, judges=judge, resultDeclared=False, endAt__lt=timezone.now())
 
-        submissions = Submission.objects.filter(competition__id=compID, competition__judges=request.user.profile,
-                                                competition__resultDeclared=False, competition__endAt__lt=timezone.now(), valid=True).order_by('submitOn')
-        competition: Competition = submissions.first().competition
-
-        if competition.allSubmissionsMarkedByJudge(judge=request.user.profile):
+        if competition.allSubmissionsMarkedByJudge(judge=judge):
             raise ObjectDoesNotExist(
                 'already submitted points',  competition, request.user)
-        if competition.isAllowedToParticipate(request.user.profile):
+        if competition.isAllowedToParticipate(judge):
             raise ObjectDoesNotExist(
                 'allowed to participate!', competition, request.user)
 
-        topics = competition.getTopics()
-
-        modifiedTops = {}
-
-        for top in topics:
-            modifiedTops[str(top.getID())] = []
-
-        for sub in subs:
-            subID = str(sub['subID']).strip()
-            for top in sub['topics']:
-                modifiedTops[str(top['topicID']).strip()].append(
-                    {subID: int(top['points'])})
-
-        """
-        The structure of modifiedTops is:
-        {
-            '<topicID>': [
-                {
-                    '<subID>': <points>
-                },
-                {
-                    '<subID>': <points>
-                },
-                ...
-            ],
-            '<topicID>': [
-                {
-                    '<subID>': <points>
-                },
-                {
-                    '<subID>': <points>
-                },
-                ...
-            ],
-            ...
-        }
-        i.e. A dict with topic IDs as the keys, and the value of each is a 
-        list of dicts having submission IDs as keys and their points as their values.
-        """
-
-        topicpointsList = []
-        for topic in topics:
-            subspointslist = modifiedTops[str(topic.getID())]
-            for sub in subspointslist:
-                point = None
-                submission = None
-                for subm in submissions:
-                    if str(subm.getID()) in sub.keys():
-                        submission = subm
-                        point = int(sub[str(subm.getID())])
-                        break
-                if point == None or submission == None:
-                    raise Exception(sub, topic, request.user, competition)
-                else:
-                    topicpointsList.append(SubmissionTopicPoint(
-                        submission=submission,
-                        topic=topic,
-                        judge=request.user.profile,
-                        points=point
-                    ))
-
-        _ = SubmissionTopicPoint.objects.bulk_create(
-            topicpointsList)
-        submissionsJudgedAlert(competition, request.user.profile)
-
-        judgeXP = len(submissions)//(len(topics)+1)
-        request.user.profile.increaseBulkTopicPoints(
-            topics=topics, by=judgeXP, reason=f"Judged submissions of {competition.title}")
-        request.user.profile.increaseXP(
-            by=judgeXP, reason=f"Judged submissions of {competition.title}")
-        return respondJson(Code.OK)
-    except (ObjectDoesNotExist, KeyError, ValueError, ValidationError, ValueError):
+        submissionIDs = set(Submission.objects.filter(
+            competition=competition, valid=True).values_list('id', flat=True))
+        topics = dict(map(lambda t: (t.id, t), competition.getTopics()))
+        if not submissionIDs or not topics:
+            raise ObjectDoesNotExist('nothing to mark', competition)
+
+        markings = validateJudgeMarkings(
+            subs, submissionIDs, set(topics.keys()), competition.eachTopicMaxPoint)
+
+        existing = dict(map(lambda p: ((p.submission_id, p.topic_id), p), SubmissionTopicPoint.objects.filter(
+            submission__competition=competition, judge=judge).only('id', 'submission_id', 'topic_id', 'points')))
+        total = len(submissionIDs)*len(topics)
+        marked = len(existing.keys() | markings.keys())
+        complete = marked == total
+        if not (partial or complete):
+            raise IllegalMarking(Message.SUBMISSION_MARKING_INCOMPLETE, None, None)
+
+        created, updated = [], []
+        for (subID, topicID), points in markings.items():
+            topicpoint = existing.get((subID, topicID), None)
+            if topicpoint is None:
+                created.append(SubmissionTopicPoint(
+                    submission_id=subID, topic=topics[topicID], judge=judge, points=points))
+            elif topicpoint.points != points:
+                topicpoint.points = points
+                updated.append(topicpoint)
+
+        SubmissionTopicPoint.objects.bulk_create(created)
+        # one plain update per changed marking, as the database backend cannot translate the CASE of bulk_update
+        for topicpoint in updated:
+            SubmissionTopicPoint.objects.filter(
+                id=topicpoint.id).update(points=topicpoint.points)
+        competition.recordMarkedPoints(judge, len(created))
+        if complete:
+            judgeXP = len(submissionIDs)//(len(topics)+1)
+            judge.increaseBulkTopicPoints(
+                topics=list(topics.values()), by=judgeXP, reason=f"Judged submissions of {competition.title}")
+            judge.increaseXP(
+                by=judgeXP, reason=f"Judged submissions of {competition.title}")
+
+        if complete:
+            submissionsJudgedAlert(competition, judge)
+        return respondJson(Code.OK, dict(complete=complete, marked=marked, total=total), message=Message.SUBMISSION_MARKING_SAVED)
+    except IllegalMarking as e:
+        error, subID, topicID = e.args
+        return respondJson(Code.NO, dict(subID=subID, topicID=topicID), error=error)
+    except (ObjectDoesNotExist, KeyError, ValueError, ValidationError):
         return respondJson(Code.NO, error=Message.INVALID_REQUEST)
     except Exception as e:
         errorLog(e)
@@ -857,13 +836,13 @@ def certificateVerify(request: WSGIRequest) -> HttpResponse:
         partcert: ParticipantCertificate = ParticipantCertificate.objects.filter(
             id=certID).first()
 
-        if partcert and partcert.certificate:
+        if partcert:
             return respondRedirect(APPNAME, URL.compete.certficate(partcert.result.get_id, partcert.profile.get_userid))
 
         appcert: AppreciationCertificate = AppreciationCertificate.objects.filter(
             id=certID).first()
 
-        if appcert and appcert.certificate:
+        if appcert:
             return respondRedirect(APPNAME, URL.compete.apprCertificate(appcert.competition.get_id, appcert.appreciatee.get_userid))
 
         return respondRedirect(APPNAME, f"{URL.Compete.CERT_INDEX}?certID={certID}", error=Message.CERT_NOT_FOUND)
@@ -911,7 +890,7 @@ def certificate(request: WSGIRequest, resID: UUID, userID: UUID) -> HttpResponse
         partcert: ParticipantCertificate = ParticipantCertificate.objects.filter(
             result__id=resID, profile=member).first()
 
-        certpath = False if not partcert else partcert.getCertImage if partcert.certificate else False
+        certpath = partcert.getCertImage if partcert and queueCertificate(partcert) else False
         certID = False if not partcert else partcert.get_id
         return renderer(request, Template.Compete.CERT_CERTIFICATE, dict(result=result, member=member, certpath=certpath, self=self, certID=certID))
     except (ObjectDoesNotExist, ValidationError, ValueError) as o:
@@ -955,7 +934,7 @@ def appCertificate(request: WSGIRequest, compID: UUID, userID: UUID) -> HttpResp
         appcert: AppreciationCertificate = AppreciationCertificate.objects.filter(
             competition__id=compID, appreciatee=person).first()
 
-        certpath = False if not appcert else appcert.getCertImage if appcert.certificate else False
+        certpath = appcert.getCertImage if appcert and queueCertificate(appcert) else False
         certID = False if not appcert else appcert.get_id
         if appcert:
             compete: Competition = appcert.competition
@@ -998,7 +977,7 @@ def generateCertificates(request: WSGIRequest, compID: UUID) -> HttpResponse:
         if competition.certificatesGenerated():
             return redirect(competition.getManagementLink(alert=Message.CERTS_GENERATED))
         taskKey = competition.CACHE_KEYS.certificates_allotment_task
-        if cache.get(taskKey) == Message.CERTS_GENERATING:
+        if competition.certificatesAllotmentStatus()['status'] == Message.CERTS_GENERATING:
             return redirect(competition.getManagementLink(alert=Message.CERTS_GENERATING))
         doneresultIDs = ParticipantCertificate.objects.filter(
             result__competition=competition).values_list("result__id", flat=True)
@@ -1042,7 +1021,7 @@ def downloadCertificate(request: WSGIRequest, resID: UUID, userID: UUID) -> Http
             raise ObjectDoesNotExist(userID)
         partcert: ParticipantCertificate = ParticipantCertificate.objects.get(
             result__id=resID, profile=member)
-        if not partcert.certificate:
+        if not queueCertificate(partcert):
             raise ObjectDoesNotExist("Certificate not yet present!", partcert)
         file_path = os_path.join(
             settings.MEDIA_ROOT, str(partcert.certificate))
@@ -1088,7 +1067,7 @@ def appDownloadCertificate(request: WSGIRequest, compID: UUID, userID: UUID) ->
             raise ObjectDoesNotExist(userID)
         appcert: AppreciationCertificate = AppreciationCertificate.objects.get(
             competition__id=compID, appreciatee=person)
-        if not appcert.certificate:
+        if not queueCertificate(appcert):
             raise ObjectDoesNotExist("Certificate not yet present!", appcert)
 
         file_path = os_path.join(settings.MEDIA_ROOT, str(appcert.certificate))
@@ -1133,73 +1112,8 @@ def browseSearch(request: WSGIRequest) -> HttpResponse:
             raise KeyError(query)
 
         limit = request.GET.get('limit', request.POST.get('limit', 10))
-
-        cachekey = f'compete_browse_search_{query}{request.LANGUAGE_CODE}'
-        if request.user.is_authenticated:
-            cachekey = f"{cachekey}{request.user.id}"
-
-        competitions = cache.get(cachekey, [])
-
-        if not len(competitions):
-            specials = ('topic:', 'manager:', 'judge:', 'status:')
-            pquery = None
-            dbquery = Q()
-            invalidQuery = False
-            if query.startswith(specials):
-                def specquerieslist(q):
-                    return [Q(topics__name__iexact=q), Q(creator__user__first_name__istartswith=q), Q(judges__user__first_name__istartswith=q, resultDeclared=True), Q()]
-                commaparts = query.split(",")
-                for cpart in commaparts:
-                    if cpart.strip().lower().startswith(specials):
-                        special, specialq = cpart.split(':')
-                        if special.strip().lower() == 'status':
-                            status = specialq.strip().lower()
-
-                            if status == Code.ACTIVE:
-                                dbquery = Q(
-                                    dbquery, startAt__lte=timezone.now(), endAt__gte=timezone.now())
-                            if status == Code.HISTORY:
-                                dbquery = Q(dbquery, endAt__lt=timezone.now())
-                            if status == Code.UPCOMING:
-                                dbquery = Q(
-                                    dbquery, startAt__gt=timezone.now())
-                            if status not in [Code.ACTIVE, Code.HISTORY, Code.UPCOMING]:
-                                invalidQuery = True
-                                break
-                        else:
-                            dbquery = Q(dbquery, specquerieslist(specialq.strip())[
-                                        list(specials).index(f"{special.strip()}:")])
-                    else:
-                        pquery = cpart.strip()
-                        break
-            else:
-                pquery = query
-
-            if pquery and not invalidQuery:
-                dbquery = Q(dbquery, Q(
-                    Q(title__istartswith=pquery)
-                    | Q(tagline__istartswith=pquery)
-                    | Q(nickname__istartswith=pquery)
-                    | Q(shortdescription__istartswith=pquery)
-                    | Q(topics__name__istartswith=pquery)
-                    | Q(title__icontains=pquery)
-                    | Q(nickname__icontains=pquery)
-                    | Q(tagline__icontains=pquery)
-                    | Q(shortdescription__icontains=pquery)
-                    | Q(creator__user__first_name__istartswith=pquery)
-                    | Q(creator__user__last_name__istartswith=pquery)
-                    | Q(creator__user__email__istartswith=pquery)
-                    | Q(creator__nickname__istartswith=pquery)
-                    | Q(qualifier__title__istartswith=pquery)
-                    | Q(qualifier__tagline__istartswith=pquery)
-                    | Q(qualifier__topics__name__istartswith=pquery)
-                ))
-
-            if not invalidQuery:
-                competitions = Competition.objects.filter(dbquery).exclude(
-                    hidden=True).exclude(is_draft=True).distinct()[:limit]
-                if len(competitions):
-                    cache.set(cachekey, competitions, settings.CACHE_SHORT)
+        profileID = request.user.profile.id if request.user.is_authenticated else None
+        competitions = searchCompetitions(query, profileID, limit)
 
         if json_body:
             return respondJson(Code.OK, dict(
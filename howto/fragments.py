@@ -0,0 +1,95 @@
+"""
+Rendered fragment cache of articles (templates/howto/article.html, templates/howto/index.html).
+
+The rendered HTML of each part of an article page, and of its card on the index page, is cached via the
+{% cache %} template tag, keyed by the version of the fragment. Every fragment declares the data it depends
+upon (ArticleDep) in FRAGMENTS, and its version is made of a token per dependency of the article, which is
+replaced by invalidateArticle whenever that data changes. So a write invalidates exactly the fragments
+depending on what it changed (a new rating re-renders the rating widgets, but not the sections),
+while the stale fragments are never looked up again and expire on their own.
+"""
+from main.methods import bumpVersionTokens, versionTokens
+
+
+class ArticleDep():
+    """Data of an article that rendered fragments depend upon"""
+    CONTENT = "content"
+    """Heading, subheading, preview media, topics and tags"""
+    SECTIONS = "sections"
+    RATINGS = "ratings"
+    ADMIRATIONS = "admirations"
+
+    ALL = (CONTENT, SECTIONS, RATINGS, ADMIRATIONS)
+
+
+FRAGMENTS = dict(
+    head=(ArticleDep.CONTENT,),
+    taxonomy=(ArticleDep.CONTENT,),
+    sections=(ArticleDep.SECTIONS,),
+    rating=(ArticleDep.RATINGS,),
+    admirers=(ArticleDep.ADMIRATIONS,),
+    card=(ArticleDep.CONTENT, ArticleDep.RATINGS),
+)
+"""Dependencies of each rendered fragment of an article, by fragment name"""
+
+
+def articleDepKey(articleID, dep: str) -> str:
+    """Returns the cache key of the version token of a dependency of an article
+
+    Args:
+        articleID (UUID, str): The id of the article
+        dep (str): An attribute of ArticleDep
+
+    Returns:
+        str: The cache key
+    """
+    return f"article_dep_{dep}_{articleID}"
+
+
+def fragmentVersions(articleIDs: list) -> dict:
+    """Returns the versions of all fragments of the given articles, in one cache lookup (see main.methods.versionTokens).
+
+    Args:
+        articleIDs (list<UUID>): The ids of the articles
+
+    Returns:
+        dict<UUID, dict<str, str>>: The version of each fragment (by name, as in FRAGMENTS) of each article id
+    """
+    keys = dict()
+    for articleID in articleIDs:
+        for dep in ArticleDep.ALL:
+            keys[articleDepKey(articleID, dep)] = (articleID, dep)
+    tokens = versionTokens(list(keys.keys()))
+    deps = dict(map(lambda a: (a, dict()), articleIDs))
+    for key, (articleID, dep) in keys.items():
+        deps[articleID][dep] = tokens.get(key, '')
+    return dict(map(lambda a: (a, dict(map(lambda f: (f[0], "-".join(map(lambda d: deps[a][d], f[1]))),
+                                            FRAGMENTS.items()))), articleIDs))
+
+
+def _dataKeys(article, deps: tuple) -> list:
+    keys = []
+    if ArticleDep.CONTENT in deps:
+        keys.extend([f"article_{article.nickname}", article.CACHE_KEYS.article_topics, article.CACHE_KEYS.article_tags,
+                     article.CACHE_KEYS.article_topics_count, article.CACHE_KEYS.article_tags_count])
+    if ArticleDep.SECTIONS in deps:
+        keys.append(article.CACHE_KEYS.article_sections)
+        if article.nickname and ArticleDep.CONTENT not in deps:
+            # the cached article carries the sections revision the editor renders
+            keys.append(f"article_{article.nickname}")
+    if ArticleDep.ADMIRATIONS in deps:
+        keys.extend([article.CACHE_KEYS.article_admireres,
+                     article.CACHE_KEYS.total_admirers])
+    return keys
+
+
+def invalidateArticle(article, *deps: str):
+    """Invalidates the rendered fragments of an article depending on the given data, along with the cached data itself.
+    To be called after (or within the transaction of) every write to that data.
+
+    Args:
+        article (Article): The article
+        *deps (str): Attributes of ArticleDep that changed. Defaults to all if none given.
+    """
+    deps = deps or ArticleDep.ALL
+    bumpVersionTokens(list(map(lambda d: articleDepKey(article.id, d), deps)), _dataKeys(article, deps))
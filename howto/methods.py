@@ -1,9 +1,17 @@
+from uuid import UUID
 from django.core.handlers.wsgi import WSGIRequest
 from howto.models import Article, Section
-from main.methods import errorLog, renderView, renderString
+from howto.fragments import ArticleDep, fragmentVersions, invalidateArticle
+from main.exceptions import StaleRevision
+from main.methods import compareAndSet, errorLog, renderView, renderString
 from howto.apps import APPNAME
 from django.core.exceptions import ObjectDoesNotExist
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
 from django.http.response import HttpResponse
+from django.utils.translation import get_language
+from main.search import SearchDoc, rankedByHits, searchIndex
 
 
 def renderer(request: WSGIRequest, file: str, data: dict = dict()):
@@ -36,7 +44,8 @@ def rendererstr(request: WSGIRequest, file: str, data: dict = dict()) -> HttpRes
 
 def articleRenderData(request:WSGIRequest, nickname: str):
     """
-    Returns context data to render article page
+    Returns context data to render article page.
+    The sections are passed lazily, to be loaded only if their rendered fragment is not cached (see howto.fragments).
     """
     try:
 
@@ -47,18 +56,222 @@ def articleRenderData(request:WSGIRequest, nickname: str):
         self: bool = authenticated and request.user.profile == article.author
         if not self and article.is_draft:
             return False
-        sections = article.getSections()
         isAdmirer = request.user.is_authenticated and article.isAdmirer(
             request.user.profile)
         isRater = False if not request.user.is_authenticated else article.is_rated_by(
             profile=request.user.profile)
         userRatingScore = 0 if not request.user.is_authenticated else article.rating_by_user(profile=request.user.profile)
         return dict(article=article,
-                    sections=sections,
+                    sections=article.getSections,
+                    fragments=fragmentVersions([article.id])[article.id],
                     self=self,
                     userRatingScore=userRatingScore,
                     isRater=isRater,
                     isAdmirer=isAdmirer
                     )
     except ObjectDoesNotExist:
-        return False
\ No newline at end of file
+        return False
+
+UNTITLED_SECTION = "Untitled Section"
+
+
+def bumpSectionsRevision(article: Article) -> int:
+    """Increments the sections revision of an article, after a change of its sections made outside applySectionDiff
+    (e.g. a section with media created or updated individually), so that diffs made upon the previous revision are rejected.
+
+    Args:
+        article (Article): The article
+
+    Returns:
+        int: The new sections revision
+    """
+    _, values = compareAndSet(Article.objects.filter(id=article.id), ['sectionsRevision'],
+                              lambda c: dict(sectionsRevision=c['sectionsRevision'] + 1))
+    invalidateArticle(article, ArticleDep.SECTIONS)
+    return values['sectionsRevision'] if values else None
+
+
+def applySectionDiff(article: Article, create: list = [], update: list = [], delete: list = [], order: list = None, revision: int = None) -> dict:
+    """Applies creations, updates, deletions and reordering of sections of an article as one diff upon a sections revision.
+    The diff is validated as a whole before anything is written, and the revision is then advanced by a compare-and-set
+    of its plain value, which rejects the diff if the sections were changed since (the database backend has no transactions
+    to lock them). Invalidates the sections of the article once.
+
+    Args:
+        article (Article): The article
+        create (list<dict>, optional): New sections, each with paragraph and subheading. Defaults to [].
+        update (list<dict>, optional): Changed sections, each with sectionID, subheading and paragraph (unchanged if empty). Defaults to [].
+        delete (list<str>, optional): IDs of sections to be deleted. Defaults to [].
+        order (list<str>, optional): IDs of all sections in their new order, new sections are appended after them. Defaults to None, i.e. unchanged.
+        revision (int): The sections revision the diff was made upon. A diff without one is rejected as stale.
+
+    Raises:
+        StaleRevision: If the given revision is missing or not the latest, with the latest revision.
+        ObjectDoesNotExist: If any updated, deleted or ordered section is not of the article.
+
+    Returns:
+        dict: created (list<UUID>) ids of created sections in the given order, and revision (int) the new sections revision.
+    """
+    def latest() -> int:
+        return Article.objects.filter(id=article.id).values_list('sectionsRevision', flat=True).first()
+
+    if revision is None:
+        raise StaleRevision(latest())
+    revision = int(revision)
+
+    sections = dict(map(lambda s: (s.id, s), Section.objects.filter(
+        article=article)))
+
+    def sectionOf(sectionID) -> Section:
+        section = sections.get(UUID(str(sectionID)), None)
+        if not section:
+            raise ObjectDoesNotExist(sectionID, article)
+        return section
+
+    removed = list(map(sectionOf, delete))
+    for section in removed:
+        del sections[section.id]
+    media = list(filter(lambda s: s.image or s.video, removed))
+
+    changed = dict()
+    for data in update:
+        section = sectionOf(data['sectionID'])
+        subheading = str(data.get('subheading', '') or UNTITLED_SECTION)[:75]
+        paragraph = str(data.get('paragraph', '') or '')[:1200]
+        fields = dict()
+        if section.subheading != subheading:
+            fields['subheading'] = section.subheading = subheading
+        if paragraph and section.paragraph != paragraph:
+            fields['paragraph'] = section.paragraph = paragraph
+        if fields:
+            changed.setdefault(section.id, dict()).update(fields)
+
+    if order is not None:
+        ordered = list(map(sectionOf, order))
+        if len(ordered) != len(sections) or len(set(map(lambda s: s.id, ordered))) != len(sections):
+            raise ObjectDoesNotExist(order, article)
+    else:
+        ordered = sorted(sections.values(), key=lambda s: s.order)
+    for position, section in enumerate(ordered):
+        if section.order != position:
+            section.order = position
+            changed.setdefault(section.id, dict())['order'] = position
+
+    if not Article.objects.filter(id=article.id, sectionsRevision=revision).update(sectionsRevision=revision + 1):
+        raise StaleRevision(latest())
+
+    for section in media:
+        section.delete()
+    if len(removed) > len(media):
+        Section.objects.filter(id__in=list(
+            map(lambda s: s.id, filter(lambda s: s not in media, removed)))).delete()
+    # one plain update per changed section, as the database backend cannot translate the CASE of bulk_update
+    for sectionID, fields in changed.items():
+        Section.objects.filter(id=sectionID).update(**fields)
+
+    created = Section.objects.bulk_create(list(map(lambda c: Section(
+        article=article, order=len(ordered)+c[0],
+        subheading=str(c[1].get('subheading', '') or UNTITLED_SECTION)[:75],
+        paragraph=str(c[1].get('paragraph', '') or '')[:1200],
+    ), enumerate(create))))
+
+    invalidateArticle(article, ArticleDep.SECTIONS)
+    return dict(created=list(map(lambda s: s.id, created)), revision=revision + 1)
+
+
+def backfillSectionOrders() -> int:
+    """Numbers the sections of existing articles in their natural (insertion) order, once, for articles whose sections
+    are not numbered yet (orders not distinct). Sections created or reordered afterwards are numbered by themselves.
+
+    Returns:
+        int: Number of articles whose sections were numbered
+    """
+    byArticle = dict()
+    for section in Section.objects.all():
+        byArticle.setdefault(section.article_id, []).append(section)
+    numbered = []
+    for sections in byArticle.values():
+        if len(set(map(lambda s: s.order, sections))) == len(sections):
+            continue
+        for position, section in enumerate(sections):
+            if section.order != position:
+                Section.objects.filter(id=section.id).update(order=position)
+        numbered.extend(sections)
+    articles = Article.objects.filter(id__in=list(set(map(lambda s: s.article_id, numbered))))
+    for article in articles:
+        invalidateArticle(article, ArticleDep.SECTIONS)
+    return len(articles)
+
+
+def searchArticles(query: str, blockedIDs: list = list(), limit: int = 10) -> list:
+    """Returns the published articles matching the search query, ranked by the search index if available, else by a database query,
+    cached for the active language. Special parts of the query (tag:, topic:, author:) filter by the respective attributes.
+
+    Args:
+        query (str): The search query
+        blockedIDs (list<str>, optional): The user ids blocked by (or blocking) the searching profile, whose results are excluded. Defaults to list().
+        limit (int, optional): The maximum number of results. Defaults to 10.
+
+    Returns:
+        list<Article>: The matching published articles
+    """
+    cachekey = f"article_browse_search_{query}{get_language()}{''.join(blockedIDs)}"
+    articles = cache.get(cachekey, [])
+
+    if not len(articles):
+        specials = ('tag:', 'topic:', 'author:')
+        pquery = None
+        hits = None
+        dbquery = Q()
+        invalidQuery = False
+        if query.startswith(specials):
+            def specquerieslist(q):
+                return [
+                    Q(tags__name__iexact=q),
+                    Q(topics__name__iexact=q),
+                    Q(
+                        Q(author__user__first_name__iexact=q) | Q(author__user__last_name__iexact=q) | Q(
+                            author__user__email__iexact=q) | Q(author__nickname__iexact=q)
+                    ),
+                    Q()
+                ]
+            commaparts = query.split(",")
+            for cpart in commaparts:
+                if cpart.strip().lower().startswith(specials):
+                    special, specialq = cpart.split(':')
+                    dbquery = Q(dbquery, specquerieslist(specialq.strip())[
+                        list(specials).index(f"{special.strip()}:")])
+                else:
+                    pquery = cpart.strip()
+                    break
+        else:
+            pquery = query
+        if pquery and not invalidQuery:
+            hits = searchIndex(pquery)
+        if hits is not None:
+            dbquery = Q(dbquery, id__in=hits[SearchDoc.ARTICLE])
+        elif pquery and not invalidQuery:
+            dbquery = Q(dbquery, Q(
+                Q(author__user__first_name__istartswith=pquery)
+                | Q(author__user__last_name__istartswith=pquery)
+                | Q(author__user__email__istartswith=pquery)
+                | Q(author__nickname__istartswith=pquery)
+                | Q(topics__name__iexact=pquery)
+                | Q(tags__name__iexact=pquery)
+                | Q(heading__iexact=pquery)
+                | Q(subheading__iexact=pquery)
+                | Q(nickname__iexact=pquery)
+                | Q(topics__name__istartswith=pquery)
+                | Q(tags__name__istartswith=pquery)
+                | Q(heading__icontains=pquery)
+                | Q(subheading__icontains=pquery)
+                | Q(nickname__icontains=pquery)
+            ))
+        if not invalidQuery:
+            articles: Article = Article.objects.exclude(author__user__id__in=blockedIDs).exclude(is_draft=True).filter(dbquery).distinct()
+            articles = articles[0:limit] if hits is None else rankedByHits(
+                articles, hits[SearchDoc.ARTICLE], limit)
+
+            if len(articles):
+                cache.set(cachekey, articles, settings.CACHE_SHORT)
+    return articles
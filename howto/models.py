@@ -1,6 +1,7 @@
 from uuid import UUID,uuid4
 from djongo import models
 from main.methods import filterNickname
+from main.ratings import RatingOf, averageRating, ratingSummary
 from time import time
 from datetime import datetime
 from django.utils import timezone
@@ -10,6 +11,7 @@ from .apps import APPNAME
 from django.conf import settings
 from main.strings import url
 from django.core.cache import cache
+from django.db.models import Max
 from django.core.validators import MaxValueValidator, MinValueValidator
 import math
 
@@ -33,6 +35,8 @@ class Article(models.Model):
     tags = models.ManyToManyField(Tag, through='ArticleTag', default=[], related_name='article_tags')
     raters = models.ManyToManyField(Profile, through="ArticleUserRating", default=[], related_name='article_user_rating')
     """raters (ManyToManyField<Profile>): The raters of the article and their rating"""
+    sectionsRevision: int = models.IntegerField(default=0)
+    """sectionsRevision (IntegerField): Incremented on every bulk edit of sections, for optimistic concurrency among editors"""
     
     def __str__(self):
         return self.nickname if self.nickname else self.get_id
@@ -47,8 +51,6 @@ class Article(models.Model):
             article_sections = f"article_sections_{self.id}"
             article_admireres = f"article_admirers_{self.id}"
             total_admirers = f"article_total_admirers_{self.id}"
-            article_totalratings = f"article_totalratings_{self.id}"
-            article_avgratings = f"article_avgratings_{self.id}"
             article_topics = f"article_topics_{self.id}"
             article_tags = f"article_tags_{self.id}"
             article_topics_count = f"article_topics_count_{self.id}"
@@ -99,7 +101,7 @@ class Article(models.Model):
         cacheKey = self.CACHE_KEYS.article_sections
         sections = cache.get(cacheKey, [])
         if not len(sections):
-            sections = self.sections.all()
+            sections = list(self.sections.order_by('order'))
             cache.set(cacheKey, sections, settings.CACHE_LONG)
         return sections
 
@@ -182,39 +184,21 @@ class Article(models.Model):
         """Returns whether the article can be edited or not"""
         return self.is_draft or cache.get(f"article_editable_{self.id}", False)
     
+    def rating_summary(self) -> dict:
+        """Returns the maintained rating summary of the article (see main.ratings.ratingSummary)"""
+        return ratingSummary(RatingOf.ARTICLE, self.id)
+
     def total_ratings(self):
         """Returns the total numbers of Rating of the article"""
-        cacheKey = self.CACHE_KEYS.article_totalratings
-        total_ratings = cache.get(cacheKey, None)
-        if total_ratings is None:
-            total_ratings = ArticleUserRating.objects.filter(article=self).count()
-            cache.set(cacheKey, total_ratings, settings.CACHE_INSTANT)
-        return total_ratings
+        return self.rating_summary()['count']
     
     def get_rating_out_of_ten(self):
         """Returns the Rating out of 10 of the article"""
-        rating_list=ArticleUserRating.objects.filter(article=self)
-        num_of_ratings=self.total_ratings()
-        total_sum=0
-        for rating in rating_list:
-            total_sum += rating.score
-        return round(total_sum/(num_of_ratings))
+        return averageRating(self.rating_summary(), scale=1, digits=None)
     
     def get_avg_rating(self):
         """Returns the average Rating of the article"""
-        cacheKey = self.CACHE_KEYS.article_avgratings
-        avgrating = cache.get(cacheKey, None)
-        if not avgrating:
-            rating_list=ArticleUserRating.objects.filter(article=self)
-            num_of_ratings=len(rating_list)
-            if (num_of_ratings==0):
-                return 0.0
-            total_sum=0
-            for rating in rating_list:
-                total_sum += rating.score
-            avgrating = round(total_sum/(2*num_of_ratings),1)
-            cache.set(cacheKey, avgrating, settings.CACHE_INSTANT)
-        return avgrating
+        return averageRating(self.rating_summary())
     
     def is_rated_by(self, profile):
         """To check whether user has rated or not"""
@@ -309,6 +293,8 @@ class Section(models.Model):
     paragraph = models.CharField(max_length=1200)
     image = models.ImageField(upload_to=sectionMediaPath, null=True, blank=True)
     video = models.FileField(upload_to=sectionMediaPath, null=True, blank=True)
+    order: int = models.IntegerField(default=0)
+    """order (IntegerField): Position of the section in the article"""
 
     def __str__(self):
         return self.subheading
@@ -320,6 +306,10 @@ class Section(models.Model):
         if not self.article.preview_image and self.image:
             self.article.preview_image = self.image
             self.article.save()
+        if self._state.adding and not self.order:
+            last = Section.objects.filter(article=self.article).aggregate(
+                last=Max('order'))['last']
+            self.order = 0 if last is None else last + 1
         super(Section, self).save(*args, **kwargs)
 
     def delete(self, *args, **kwargs):
@@ -0,0 +1,87 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+from main.ratings import RatingOf, previousScore, ratingSaved, recordRating
+from main.search import (SearchDoc, queueIndexDocument, queueIndexRelation,
+                         queueRemoveDocument)
+
+from .fragments import ArticleDep, invalidateArticle
+from .models import (Article, ArticleTag, ArticleTopic, ArticleUserRating,
+                     Section)
+
+
+@receiver(post_save, sender=Article)
+def on_article_index(sender, instance: Article, **kwargs):
+    """
+    Article search index update.
+    """
+    queueIndexDocument(SearchDoc.ARTICLE, instance.id)
+
+
+@receiver(post_save, sender=ArticleTopic)
+@receiver(post_delete, sender=ArticleTopic)
+@receiver(post_save, sender=ArticleTag)
+@receiver(post_delete, sender=ArticleTag)
+def on_article_relation_index(sender, instance, **kwargs):
+    """
+    Article topic or tag added or removed, article search index update.
+    """
+    queueIndexDocument(SearchDoc.ARTICLE, instance.article_id)
+
+
+@receiver(m2m_changed, sender=Article.topics.through)
+@receiver(m2m_changed, sender=Article.tags.through)
+def on_article_relations_index(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Article topics or tags changed in bulk, search index update of the affected articles.
+    """
+    queueIndexRelation(SearchDoc.ARTICLE, instance, action, reverse, pk_set)
+
+
+@receiver(post_save, sender=Article)
+def on_article_update(sender, instance: Article, created: bool, **kwargs):
+    """
+    Article rendered content invalidation.
+    """
+    if not created:
+        invalidateArticle(instance, ArticleDep.CONTENT)
+
+
+@receiver(post_delete, sender=Article)
+def on_article_unindex(sender, instance: Article, **kwargs):
+    """
+    Article search index removal.
+    """
+    queueRemoveDocument(SearchDoc.ARTICLE, instance.id)
+
+
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+def on_section_update(sender, instance: Section, **kwargs):
+    """
+    Article rendered sections invalidation.
+    """
+    invalidateArticle(Article(id=instance.article_id), ArticleDep.SECTIONS)
+
+
+@receiver(pre_save, sender=ArticleUserRating)
+def on_article_rating_change(sender, instance: ArticleUserRating, **kwargs):
+    """
+    Article rating to be saved, remembers its stored score for the rating aggregates.
+    """
+    instance._previousScore = previousScore(instance)
+
+
+@receiver(post_save, sender=ArticleUserRating)
+def on_article_rating_save(sender, instance: ArticleUserRating, created, **kwargs):
+    """
+    Article rating created or changed (also by the admin), adds it to the rating aggregates of the article.
+    """
+    ratingSaved(RatingOf.ARTICLE, instance.article_id, instance, created)
+
+
+@receiver(post_delete, sender=ArticleUserRating)
+def on_article_rating_delete(sender, instance: ArticleUserRating, **kwargs):
+    """
+    Article rating deleted (also by cascade), removes it from the rating aggregates of the article.
+    """
+    recordRating(RatingOf.ARTICLE, instance.article_id, previous=instance.score)
@@ -1,9 +1,15 @@
+from uuid import uuid4
 from django.test import TestCase, tag
 from django.core.exceptions import ObjectDoesNotExist
 from django.db.utils import DatabaseError
 from auth2.tests.utils import (getTestEmail, getTestGHID, getTestName,
                                getTestPassword)
 from howto.models import Article, Section, ArticleUserRating, sectionMediaPath
+from main.ratings import rateObject, ratingBucket, unrateObject
+from howto.fragments import FRAGMENTS, ArticleDep, fragmentVersions, invalidateArticle
+from howto.methods import (UNTITLED_SECTION, applySectionDiff, bumpSectionsRevision,
+                            backfillSectionOrders)
+from main.exceptions import StaleRevision
 from main.strings import Code
 from main.tests.utils import getRandomFloat
 from people.models import Profile, Topic, User
@@ -91,8 +97,29 @@ class ArticleAttributeTest(TestCase):
         self.assertFalse(self.article.is_rated_by(self.management_profile))
         self.assertEqual(self.article.total_ratings(), 1)
         self.assertEqual(self.article.get_avg_rating(), round(score/2, 1))
+        self.assertTrue(rateObject(ArticleUserRating, 'article', self.article, 'profile', self.profile, 10))
+        self.assertTrue(rateObject(ArticleUserRating, 'article', self.article, 'profile', self.profile, score))
+        self.assertFalse(rateObject(ArticleUserRating, 'article', self.article, 'profile', self.profile, score))
+        self.assertEqual(self.article.total_ratings(), 1)
+        self.assertDictEqual(self.article.rating_summary()['histogram'], {ratingBucket(score): 1})
+        rateObject(ArticleUserRating, 'article', self.article, 'profile', self.management_profile, 4)
+        self.assertEqual(self.article.total_ratings(), 2)
+        self.assertEqual(unrateObject(ArticleUserRating, article=self.article, profile=self.management_profile), 1)
+        self.assertEqual(self.article.total_ratings(), 1)
+        self.assertEqual(self.article.get_rating_out_of_ten(), round(score))
         self.assertEqual(self.article.rating_by_user(self.profile), score)
         self.assertEqual(self.article.rating_by_user(self.management_profile), 0)
+        rating = ArticleUserRating.objects.get(article=self.article, profile=self.profile)
+        rating.score = 2
+        rating.save()
+        self.assertDictEqual(self.article.rating_summary()['histogram'], {2: 1})
+        ArticleUserRating.objects.filter(article=self.article).delete()
+        self.assertEqual(self.article.total_ratings(), 0)
+        self.assertEqual(self.article.get_avg_rating(), 0)
+        ArticleUserRating.objects.bulk_create([ArticleUserRating(article=self.article, profile=self.profile, score=score)])
+        ArticleUserRating.objects.filter(article=self.article).delete()
+        self.assertEqual(self.article.total_ratings(), 0)
+        rateObject(ArticleUserRating, 'article', self.article, 'profile', self.profile, score)
 
         self.assertEqual(self.article.getImage(), self.article.author.get_dp)
         section: Section = Section.objects.create(article=self.article, image=getTestImage())
@@ -167,4 +194,63 @@ class SectionAttributeTest(TestCase):
         self.section.video = getTestVideo()
         self.section.save()
         self.assertEqual(self.section.image.url, self.section.get_image())
-        self.assertEqual(self.section.video.url, self.section.get_video())
\ No newline at end of file
+        self.assertEqual(self.section.video.url, self.section.get_video())
+
+    def test_section_order_backfill(self):
+        second = Section.objects.create(article=self.article, subheading=getTestSubhHeading(), paragraph=getTestParagraph())
+        second.delete()
+        third = Section.objects.create(article=self.article, subheading=getTestSubhHeading(), paragraph=getTestParagraph())
+        self.assertEqual(third.order, self.section.order+1)
+        Section.objects.filter(article=self.article).update(order=0)
+        self.assertEqual(backfillSectionOrders(), 1)
+        self.assertEqual(list(Section.objects.filter(article=self.article).order_by('order').values_list('order', flat=True)), [0, 1])
+        self.assertEqual(backfillSectionOrders(), 0)
+
+    def test_apply_section_diff(self):
+        second = Section.objects.create(article=self.article, subheading=getTestSubhHeading(), paragraph=getTestParagraph())
+        self.assertEqual(second.order, 1)
+        revision = Article.objects.get(id=self.article.id).sectionsRevision
+        diff = applySectionDiff(self.article, create=[dict(paragraph=getTestParagraph())],
+                                update=[dict(sectionID=self.section.get_id, subheading='', paragraph='Updated')],
+                                order=[second.get_id, self.section.get_id], revision=revision)
+        self.assertEqual(diff['revision'], revision+1)
+        sections = self.article.getSections()
+        self.assertEqual(list(map(lambda s: s.id, sections)), [second.id, self.section.id, diff['created'][0]])
+        self.assertEqual(sections[1].paragraph, 'Updated')
+        self.assertEqual(sections[1].subheading, UNTITLED_SECTION)
+        with self.assertRaises(StaleRevision):
+            applySectionDiff(self.article, delete=[second.get_id], revision=revision)
+        self.assertTrue(Section.objects.filter(id=second.id).exists())
+        with self.assertRaises(StaleRevision):
+            applySectionDiff(self.article, delete=[second.get_id])
+        with self.assertRaises(ObjectDoesNotExist):
+            applySectionDiff(self.article, delete=[second.get_id, uuid4().hex], revision=revision+1)
+        self.assertTrue(Section.objects.filter(id=second.id).exists())
+        self.assertEqual(Article.objects.get(id=self.article.id).sectionsRevision, revision+1)
+        applySectionDiff(self.article, delete=[second.get_id], revision=revision+1)
+        self.assertEqual(list(map(lambda s: (s.id, s.order), self.article.getSections())), [(self.section.id, 0), (sections[2].id, 1)])
+        self.assertEqual(bumpSectionsRevision(self.article), revision+3)
+
+    def test_section_diff_refreshes_cached_revision(self):
+        Article.objects.filter(id=self.article.id).update(is_draft=False)
+        article = Article.objects.get(id=self.article.id)
+        nickname = article.get_nickname()
+        revision = Article.get_cache_one(nickname).sectionsRevision
+        applySectionDiff(article, create=[dict(paragraph=getTestParagraph())], revision=revision)
+        self.assertEqual(Article.get_cache_one(nickname).sectionsRevision, revision+1)
+        bumpSectionsRevision(article)
+        self.assertEqual(Article.get_cache_one(nickname).sectionsRevision, revision+2)
+
+    @tag('article_fragments')
+    def test_fragment_versions(self):
+        versions = fragmentVersions([self.article.id])[self.article.id]
+        self.assertEqual(set(versions.keys()), set(FRAGMENTS.keys()))
+        self.assertEqual(versions, fragmentVersions([self.article.id])[self.article.id])
+        invalidateArticle(self.article, ArticleDep.RATINGS)
+        changed = fragmentVersions([self.article.id])[self.article.id]
+        for name, deps in FRAGMENTS.items():
+            self.assertEqual(changed[name] != versions[name], ArticleDep.RATINGS in deps)
+        Section.objects.create(article=self.article, subheading=getTestSubhHeading(), paragraph=getTestParagraph())
+        versions, changed = changed, fragmentVersions([self.article.id])[self.article.id]
+        self.assertNotEqual(changed['sections'], versions['sections'])
+        self.assertEqual(changed['card'], versions['card'])
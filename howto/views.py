@@ -2,13 +2,17 @@ from re import sub
 from django.shortcuts import redirect, render
 from django.utils import timezone
 from howto.models import Article, Section, ArticleTopic, ArticleTag, ArticleUserRating
-from howto.methods import renderer, articleRenderData, rendererstr
+from howto.fragments import ArticleDep, fragmentVersions, invalidateArticle
+from howto.methods import renderer, articleRenderData, rendererstr, applySectionDiff, bumpSectionsRevision, searchArticles
 from main.strings import Template, Code , Message, URL, Action, setURLAlerts
 from main.methods import respondJson, errorLog, respondRedirect, base64ToFile, base64ToImageFile
+from main.ratings import rateObject, unrateObject
+from main.search import SearchDoc, queueIndexDocument
 from main.decorators import require_JSON, normal_profile_required, decode_JSON
 from django.views.decorators.http import require_GET, require_POST
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
 from django.http.response import Http404, HttpResponse
+from main.exceptions import StaleRevision
 from ratelimit.decorators import ratelimit
 from uuid import UUID
 from django.conf import settings
@@ -21,17 +25,47 @@ from people.methods import addTopicToDatabase
 from projects.methods import addTagToDatabase, topicSearchList, tagSearchList
 from .apps import APPNAME
 from howto.mailers import articleAdmired, articleCreated , articlePublished , articleDeleted
+from .receivers import *
+
+HOWTO_INDEX_PAGE_SIZE = 24
+"""Number of article cards per index page"""
+
 
 def index(request: WSGIRequest):
-    cacheKey = "howto_index_page"
-    articles = cache.get(cacheKey, [])
-    count = len(articles)
-    if not count:
-        articles=Article.objects.filter(is_draft=False)
-        count = len(articles)
-    if count:
+    """To view the published articles, latest first, a page at a time.
+    The cards of articles are rendered from the fragment cache (see howto.fragments).
+
+    METHODS: GET
+
+    Args:
+        request (WSGIRequest): The request object.
+        request.GET.page (int, optional): The page number. Defaults to 1.
+
+    Returns:
+        HttpResponse: The index page
+    """
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+    cacheKey = f"howto_index_page_{page}"
+    articles = cache.get(cacheKey, None)
+    if articles is None:
+        start = (page-1)*HOWTO_INDEX_PAGE_SIZE
+        articles = list(Article.objects.filter(is_draft=False).order_by(
+            '-createdOn', '-id')[start:start+HOWTO_INDEX_PAGE_SIZE+1])
         cache.set(cacheKey, articles, settings.CACHE_INSTANT)
-    return renderer(request, Template.Howto.INDEX, dict(articles=articles))
+    hasNext = len(articles) > HOWTO_INDEX_PAGE_SIZE
+    articles = articles[:HOWTO_INDEX_PAGE_SIZE]
+    versions = fragmentVersions(list(map(lambda a: a.id, articles)))
+    for article in articles:
+        article.fragments = versions[article.id]
+    return renderer(request, Template.Howto.INDEX, dict(
+        articles=articles,
+        page=page,
+        prevPage=page-1 if page > 1 else None,
+        nextPage=page+1 if hasNext else None,
+    ))
 
 
 @normal_profile_required
@@ -79,18 +113,19 @@ def saveArticle(request: WSGIRequest, nickname: str):
         heading = str(request.POST["heading"]).strip()[:75]
         subheading = str(request.POST["subheading"]).strip()[:250]
 
+        articles = Article.objects.filter(nickname=nickname, author=request.user.profile)
         if heading and subheading:
-            done = Article.objects.filter(nickname=nickname, author=request.user.profile).update(heading=heading, subheading=subheading)
+            done = articles.update(heading=heading, subheading=subheading)
         elif not subheading:
-            done = Article.objects.filter(nickname=nickname, author=request.user.profile).update(heading=heading)
+            done = articles.update(heading=heading)
         elif not heading:
-            done = Article.objects.filter(nickname=nickname, author=request.user.profile).update(subheading=subheading)
+            done = articles.update(subheading=subheading)
         else:
             raise ValidationError(heading, subheading)
         
         if not done:
             raise ValidationError(done)
-        cache.delete(f"article_{nickname}")
+        invalidateArticle(articles.first(), ArticleDep.CONTENT)
         if json_body:
             return respondJson(Code.OK, success=Message.ARTICLE_UPDATED)
         return respondRedirect(APPNAME, path=URL.howto.view(nickname),success=Message.ARTICLE_UPDATED)
@@ -178,6 +213,7 @@ def publish(request: WSGIRequest, articleID:UUID):
         nickname = article.get_nickname
         cache.set(f"article_editable_{articleID}", True, 70*settings.CACHE_MAX)        
         articlePublished(request, article)
+        invalidateArticle(article, ArticleDep.CONTENT)
         article.author.increaseXP(by=5, reason="Published an article")
         return respondJson(Code.OK, dict(nickname=nickname))
     except ObjectDoesNotExist:
@@ -269,6 +305,7 @@ def topicsUpdate(request: WSGIRequest, articleID: UUID) -> HttpResponse:
                 removetopicIDs = removetopicIDs.strip(',').split(',')
             ArticleTopic.objects.filter(
                 article=article, topic__id__in=removetopicIDs).delete()
+            invalidateArticle(article, ArticleDep.CONTENT)
 
         if addtopicIDs:
             if not json_body:
@@ -304,7 +341,9 @@ def topicsUpdate(request: WSGIRequest, articleID: UUID) -> HttpResponse:
                     topic=topic, article=article))
             if len(articletopics) > 0:
                 ArticleTopic.objects.bulk_create(articletopics)
+                queueIndexDocument(SearchDoc.ARTICLE, article.id)
 
+        invalidateArticle(article, ArticleDep.CONTENT)
         if json_body:
             return respondJson(Code.OK, message=Message.TOPICS_UPDATED)
         return redirect(article.getLink(success=Message.TOPICS_UPDATED))
@@ -401,6 +440,7 @@ def tagsUpdate(request: WSGIRequest, articleID: UUID) -> HttpResponse:
                 removetagIDs = removetagIDs.strip(',').split(",")
             ArticleTag.objects.filter(
                 article=article, tag__id__in=removetagIDs).delete()
+            invalidateArticle(article, ArticleDep.CONTENT)
 
         currentcount = ArticleTag.objects.filter(article=article).count()
         if addtagIDs:
@@ -435,6 +475,7 @@ def tagsUpdate(request: WSGIRequest, articleID: UUID) -> HttpResponse:
                     return respondJson(Code.NO, error=Message.MAX_TAGS_ACHEIVED)
                 return redirect(setURLAlerts(next, error=Message.MAX_TAGS_ACHEIVED))
 
+        invalidateArticle(article, ArticleDep.CONTENT)
         if json_body:
             return respondJson(Code.OK)
         return redirect(next)
@@ -475,8 +516,7 @@ def deleteArticle(request, articleID):
             deleted = article.delete()[0]
             if not deleted:
                 raise ValidationError(deleted)
-            cache.delete(f"article_{article.nickname}")
-            cache.delete(f"article_sections_{articleID}")
+            invalidateArticle(article)
             articleDeleted(request, article)
             if not article.is_draft:
                 article.author.decreaseXP(by=5, reason="Deleted an article")
@@ -545,9 +585,9 @@ def section(request: WSGIRequest, articleID: UUID, action: str):
                 image=imagefile,
                 video=videofile
             )
-            cache.delete(f"article_sections_{article.id}")
+            revision = bumpSectionsRevision(article)
             if json_body:
-                return respondJson(Code.OK, dict(sectionID=section.id))
+                return respondJson(Code.OK, dict(sectionID=section.id, revision=revision))
             return redirect(article.getLink(success=Message.SECTION_CREATED))
 
         id = request.POST['sectionid'][:50]
@@ -589,20 +629,21 @@ def section(request: WSGIRequest, articleID: UUID, action: str):
                     changed = True
                 except:
                     newvidfile = None
+            revision = article.sectionsRevision
             if changed:
-                cache.delete(f"article_sections_{article.id}")
                 section.save()
+                revision = bumpSectionsRevision(article)
             if json_body:
-                return respondJson(Code.OK, message=Message.SECTION_UPDATED)
+                return respondJson(Code.OK, dict(revision=revision), message=Message.SECTION_UPDATED)
             return redirect(article.getLink(success=Message.SECTION_UPDATED))
 
         if action == Action.REMOVE:
             done = section.delete()[0] >= 1
             if not done:
                 raise ObjectDoesNotExist(section)
-            cache.delete(f"article_sections_{article.id}")
+            revision = bumpSectionsRevision(article)
             if json_body:
-                return respondJson(Code.OK, message=Message.SECTION_DELETED)
+                return respondJson(Code.OK, dict(revision=revision), message=Message.SECTION_DELETED)
             return redirect(article.getLink(success=Message.SECTION_DELETED))
 
         raise KeyError(action)
@@ -642,13 +683,14 @@ def submitArticleRating(request: WSGIRequest, articleID: UUID) -> JsonResponse:
         if action == Action.CREATE:
             score: float= float(request.POST['score'])
             if (1 <= score <= 10):
-                ArticleUserRating.objects.update_or_create(profile=profile, article=article, defaults=dict(score=score))
+                rateObject(ArticleUserRating, 'article', article, 'profile', profile, score)
             else:
                 raise ValidationError(score)       
         elif action==Action.REMOVE:
-            ArticleUserRating.objects.filter(profile=profile, article=article).delete()        
+            unrateObject(ArticleUserRating, profile=profile, article=article)
         else:
             raise ValidationError(action)
+        invalidateArticle(article, ArticleDep.RATINGS)
         return respondJson(Code.OK)
     except (ObjectDoesNotExist, ValidationError, KeyError):
         return respondJson(Code.NO, error=Message.INVALID_REQUEST)
@@ -688,6 +730,7 @@ def toggleAdmiration(request: WSGIRequest, articleID: UUID) -> HttpResponse:
         elif admire in ["false", False]:
             article.admirers.remove(request.user.profile)
             article.decreaseTopicsXp()
+        invalidateArticle(article, ArticleDep.ADMIRATIONS)
         if json_body:
             return respondJson(Code.OK)
         return redirect(article.getLink())
@@ -774,63 +817,8 @@ def browseSearch(request: WSGIRequest) -> HttpResponse:
         if not query:
             raise KeyError(query)
         limit = request.GET.get('limit', request.POST.get('limit', 10))
-        excludeauthorIDs = []
-        cachekey = f'article_browse_search_{query}{request.LANGUAGE_CODE}'
-        if request.user.is_authenticated:
-            excludeauthorIDs = request.user.profile.blockedIDs()
-            cachekey = f"{cachekey}{''.join(excludeauthorIDs)}"
-
-        articles = cache.get(cachekey, [])
-
-        if not len(articles):
-            specials = ('tag:', 'topic:', 'author:')
-            pquery = None
-            dbquery = Q()
-            invalidQuery = False
-            if query.startswith(specials):
-                def specquerieslist(q):
-                    return [
-                        Q(tags__name__iexact=q),
-                        Q(topics__name__iexact=q),
-                        Q(
-                            Q(author__user__first_name__iexact=q) | Q(author__user__last_name__iexact=q) | Q(
-                                author__user__email__iexact=q) | Q(author__nickname__iexact=q)
-                        ),
-                        Q()
-                    ]
-                commaparts = query.split(",")
-                for cpart in commaparts:
-                    if cpart.strip().lower().startswith(specials):
-                        special, specialq = cpart.split(':')
-                        dbquery = Q(dbquery, specquerieslist(specialq.strip())[
-                            list(specials).index(f"{special.strip()}:")])
-                    else:
-                        pquery = cpart.strip()
-                        break
-            else:
-                pquery = query
-            if pquery and not invalidQuery:
-                dbquery = Q(dbquery, Q(
-                    Q(author__user__first_name__istartswith=pquery)
-                    | Q(author__user__last_name__istartswith=pquery)
-                    | Q(author__user__email__istartswith=pquery)
-                    | Q(author__nickname__istartswith=pquery)
-                    | Q(topics__name__iexact=pquery)
-                    | Q(tags__name__iexact=pquery)
-                    | Q(heading__iexact=pquery)
-                    | Q(subheading__iexact=pquery)
-                    | Q(nickname__iexact=pquery)
-                    | Q(topics__name__istartswith=pquery)
-                    | Q(tags__name__istartswith=pquery)
-                    | Q(heading__icontains=pquery)
-                    | Q(subheading__icontains=pquery)
-                    | Q(nickname__icontains=pquery)
-                ))
-            if not invalidQuery:
-                articles: Article = Article.objects.exclude(author__user__id__in=excludeauthorIDs).exclude(is_draft=True).filter(dbquery).distinct()[0:limit]
-
-                if len(articles):
-                    cache.set(cachekey, articles, settings.CACHE_SHORT)
+        blockedIDs = request.user.profile.blockedIDs() if request.user.is_authenticated else []
+        articles = searchArticles(query, blockedIDs, limit)
 
         if json_body:
             return respondJson(Code.OK, dict(
@@ -855,15 +843,42 @@ def browseSearch(request: WSGIRequest) -> HttpResponse:
     
 @require_JSON
 def bulkUpdateArticle(request: WSGIRequest, articleID: str):
-    """
-    To bulk update article's sections
+    """To bulk update an article and its sections (autosave of the editor), as one diff upon the sections revision.
+
+    METHODS: POST
+
+    Args:
+        request (WSGIRequest): The request object
+        articleID (str): The article id
+
+        request.POST.article_update (dict, optional): heading and subheading of the article
+        request.POST.section_create_paragraph (str, optional): Paragraph of a new section
+        request.POST.section_create (list, optional): New sections, dicts with subheading and paragraph
+        request.POST.section_update (list, optional): Changed sections, dicts with sectionID, subheading and paragraph
+        request.POST.section_delete (list, optional): IDs of sections to be deleted
+        request.POST.section_order (list, optional): IDs of all remaining sections in their new order
+        request.POST.revision (int): The sections revision the changes were made upon
+
+    Returns:
+        JsonResponse: The json response with main.strings.Code.OK along with the ids of created sections and the new revision if successful,
+            or main.strings.Code.NO along with the latest revision if sections were changed since the given revision (or it is missing).
     """
     try:
         article:Article = Article.objects.get(id=articleID, author=request.user.profile)
         article_update = request.POST.get('article_update', None)
         section_create_paragraph = request.POST.get('section_create_paragraph', None)
-        section_update = request.POST['section_update']
-        
+        section_create = list(request.POST.get('section_create', None) or [])
+        if section_create_paragraph:
+            section_create.insert(0, dict(paragraph=section_create_paragraph))
+
+        diff = applySectionDiff(article,
+            create=section_create,
+            update=request.POST.get('section_update', None) or [],
+            delete=request.POST.get('section_delete', None) or [],
+            order=request.POST.get('section_order', None),
+            revision=request.POST.get('revision', None),
+        )
+
         if article_update:
             updated = False
             heading = article_update['heading']
@@ -875,51 +890,14 @@ def bulkUpdateArticle(request: WSGIRequest, articleID: str):
                 article.subheading = subheading
                 updated = True
             if updated:
-                article.save()
-
-        section = None
-        if section_create_paragraph:
-            section: Section = Section.objects.create(article=article, paragraph=section_create_paragraph, subheading="Untitled Section")
-
-        if len(section_update)>0:
-            for data in section_update:
-                subheading = data['subheading'] if data['subheading'] else 'Untitled Section'
-                paragraph = data['paragraph']
-                if paragraph:
-                    done = Section.objects.filter(id=data['sectionID'], article=article).update(subheading=subheading, paragraph=paragraph)
-                else:
-                    done = Section.objects.filter(id=data['sectionID'], article=article).update(subheading=subheading)
-                if not done:
-                    raise Exception
-            
-        #TODO: Try to do using bulk_update
-        # if len(section_update)>0:
-        #     if len(section_update)==1:
-        #         if section_update[0]['paragraph']:
-        #             done = Section.objects.filter(id=section_update[0]['sectionID'],article=article).update(subheading=section_update[0]['subheading'], paragraph=section_update[0]['paragraph'])
-        #         else:
-        #             done = Section.objects.filter(id=section_update[0]['sectionID'],article=article).update(paragraph=section_update[0]['subheading'])
-        #         if not done:
-        #             raise Exception
-        #     else:
-        #         sections_dict = {}
-        #         for data in section_update:
-        #             sections_dict[data['sectionID']] = [data['subheading'], data['paragraph']]
-        #         update_list = Section.objects.filter(id__in=sections_dict.keys(), article=article)
-        #         for obj in update_list:
-        #             subheading = sections_dict[str(obj.id)][0]
-        #             paragraph = sections_dict[str(obj.id)][1]
-        #             obj.subheading = subheading
-        #             obj.paragraph = paragraph
-        #         done = Section.objects.bulk_update(update_list, ['subheading','paragraph'])
-        #         if not done:
-        #             raise Exception
+                article.save(update_fields=['heading', 'subheading', 'modifiedOn'])
 
         if section_create_paragraph:
-            return respondJson(Code.OK, dict(sectionID=section.id))
-        return respondJson(Code.OK)
-
-    except ObjectDoesNotExist:
+            return respondJson(Code.OK, dict(sectionID=diff['created'][0], sectionIDs=diff['created'], revision=diff['revision']))
+        return respondJson(Code.OK, dict(sectionIDs=diff['created'], revision=diff['revision']))
+    except StaleRevision as s:
+        return respondJson(Code.NO, dict(revision=s.args[0]), error=Message.SECTIONS_CHANGED)
+    except (ObjectDoesNotExist, ValueError, KeyError):
         return respondJson(Code.NO, error=Message.ARTICLE_NOT_FOUND)
     except Exception as e:
         errorLog(e)
@@ -1,6 +1,7 @@
 from uuid import UUID, uuid4
 from djongo import models
 from main.methods import filterNickname
+from main.ratings import RatingOf, averageRating, ratingSummary
 from time import time
 from datetime import datetime
 from django.utils import timezone
@@ -83,18 +84,9 @@ class Course(models.Model):
             return self.get_dp
         return f"{settings.SITE}{self.get_dp}"
 
-    def get_avg_rating(self):
-        avgrating = 0
-        if not avgrating:
-            rating_list=CourseUserReview.objects.filter(course=self)
-            num_of_ratings=len(rating_list)
-            if (num_of_ratings==0):
-                return 0.0
-            total_sum=0
-            for rating in rating_list:
-                total_sum += rating.score
-            avgrating = round(total_sum/(2*num_of_ratings),1)
-        return avgrating
+    def get_avg_rating(self, summary: dict = None):
+        """Returns the average rating of the course, from the given or maintained rating summary (see main.ratings.ratingSummary)"""
+        return averageRating(summary or ratingSummary(RatingOf.COURSE, self.id))
 
     def get_topics_dict(self):
         return list(map(lambda topic: dict(id=topic.id.hex, name=topic.name), self.topics.all()))
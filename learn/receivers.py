@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from main.ratings import RatingOf, previousScore, ratingSaved, recordRating
+
+from .models import CourseUserReview
+
+
+@receiver(pre_save, sender=CourseUserReview)
+def on_course_review_change(sender, instance: CourseUserReview, **kwargs):
+    """
+    Course review to be saved, remembers its stored score for the rating aggregates.
+    """
+    instance._previousScore = previousScore(instance)
+
+
+@receiver(post_save, sender=CourseUserReview)
+def on_course_review_save(sender, instance: CourseUserReview, created, **kwargs):
+    """
+    Course review created or changed (also by the admin), adds it to the rating aggregates of the course.
+    """
+    ratingSaved(RatingOf.COURSE, instance.course_id, instance, created)
+
+
+@receiver(post_delete, sender=CourseUserReview)
+def on_course_review_delete(sender, instance: CourseUserReview, **kwargs):
+    """
+    Course review deleted (also by cascade), removes it from the rating aggregates of the course.
+    """
+    recordRating(RatingOf.COURSE, instance.course_id, previous=instance.score)
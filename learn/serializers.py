@@ -0,0 +1,103 @@
+from api.serializers import Field, Nested, ProfileSerializer, Serializer
+from django.db.models import Count
+from main.ratings import RatingOf, ratingSummaries
+
+from .models import Course, CourseUserLikes, CourseUserReview, Lesson, UserLessonHistory
+
+
+def _courseRatings(courses: list, context: dict) -> dict:
+    return ratingSummaries(RatingOf.COURSE, list(map(lambda c: c.pk, courses)))
+
+
+def _ownReviews(reviews: list, context: dict) -> dict:
+    profileID = context.get('profileID', None)
+    return dict(map(lambda r: (r.pk, bool(profileID) and r.creator_id == profileID), reviews))
+
+
+_COURSE_FIELDS = dict(
+    id=Field(lambda c: c.get_id),
+    name=Field(lambda c: c.title),
+    short_desc=Field(lambda c: c.short_desc),
+    long_desc=Field(lambda c: c.long_desc),
+    picture=Field(lambda c: c.get_abs_dp),
+    creator=Nested(ProfileSerializer, 'creator'),
+    total_lessons=Field(lambda c: c.num_lessons, annotate=dict(
+        num_lessons=Count('lesson', distinct=True))),
+    rating=Field(lambda c, summary: c.get_avg_rating(summary),
+                 batch=_courseRatings),
+    topics=Field(lambda c: c.get_topics_dict(), prefetch=('topics',)),
+)
+
+
+class CourseSerializer(Serializer):
+    """Serializes courses for listings"""
+    model = Course
+    fields = dict(
+        **_COURSE_FIELDS,
+        total_admirers=Field(lambda c: c.num_admirers, annotate=dict(
+            num_admirers=Count('admirers', distinct=True))),
+    )
+    keyset = ('-createdOn', '-id')
+    queryBudget = 4
+    """The page with annotations, topics prefetch, rating summaries (if not cached), managers among creators"""
+
+
+class CourseDetailSerializer(Serializer):
+    """Serializes a course for its own view"""
+    model = Course
+    fields = dict(
+        **_COURSE_FIELDS,
+        tags=Field(lambda c: c.get_tags_dict(), prefetch=('tags',)),
+    )
+    queryBudget = 5
+
+
+class LessonSerializer(Serializer):
+    """Serializes lessons of a course"""
+    model = Lesson
+    fields = dict(
+        id=Field(lambda l: l.get_id),
+        name=Field(lambda l: l.name),
+        type=Field(lambda l: l.type),
+        courseId=Field(lambda l: l.course_id.hex),
+    )
+    keyset = ('createdOn', 'id')
+    queryBudget = 1
+
+
+class ReviewSerializer(Serializer):
+    """Serializes reviews of a course, context may have profileID of the requestor"""
+    model = CourseUserReview
+    fields = dict(
+        id=Field(lambda r: r.id.hex),
+        courseId=Field(lambda r: r.course_id.hex),
+        review=Field(lambda r: r.review),
+        reviewer=Nested(ProfileSerializer, 'creator'),
+        score=Field(lambda r: r.score),
+        canBeDeleted=Field(lambda r, own: own, batch=_ownReviews),
+    )
+    keyset = ('-createdOn', '-id')
+    queryBudget = 2
+
+
+class AdmirerSerializer(Serializer):
+    """Serializes admirations of a course"""
+    model = CourseUserLikes
+    fields = dict(
+        profile=Nested(ProfileSerializer, 'profile'),
+    )
+    queryBudget = 2
+
+
+class LessonHistorySerializer(Serializer):
+    """Serializes the lesson history of a profile"""
+    model = UserLessonHistory
+    fields = dict(
+        id=Field(lambda h: h.id.hex),
+        courseId=Field(lambda h: h.lesson.course.get_id,
+                       select=('lesson__course',)),
+        lesson=Field(lambda h: h.lesson.get_dict(),
+                     select=('lesson__course',)),
+    )
+    keyset = ('-modifiedOn', '-id')
+    queryBudget = 1
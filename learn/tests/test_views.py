@@ -0,0 +1,114 @@
+from datetime import timedelta
+from json import loads as json_loads
+from unittest import mock
+
+from api.serializers import InvalidCursor
+from auth2.tests.utils import getTestEmail, getTestName, getTestPassword
+from django.db import connection
+from django.test import Client, TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from learn.apps import APPNAME
+from learn.models import Course, CourseUserLikes, Lesson
+from learn.serializers import CourseSerializer, LessonSerializer
+from main.env import BOTMAIL
+from main.strings import Code, url
+from people.models import Profile, Topic, User
+from people.tests.utils import getTestTopicsInst
+
+
+@tag(Code.Test.VIEW, APPNAME)
+class TestViews(TestCase):
+    @classmethod
+    def setUpTestData(self) -> None:
+        self.bot, _ = User.objects.get_or_create(email=BOTMAIL, defaults=dict(
+            first_name='knottersbot', email=BOTMAIL, password=getTestPassword()))
+        self.profiles = []
+        for _ in range(3):
+            user = User.objects.create_user(
+                email=getTestEmail(), password=getTestPassword(), first_name=getTestName())
+            self.profiles.append(Profile.objects.get(user=user))
+        topics = Topic.objects.bulk_create(getTestTopicsInst(2))
+        now = timezone.now()
+        self.courses = []
+        for i in range(7):
+            course = Course.objects.create(title=f"Course {i}", short_desc=getTestName(), long_desc=getTestName(),
+                                           creator=self.profiles[i % 3], draft=False, createdOn=now-timedelta(minutes=i % 4))
+            course.topics.set(topics)
+            Lesson.objects.create(name=getTestName(), type='text',
+                                  course=course, data=getTestName())
+            CourseUserLikes.objects.create(
+                course=course, profile=self.profiles[(i+1) % 3])
+            self.courses.append(course)
+        return super().setUpTestData()
+
+    def _pageQueries(self, serializer, queryset, **kwargs) -> tuple:
+        with CaptureQueriesContext(connection) as context:
+            page, cursor = serializer.page(queryset, **kwargs)
+        return page, cursor, len(context.captured_queries)
+
+    def test_course_serializer_budget(self):
+        queryset = Course.objects.filter(draft=False, trashed=False)
+        small, _, smallQueries = self._pageQueries(
+            CourseSerializer, queryset, size=2)
+        large, _, largeQueries = self._pageQueries(
+            CourseSerializer, queryset, size=7)
+        self.assertEqual(len(small), 2)
+        self.assertEqual(len(large), 7)
+        self.assertLessEqual(largeQueries, CourseSerializer.queryBudget)
+        self.assertLessEqual(smallQueries, CourseSerializer.queryBudget)
+        course = large[0]
+        self.assertEqual(course['total_lessons'], 1)
+        self.assertEqual(course['total_admirers'], 1)
+        self.assertEqual(len(course['topics']), 2)
+        self.assertEqual(course['creator'], Course.objects.get(
+            id=course['id']).creator.get_dict())
+
+    def test_course_keyset_pagination(self):
+        queryset = Course.objects.filter(draft=False, trashed=False)
+        seen, cursor = [], None
+        while True:
+            page, cursor = CourseSerializer.page(
+                queryset, cursor=cursor, size=3)
+            seen.extend(map(lambda c: c['id'], page))
+            if not cursor:
+                break
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(set(seen), set(
+            map(lambda c: c.get_id, self.courses)))
+        with self.assertRaises(InvalidCursor):
+            CourseSerializer.page(queryset, cursor='invalid')
+
+    def test_lesson_serializer_budget(self):
+        with CaptureQueriesContext(connection) as context:
+            lessons = LessonSerializer.serialize(LessonSerializer.plan(
+                Lesson.objects.all()).order_by(*LessonSerializer.keyset))
+        self.assertEqual(len(lessons), 7)
+        self.assertLessEqual(
+            len(context.captured_queries), LessonSerializer.queryBudget)
+
+    def test_getallcourses(self):
+        client = Client()
+        resp = client.get(
+            f"{url.getRoot()}{url.API}{url.LEARN}courses", dict(size=4))
+        data = json_loads(resp.content.decode())
+        self.assertEqual(data['code'], Code.OK)
+        self.assertEqual(len(data['courses']), 4)
+        self.assertTrue(data['next'])
+        resp = client.get(
+            f"{url.getRoot()}{url.API}{url.LEARN}courses", dict(size=4, cursor=data['next']))
+        data = json_loads(resp.content.decode())
+        self.assertEqual(len(data['courses']), 3)
+        self.assertIsNone(data['next'])
+
+    def test_getallcourses_legacy_pages(self):
+        client = Client()
+        pages = []
+        with mock.patch('api.serializers.API_PAGE_MAX', 3), mock.patch('learn.views.API_PAGE_MAX', 3):
+            for page in (1, 2, 3):
+                resp = client.get(
+                    f"{url.getRoot()}{url.API}{url.LEARN}courses", dict(size=100, page=page))
+                pages.append(list(map(lambda course: course['id'], json_loads(
+                    resp.content.decode())['courses'])))
+        self.assertEqual(list(map(len, pages)), [3, 3, 1])
+        self.assertEqual(len(set(sum(pages, []))), 7)
@@ -1,40 +1,42 @@
+from api.serializers import API_PAGE_MAX, API_PAGE_SIZE, InvalidCursor
 from django.core.handlers.wsgi import WSGIRequest
 from main.methods import respondJson
+from main.ratings import unrateObject
 from main.strings import Code
 from main.decorators import normal_profile_required
 from django.views.decorators.http import require_GET, require_POST
 from .models import *
 from django.views.decorators.csrf import csrf_exempt
 from main.decorators import require_GET
+from .receivers import *
+from .serializers import (AdmirerSerializer, CourseDetailSerializer, CourseSerializer,
+                          LessonHistorySerializer, LessonSerializer, ReviewSerializer)
+
+
+def pageParams(request: WSGIRequest) -> dict:
+    """Returns the keyset pagination arguments of a listing request, from its cursor and size params,
+    or from the legacy page param (as offset) if no cursor is given.
+    The size is clamped as Serializer.page clamps it, so that legacy pages do not overlap."""
+    size = max(1, min(int(request.GET.get('size', API_PAGE_SIZE)), API_PAGE_MAX))
+    cursor = request.GET.get('cursor', None)
+    return dict(cursor=cursor, size=size, offset=0 if cursor else (int(request.GET.get('page', 1))-1)*size)
+
+
+def serializerContext(request: WSGIRequest) -> dict:
+    """Returns the request specific context for serializers"""
+    return dict(profileID=request.user.profile.id if request.user.is_authenticated else None)
 
 
 
 @csrf_exempt
 @require_GET
 def getallcourses(request: WSGIRequest):
-    page = int(request.GET.get('page', 1))
-    size = int(request.GET.get('size', 10))
-    lfrom = (page-1)*size
-    lto = lfrom + size
-    courses = Course.objects.filter(draft=False, trashed=False)[lfrom:lto]
-    return respondJson(Code.OK, dict(
-        courses=list(
-            map(
-                lambda course: dict(
-                    id=course.get_id,
-                    name=course.title,
-                    short_desc=course.short_desc,
-                    long_desc=course.long_desc,
-                    picture=course.get_abs_dp,
-                    creator=course.creator.get_dict(),
-                    total_lessons=course.total_lessons(),
-                    rating=course.get_avg_rating(),
-                    topics=course.get_topics_dict(),
-                    total_admirers=course.total_admirers()
-                ), courses
-            )
-        )
-    ))
+    try:
+        courses, cursor = CourseSerializer.page(
+            Course.objects.filter(draft=False, trashed=False), **pageParams(request))
+    except (InvalidCursor, ValueError):
+        return respondJson(Code.NO, status=400)
+    return respondJson(Code.OK, dict(courses=courses, next=cursor))
 
 
 @csrf_exempt
@@ -44,24 +46,11 @@ def getCoursebyID(request: WSGIRequest, courseID):
         UUID(courseID)
     except:
         return respondJson(Code.NO, status=400)
-    course = Course.objects.filter(
-        id=courseID, draft=False, trashed=False).first()
+    course = CourseDetailSerializer.one(Course.objects.filter(
+        id=courseID, draft=False, trashed=False))
     if not course:
         return respondJson(Code.NO, error='Course not found', status=404)
-    return respondJson(Code.OK, dict(
-        course=dict(
-            id=course.get_id,
-            name=course.title,
-            short_desc=course.short_desc,
-            long_desc=course.long_desc,
-            picture=course.get_abs_dp,
-            creator=course.creator.get_dict(),
-            total_lessons=course.total_lessons(),
-            rating=course.get_avg_rating(),
-            topics=course.get_topics_dict(),
-            tags=course.get_tags_dict()
-        )
-    ))
+    return respondJson(Code.OK, dict(course=course))
 
 
 @csrf_exempt
@@ -71,22 +60,11 @@ def getLessonsByCourse(request: WSGIRequest, courseID):
         UUID(courseID)
     except:
         return respondJson(Code.NO, status=400)
-    course = Course.objects.filter(
-        id=courseID, draft=False, trashed=False).first()
-    if not course:
+    if not Course.objects.filter(id=courseID, draft=False, trashed=False).exists():
         return respondJson(Code.NO, error='Course not found', status=404)
-    lessons = Lesson.objects.filter(course=course, trashed=False)
-    return respondJson(Code.OK, dict(
-        lessons=list(
-            map(
-                lambda lesson: dict(
-                    id=lesson.get_id,
-                    name=lesson.name,
-                    type=lesson.type,
-                    courseId=lesson.course.get_id,
-                ), lessons),
-        )
-    ))
+    lessons = LessonSerializer.plan(Lesson.objects.filter(
+        course__id=courseID, trashed=False)).order_by(*LessonSerializer.keyset)
+    return respondJson(Code.OK, dict(lessons=LessonSerializer.serialize(lessons)))
 
 
 @csrf_exempt
@@ -120,27 +98,11 @@ def getReviewsByCourse(request: WSGIRequest, courseID: UUID):
         UUID(courseID)
     except:
         return respondJson(Code.NO, status=400)
-    course = Course.objects.filter(
-        id=courseID, draft=False, trashed=False).first()
-    if not course:
+    if not Course.objects.filter(id=courseID, draft=False, trashed=False).exists():
         return respondJson(Code.NO, error='Course not found', status=404)
-    reviews = CourseUserReview.objects.filter(
-        course=course, draft=False, trashed=False, suspended=False)
-    return respondJson(Code.OK, dict(
-        reviews=list(
-            map(
-                lambda review: dict(
-                    id=review.id.hex,
-                    courseId=review.course.get_id,
-                    review=review.review,
-                    reviewer=review.creator.get_dict(),
-                    score=review.score,
-                    canBeDeleted=(
-                        request.user.is_authenticated and review.creator == request.user.profile)
-                ), reviews
-            )
-        )
-    ))
+    reviews = ReviewSerializer.plan(CourseUserReview.objects.filter(
+        course__id=courseID, draft=False, trashed=False, suspended=False)).order_by(*ReviewSerializer.keyset)
+    return respondJson(Code.OK, dict(reviews=ReviewSerializer.serialize(reviews, serializerContext(request))))
 
 
 @csrf_exempt
@@ -158,16 +120,7 @@ def addReviewByCourse(request, courseID):
     score = int(request.POST.get('score', 1))
     review = CourseUserReview.objects.create(
         course=course, review=review,draft=False, creator=request.user.profile, score=score)
-    return respondJson(Code.OK, dict(
-        review=dict(
-            id=review.id.hex,
-            courseId=review.course.get_id,
-            review=review.review,
-            reviewer=review.creator.get_dict(),
-            score=review.score,
-            canBeDeleted=True
-        )
-    ))
+    return respondJson(Code.OK, dict(review=ReviewSerializer.serialize([review], serializerContext(request))[0]))
 
 
 @csrf_exempt
@@ -178,8 +131,9 @@ def deleteReviewById(request: WSGIRequest, reviewID):
         UUID(reviewID)
     except:
         return respondJson(Code.NO, status=400)
-    deleted = CourseUserReview.objects.filter(
-        id=reviewID, creator=request.user.profile).delete()
+    review = CourseUserReview.objects.filter(
+        id=reviewID, creator=request.user.profile).first()
+    deleted = review and unrateObject(CourseUserReview, id=review.id)
     if not deleted:
         return respondJson(Code.NO, error='Review not found', status=404)
     return respondJson(Code.OK)
@@ -214,18 +168,9 @@ def addLessonToUserHistory(request: WSGIRequest):
 @normal_profile_required
 @require_GET
 def getUserLessonHistory(request: WSGIRequest):
-    histories = UserLessonHistory.objects.filter(profile=request.user.profile)
-    return respondJson(Code.OK, dict(
-        histories=list(
-            map(
-                lambda history: dict(
-                    id=history.id.hex,
-                    courseId=history.course().get_id,
-                    lesson=history.lesson.get_dict(),
-                ), histories
-            )
-        )
-    ))
+    histories = LessonHistorySerializer.plan(UserLessonHistory.objects.filter(
+        profile=request.user.profile)).order_by(*LessonHistorySerializer.keyset)
+    return respondJson(Code.OK, dict(histories=LessonHistorySerializer.serialize(histories)))
 
 
 @csrf_exempt
@@ -366,10 +311,9 @@ def getCourseAdmirers(request, courseID):
         id=courseID, trashed=False, draft=False).first()
     if not course:
         return respondJson(Code.NO, error='Course not found', status=404)
-    page = int(request.GET.get('page', 1))
-    size = int(request.GET.get('size', 10))
-    lfrom = (page-1)*size
-    lto = lfrom + size
-    likes = CourseUserLikes.objects.filter(course=course)[lfrom:lto]
-    admirers = list(map(lambda like: like.profile.get_dict(), likes))
-    return respondJson(Code.OK, dict(admirers=admirers))
+    try:
+        likes, cursor = AdmirerSerializer.page(
+            CourseUserLikes.objects.filter(course=course), **pageParams(request))
+    except (InvalidCursor, ValueError):
+        return respondJson(Code.NO, status=400)
+    return respondJson(Code.OK, dict(admirers=list(map(lambda like: like['profile'], likes)), next=cursor))
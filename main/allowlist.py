@@ -0,0 +1,160 @@
+"""
+IP allowlist of GitHub webhook deliveries (main.decorators.github_only).
+
+The CIDR networks GitHub sends hooks from (the hooks list of its meta API) are kept in cache along with when
+they were fetched, without expiry, as the last known good allowlist. Once older than GH_HOOK_IPS_TTL, they are
+refreshed in background by the task queue, and a failed refresh keeps the last known good ones, so that webhook
+deliveries never wait for the GitHub API (except for the very first one, when no allowlist was ever fetched).
+Each process compiles the networks once per fetch into a NetworkMatcher, which checks an address against all
+of them with a binary search over their merged address intervals.
+
+The GH_HOOK_IPS_FIXTURE setting replaces the GitHub API with a local JSON file, for tests.
+"""
+from bisect import bisect_right
+from ipaddress import ip_address, ip_network
+from json import load as json_load
+from time import time
+
+from django.conf import settings
+from django.core.cache import cache
+from requests import get as getRequest
+
+from .env import ASYNC_CLUSTER
+from .methods import addMethodToAsyncQueue, errorLog
+
+HOOK_IPS_CACHE_KEY = "github_hook_ips"
+"""Cache key of the last known good hook networks, with their fetch time"""
+
+HOOK_IPS_REFRESH_LOCK_KEY = "github_hook_ips_refreshing"
+"""Cache key held while a background refresh is queued, so that a burst of deliveries queues it once"""
+
+_MATCHER = dict()
+"""In process compiled matcher memo, by fetch time"""
+
+
+class NetworkMatcher():
+    """Compiled membership checker of a list of CIDR networks.
+    The networks of each IP version are converted into address intervals, sorted and merged where they overlap
+    or adjoin, so that an address is checked in O(log n) by a binary search for the interval starting at or before it.
+    """
+
+    def __init__(self, cidrs: list):
+        """
+        Args:
+            cidrs (list<str>): The CIDR networks, invalid ones are skipped.
+        """
+        intervals = {4: [], 6: []}
+        for cidr in cidrs:
+            try:
+                network = ip_network(str(cidr).strip(), strict=False)
+            except ValueError:
+                continue
+            intervals[network.version].append(
+                (int(network.network_address), int(network.broadcast_address)))
+        self.starts, self.ends = dict(), dict()
+        for version, ranges in intervals.items():
+            merged = []
+            for start, end in sorted(ranges):
+                if merged and start <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            self.starts[version] = list(map(lambda m: m[0], merged))
+            self.ends[version] = list(map(lambda m: m[1], merged))
+
+    def __contains__(self, address) -> bool:
+        """Returns whether the given address (str or ip_address) is in any of the networks, False if it is invalid"""
+        try:
+            address = ip_address(str(address).strip())
+        except ValueError:
+            return False
+        value = int(address)
+        index = bisect_right(self.starts[address.version], value) - 1
+        return index >= 0 and value <= self.ends[address.version][index]
+
+    def __len__(self) -> int:
+        """Returns the number of merged intervals"""
+        return sum(map(len, self.starts.values()))
+
+
+def fetchHookNetworks() -> list:
+    """Fetches the CIDR networks GitHub sends hooks from, from the GitHub meta API, or from GH_HOOK_IPS_FIXTURE if set.
+
+    Raises:
+        ValueError: If no networks were received.
+
+    Returns:
+        list<str>: The CIDR networks
+    """
+    if settings.GH_HOOK_IPS_FIXTURE:
+        with open(settings.GH_HOOK_IPS_FIXTURE, 'r') as file:
+            data = json_load(file)
+    else:
+        data = getRequest(f'{settings.GITHUB_API_URL}/meta',
+                          timeout=settings.GH_HOOK_IPS_TIMEOUT).json()
+    cidrs = data['hooks'] if isinstance(data, dict) else data
+    if not cidrs:
+        raise ValueError(f"No GitHub hook networks received: {data}")
+    return list(map(str, cidrs))
+
+
+def refreshHookAllowlist() -> list:
+    """Fetches the hook networks afresh and publishes them as the last known good allowlist for all processes.
+    Keeps the previous allowlist if fetching fails.
+
+    Returns:
+        list<str>: The fetched CIDR networks, or None if fetching failed
+    """
+    try:
+        cidrs = fetchHookNetworks()
+        cache.set(HOOK_IPS_CACHE_KEY, dict(
+            cidrs=cidrs, fetchedOn=time()), settings.CACHE_ETERNAL)
+        return cidrs
+    except Exception as e:
+        errorLog(e)
+        return None
+    finally:
+        cache.delete(HOOK_IPS_REFRESH_LOCK_KEY)
+
+
+def _queueRefresh():
+    if not cache.add(HOOK_IPS_REFRESH_LOCK_KEY, True, settings.CACHE_MIN):
+        return
+    if ASYNC_CLUSTER:
+        addMethodToAsyncQueue(f"main.allowlist.{refreshHookAllowlist.__name__}")
+    else:
+        refreshHookAllowlist()
+
+
+def hookAllowlist() -> NetworkMatcher:
+    """Returns the compiled allowlist of GitHub hook networks, from process memory if unchanged since compiled.
+    Queues a refresh if it is older than GH_HOOK_IPS_TTL, and fetches it on the spot only if none was ever fetched.
+
+    Returns:
+        NetworkMatcher: The allowlist matcher, empty if the networks were never fetched successfully
+    """
+    known = cache.get(HOOK_IPS_CACHE_KEY, None)
+    if known is None:
+        refreshHookAllowlist()
+        known = cache.get(HOOK_IPS_CACHE_KEY, None) or dict(
+            cidrs=[], fetchedOn=0)
+    elif time() - known['fetchedOn'] > settings.GH_HOOK_IPS_TTL:
+        _queueRefresh()
+    matcher = _MATCHER.get(known['fetchedOn'], None)
+    if matcher is None:
+        matcher = NetworkMatcher(known['cidrs'])
+        _MATCHER.clear()
+        _MATCHER[known['fetchedOn']] = matcher
+    return matcher
+
+
+def isHookAddress(address: str) -> bool:
+    """Returns whether the given address is among the GitHub hook networks
+
+    Args:
+        address (str): The request IP address
+
+    Returns:
+        bool: True if allowed
+    """
+    return address in hookAllowlist()
@@ -0,0 +1,130 @@
+"""
+Asset manifest of the static files precached by the service worker (main.views.ServiceWorker).
+
+The manifest lists the static asset URLs along with a short content hash of each file, and a digest of
+the whole manifest. It is computed once per deployed version (by the preparestatics management command,
+or by the first process to need it), shared via cache, and kept in process memory afterwards, so that
+service worker requests never walk the static directory.
+The per-file hashes let the service worker refetch only the assets that changed between two versions.
+"""
+from hashlib import sha1
+from os import path as ospath
+from os import walk as oswalk
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .env import VERSION
+from .methods import errorLog
+from .strings import URL
+
+ASSET_EXTENSIONS = ('.js', '.css', '.map', '.jpg', '.webp',
+                    '.woff2', '.svg', '.png', '.jpeg')
+"""Extensions of the static files precached by the service worker"""
+
+ASSET_EXCLUDE_DIRS = ('/email/', '/admin/')
+"""Static sub directories never precached by the service worker"""
+
+ASSET_HASH_LENGTH = 12
+
+_MANIFEST = dict()
+"""In process manifest memo, by version"""
+
+
+def assetManifestKey() -> str:
+    """Returns the cache key of the asset manifest of the current version"""
+    return f"asset_manifest_{VERSION}"
+
+
+def isServiceWorkerAsset(path: str) -> bool:
+    """Returns whether the given static path is to be precached by the service worker
+
+    Args:
+        path (str): The static path (starting with /static/)
+
+    Returns:
+        bool: True if precachable
+    """
+    return path.endswith(ASSET_EXTENSIONS) and not any(map(lambda d: d in path, ASSET_EXCLUDE_DIRS))
+
+
+def fileHash(filepath: str) -> str:
+    """Returns the short content hash of the given file
+
+    Args:
+        filepath (str): The absolute file path
+
+    Returns:
+        str: The hexdigest prefix
+    """
+    digest = sha1()
+    with open(filepath, 'rb') as file:
+        for chunk in iter(lambda: file.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:ASSET_HASH_LENGTH]
+
+
+def buildAssetManifest(static_dir: str = None) -> dict:
+    """Walks the static directory once and computes the asset manifest.
+
+    Args:
+        static_dir (str, optional): The static directory to walk. Defaults to BASE_DIR/static.
+
+    Returns:
+        dict: assets (list<str>) sorted asset URLs, hashes (dict<str, str>) content hash of each asset URL,
+            and digest (str) the hash of the whole manifest.
+    """
+    static_dir = static_dir or ospath.join(settings.BASE_DIR, 'static')
+    hashes = dict()
+    for root, _, files in oswalk(static_dir):
+        for file in files:
+            filepath = ospath.join(root, file)
+            path = '/static/' + \
+                ospath.relpath(filepath, static_dir).replace(ospath.sep, '/')
+            if isServiceWorkerAsset(path):
+                hashes[path.replace(
+                    "/static/", settings.STATIC_URL, 1)] = fileHash(filepath)
+    hashes[f"/{URL.OFFLINE}"] = VERSION
+    hashes[f"/{URL.MANIFEST}"] = VERSION
+    assets = sorted(hashes.keys())
+    digest = sha1(''.join(map(lambda a: f"{a}{hashes[a]}", assets)).encode()).hexdigest()[
+        :ASSET_HASH_LENGTH]
+    return dict(assets=assets, hashes=hashes, digest=digest)
+
+
+def prepareAssetManifest(static_dir: str = None) -> dict:
+    """Computes the asset manifest afresh and publishes it for all processes.
+
+    Args:
+        static_dir (str, optional): The static directory to walk. Defaults to BASE_DIR/static.
+
+    Returns:
+        dict: The asset manifest
+    """
+    manifest = buildAssetManifest(static_dir)
+    cache.set(assetManifestKey(), manifest, settings.CACHE_ETERNAL)
+    _MANIFEST[VERSION] = manifest
+    return manifest
+
+
+def assetManifest() -> dict:
+    """Returns the asset manifest of the current version, from process memory, cache,
+    or by computing it if neither has it. Always computed afresh in DEBUG mode, as static files change without version bumps.
+
+    Returns:
+        dict: The asset manifest (see buildAssetManifest)
+    """
+    if settings.DEBUG:
+        return buildAssetManifest()
+    manifest = _MANIFEST.get(VERSION, None)
+    if manifest:
+        return manifest
+    manifest = cache.get(assetManifestKey(), None)
+    if manifest:
+        _MANIFEST[VERSION] = manifest
+        return manifest
+    try:
+        return prepareAssetManifest()
+    except Exception as e:
+        errorLog(e)
+        return dict(assets=[], hashes=dict(), digest=VERSION)
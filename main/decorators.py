@@ -2,7 +2,6 @@ from functools import wraps
 from hashlib import sha256
 from hmac import compare_digest as hmac_compare_digest
 from hmac import new as hmac_new
-from ipaddress import ip_address, ip_network
 from json import loads as json_loads
 from json.decoder import JSONDecodeError
 from urllib.parse import unquote
@@ -22,8 +21,8 @@ from django.shortcuts import render
 from django.utils.encoding import force_bytes
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST, require_GET
-from requests import get as getRequest
 from people.models import User
+from .allowlist import isHookAddress
 from .env import ISTESTING
 from .methods import errorLog, respondJson
 from .strings import Code, Event, Message
@@ -289,7 +288,7 @@ def manager_only(function: callable) -> callable:
 @decDec(csrf_exempt)
 def github_only(function: callable) -> callable:
     """To make sure that the request is received from GitHub, by checking the following:
-        1. The request IP is in the list of GitHub provided IPs.
+        1. The request IP is in the list of GitHub provided IPs (see main.allowlist).
         2. The request header contains the X-Hub-Signature-256 header,
             which is the HMAC-SHA-256 of the GitHub webhook payload.
         3. The request header contains the X-GitHub-Event header
@@ -307,16 +306,10 @@ def github_only(function: callable) -> callable:
     @wraps(function)
     def wrap(request: WSGIRequest, *args, **kwargs):
         if not settings.DEBUG:
-            whitelist = getRequest(
-                f'{settings.GITHUB_API_URL}/meta').json()['hooks']
             real_ip = u'{}'.format(request.META.get('HTTP_X_REAL_IP'))
             if not real_ip or real_ip == 'None':
                 return HttpResponseForbidden('Permission denied 0')
-            client_ip_address = ip_address(real_ip)
-            for valid_ip in whitelist:
-                if client_ip_address in ip_network(valid_ip):
-                    break
-            else:
+            if not isHookAddress(real_ip):
                 return HttpResponseForbidden('Permission denied 1')
 
             header_signature = request.META.get('HTTP_X_HUB_SIGNATURE_256')
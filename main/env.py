@@ -65,6 +65,8 @@ GSUITE_CREDENTIALS_PATH = env('GSUITE_CREDENTIALS_PATH', default=None)
 CDN_URL = env('CDN_URL', default='https://cdn.knotters.org').strip()
 INTERNAL_SHARED_SECRET = env(
     'INTERNAL_SHARED_SECRET', default='secret').strip()
+SERVER_CONCURRENCY = int(env('SERVER_CONCURRENCY', default='8'))
+"""Requests served concurrently by each web server process"""
 
 PROJECTKEY = None if PROJECTKEY == 'none' else PROJECTKEY
 PUBNAME = None if PUBNAME == 'none' else PUBNAME
@@ -46,3 +46,15 @@ class InactiveCompetitionError(Exception):
 class InvalidUserOrProfile(Exception):
     """The profile/user being accessed is not available or restricted or invalid"""
     pass
+
+
+class IllegalMarking(Exception):
+    """The given marking of a submission by a judge is illegal.
+    Raised with (error message, submission id, topic id) as args."""
+    pass
+
+
+class StaleRevision(Exception):
+    """The given revision of an object is no longer the latest one.
+    Raised with the latest revision as the first arg."""
+    pass
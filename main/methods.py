@@ -1,4 +1,6 @@
+from atexit import register as atexit_register
 from base64 import b64decode
+from collections import deque
 from datetime import timedelta
 from json import dumps as json_dumps
 from logging import ERROR as LOG_CODE_ERROR
@@ -9,6 +11,8 @@ from os import walk as oswalk
 from re import compile as re_compile
 from re import findall as re_findall
 from re import sub as re_sub
+from threading import Lock
+from time import monotonic
 from traceback import print_exc
 from uuid import uuid4
 
@@ -16,7 +20,9 @@ from allauth.account.models import EmailAddress
 from django.conf import settings
 from django.core.files.base import ContentFile, File
 from django.core.handlers.wsgi import WSGIRequest
+from django.core.cache import cache
 from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
 from django.db.models.fields.files import ImageFieldFile
 from django.http.response import (HttpResponse, HttpResponseRedirect,
                                   JsonResponse)
@@ -384,6 +390,79 @@ def addMethodToAsyncQueue(methodpath, *args, **kwargs) -> str:
         return False
 
 
+def invalidateOnCommit(invalidate: callable):
+    """Calls the given cache invalidation now, and again after the current transaction (if any) commits,
+    in case the cache was filled from the old state in between.
+
+    Args:
+        invalidate (callable): The invalidation, without arguments
+    """
+    invalidate()
+    transaction.on_commit(invalidate)
+
+
+def compareAndSet(queryset, fields: list, change: callable, attempts: int = 10) -> tuple:
+    """Changes the given fields of the (single) row of a queryset by a compare-and-set of plain values: the fields are read,
+    and written only where they still hold the values read, retried if changed in between. As the database backend
+    translates neither F() expressions nor transactions, this is the way to apply concurrent changes to a row without losing any.
+
+    Args:
+        queryset (QuerySet): The queryset of the row
+        fields (list<str>): The fields to be changed
+        change (callable): Called with the dict of read values of the fields, returns the dict of new values of (some of) them
+        attempts (int, optional): Number of reads before giving up. Defaults to 10.
+
+    Raises:
+        RuntimeError: If the row kept changing through every attempt
+
+    Returns:
+        tuple<dict, dict>: The values read and the new values written, both None if no row matched
+    """
+    for _ in range(attempts):
+        current = queryset.values(*fields).first()
+        if current is None:
+            return None, None
+        values = change(dict(current))
+        if not values or queryset.filter(**current).update(**values):
+            return current, values
+    raise RuntimeError(f"compareAndSet: {queryset.model.__name__} row kept changing")
+
+
+def versionTokens(cacheKeys: list) -> dict:
+    """Returns the version tokens cached under the given keys, in one cache lookup (two if any is missing).
+    A missing token is added afresh rather than assumed, so that anything cached under a version evicted since is never reused.
+
+    Args:
+        cacheKeys (list<str>): The cache keys of the tokens
+
+    Returns:
+        dict<str, str>: The token of each cache key
+    """
+    tokens = cache.get_many(list(cacheKeys))
+    missing = list(filter(lambda k: k not in tokens, cacheKeys))
+    if missing:
+        for key in missing:
+            cache.add(key, uuid4().hex, settings.CACHE_ETERNAL)
+        tokens.update(cache.get_many(missing))
+    return dict(map(lambda k: (k, tokens.get(k, '')), cacheKeys))
+
+
+def bumpVersionTokens(cacheKeys: list, deleteKeys: list = []):
+    """Replaces the version tokens cached under the given keys (and deletes the given keys of cached data along), now and
+    after the current transaction commits (see invalidateOnCommit). To be called after (or within the transaction of)
+    every write to the data versioned by them.
+
+    Args:
+        cacheKeys (list<str>): The cache keys of the tokens
+        deleteKeys (list<str>, optional): The cache keys to be deleted along. Defaults to [].
+    """
+    def bump():
+        cache.set_many(dict(map(lambda k: (k, uuid4().hex), cacheKeys)), settings.CACHE_ETERNAL)
+        if deleteKeys:
+            cache.delete_many(deleteKeys)
+    invalidateOnCommit(bump)
+
+
 def testPathRegex(parampath: str, path: str) -> bool:
     """Tests if given path matches the params based url path.
 
@@ -559,14 +638,96 @@ def group_device_notify(group_s: str, title: str, body: str = None, url: str = N
     ))
 
 
-def addActivity(view, user, request_get, request_post, status):
-    ActivityRecord.objects.create(view_name=view, user=user, request_get=json_dumps(
-        request_get), request_post=json_dumps(request_post), response_status=status)
+_ACTIVITY_BUFFER = deque(maxlen=settings.ACTIVITY_BUFFER_MAX)
+_ACTIVITY_LOCK = Lock()
+_ACTIVITY_LAST_FLUSH = [monotonic()]
+
+_ACTIVITY_SENSITIVE_KEYS = ('password', 'secret', 'token', 'csrf', 'otp')
+
+
+def _activityData(data) -> dict:
+    """Returns a plain dict copy of request data, without values of sensitive looking keys.
+
+    Args:
+        data (QueryDict, dict): The request GET or POST data.
+
+    Returns:
+        dict: The sanitized request data.
+    """
+    try:
+        data = data.dict() if hasattr(data, 'dict') else dict(data)
+    except Exception:
+        return dict()
+    return {key: value for key, value in data.items() if not any(
+        sens in str(key).lower() for sens in _ACTIVITY_SENSITIVE_KEYS)}
+
+
+def addActivities(records: list) -> int:
+    """Inserts buffered activity records in bulk.
+
+    Args:
+        records (list<dict>): List of activity record dicts, as buffered by main.methods.activity.
+
+    Returns:
+        int: The number of records inserted.
+    """
+    return len(ActivityRecord.objects.bulk_create([
+        ActivityRecord(view_name=record['view_name'], user_id=record['user_id'],
+                       request_get=json_dumps(record['request_get'], cls=JsonEncoder),
+                       request_post=json_dumps(record['request_post'], cls=JsonEncoder),
+                       response_status=record['response_status'], createdOn=record['createdOn'])
+        for record in records
+    ], batch_size=settings.ACTIVITY_BUFFER_SIZE))
+
+
+def flushActivities() -> bool:
+    """Drains the in-process activity buffer and queues a single bulk insert task for it.
+
+    Returns:
+        bool: True if any records were queued, otherwise False.
+    """
+    with _ACTIVITY_LOCK:
+        records = list(_ACTIVITY_BUFFER)
+        _ACTIVITY_BUFFER.clear()
+        _ACTIVITY_LAST_FLUSH[0] = monotonic()
+    if not records:
+        return False
+    addMethodToAsyncQueue(
+        f"main.methods.{addActivities.__name__}", records)
+    return True
+
+
+def activity(request: WSGIRequest, response: HttpResponse) -> bool:
+    """Appends an activity record of the given request to the in-process buffer,
+    which is flushed in bulk once ACTIVITY_BUFFER_SIZE records are buffered
+    or ACTIVITY_FLUSH_INTERVAL seconds have passed since the last flush.
+
+    Args:
+        request (WSGIRequest): The request object, already processed by the view.
+        response (HttpResponse): The response object returned for the request.
+
+    Returns:
+        bool: True if the activity was buffered, False if the request is not of an authenticated user.
+    """
+    if not request.user.is_authenticated:
+        return False
+    with _ACTIVITY_LOCK:
+        _ACTIVITY_BUFFER.append(dict(
+            view_name=request.path[:500],
+            user_id=request.user.id,
+            request_get=_activityData(request.GET),
+            request_post=_activityData(request.POST),
+            response_status=response.status_code,
+            createdOn=timezone.now(),
+        ))
+        due = len(_ACTIVITY_BUFFER) >= settings.ACTIVITY_BUFFER_SIZE or (
+            monotonic() - _ACTIVITY_LAST_FLUSH[0]) >= settings.ACTIVITY_FLUSH_INTERVAL
+    if due:
+        flushActivities()
+    return True
 
 
-def activity(request, response):
-    addMethodToAsyncQueue(f"main.methods.{addActivity.__name__}", request.path,
-                          request.user, request.GET.__dict__, request.POST, response.status_code)
+atexit_register(flushActivities)
 
 
 def removeUnverified():
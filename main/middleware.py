@@ -14,7 +14,8 @@ from django.utils.deprecation import MiddlewareMixin
 from django.utils.http import http_date
 
 from .env import ADMINPATH
-from .methods import activity, allowBypassDeactivated, htmlmin, testPathRegex
+from .methods import (activity, allowBypassDeactivated, errorLog, htmlmin,
+                      testPathRegex)
 from .strings import URL, Code, message
 
 
@@ -74,24 +75,25 @@ class MinifyMiddleware(object):
 
 class ActivityMiddleware(object):
     """
-    TODO: To maintain activity record of every authenticated user, for their own enhanced security.
+    To maintain activity record of every authenticated user, for their own enhanced security.
+
+    The view is executed only once per request, and the activity is appended to an in-process buffer
+    (see main.methods.activity), which is flushed to database in bulk.
     """
 
     def __init__(self, get_response) -> None:
         self.get_response = get_response
+        self.skip_paths = (f"/{ADMINPATH}", f"/{URL.SERVICE_WORKER}")
         super().__init__()
 
     def __call__(self, request: WSGIRequest):
-        real_ip = u'{}'.format(request.META.get('HTTP_X_REAL_IP'))
-        if real_ip and real_ip != 'None':
-            client_ip_address = ip_address(real_ip)
-            # print(client_ip_address)
-
-        def addslash(path):
-            return f"/{path}" if not path.startswith('/') else path
-        if not (request.path.startswith(f"/{ADMINPATH}") or list(map(addslash, [URL.SERVICE_WORKER])).__contains__(request.path)):
-            activity(request, self.get_response(request))
-        return self.get_response(request)
+        response = self.get_response(request)
+        if not request.path.startswith(self.skip_paths):
+            try:
+                activity(request, response)
+            except Exception as e:
+                errorLog(e)
+        return response
 
 
 class AuthAccessMiddleware(object):
@@ -0,0 +1,295 @@
+"""
+Precomputed rankings for the global browse lists (main.strings.Browse), as read by main.views.browser.
+
+Each ranked list is backed by a redis sorted set. Trending scores are time-decayed using a
+forward decay: every event adds weight * 2^((t - epoch) / half life) to its member, so that older
+events weigh exponentially less without ever touching existing scores. The epoch is periodically moved
+forward by rescaling all scores once, which keeps them within float range.
+
+New profiles, new projects, latest competitions and recent winners are scored by their timestamps.
+The monthly XP leaderboard keeps raw XP sums in a sorted set per calendar month.
+
+refreshBrowseLists runs as a django-q schedule (see main.schedules), or on demand by the refreshbrowselists management command,
+it reads only the records created since its last run, and then materializes the top members of every
+sorted set into the plain redis lists that main.views.browser reads, in a single pipeline.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .env import REDIS_PREFIX
+from .methods import errorLog
+from .strings import Browse, Code
+
+RANK_HALF_LIFE = timedelta(days=3).total_seconds()
+"""Seconds after which the weight of a trending event halves"""
+
+RANK_REBASE_AFTER = RANK_HALF_LIFE * 10
+"""Seconds after which the decay epoch is moved forward and existing scores are rescaled"""
+
+RANK_LIST_SIZE = 100
+"""Number of top members materialized into each browse list"""
+
+RANK_FIRST_LOOKBACK = timedelta(days=30)
+"""How far back the first refresh reads records, when no cursor exists yet"""
+
+RANK_WEIGHT_ADMIRATION = 5
+RANK_WEIGHT_SNAPSHOT = 3
+
+_EPOCH_KEY = f"{REDIS_PREFIX}browse_rank_epoch"
+_CURSOR_KEY = f"{REDIS_PREFIX}browse_rank_cursor"
+
+TRENDING_TYPES = (
+    Browse.TRENDING_PROJECTS,
+    Browse.TRENDING_CORE,
+    Browse.TRENDING_VERIFIED,
+    Browse.TRENDING_QUICK,
+    Browse.TRENDING_PROFILES,
+    Browse.TRENDING_MENTORS,
+    Browse.TRENDING_MODERATORS,
+)
+"""Browse types ranked by time-decayed scores"""
+
+LATEST_TYPES = (
+    Browse.NEW_PROFILES,
+    Browse.NEW_PROJECTS,
+    Browse.LATEST_COMPETITIONS,
+    Browse.RECENT_WINNERS,
+)
+"""Browse types ranked by timestamps"""
+
+
+def scoreKey(browseType: str) -> str:
+    """Returns the redis key of the sorted set backing the given browse list
+
+    Args:
+        browseType (str): An attribute of main.strings.Browse
+
+    Returns:
+        str: The sorted set key
+    """
+    return f"{REDIS_PREFIX}{browseType}_scores"
+
+
+def monthXPKey(when: datetime = None) -> str:
+    """Returns the redis key of the monthly XP sorted set for the month of given time
+
+    Args:
+        when (datetime, optional): Any time in the month. Defaults to now.
+
+    Returns:
+        str: The sorted set key
+    """
+    when = when or timezone.now()
+    return f"{REDIS_PREFIX}{Browse.HIGHEST_MONTH_XP_PROFILES}_{when.year}_{when.month}"
+
+
+def _epoch(r) -> float:
+    epoch = r.get(_EPOCH_KEY)
+    if epoch is None:
+        epoch = timezone.now().timestamp()
+        r.set(_EPOCH_KEY, epoch, nx=True)
+        return float(r.get(_EPOCH_KEY) or epoch)
+    return float(epoch)
+
+
+def decayedWeight(weight: float, when: datetime, epoch: float) -> float:
+    """Returns the forward-decayed weight of an event
+
+    Args:
+        weight (float): The raw weight of the event
+        when (datetime): The time of the event
+        epoch (float): The current decay epoch timestamp
+
+    Returns:
+        float: The weight to be added to the member's score
+    """
+    return weight * 2 ** ((when.timestamp() - epoch) / RANK_HALF_LIFE)
+
+
+def bumpScores(browseTypes: list, memberID, weight: float = 1, when: datetime = None) -> bool:
+    """Adds a time-decayed weight to a member in the given trending lists.
+    Used for events without timestamps in the database (like admirations).
+
+    Args:
+        browseTypes (list<str>): Trending browse types to update
+        memberID (UUID, str): The id of the ranked object
+        weight (float, optional): The raw weight of the event. Defaults to 1.
+        when (datetime, optional): The time of the event. Defaults to now.
+
+    Returns:
+        bool: True if scores were updated
+    """
+    try:
+        r = settings.REDIS_CLIENT
+        if not r or not browseTypes:
+            return False
+        score = decayedWeight(weight, when or timezone.now(), _epoch(r))
+        pipe = r.pipeline(transaction=False)
+        for browseType in browseTypes:
+            pipe.zincrby(scoreKey(browseType), score, str(memberID))
+        pipe.execute()
+        return True
+    except Exception as e:
+        errorLog(e)
+        return False
+
+
+def _rebase(r, now: float) -> float:
+    """Moves the decay epoch to now, rescaling every trending score once."""
+    epoch = _epoch(r)
+    if now - epoch < RANK_REBASE_AFTER:
+        return epoch
+    factor = 2 ** (-(now - epoch) / RANK_HALF_LIFE)
+    pipe = r.pipeline()
+    for browseType in TRENDING_TYPES:
+        key = scoreKey(browseType)
+        pipe.zunionstore(key, {key: factor})
+        pipe.zremrangebyscore(key, '-inf', 0.001)
+    pipe.set(_EPOCH_KEY, now)
+    pipe.execute()
+    return now
+
+
+def projectTrendingTypes(projectIDs: set) -> dict:
+    """Returns the trending browse types applicable to each of the given projects, in three queries.
+
+    Args:
+        projectIDs (set<UUID>): The base project ids
+
+    Returns:
+        dict<UUID, list<str>>: Browse types for each project id found
+    """
+    from projects.models import CoreProject, FreeProject, Project
+    types = {}
+    for model, browseType in ((FreeProject, Browse.TRENDING_QUICK), (Project, Browse.TRENDING_VERIFIED), (CoreProject, Browse.TRENDING_CORE)):
+        for projID in model.objects.filter(id__in=projectIDs).values_list('id', flat=True):
+            types[projID] = [Browse.TRENDING_PROJECTS, browseType]
+    return types
+
+
+def refreshBrowseLists() -> bool:
+    """Incrementally updates ranking scores from records created since the last run,
+    and materializes the top members of each ranking into the browse lists.
+
+    Returns:
+        bool: True if lists were refreshed
+    """
+    try:
+        from compete.models import Competition, Result
+        from people.models import Profile, ProfileXPRecord
+        from projects.models import CoreProject, FreeProject, Project, Snapshot
+        r = settings.REDIS_CLIENT
+        if not r:
+            return False
+        now = timezone.now()
+        cursor = r.get(_CURSOR_KEY)
+        since = datetime.fromtimestamp(float(cursor), tz=timezone.utc) if cursor else now - RANK_FIRST_LOOKBACK
+        epoch = _rebase(r, now.timestamp())
+
+        pipe = r.pipeline(transaction=False)
+
+        months = set()
+        for profileID, xp, createdOn, is_mentor, is_moderator in ProfileXPRecord.objects.filter(
+            createdOn__gt=since, createdOn__lte=now, xp__gt=0, profile__suspended=False, profile__is_zombie=False
+        ).values_list('profile_id', 'xp', 'createdOn', 'profile__is_mentor', 'profile__is_moderator'):
+            profileID = str(profileID)
+            score = decayedWeight(xp, createdOn, epoch)
+            pipe.zincrby(scoreKey(Browse.TRENDING_PROFILES), score, profileID)
+            if is_mentor:
+                pipe.zincrby(scoreKey(Browse.TRENDING_MENTORS), score, profileID)
+            if is_moderator:
+                pipe.zincrby(scoreKey(Browse.TRENDING_MODERATORS), score, profileID)
+            monthkey = monthXPKey(createdOn)
+            pipe.zincrby(monthkey, xp, profileID)
+            months.add(monthkey)
+        for monthkey in months:
+            pipe.expire(monthkey, int(timedelta(days=62).total_seconds()))
+
+        snapshots = list(Snapshot.objects.filter(created_on__gt=since, created_on__lte=now, suspended=False,
+                                                 base_project__trashed=False, base_project__suspended=False).values_list('base_project_id', 'created_on'))
+        projectTypes = projectTrendingTypes(set(map(lambda s: s[0], snapshots)))
+        for projectID, createdOn in snapshots:
+            score = decayedWeight(RANK_WEIGHT_SNAPSHOT, createdOn, epoch)
+            for browseType in projectTypes.get(projectID, []):
+                pipe.zincrby(scoreKey(browseType), score, str(projectID))
+
+        for profileID, createdOn in Profile.objects.filter(createdOn__gt=since, createdOn__lte=now, is_active=True,
+                                                           suspended=False, is_zombie=False, to_be_zombie=False).values_list('id', 'createdOn'):
+            pipe.zadd(scoreKey(Browse.NEW_PROFILES), {str(profileID): createdOn.timestamp()})
+
+        for projectID, createdOn in FreeProject.objects.filter(createdOn__gt=since, createdOn__lte=now, trashed=False, suspended=False).values_list('id', 'createdOn'):
+            pipe.zadd(scoreKey(Browse.NEW_PROJECTS), {str(projectID): createdOn.timestamp()})
+        for model in (Project, CoreProject):
+            for projectID, approvedOn in model.objects.filter(status=Code.APPROVED, approvedOn__gt=since, approvedOn__lte=now, trashed=False, suspended=False).values_list('id', 'approvedOn'):
+                pipe.zadd(scoreKey(Browse.NEW_PROJECTS), {str(projectID): approvedOn.timestamp()})
+
+        for compID, startAt in Competition.objects.filter(modifiedOn__gt=since, is_draft=False, hidden=False).values_list('id', 'startAt'):
+            pipe.zadd(scoreKey(Browse.LATEST_COMPETITIONS), {str(compID): startAt.timestamp()})
+
+        for resultID, declaredOn in Result.objects.filter(rank=1, competition__resultDeclared=True, competition__hidden=False,
+                                                          competition__resultDeclaredOn__gt=since, competition__resultDeclaredOn__lte=now).values_list('id', 'competition__resultDeclaredOn'):
+            pipe.zadd(scoreKey(Browse.RECENT_WINNERS), {str(resultID): declaredOn.timestamp()})
+
+        for browseType in LATEST_TYPES:
+            pipe.zremrangebyrank(scoreKey(browseType), 0, -(RANK_LIST_SIZE+1))
+        pipe.set(_CURSOR_KEY, now.timestamp())
+        pipe.execute()
+        return materializeBrowseLists(now)
+    except Exception as e:
+        errorLog(e)
+        return False
+
+
+def materializeBrowseLists(now: datetime = None) -> bool:
+    """Writes the top members of every ranking into the browse lists read by main.views.browser,
+    replacing each list atomically.
+
+    Args:
+        now (datetime, optional): The current time, to pick the monthly XP ranking. Defaults to now.
+
+    Returns:
+        bool: True if lists were written
+    """
+    r = settings.REDIS_CLIENT
+    if not r:
+        return False
+    sources = dict(map(lambda b: (b, scoreKey(b)), TRENDING_TYPES + LATEST_TYPES))
+    sources[Browse.HIGHEST_MONTH_XP_PROFILES] = monthXPKey(now)
+    read = r.pipeline(transaction=False)
+    for key in sources.values():
+        read.zrevrange(key, 0, RANK_LIST_SIZE-1)
+    ranked = dict(zip(sources.keys(), read.execute()))
+    write = r.pipeline()
+    for browseType, members in ranked.items():
+        listkey = f"{REDIS_PREFIX}{browseType}"
+        write.delete(listkey)
+        if members:
+            write.rpush(listkey, *members)
+    write.execute()
+    return True
+
+
+def forgetMember(memberID) -> bool:
+    """Removes a deleted/suspended object from every ranking, so that it does not surface again.
+
+    Args:
+        memberID (UUID, str): The id of the ranked object
+
+    Returns:
+        bool: True if removed
+    """
+    try:
+        r = settings.REDIS_CLIENT
+        if not r:
+            return False
+        pipe = r.pipeline(transaction=False)
+        for browseType in TRENDING_TYPES + LATEST_TYPES:
+            pipe.zrem(scoreKey(browseType), str(memberID))
+        pipe.zrem(monthXPKey(), str(memberID))
+        pipe.execute()
+        return True
+    except Exception as e:
+        errorLog(e)
+        return False
@@ -0,0 +1,287 @@
+"""
+Maintained rating aggregates of articles, projects and courses.
+
+Instead of scanning every rating row of an object to compute its average, the count and the sum of scores
+of its ratings are kept per whole score bucket in management.models.RatingAggregate, which also gives the
+histogram of its ratings. Aggregates are updated by a compare-and-set of their plain values (see
+main.methods.compareAndSet), as the database backend translates no F() increments, by the post_save and post_delete
+receivers of the rating models, so that every rating row written or deleted (by the views, the admin, or by cascade)
+is counted exactly once, and the summaries derived from them are cached until the next update.
+
+The rebuildratings management command recomputes all aggregates from the rating rows, to populate them once
+for existing ratings, or to repair them if they ever drift.
+"""
+from math import ceil
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from management.models import RatingAggregate
+
+from .methods import compareAndSet, invalidateOnCommit
+
+
+class RatingOf():
+    """Types of rated objects"""
+    ARTICLE = "article"
+    PROJECT = "project"
+    COURSE = "course"
+
+    ALL = (ARTICLE, PROJECT, COURSE)
+
+
+def ratingSummaryKey(kind: str, objectID) -> str:
+    """Returns the cache key of the rating summary of an object
+
+    Args:
+        kind (str): An attribute of RatingOf
+        objectID (UUID, str): The id of the rated object
+
+    Returns:
+        str: The cache key
+    """
+    return f"rating_summary_{kind}_{objectID}"
+
+
+def ratingBucket(score: float) -> int:
+    """Returns the histogram bucket of a score, i.e. the score rounded up to a whole number.
+
+    Args:
+        score (float): The rating score
+
+    Returns:
+        int: The bucket
+    """
+    return max(1, ceil(score))
+
+
+def _summary(buckets: list) -> dict:
+    histogram = dict()
+    count, total = 0, 0
+    for bucket, bcount, btotal in buckets:
+        if bcount > 0:
+            histogram[bucket] = bcount
+            count += bcount
+            total += btotal
+    return dict(count=count, total=total, histogram=histogram)
+
+
+def _bump(kind: str, objectID, score: float, by: int):
+    bucket = ratingBucket(score)
+    rows = RatingAggregate.objects.filter(
+        kind=kind, objectID=objectID, bucket=bucket)
+
+    def change(current):
+        # never below zero, for a rating removed before the aggregates were ever rebuilt
+        count = max(current['count'] + by, 0)
+        return dict(count=count, total=max(current['total'] + by*score, 0) if count else 0)
+    _, values = compareAndSet(rows, ['count', 'total'], change)
+    if values is None:
+        _, created = RatingAggregate.objects.get_or_create(
+            kind=kind, objectID=objectID, bucket=bucket, defaults=dict(count=max(by, 0), total=max(by, 0)*score))
+        if not created:
+            compareAndSet(rows, ['count', 'total'], change)
+
+
+def recordRating(kind: str, objectID, score: float = None, previous: float = None) -> bool:
+    """Updates the aggregates of an object for a rating being added, changed or removed.
+    Called by the post_save and post_delete receivers of the rating models (see ratingSaved).
+
+    Args:
+        kind (str): An attribute of RatingOf
+        objectID (UUID, str): The id of the rated object
+        score (float, optional): The new score of the rating. Defaults to None, if the rating was removed.
+        previous (float, optional): The previous score of the rating. Defaults to None, if the rating is new.
+
+    Returns:
+        bool: True if the aggregates changed
+    """
+    if score == previous:
+        return False
+    if previous is not None:
+        _bump(kind, objectID, previous, -1)
+    if score is not None:
+        _bump(kind, objectID, score, 1)
+    cacheKey = ratingSummaryKey(kind, objectID)
+    invalidateOnCommit(lambda: cache.delete(cacheKey))
+    return True
+
+
+def previousScore(instance) -> float:
+    """Returns the stored score of a rating about to be saved, for its post_save receiver to update the aggregates by the change.
+    To be called by the pre_save receivers of the rating models.
+
+    Args:
+        instance (Model): The rating being saved
+
+    Returns:
+        float: The stored score, None if the rating is new
+    """
+    if instance._state.adding:
+        return None
+    return type(instance).objects.filter(id=instance.id).values_list('score', flat=True).first()
+
+
+def ratingSaved(kind: str, objectID, instance, created: bool) -> bool:
+    """Updates the aggregates of an object for a rating saved, with the previous score remembered by its pre_save receiver.
+    To be called by the post_save receivers of the rating models.
+
+    Args:
+        kind (str): An attribute of RatingOf
+        objectID (UUID, str): The id of the rated object
+        instance (Model): The saved rating
+        created (bool): Whether the rating was created
+
+    Returns:
+        bool: True if the aggregates changed
+    """
+    previous = None if created else getattr(instance, '_previousScore', None)
+    if not created and previous is None:
+        return False
+    return recordRating(kind, objectID, instance.score, previous)
+
+
+def rateObject(model, objectField: str, obj, profileField: str, profile, score: float) -> bool:
+    """Creates or updates the rating of an object by a profile, in one transaction. The aggregates of the object are
+    updated by the receivers of the rating model.
+
+    Args:
+        model (Model): The rating model (e.g. howto.models.ArticleUserRating)
+        objectField (str): The field of the rating model referring to the rated object
+        obj (Model): The rated object
+        profileField (str): The field of the rating model referring to the rater
+        profile (Profile): The rater
+        score (float): The score
+
+    Returns:
+        bool: True if the rating changed
+    """
+    with transaction.atomic():
+        rating = model.objects.select_for_update().filter(
+            **{objectField: obj, profileField: profile}).first()
+        if rating is None:
+            model.objects.create(
+                **{objectField: obj, profileField: profile}, score=score)
+            return True
+        if rating.score == score:
+            return False
+        rating.score = score
+        rating.save(update_fields=['score'])
+        return True
+
+
+def unrateObject(model, **lookup) -> int:
+    """Deletes the matching ratings, in one transaction. Their contribution to the aggregates of the rated objects is removed
+    by the post_delete receivers of the rating models (as for ratings deleted by cascade), calling recordRating.
+
+    Args:
+        model (Model): The rating model (e.g. howto.models.ArticleUserRating)
+        **lookup: Filters of the ratings to be deleted.
+
+    Returns:
+        int: The number of ratings deleted
+    """
+    with transaction.atomic():
+        _, deleted = model.objects.filter(**lookup).delete()
+        return deleted.get(model._meta.label, 0)
+
+
+def ratingSummary(kind: str, objectID) -> dict:
+    """Returns the rating summary of an object, without scanning its ratings.
+
+    Args:
+        kind (str): An attribute of RatingOf
+        objectID (UUID, str): The id of the rated object
+
+    Returns:
+        dict: count (int) number of ratings, total (float) sum of scores, and histogram (dict<int, int>) number of ratings by bucket
+    """
+    cacheKey = ratingSummaryKey(kind, objectID)
+    summary = cache.get(cacheKey, None)
+    if summary is None:
+        summary = _summary(RatingAggregate.objects.filter(
+            kind=kind, objectID=objectID).values_list('bucket', 'count', 'total'))
+        cache.set(cacheKey, summary, settings.CACHE_MAX)
+    return summary
+
+
+def ratingSummaries(kind: str, objectIDs: list) -> dict:
+    """Returns the rating summaries of many objects of the same kind, in at most one query.
+
+    Args:
+        kind (str): An attribute of RatingOf
+        objectIDs (list<UUID>): The ids of the rated objects
+
+    Returns:
+        dict<UUID, dict>: The rating summary (see ratingSummary) of each object id
+    """
+    keys = dict(map(lambda o: (ratingSummaryKey(kind, o), o), objectIDs))
+    summaries = dict(map(lambda k: (keys[k[0]], k[1]), cache.get_many(
+        list(keys.keys())).items()))
+    missing = list(filter(lambda o: o not in summaries, objectIDs))
+    if missing:
+        buckets = dict(map(lambda o: (o, []), missing))
+        for objectID, bucket, count, total in RatingAggregate.objects.filter(kind=kind, objectID__in=missing).values_list('objectID', 'bucket', 'count', 'total'):
+            buckets[objectID].append((bucket, count, total))
+        fresh = dict(map(lambda o: (o, _summary(buckets[o])), missing))
+        cache.set_many(dict(map(lambda o: (ratingSummaryKey(
+            kind, o), fresh[o]), missing)), settings.CACHE_MAX)
+        summaries.update(fresh)
+    return summaries
+
+
+def averageRating(summary: dict, scale: int = 2, digits: int = 1) -> float:
+    """Returns the average score of a rating summary, divided by the given scale.
+
+    Args:
+        summary (dict): The rating summary (see ratingSummary)
+        scale (int, optional): The divisor of the average. Defaults to 2, i.e. out of 5 for scores out of 10.
+        digits (int, optional): Decimal digits to round to. Defaults to 1.
+
+    Returns:
+        float: The scaled average, 0.0 if there are no ratings
+    """
+    if not summary['count']:
+        return 0.0
+    return round(summary['total']/(scale*summary['count']), digits)
+
+
+def _ratingSources() -> dict:
+    from howto.models import ArticleUserRating
+    from learn.models import CourseUserReview
+    from projects.models import ProjectUserRating
+    return {
+        RatingOf.ARTICLE: ArticleUserRating.objects.values_list('article_id', 'score'),
+        RatingOf.PROJECT: ProjectUserRating.objects.values_list('base_project_id', 'score'),
+        RatingOf.COURSE: CourseUserReview.objects.values_list('course_id', 'score'),
+    }
+
+
+def rebuildRatings(batch: int = 1000) -> dict:
+    """Recomputes the rating aggregates of every rated object from its rating rows.
+
+    Args:
+        batch (int, optional): Number of rating rows loaded at once. Defaults to 1000.
+
+    Returns:
+        dict<str, int>: Number of rated objects per RatingOf type
+    """
+    counts = dict()
+    for kind, ratings in _ratingSources().items():
+        buckets = dict()
+        for objectID, score in ratings.iterator(chunk_size=batch):
+            bucket = buckets.setdefault(
+                (objectID, ratingBucket(score)), [0, 0])
+            bucket[0] += 1
+            bucket[1] += score
+        with transaction.atomic():
+            stale = list(RatingAggregate.objects.filter(
+                kind=kind).values_list('objectID', flat=True).distinct())
+            RatingAggregate.objects.filter(kind=kind).delete()
+            RatingAggregate.objects.bulk_create(list(map(lambda b: RatingAggregate(
+                kind=kind, objectID=b[0][0], bucket=b[0][1], count=b[1][0], total=b[1][1]), buckets.items())), batch_size=batch)
+        objectIDs = set(map(lambda b: b[0], buckets.keys()))
+        cache.delete_many(list(map(lambda o: ratingSummaryKey(
+            kind, o), objectIDs.union(stale))))
+        counts[kind] = len(objectIDs)
+    return counts
@@ -0,0 +1,25 @@
+"""
+Periodic tasks of the task cluster (django-q), registered as its schedules by the registerschedules management command,
+run by the deploy workflows after migrations, so that they are kept in step with the code on every release.
+"""
+from django_q.models import Schedule
+
+SCHEDULES = {
+    "main.webhooks.drainDueDeliveries": dict(schedule_type=Schedule.MINUTES, minutes=1),
+    "main.rankings.refreshBrowseLists": dict(schedule_type=Schedule.MINUTES, minutes=5),
+}
+"""Options of the schedule of each periodic task, by its path"""
+
+
+def registerSchedules() -> dict:
+    """Creates or updates the schedule of each periodic task in SCHEDULES, named by its path.
+
+    Returns:
+        dict<str, bool>: Whether the schedule of each task was created (else updated), by its path
+    """
+    registered = dict()
+    for func, options in SCHEDULES.items():
+        _, created = Schedule.objects.update_or_create(
+            name=func, defaults=dict(func=func, repeats=-1, **options))
+        registered[func] = created
+    return registered
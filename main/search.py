@@ -0,0 +1,400 @@
+"""
+Search index for profiles, projects, competitions and articles, used by every browseSearch view.
+
+Documents are tokenized into lowercase words, and every prefix of every word is stored in a redis sorted set
+per document type, with the weight of the field it came from as score. A search intersects the sorted sets
+of its query tokens for all document types in a single pipeline, giving ranked ids per type.
+
+The index is kept up to date via post_save/post_delete receivers of each subapplication, which queue
+indexDocument/removeDocument, also on changes of the indexed relations (topics, tags) and of the users named in documents.
+Relations created in bulk (bulk_create, queryset updates) are re-indexed by their callers. The rebuildsearchindex management command builds the index from scratch,
+and until it has been built once, searchIndex returns None so that the views fall back to database queries.
+"""
+from re import compile as re_compile
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .env import REDIS_PREFIX
+from .methods import addMethodToAsyncQueue, errorLog
+
+
+class SearchDoc():
+    """Types of searchable documents"""
+    PROFILE = "profile"
+    PROJECT = "project"
+    COMPETITION = "competition"
+    ARTICLE = "article"
+
+    ALL = (PROFILE, PROJECT, COMPETITION, ARTICLE)
+
+
+SEARCH_MIN_PREFIX = 2
+"""Shortest indexed prefix, shorter query tokens are ignored"""
+
+SEARCH_MAX_PREFIX = 20
+"""Longest indexed prefix, longer tokens are matched by their first SEARCH_MAX_PREFIX characters"""
+
+SEARCH_HITS = 50
+"""Maximum ranked hits returned per document type"""
+
+_TOKEN = re_compile(r"[^\W_]+")
+_READY_KEY = f"{REDIS_PREFIX}search_ready"
+
+
+def tokenize(text: str) -> list:
+    """Splits text into lowercase word tokens
+
+    Args:
+        text (str): The text to tokenize
+
+    Returns:
+        list<str>: The tokens
+    """
+    return _TOKEN.findall(str(text or "").lower())
+
+
+def prefixKey(doctype: str, prefix: str) -> str:
+    """Returns the redis key of the sorted set of documents containing the given prefix
+
+    Args:
+        doctype (str): An attribute of SearchDoc
+        prefix (str): The token prefix
+
+    Returns:
+        str: The sorted set key
+    """
+    return f"{REDIS_PREFIX}search_{doctype}_{prefix}"
+
+
+def _docKey(doctype: str, docID: str) -> str:
+    return f"{REDIS_PREFIX}search_doc_{doctype}_{docID}"
+
+
+def documentPrefixes(fields: list) -> dict:
+    """Returns the weighted prefixes of a document.
+    A prefix takes the highest weight among the fields it occurs in, doubled if it is a whole word.
+
+    Args:
+        fields (list<tuple<str, int>>): (text, weight) pairs of the document
+
+    Returns:
+        dict<str, int>: Weight of each prefix
+    """
+    prefixes = dict()
+    for text, weight in fields:
+        for token in tokenize(text):
+            token = token[:SEARCH_MAX_PREFIX]
+            for end in range(SEARCH_MIN_PREFIX, len(token)+1):
+                prefix = token[:end]
+                score = weight * 2 if end == len(token) else weight
+                if prefixes.get(prefix, 0) < score:
+                    prefixes[prefix] = score
+    return prefixes
+
+
+PROFILE_INDEXED_FIELDS = ('user', 'nickname', 'is_active', 'suspended', 'to_be_zombie', 'is_zombie')
+"""Fields of Profile its document depends upon, other than its user's and its topics' and tags' (see people.receivers.on_profile_index)"""
+
+
+def _profileFields(profile) -> list:
+    if not profile.is_active or profile.suspended or profile.to_be_zombie or profile.is_zombie:
+        return None
+    return [
+        (profile.user.first_name, 3),
+        (profile.user.last_name, 3),
+        (profile.nickname, 3),
+        (profile.user.email.split('@')[0], 1),
+        *map(lambda name: (name, 2), profile.getTopicsData().values_list('topic__name', flat=True)),
+        *map(lambda name: (name, 2), profile.tags.values_list('name', flat=True)),
+    ]
+
+
+def _projectFields(project) -> list:
+    if project.trashed or project.suspended or not project.is_approved():
+        return None
+    return [
+        (project.name, 3),
+        (project.get_nickname(), 3),
+        (project.creator.user.first_name, 2),
+        (project.creator.user.last_name, 2),
+        (project.creator.nickname, 2),
+        (project.category.name, 2),
+        (project.license.name, 1),
+        (project.description, 1),
+        *map(lambda name: (name, 2), project.topics.values_list('name', flat=True)),
+        *map(lambda name: (name, 2), project.tags.values_list('name', flat=True)),
+    ]
+
+
+def _competitionFields(competition) -> list:
+    if competition.hidden or competition.is_draft:
+        return None
+    return [
+        (competition.title, 3),
+        (competition.nickname, 3),
+        (competition.tagline, 2),
+        (competition.shortdescription, 1),
+        (competition.creator.user.first_name, 1),
+        (competition.creator.user.last_name, 1),
+        *map(lambda name: (name, 2), competition.topics.values_list('name', flat=True)),
+    ]
+
+
+def _articleFields(article) -> list:
+    if article.is_draft:
+        return None
+    return [
+        (article.heading, 3),
+        (article.nickname, 3),
+        (article.subheading, 2),
+        (article.author.user.first_name, 2),
+        (article.author.user.last_name, 2),
+        (article.author.nickname, 2),
+        *map(lambda name: (name, 2), article.topics.values_list('name', flat=True)),
+        *map(lambda name: (name, 2), article.tags.values_list('name', flat=True)),
+    ]
+
+
+def _documentSources() -> dict:
+    from compete.models import Competition
+    from howto.models import Article
+    from people.models import Profile
+    from projects.models import BaseProject
+    return {
+        SearchDoc.PROFILE: (Profile.objects.select_related('user'), _profileFields),
+        SearchDoc.PROJECT: (BaseProject.objects.select_related('creator__user', 'category', 'license'), _projectFields),
+        SearchDoc.COMPETITION: (Competition.objects.select_related('creator__user'), _competitionFields),
+        SearchDoc.ARTICLE: (Article.objects.select_related('author__user'), _articleFields),
+    }
+
+
+def _writeDocument(r, doctype: str, docID: str, prefixes: dict):
+    """Replaces the indexed prefixes of a document"""
+    dockey = _docKey(doctype, docID)
+    old = r.smembers(dockey)
+    pipe = r.pipeline()
+    for prefix in old.difference(prefixes.keys()):
+        pipe.zrem(prefixKey(doctype, prefix), docID)
+    for prefix, score in prefixes.items():
+        pipe.zadd(prefixKey(doctype, prefix), {docID: score})
+    pipe.delete(dockey)
+    if prefixes:
+        pipe.sadd(dockey, *prefixes.keys())
+    pipe.execute()
+
+
+def indexDocument(doctype: str, docID) -> bool:
+    """Indexes (or re-indexes) a document from its current database state.
+    Documents that should not be searchable (drafts, trashed, suspended, etc.) are removed from the index.
+
+    Args:
+        doctype (str): An attribute of SearchDoc
+        docID (UUID, str): The id of the document's model instance
+
+    Returns:
+        bool: True if the index was updated
+    """
+    try:
+        r = settings.REDIS_CLIENT
+        if not r:
+            return False
+        queryset, fields = _documentSources()[doctype]
+        instance = queryset.filter(id=docID).first()
+        _writeDocument(r, doctype, str(docID), documentPrefixes(
+            (instance and fields(instance)) or []))
+        return True
+    except Exception as e:
+        errorLog(e)
+        return False
+
+
+def removeDocument(doctype: str, docID) -> bool:
+    """Removes a document from the index
+
+    Args:
+        doctype (str): An attribute of SearchDoc
+        docID (UUID, str): The id of the deleted model instance
+
+    Returns:
+        bool: True if the index was updated
+    """
+    try:
+        r = settings.REDIS_CLIENT
+        if not r:
+            return False
+        _writeDocument(r, doctype, str(docID), dict())
+        return True
+    except Exception as e:
+        errorLog(e)
+        return False
+
+
+def queueIndexDocument(doctype: str, docID) -> bool:
+    """Queues indexDocument for the given document, to keep saves fast.
+
+    Args:
+        doctype (str): An attribute of SearchDoc
+        docID (UUID, str): The id of the document's model instance
+
+    Returns:
+        bool: True if queued
+    """
+    return bool(addMethodToAsyncQueue(f"main.search.{indexDocument.__name__}", doctype, str(docID)))
+
+
+def queueIndexRelation(doctype: str, instance, action: str, reverse: bool, pk_set) -> bool:
+    """Queues indexDocument for the documents whose indexed relations (topics, tags) changed, from an m2m_changed signal.
+
+    Args:
+        doctype (str): An attribute of SearchDoc
+        instance (Model): The instance of the signal
+        action (str): The action of the signal
+        reverse (bool): Whether the instance is the related object (e.g. the topic) rather than the document
+        pk_set (set): The ids of the related objects, or documents if reverse
+
+    Returns:
+        bool: True if any were queued
+    """
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return False
+    docIDs = (pk_set or []) if reverse else [instance.id]
+    for docID in docIDs:
+        queueIndexDocument(doctype, docID)
+    return bool(docIDs)
+
+
+def indexUserDocuments(userID) -> int:
+    """Re-indexes the documents naming a user (their profile, and the projects, competitions and articles they created),
+    after a change of the user's name or email.
+
+    Args:
+        userID (UUID, str): The id of the user
+
+    Returns:
+        int: Number of documents re-indexed
+    """
+    from compete.models import Competition
+    from howto.models import Article
+    from people.models import Profile
+    from projects.models import BaseProject
+    profileID = Profile.objects.filter(user__id=userID).values_list('id', flat=True).first()
+    if not profileID:
+        return 0
+    documents = [(SearchDoc.PROFILE, profileID),
+                 *map(lambda docID: (SearchDoc.PROJECT, docID), BaseProject.objects.filter(
+                     creator__id=profileID).values_list('id', flat=True)),
+                 *map(lambda docID: (SearchDoc.COMPETITION, docID), Competition.objects.filter(
+                     creator__id=profileID).values_list('id', flat=True)),
+                 *map(lambda docID: (SearchDoc.ARTICLE, docID), Article.objects.filter(
+                     author__id=profileID).values_list('id', flat=True))]
+    return len(list(filter(lambda d: indexDocument(*d), documents)))
+
+
+def queueIndexUserDocuments(userID) -> bool:
+    """Queues indexUserDocuments for the given user.
+
+    Args:
+        userID (UUID, str): The id of the user
+
+    Returns:
+        bool: True if queued
+    """
+    return bool(addMethodToAsyncQueue(f"main.search.{indexUserDocuments.__name__}", str(userID)))
+
+
+def queueRemoveDocument(doctype: str, docID) -> bool:
+    """Queues removeDocument for the given document.
+
+    Args:
+        doctype (str): An attribute of SearchDoc
+        docID (UUID, str): The id of the deleted model instance
+
+    Returns:
+        bool: True if queued
+    """
+    return bool(addMethodToAsyncQueue(f"main.search.{removeDocument.__name__}", doctype, str(docID)))
+
+
+def rebuildIndex(batch: int = 500) -> dict:
+    """Indexes all documents of every type, and marks the index as ready for searches.
+
+    Args:
+        batch (int, optional): Number of instances loaded at once. Defaults to 500.
+
+    Returns:
+        dict<str, int>: Number of searchable documents indexed per type
+    """
+    r = settings.REDIS_CLIENT
+    counts = dict()
+    for doctype, (queryset, fields) in _documentSources().items():
+        counts[doctype] = 0
+        for instance in queryset.iterator(chunk_size=batch):
+            docfields = fields(instance)
+            _writeDocument(r, doctype, str(instance.id),
+                           documentPrefixes(docfields or []))
+            counts[doctype] += 1 if docfields else 0
+    r.set(_READY_KEY, 1)
+    return counts
+
+
+def searchIndex(query: str) -> dict:
+    """Looks up the query in the index for all document types at once.
+    Every query token must match a prefix of some word of a document, hits are ranked by summed weights.
+
+    Args:
+        query (str): The search query text
+
+    Returns:
+        dict<str, list<str>>: Ranked document ids for each SearchDoc type
+        None: If the index is unavailable, or the query has no indexable token, so that the caller should query the database instead
+    """
+    try:
+        r = settings.REDIS_CLIENT
+        if not r:
+            return None
+        tokens = sorted(set(map(lambda t: t[:SEARCH_MAX_PREFIX], filter(
+            lambda t: len(t) >= SEARCH_MIN_PREFIX, tokenize(query)))))
+        if not tokens:
+            return None
+        cachekey = f"search_index_{'_'.join(tokens)}"
+        hits = cache.get(cachekey, None)
+        if hits is not None:
+            return hits
+        pipe = r.pipeline()
+        pipe.exists(_READY_KEY)
+        for doctype in SearchDoc.ALL:
+            if len(tokens) == 1:
+                pipe.zrevrange(prefixKey(doctype, tokens[0]), 0, SEARCH_HITS-1)
+            else:
+                tmpkey = f"{REDIS_PREFIX}search_tmp_{uuid4().hex}"
+                pipe.zinterstore(tmpkey, list(
+                    map(lambda t: prefixKey(doctype, t), tokens)), aggregate='SUM')
+                pipe.zrevrange(tmpkey, 0, SEARCH_HITS-1)
+                pipe.delete(tmpkey)
+        results = pipe.execute()
+        if not results[0]:
+            return None
+        step = 1 if len(tokens) == 1 else 3
+        hits = dict(map(lambda i: (SearchDoc.ALL[i], results[1 + i*step + step//2]), range(len(SearchDoc.ALL))))
+        cache.set(cachekey, hits, settings.CACHE_INSTANT)
+        return hits
+    except Exception as e:
+        errorLog(e)
+        return None
+
+
+def rankedByHits(queryset, hits: list, limit: int) -> list:
+    """Orders the instances of a queryset filtered by search hits in the ranked order of hits.
+
+    Args:
+        queryset (QuerySet): Instances whose ids are among the hits
+        hits (list<str>): Ranked ids from searchIndex
+        limit (int): Maximum instances to return
+
+    Returns:
+        list: The ordered instances
+    """
+    rank = dict(map(lambda h: (h[1], h[0]), enumerate(hits)))
+    return sorted(queryset, key=lambda x: rank.get(str(x.id), len(rank)))[:int(limit)]
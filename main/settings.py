@@ -89,7 +89,7 @@ MIDDLEWARE = [
     'main.middleware.TwoFactorMiddleware',
     "django.contrib.messages.middleware.MessageMiddleware",
     'csp.middleware.CSPMiddleware',
-    # "main.middleware.ActivityMiddleware",
+    "main.middleware.ActivityMiddleware",
     # "main.middleware.AuthAccessMiddleware",
     "main.middleware.MinifyMiddleware",
     "main.middleware.MessageFilterMiddleware",
@@ -233,6 +233,20 @@ CACHE_ETERNAL = CACHE_MAX * 12 * 6
 
 CACHE_MINI = CACHE_MIN
 
+ACTIVITY_BUFFER_SIZE = 200
+ACTIVITY_BUFFER_MAX = ACTIVITY_BUFFER_SIZE * 10
+ACTIVITY_FLUSH_INTERVAL = CACHE_INSTANT * 2
+
+SEARCH_CONCURRENCY = env.SERVER_CONCURRENCY
+"""Searches each web server process runs the verticals of in parallel (main.views.search_results), further ones run them inline"""
+SEARCH_VERTICAL_TIMEOUT = 3
+
+SNAPSHOTS_TIMELINE_SIZE = 300
+
+CERT_RENDER_CHUNK = 50
+"""Certificates each queued rendering task renders (compete.methods.queueCertificateChunks)"""
+CERT_LAZY_RENDER = True
+
 SOCIALACCOUNT_PROVIDERS = {
     'google': {
         "VERIFIED_EMAIL": True,
@@ -388,6 +402,20 @@ SENDER_API_URL_GRPS = "https://api.sender.net/v2/groups"
 
 GITHUB_API_URL = "https://api.github.com"
 GH_HOOK_SECRET = env.GH_HOOK_SECRET
+GH_HOOK_IPS_TTL = CACHE_LONG
+"""Seconds after which the GitHub hook IP allowlist (main.allowlist) is refreshed in background"""
+GH_HOOK_IPS_TIMEOUT = 5
+"""Seconds to wait for the GitHub meta API while refreshing the hook IP allowlist"""
+GH_HOOK_IPS_FIXTURE = None
+"""Path of a JSON file of hook CIDRs (a list, or GitHub meta API response), used instead of the GitHub meta API (e.g. in tests)"""
+GH_HOOK_MAX_ATTEMPTS = 6
+"""Attempts after which a webhook delivery failing with errors is given up (main.webhooks)"""
+GH_HOOK_RETRY_DELAY = 30
+"""Seconds before retrying a webhook delivery after its first failed attempt, doubled after each further one"""
+GH_HOOK_CLAIM_TIMEOUT = CACHE_MIN
+"""Seconds after which a webhook delivery claimed for processing, but neither done nor failed since, may be claimed again"""
+GH_HOOK_METRICS_WINDOW = 3600
+"""Seconds over which webhook delivery throughput and latency are measured"""
 
 GOOGLE_RECAPTCHA_KEY = env.RECAPTCHA_KEY
 GOOGLE_RECAPTCHA_SECRET = env.RECAPTCHA_SECRET
@@ -230,6 +230,7 @@ class Message():
     SECTION_CREATED =_("Section created successfully.")
     SECTION_DELETED = _("Section deleted successfully.")
     SECTION_UPDATED = _("Section updated successfully.")
+    SECTIONS_CHANGED = _("Sections were changed elsewhere, reload to continue editing.")
     RESULT_DECLARED = _("Results declared!")
     RESULT_NOT_DECLARED = _("Results not declared.")
     RESULT_DECLARING = _("Results declaration in progress")
@@ -248,6 +249,12 @@ class Message():
     SUBMITTED_LATE = _("Submitted, but late.")
     SUBMISSION_TOO_LATE = _("It is too late now.")
     SUBMISSION_MARKING_INVALID = _("Invalid submission markings, try again.")
+    SUBMISSION_MARKING_UNKNOWN = _("Marking of an unknown submission.")
+    SUBMISSION_MARKING_TOPIC = _("Marking of an unknown topic.")
+    SUBMISSION_MARKING_POINTS = _("Marked points out of allowed range.")
+    SUBMISSION_MARKING_DUPLICATE = _("Same topic of a submission marked twice.")
+    SUBMISSION_MARKING_INCOMPLETE = _("Every topic of every submission must be marked.")
+    SUBMISSION_MARKING_SAVED = _("Markings saved")
     SUBMISSION_ERROR = _("Error in submission")
     NO_INTERNAL_MODERATORS = _("No moderators in available your organization")
 
@@ -422,6 +429,15 @@ class Project():
         [code.APPROVED, code.APPROVED.capitalize()],
         [code.REJECTED, code.REJECTED.capitalize()]
     )
+    FREE = "free"
+    VERIFIED = "verified"
+    CORE = "core"
+    PROJECTKINDS = [FREE, VERIFIED, CORE]
+    PROJECTKINDSCHOICES = (
+        [FREE, FREE.capitalize()],
+        [VERIFIED, VERIFIED.capitalize()],
+        [CORE, CORE.capitalize()]
+    )
     PALLETE = 'pallete'
 
 
@@ -623,6 +639,8 @@ class URL():
     def browser(self, type):
         return setPathParams(self.BROWSER, type)
 
+    BROWSER_BATCH = 'browser-batch/'
+
     VERIFY_CAPTCHA = 'captcha/verify'
     DONATE = 'donate/'
     
@@ -0,0 +1,44 @@
+from os import path as ospath
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings, tag
+from main.allowlist import (HOOK_IPS_CACHE_KEY, NetworkMatcher,
+                            hookAllowlist, isHookAddress,
+                            refreshHookAllowlist)
+from main.strings import Code
+
+GITHUB_META_FIXTURE = ospath.join(ospath.dirname(
+    __file__), 'fixtures', 'github_meta.json')
+
+
+@tag(Code.Test.METHOD, Code.Test.REST)
+@override_settings(GH_HOOK_IPS_FIXTURE=GITHUB_META_FIXTURE)
+class HookAllowlistTest(TestCase):
+    def setUp(self) -> None:
+        cache.delete(HOOK_IPS_CACHE_KEY)
+        return super().setUp()
+
+    def test_network_matcher(self):
+        matcher = NetworkMatcher(
+            ["10.0.0.0/24", "10.0.1.0/24", "10.0.0.128/25", "192.168.1.1/32", "invalid", "2001:db8::/32"])
+        self.assertEqual(len(matcher), 3)
+        self.assertTrue("10.0.0.0" in matcher)
+        self.assertTrue("10.0.1.255" in matcher)
+        self.assertFalse("10.0.2.0" in matcher)
+        self.assertTrue("192.168.1.1" in matcher)
+        self.assertFalse("192.168.1.2" in matcher)
+        self.assertFalse("9.255.255.255" in matcher)
+        self.assertTrue("2001:db8::1" in matcher)
+        self.assertFalse("2001:db9::1" in matcher)
+        self.assertFalse("None" in matcher)
+
+    def test_hook_allowlist(self):
+        self.assertTrue(isHookAddress("140.82.115.9"))
+        self.assertTrue(isHookAddress("2606:50c0::10"))
+        self.assertFalse(isHookAddress("127.0.0.1"))
+        self.assertIs(hookAllowlist(), hookAllowlist())
+        known = cache.get(HOOK_IPS_CACHE_KEY)
+        with override_settings(GH_HOOK_IPS_FIXTURE=ospath.join(ospath.dirname(__file__), 'fixtures', 'missing.json')):
+            self.assertIsNone(refreshHookAllowlist())
+        self.assertEqual(cache.get(HOOK_IPS_CACHE_KEY), known)
+        self.assertTrue(isHookAddress("140.82.115.9"))
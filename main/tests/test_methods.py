@@ -1,11 +1,15 @@
 from auth2.tests.utils import getTestPassword
+from unittest import skipUnless
+
+from django.conf import settings
 from django.test import TestCase, tag
 from main.env import BOTMAIL
 from main.methods import *
+from main.methods import _activityData
 from main.strings import Code, Message, classAttrsToDict, setPathParams
 from people.models import Profile, User
 
-from .utils import B64
+from .utils import B64, getRandomStr
 
 
 @tag(Code.Test.METHOD, Code.Test.REST)
@@ -112,3 +116,88 @@ class MainMethodsTest(TestCase):
             else:
                 self.assertEqual(getNumberSuffix(i), 'th')
                 self.assertEqual(getNumberSuffix(i, True), f'{i}th')
+
+    @tag('activities')
+    def test_addActivities(self):
+        from management.models import ActivityRecord
+        records = [dict(view_name=f"/{i}", user_id=self.bot.id, request_get=dict(q=str(i)),
+                        request_post=dict(), response_status=200, createdOn=timezone.now()) for i in range(5)]
+        self.assertEqual(addActivities(records), 5)
+        self.assertEqual(ActivityRecord.objects.filter(user=self.bot).count(), 5)
+        self.assertEqual(_activityData(dict(name='a', password='b', csrfmiddlewaretoken='c')), dict(name='a'))
+
+    @tag('search')
+    def test_searchPrefixes(self):
+        from main.search import documentPrefixes, tokenize
+        self.assertEqual(tokenize("Knotters_bot, Hello-World 42"), ['knotters', 'bot', 'hello', 'world', '42'])
+        prefixes = documentPrefixes([("Knot bot", 3), ("knotters", 1)])
+        self.assertEqual(prefixes['knot'], 6)
+        self.assertEqual(prefixes['kn'], 3)
+        self.assertEqual(prefixes['knotters'], 2)
+        self.assertEqual(prefixes['bot'], 6)
+        self.assertNotIn('k', prefixes)
+
+    @tag('search')
+    def test_searchIndexRelation(self):
+        from main.search import SearchDoc, queueIndexRelation
+        profile = self.bot.profile
+        self.assertFalse(queueIndexRelation(SearchDoc.PROFILE, profile, "pre_add", False, set()))
+        self.assertTrue(queueIndexRelation(SearchDoc.PROFILE, profile, "post_remove", False, set()))
+        self.assertTrue(queueIndexRelation(SearchDoc.PROFILE, profile, "post_add", True, {profile.id}))
+        self.assertFalse(queueIndexRelation(SearchDoc.PROFILE, profile, "post_clear", True, None))
+
+    def test_compareAndSet(self):
+        profile = Profile.objects.get(user=self.bot)
+        Profile.objects.filter(id=profile.id).update(xp=5)
+        rows = Profile.objects.filter(id=profile.id)
+        raced = []
+
+        def change(current):
+            if not raced:
+                # another writer changes the row after it was read
+                raced.append(Profile.objects.filter(id=profile.id).update(xp=7))
+            return dict(xp=current['xp']+1)
+        current, values = compareAndSet(rows, ['xp'], change)
+        self.assertEqual((current, values), (dict(xp=7), dict(xp=8)))
+        self.assertEqual(Profile.objects.get(id=profile.id).xp, 8)
+        self.assertEqual(compareAndSet(Profile.objects.none(), ['xp'], change), (None, None))
+
+
+@tag(Code.Test.METHOD, 'search')
+@skipUnless(settings.REDIS_CLIENT, "requires redis (REDIS_LOCATION)")
+class SearchIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(self) -> None:
+        self.user = User.objects.create_user(email=f"{getRandomStr()}@knotters.org", password=getTestPassword(
+        ), first_name=f"Zq{getRandomStr()}".lower(), last_name="Searchable")
+        self.profile = Profile.objects.get(user=self.user)
+        return super().setUpTestData()
+
+    def setUp(self) -> None:
+        from main.search import _READY_KEY
+        self.ready = settings.REDIS_CLIENT.exists(_READY_KEY)
+        settings.REDIS_CLIENT.set(_READY_KEY, 1)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        from main.search import SearchDoc, _READY_KEY, removeDocument
+        removeDocument(SearchDoc.PROFILE, self.profile.id)
+        if not self.ready:
+            settings.REDIS_CLIENT.delete(_READY_KEY)
+        return super().tearDown()
+
+    def test_index_search_remove(self):
+        from main.search import (SearchDoc, indexDocument, removeDocument,
+                                 searchIndex)
+        self.assertTrue(indexDocument(SearchDoc.PROFILE, self.profile.id))
+        self.assertIn(str(self.profile.id), searchIndex(
+            self.user.first_name)[SearchDoc.PROFILE])
+        self.assertIn(str(self.profile.id), searchIndex(
+            f"{self.user.first_name[:4]} searchab")[SearchDoc.PROFILE])
+        self.assertTrue(removeDocument(SearchDoc.PROFILE, self.profile.id))
+        self.assertNotIn(str(self.profile.id), searchIndex(
+            f"{self.user.first_name} searchable")[SearchDoc.PROFILE])
+        Profile.objects.filter(id=self.profile.id).update(suspended=True)
+        self.assertTrue(indexDocument(SearchDoc.PROFILE, self.profile.id))
+        self.assertNotIn(str(self.profile.id), searchIndex(
+            self.user.last_name)[SearchDoc.PROFILE])
@@ -0,0 +1,64 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from auth2.tests.utils import getTestEmail, getTestName, getTestPassword
+from django.conf import settings
+from django.test import TestCase, override_settings, tag
+from django.utils import timezone
+from main.env import REDIS_PREFIX
+from main.rankings import (_CURSOR_KEY, _EPOCH_KEY, LATEST_TYPES,
+                           TRENDING_TYPES, bumpScores, monthXPKey,
+                           refreshBrowseLists, scoreKey)
+from main.strings import Browse, Code
+from people.models import Profile, User
+
+
+@tag(Code.Test.METHOD)
+class RankingsTest(TestCase):
+
+    @override_settings(REDIS_CLIENT=None)
+    def test_without_redis(self):
+        self.assertFalse(bumpScores([Browse.TRENDING_PROFILES], 'member'))
+        self.assertFalse(refreshBrowseLists())
+
+
+@tag(Code.Test.METHOD)
+@skipUnless(settings.REDIS_CLIENT, "requires redis (REDIS_LOCATION)")
+class RedisRankingsTest(TestCase):
+    def tearDown(self) -> None:
+        settings.REDIS_CLIENT.delete(_CURSOR_KEY, _EPOCH_KEY, monthXPKey(), *map(scoreKey, TRENDING_TYPES + LATEST_TYPES), *map(
+            lambda browseType: f"{REDIS_PREFIX}{browseType}", TRENDING_TYPES + LATEST_TYPES + (Browse.HIGHEST_MONTH_XP_PROFILES,)))
+        return super().tearDown()
+
+    def test_bumpScores(self):
+        r = settings.REDIS_CLIENT
+        self.assertTrue(bumpScores(
+            [Browse.TRENDING_PROFILES, Browse.TRENDING_MENTORS], 'recent', 5))
+        self.assertTrue(bumpScores([Browse.TRENDING_PROFILES], 'older',
+                        5, timezone.now()-timedelta(days=3)))
+        recent = r.zscore(scoreKey(Browse.TRENDING_PROFILES), 'recent')
+        self.assertEqual(
+            r.zscore(scoreKey(Browse.TRENDING_MENTORS), 'recent'), recent)
+        self.assertIsNone(r.zscore(scoreKey(Browse.TRENDING_MENTORS), 'older'))
+        self.assertAlmostEqual(r.zscore(scoreKey(
+            Browse.TRENDING_PROFILES), 'older'), recent/2, delta=recent/100)
+        self.assertTrue(bumpScores([Browse.TRENDING_PROFILES], 'recent', 5))
+        self.assertGreater(
+            r.zscore(scoreKey(Browse.TRENDING_PROFILES), 'recent'), recent)
+        self.assertFalse(bumpScores([], 'recent'))
+
+    def test_refreshBrowseLists(self):
+        r = settings.REDIS_CLIENT
+        profile = Profile.objects.get(user=User.objects.create_user(
+            email=getTestEmail(), password=getTestPassword(), first_name=getTestName()))
+        profile.increaseXP(10, notify=False)
+        self.assertTrue(refreshBrowseLists())
+        self.assertIn(str(profile.id), r.lrange(
+            f"{REDIS_PREFIX}{Browse.NEW_PROFILES}", 0, -1))
+        self.assertIn(str(profile.id), r.lrange(
+            f"{REDIS_PREFIX}{Browse.TRENDING_PROFILES}", 0, -1))
+        monthXP = r.zscore(monthXPKey(), str(profile.id))
+        self.assertGreaterEqual(monthXP, 10)
+        # records already read are not scored again
+        self.assertTrue(refreshBrowseLists())
+        self.assertEqual(r.zscore(monthXPKey(), str(profile.id)), monthXP)
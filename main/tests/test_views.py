@@ -1,4 +1,6 @@
 from json import loads as json_loads
+from threading import Event, current_thread
+from unittest import mock
 
 from auth2.tests.utils import getTestEmail, getTestName, getTestPassword
 from compete.methods import *
@@ -6,10 +8,11 @@ from django.db.models.query import QuerySet
 from django.http import (HttpResponse, HttpResponseNotFound,
                          HttpResponseRedirect)
 from django.http.response import HttpResponseBadRequest
-from django.test import Client, TestCase, tag
+from django.test import Client, TestCase, override_settings, tag
+from main import views as mainviews
+from main.assets import assetManifest
 from main.env import BOTMAIL, PUBNAME, SITE, VERSION
 from main.strings import DIVISIONS, Code, setPathParams, template, url
-from moderation.models import LocalStorage
 from projects.models import LegalDoc
 
 from .utils import (authroot, docroot, getLegalContent, getLegalName,
@@ -146,9 +149,12 @@ class TestViews(TestCase):
         self.assertEqual(resp['content-type'], Code.APPLICATION_JS)
         self.assertTemplateUsed(resp, template.SW_JS)
         self.assertEqual(resp.context['OFFLINE'], f"/{url.OFFLINE}")
-        store = LocalStorage.objects.get(key=Code.SWASSETS)
+        manifest = assetManifest()
         self.assertEqual(json_loads(
-            resp.context['assets']), json_loads(store.value))
+            resp.context['assets']), manifest['assets'])
+        self.assertEqual(json_loads(
+            resp.context['assetHashes']), manifest['hashes'])
+        self.assertIn(f"/{url.OFFLINE}", manifest['hashes'])
 
     @tag('browse')
     def test_browser(self):
@@ -156,3 +162,62 @@ class TestViews(TestCase):
         resp = client.get(
             follow=True, path=root(url.browser(getRandomStr())))
         self.assertEqual(resp.status_code, HttpResponseBadRequest.status_code)
+
+    @tag('browse')
+    def test_browserBatch(self):
+        client = Client()
+        resp = client.get(follow=True, path=root(url.BROWSER_BATCH))
+        self.assertEqual(resp.status_code, 405)
+        resp = client.post(root(url.BROWSER_BATCH), dict(
+            types=getRandomStr()), content_type=Code.APPLICATION_JSON)
+        self.assertEqual(json_loads(resp.content.decode(Code.UTF_8))['code'], Code.NO)
+
+    @tag('search')
+    @override_settings(SEARCH_VERTICAL_TIMEOUT=0.5)
+    def test_search_results_partial(self):
+        release = Event()
+        searched = []
+
+        def fastSearch(query, profileID, blockedIDs):
+            searched.append((query, profileID, blockedIDs))
+            return current_thread().name
+
+        def slowSearch(query, profileID, blockedIDs):
+            release.wait(5)
+            return "slow"
+
+        def failingSearch(query, profileID, blockedIDs):
+            raise Exception("failing")
+
+        with mock.patch.dict(mainviews.SEARCH_VERTICALS, dict(fast=fastSearch, slow=slowSearch, failing=failingSearch), clear=True):
+            try:
+                client = Client()
+                query = getRandomStr()
+                resp = client.post(root(url.SEARCH_RESULT), dict(
+                    query=query), content_type=Code.APPLICATION_JSON)
+                data = json_loads(resp.content.decode(Code.UTF_8))
+                self.assertEqual(data['code'], Code.OK)
+                self.assertTrue(data['fast'].startswith('search'))
+                self.assertEqual(searched, [(query, None, [])])
+                self.assertEqual(data['slow'], "")
+                self.assertEqual(data['failing'], "")
+                self.assertCountEqual(data['partial'], ['slow', 'failing'])
+                release.set()
+                # a saturated pool runs the verticals inline instead of queueing them,
+                # taking every slot waits for the timed out vertical to end and release its own
+                taken = 0
+                while taken < mainviews._SEARCH_POOL_SIZE and mainviews._SEARCH_SLOTS.acquire(timeout=5):
+                    taken = taken + 1
+                try:
+                    resp = client.post(root(url.SEARCH_RESULT), dict(
+                        query=getRandomStr()), content_type=Code.APPLICATION_JSON)
+                finally:
+                    for _ in range(taken):
+                        mainviews._SEARCH_SLOTS.release()
+                self.assertEqual(taken, mainviews._SEARCH_POOL_SIZE)
+                data = json_loads(resp.content.decode(Code.UTF_8))
+                self.assertEqual(data['fast'], current_thread().name)
+                self.assertEqual(data['slow'], "slow")
+                self.assertEqual(data['partial'], ['failing'])
+            finally:
+                release.set()
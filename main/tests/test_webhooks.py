@@ -0,0 +1,87 @@
+from datetime import timedelta
+from json import dumps as json_dumps
+
+from django.test import TestCase, override_settings, tag
+from django.utils import timezone
+from main.strings import Code
+from main.webhooks import (PROCESSORS, DeliveryStatus, claimDelivery,
+                           drainDeliveries, ingestDelivery, webhookMetrics)
+from management.models import HookRecord, WebhookDelivery
+
+TEST_SOURCE = "test"
+PROCESSED = []
+
+
+def testProcessor(delivery, payload: dict) -> tuple:
+    if payload.get('error', False):
+        raise Exception(delivery.deliveryID)
+    PROCESSED.append(delivery.deliveryID)
+    return not payload.get('invalid', False), delivery.deliveryID
+
+
+@tag(Code.Test.METHOD, Code.Test.REST)
+@override_settings(GH_HOOK_MAX_ATTEMPTS=2, GH_HOOK_RETRY_DELAY=0)
+class WebhookQueueTest(TestCase):
+    def setUp(self) -> None:
+        PROCESSORS[TEST_SOURCE] = f"{__name__}.{testProcessor.__name__}"
+        PROCESSED.clear()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        PROCESSORS.pop(TEST_SOURCE)
+        return super().tearDown()
+
+    def test_ingest_dedupe(self):
+        self.assertTrue(ingestDelivery(
+            TEST_SOURCE, "d1", "push", dict(), "repo_1"))
+        self.assertFalse(ingestDelivery(
+            TEST_SOURCE, "d1", "push", dict(), "repo_1"))
+        self.assertEqual(PROCESSED, ["d1"])
+        self.assertEqual(WebhookDelivery.objects.get(
+            deliveryID="d1").status, DeliveryStatus.DONE)
+
+    def test_order_and_retry(self):
+        receivedOn = timezone.now() - timedelta(minutes=1)
+        for index, (deliveryID, payload) in enumerate([("a1", dict(error=True)), ("a2", dict(invalid=True)), ("a3", dict())]):
+            WebhookDelivery.objects.create(deliveryID=deliveryID, source=TEST_SOURCE, event="push", orderKey="repo_2", payload=json_dumps(payload),
+                                           status=DeliveryStatus.QUEUED, receivedOn=receivedOn + timedelta(seconds=index))
+        WebhookDelivery.objects.filter(deliveryID="a1").update(
+            nextAttemptOn=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(drainDeliveries("repo_2"), 0)
+        WebhookDelivery.objects.filter(deliveryID="a1").update(
+            nextAttemptOn=timezone.now())
+        drainDeliveries("repo_2")
+        first = WebhookDelivery.objects.get(deliveryID="a1")
+        self.assertEqual(first.status, DeliveryStatus.FAILED)
+        self.assertEqual(first.attempts, 2)
+        self.assertEqual(PROCESSED, ["a2", "a3"])
+        self.assertEqual(WebhookDelivery.objects.get(
+            deliveryID="a2").status, DeliveryStatus.FAILED)
+        metrics = webhookMetrics()
+        self.assertEqual(metrics['queued'], 0)
+        self.assertEqual((metrics['processed'], metrics['failed']), (3, 2))
+
+    def test_claim_once(self):
+        WebhookDelivery.objects.create(deliveryID="c1", source=TEST_SOURCE, event="push", orderKey="repo_3", payload=json_dumps(dict()),
+                                       status=DeliveryStatus.QUEUED)
+        first = WebhookDelivery.objects.get(deliveryID="c1")
+        second = WebhookDelivery.objects.get(deliveryID="c1")
+        self.assertTrue(claimDelivery(first))
+        self.assertFalse(claimDelivery(second))
+        self.assertEqual(first.attempts, 1)
+        self.assertEqual(drainDeliveries("repo_3"), 0)
+        self.assertEqual(PROCESSED, [])
+
+    def test_hook_record_steps(self):
+        hookrecord = HookRecord.objects.create(hookID="h1")
+        applied = []
+        self.assertTrue(hookrecord.applyStep("xp", lambda: applied.append("xp")))
+        retried = HookRecord.objects.get(id=hookrecord.id)
+
+        def fail():
+            raise Exception("score")
+        with self.assertRaises(Exception):
+            retried.applyStep("score", fail)
+        self.assertFalse(retried.applyStep("xp", lambda: applied.append("xp")))
+        self.assertTrue(retried.applyStep("score", lambda: applied.append("score")))
+        self.assertEqual(applied, ["xp", "score"])
@@ -95,6 +95,7 @@ urlpatterns = [
     path(URL.DOCTYPE, docs),
     path(URL.FAME_WALL, fameWall),
     path(URL.BROWSER, browser),
+    path(URL.BROWSER_BATCH, browserBatch),
     path(URL.BASE_GITHUB_EVENTS, githubEventsListener),
     path(URL.VIEW_SNAPSHOT, snapshot),
     path(URL.DONATE, donation),
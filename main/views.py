@@ -1,22 +1,19 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import timedelta
 from json import dumps as jsondumps
 from json import loads as jsonloads
 from os import path as ospath
+from threading import BoundedSemaphore
 from uuid import UUID
-from people.views import browseSearch as peopleSearch
-from projects.views import browseSearch as projectsSearch
-from compete.views import browseSearch as competeSearch
-from howto.views import browseSearch as howtoSearch
-from allauth.account.models import EmailAddress
-from allauth.socialaccount.models import SocialAccount
-from allauth.socialaccount.providers.github.provider import GitHubProvider
-from compete.methods import competitionProfileData
+from compete.methods import competitionProfileData, searchCompetitions
 from compete.methods import rendererstr as competeRendererstr
 from compete.models import Competition, Result, Submission
 from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections
 from django.db.models import Count, Q
 from django.http.response import (Http404, HttpResponse,
                                   HttpResponseBadRequest, JsonResponse)
@@ -24,43 +21,42 @@ from django.shortcuts import redirect, render
 from django.template.exceptions import TemplateDoesNotExist
 from django.template.loader import render_to_string
 from django.utils import timezone
-from django.utils.dateparse import parse_datetime
 from django.utils.decorators import method_decorator
-from django.utils.timezone import is_aware, make_aware
+from django.utils.translation import override as translation_override
 from django.views.decorators.cache import cache_control, cache_page
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET
 from django.views.generic import TemplateView
+from main.assets import assetManifest
 from main.env import REDIS_PREFIX
 from management.methods import competitionManagementRenderData, labelRenderData
-from management.models import (GhMarketApp, GhMarketPlan, HookRecord, CorePartner,
+from management.models import (GhMarketApp, CorePartner,
                                ThirdPartyLicense, CareerPosition,CareerApplication)
 from moderation.methods import moderationRenderData
-from moderation.models import LocalStorage
-from people.methods import profileRenderData
+from people.methods import profileRenderData, searchProfiles
 from people.methods import rendererstr as peopleRendererstr
 from howto.methods import rendererstr as howtoRendererstr
+from howto.methods import searchArticles
 from howto.models import Article
-from people.models import (CoreMember, DisplayMentor, CoreContributor, GHMarketPurchase,
+from people.models import (CoreMember, DisplayMentor, CoreContributor,
                            Profile, Topic)
 from projects.methods import coreProfileData, freeProfileData
 from projects.methods import rendererstr as projectsRendererstr
-from projects.methods import verifiedProfileData, baseProfileData
+from projects.methods import verifiedProfileData, baseProfileData, searchProjects
 from projects.models import (BaseProject, CoreProject, FreeProject, LegalDoc,
                              Project, Snapshot)
 from ratelimit.decorators import ratelimit
 from rjsmin import jsmin
 from urllib.parse import urlparse
-from .bots import Github
 from .decorators import (decode_JSON, dev_only, github_only,
                          normal_profile_required, require_JSON)
 from .env import ADMINPATH, ISBETA, ISPRODUCTION
-from .mailers import featureRelease
 from .methods import (errorLog, getDeepFilePaths, renderData, renderString,base64ToFile,
                       renderView, respondJson, respondRedirect, verify_captcha)
 from .strings import (COMPETE, DOCS, MANAGEMENT, MODERATION, PEOPLE, PROJECTS, HOWTO,
                       URL, Browse, Code, Event, Message, Template,
                       setPathParams, setURLAlerts)
+from .webhooks import WebhookSource, ingestDelivery
 from howto.methods import articleRenderData
 
 
@@ -279,10 +275,62 @@ def search_view(request: WSGIRequest) -> HttpResponse:
         raise Http404(e)
 
 
+SEARCH_VERTICALS = dict(
+    people=lambda query, profileID, blockedIDs: renderString(None, Template.People.BROWSE_SEARCH, dict(
+        profiles=searchProfiles(query, blockedIDs), query=query), PEOPLE),
+    projects=lambda query, profileID, blockedIDs: renderString(None, Template.Projects.BROWSE_SEARCH, dict(
+        projects=searchProjects(query, blockedIDs), query=query), PROJECTS),
+    compete=lambda query, profileID, blockedIDs: renderString(None, Template.Compete.BROWSE_SEARCH, dict(
+        competitions=searchCompetitions(query, profileID), query=query), COMPETE),
+    howto=lambda query, profileID, blockedIDs: renderString(None, Template.Howto.BROWSE_SEARCH, dict(
+        articles=searchArticles(query, blockedIDs), query=query), HOWTO),
+)
+"""The vertical searches of search_results by response key, each returning its html content
+for the query, the searching profile id (None if anonymous) and the user ids blocked by (or blocking) it"""
+
+_SEARCH_POOL_SIZE = settings.SEARCH_CONCURRENCY*len(SEARCH_VERTICALS)
+_SEARCH_POOL = ThreadPoolExecutor(
+    max_workers=_SEARCH_POOL_SIZE, thread_name_prefix='search')
+_SEARCH_SLOTS = BoundedSemaphore(_SEARCH_POOL_SIZE)
+"""Held by each vertical search submitted to the pool until it ends, even past its deadline, so that none queues behind busy workers"""
+
+
+def _searchVertical(search: callable, language: str, *args) -> str:
+    """Runs a vertical search in a worker thread, with the given language, and returns its html content."""
+    close_old_connections()
+    try:
+        with translation_override(language):
+            return search(*args)
+    finally:
+        close_old_connections()
+        _SEARCH_SLOTS.release()
+
+
+def _submitVertical(search: callable, language: str, *args) -> Future:
+    """Submits a vertical search to the pool if a worker is free, else runs it inline, and returns its future.
+    Only plain values are passed to the search, never the request, as it is not safe to share across threads."""
+    if _SEARCH_SLOTS.acquire(blocking=False):
+        try:
+            return _SEARCH_POOL.submit(_searchVertical, search, language, *args)
+        except Exception:
+            _SEARCH_SLOTS.release()
+            raise
+    future = Future()
+    try:
+        with translation_override(language):
+            future.set_result(search(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
 @ratelimit(key='user_or_ip', rate='2/s', block=True)
 @decode_JSON
 def search_results(request: WSGIRequest) -> HttpResponse:
     """To respond with search results.
+        The vertical searches run concurrently on a bounded thread pool, each with its own deadline
+        (settings.SEARCH_VERTICAL_TIMEOUT), or inline when the pool is saturated (settings.SEARCH_CONCURRENCY).
+        Verticals that fail or miss the deadline respond with empty content, and are listed in the partial key of the response.
 
     Methods: GET, POST
 
@@ -299,15 +347,27 @@ def search_results(request: WSGIRequest) -> HttpResponse:
 
         if not query:
             raise KeyError(query)
-        response1 = peopleSearch(request)
-        people = response1.content.decode(Code.UTF_8)
-        response2 = projectsSearch(request)
-        projects = response2.content.decode(Code.UTF_8)
-        response3 = competeSearch(request)
-        compete = response3.content.decode(Code.UTF_8)
-        response4 = howtoSearch(request)
-        howto = response4.content.decode(Code.UTF_8)
-        return respondJson(Code.OK, dict(people=people, projects=projects, compete=compete, howto=howto))
+        profileID, blockedIDs = None, []
+        if request.user.is_authenticated:
+            profileID = request.user.profile.id
+            blockedIDs = request.user.profile.blockedIDs()
+        deadline = timezone.now() + timedelta(seconds=settings.SEARCH_VERTICAL_TIMEOUT)
+        futures = dict(map(lambda vertical: (vertical[0], _submitVertical(
+            vertical[1], request.LANGUAGE_CODE, query, profileID, blockedIDs)), SEARCH_VERTICALS.items()))
+        results = dict(partial=[])
+        for vertical, future in futures.items():
+            try:
+                results[vertical] = future.result(
+                    timeout=max((deadline - timezone.now()).total_seconds(), 0))
+            except FutureTimeoutError:
+                future.cancel()
+                results[vertical] = ""
+                results['partial'].append(vertical)
+            except Exception as e:
+                errorLog(e)
+                results[vertical] = ""
+                results['partial'].append(vertical)
+        return respondJson(Code.OK, results)
     except (KeyError, ValidationError) as e:
         if json_body:
             return respondJson(Code.NO, error=Message.INVALID_REQUEST)
@@ -760,12 +820,10 @@ def handler403(request: WSGIRequest, exception: Exception, template_name="403.ht
 @csrf_exempt
 @github_only
 def githubEventsListener(request: WSGIRequest, type: str, targetID: str) -> HttpResponse:
-    """To handle the github webhook requests.
+    """To receive the github webhook requests, and queue them for processing (see main.webhooks).
 
     NOTE: This is not the handler for project respository webhooks. Check that in projects.views
 
-    TODO: Make the webhook handler logic a queue based task, see projects.views.githubEventsListener for this.
-
     METHODS: POST
 
     Args:
@@ -777,7 +835,7 @@ def githubEventsListener(request: WSGIRequest, type: str, targetID: str) -> Http
         Http404: If an exception occurs
 
     Returns:
-        HttpResponse: main.strings.Code.OK if request succeeds, else main.strings.Code.NO.
+        HttpResponse: main.strings.Code.OK if request is queued, main.strings.Code.NO if already received.
     """
     try:
         if type != Code.HOOK:
@@ -786,156 +844,13 @@ def githubEventsListener(request: WSGIRequest, type: str, targetID: str) -> Http
         hookID = request.POST['hookID']
         ghevent = request.POST['ghevent']
 
-        hookrecord, _ = HookRecord.objects.get_or_create(hookID=hookID, defaults=dict(
-            success=False
-        ))
-        if hookrecord.success:
-            return HttpResponse(Code.NO)
-
         if ghevent == Event.RELEASE:
             return HttpResponse(Code.UNKNOWN_EVENT)
-            release = request.POST['release']
-            action = request.POST.get('action', None)
-            if action == Event.PUBLISHED:
-                if not release['draft'] and release['name'] and release['body']:
-                    featureRelease(release['name'], release['body'])
-
-        elif ghevent == Event.MARKETPLACE_PURCHASE:
-            action = request.POST.get('action', None)
-            if not action:
-                raise Exception(ghevent)
-            effective_date = parse_datetime(request.POST['effective_date'])
-            if not is_aware(effective_date):
-                try:
-                    effective_date = make_aware(effective_date)
-                except:
-                    pass
-            sender = request.POST['sender']
-            m_purchase = request.POST['marketplace_purchase']
-            next_billing_date = parse_datetime(m_purchase['next_billing_date'])
-            if not is_aware(next_billing_date):
-                try:
-                    next_billing_date = make_aware(next_billing_date)
-                except:
-                    pass
-            account = m_purchase['account']
-            if account['type'] == "Organization":
-                used_email = account['organization_billing_email']
-            else:
-                user_gh_id = account["id"]
-                ghsocial = SocialAccount.objects.get(
-                    provider=GitHubProvider.id, uid=user_gh_id)
-                if not ghsocial:
-                    ghUser = Github.get_user_by_id(int(user_gh_id))
-                    used_email = ghUser.email
-                else:
-                    used_email = ghsocial.extra_data['email']
-
-            billcycle = m_purchase['billing_cycle']
-            unit_count = m_purchase['unit_count']
-
-            p_id = m_purchase['plan']['id']
-            gh_plan = GhMarketPlan.objects.get(
-                gh_app__gh_id=targetID, gh_id=p_id)
-            emailaddr = EmailAddress.objects.filter(email=used_email).first()
-
-            if action == "purchased":
-                if emailaddr:
-                    GHMarketPurchase.objects.create(
-                        profile=emailaddr.user.profile,
-                        effective_date=effective_date,
-                        gh_app_plan=gh_plan,
-                        units_purchased=(unit_count or 1)
-                    )
-                else:
-                    GHMarketPurchase.objects.create(
-                        email=used_email,
-                        effective_date=effective_date,
-                        gh_app_plan=gh_plan,
-                        units_purchased=(unit_count or 1)
-                    )
-
-            elif action == "changed":
-                pre_m_purchase = request.POST['previous_marketplace_purchase']
-
-                pre_account = pre_m_purchase['account']
-                if pre_account['type'] == "Organization":
-                    pre_used_email = pre_account['organization_billing_email']
-                else:
-                    pre_user_gh_id = pre_account["id"]
-                    pre_ghsocial = SocialAccount.objects.get(
-                        provider=GitHubProvider.id, uid=pre_user_gh_id)
-                    if not ghsocial:
-                        pre_ghUser = Github.get_user_by_id(int(pre_user_gh_id))
-                        pre_used_email = pre_ghUser.email
-                    else:
-                        pre_used_email = pre_ghsocial.extra_data['email']
-
-                pre_p_id = pre_m_purchase['plan']['id']
-                pre_gh_plan = GhMarketPlan.objects.get(
-                    gh_app__gh_id=targetID, gh_id=pre_p_id)
-                pre_emailaddr = EmailAddress.objects.filter(
-                    email=pre_used_email).first()
-                if pre_emailaddr:
-                    pre_GHMarketPurchase = GHMarketPurchase.objects.filter(
-                        profile=pre_emailaddr.user.profile,
-                        gh_app_plan=pre_gh_plan
-                    ).first()
-                else:
-                    pre_GHMarketPurchase = GHMarketPurchase.objects.filter(
-                        email=pre_used_email,
-                        gh_app_plan=pre_gh_plan
-                    ).first()
-                if pre_GHMarketPurchase:
-                    pre_GHMarketPurchase.gh_app_plan = gh_plan
-                    pre_GHMarketPurchase.effective_date = effective_date
-                    pre_GHMarketPurchase.next_billing_date = next_billing_date
-                    pre_GHMarketPurchase.units_purchased = (unit_count or 1)
-                    if emailaddr:
-                        pre_GHMarketPurchase.profile = emailaddr.user.profile
-                    pre_GHMarketPurchase.save()
-                else:
-                    if emailaddr:
-                        GHMarketPurchase.objects.create(
-                            profile=emailaddr.user.profile,
-                            effective_date=effective_date,
-                            gh_app_plan=gh_plan,
-                            next_billing_date=next_billing_date,
-                            units_purchased=(unit_count or 1)
-                        )
-                    else:
-                        GHMarketPurchase.objects.create(
-                            email=used_email,
-                            effective_date=effective_date,
-                            gh_app_plan=gh_plan,
-                            next_billing_date=next_billing_date,
-                            units_purchased=(unit_count or 1)
-                        )
-
-            elif action == "cancelled":
-                if emailaddr:
-                    gHMarketPurchase = GHMarketPurchase.objects.filter(
-                        profile=emailaddr.user.profile,
-                        gh_app_plan=gh_plan
-                    ).first()
-                else:
-                    gHMarketPurchase = GHMarketPurchase.objects.filter(
-                        email=used_email,
-                        gh_app_plan=gh_plan
-                    ).first()
-                if gHMarketPurchase:
-                    gHMarketPurchase.delete()
-
-            elif action == "pending_change":
-                pass
-            elif action == "pending_change_cancelled":
-                pass
-            else:
-                return HttpResponseBadRequest(action)
-        else:
+        if ghevent != Event.MARKETPLACE_PURCHASE:
             return HttpResponseBadRequest(ghevent)
-        hookrecord.success = True
-        hookrecord.save()
+        account = request.POST['marketplace_purchase']['account']
+        if not ingestDelivery(WebhookSource.MARKETPLACE, hookID, ghevent, request.POST, f"marketplace_{account['id']}", targetID):
+            return HttpResponse(Code.NO)
         return HttpResponse(Code.OK)
     except Exception as e:
         errorLog(f"GH-EVENT: {e}")
@@ -1071,54 +986,12 @@ class ServiceWorker(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        assets = []
-
-        def appendWhen(path: str):
-            return path.endswith(('.js', '.css', '.map', '.jpg', '.webp', '.woff2', '.svg', '.png', '.jpeg')) and not (path.__contains__('/email/') or path.__contains__('/admin/'))
-        assets = getDeepFilePaths(
-            "static", appendWhen=appendWhen)
-
-        def attachStaticURL(path: str):
-            return str(path.replace("/static/", settings.STATIC_URL))
-
-        assets = list(map(attachStaticURL, assets))
-        assets.append(f"/{URL.OFFLINE}")
-        assets.append(f"/{URL.MANIFEST}")
-
-        cacheKey = f'localstore_{Code.SWASSETS}'
-        swassets = cache.get(cacheKey, None)
-        created = False
-        if not swassets:
-            swassets, created = LocalStorage.objects.get_or_create(key=Code.SWASSETS, defaults=dict(
-                value=jsondumps(assets)
-            ))
-        if not created:
-            oldassets = jsonloads(swassets.value)
-            different = False
-            if len(oldassets) != len(assets):
-                different = True
-            else:
-                for old in oldassets:
-                    if not old in assets:
-                        different = True
-                        break
-                if not different:
-                    for new in assets:
-                        if not new in oldassets:
-                            different = True
-                            break
-
-            assets = assets if different else oldassets
-            if different:
-                swassets.value = jsondumps(assets)
-                swassets.save()
-                cache.set(cacheKey, swassets)
-            else:
-                assets = oldassets
+        manifest = assetManifest()
 
         context = dict(**context, **renderData(dict(
             OFFLINE=f"/{URL.OFFLINE}",
-            assets=jsondumps(assets),
+            assets=jsondumps(manifest['assets']),
+            assetHashes=jsondumps(manifest['hashes']),
             noOfflineList=jsondumps([
                 setPathParams(f"/{URL.ON_BOARDING}"),
                 setPathParams(
@@ -1501,3 +1374,117 @@ def browser(request: WSGIRequest, type: str) -> HttpResponse:
         if request.POST.get(Code.JSON_BODY, False):
             return respondJson(Code.NO, error=Message.ERROR_OCCURRED)
         raise Http404(e)
+
+
+BROWSER_BATCH_LISTS = {
+    Browse.NEW_PROFILES: (Profile, PEOPLE, Template.People.BROWSE_NEWBIE, 'profiles'),
+    Browse.NEW_PROJECTS: (BaseProject, PROJECTS, Template.Projects.BROWSE_NEWBIE, 'projects'),
+    Browse.RECENT_WINNERS: (Result, COMPETE, Template.Compete.BROWSE_RECENT_WINNERS, 'results'),
+    Browse.TRENDING_PROJECTS: (BaseProject, PROJECTS, Template.Projects.BROWSE_TRENDING, 'projects'),
+    Browse.TRENDING_PROFILES: (Profile, PEOPLE, Template.People.BROWSE_TRENDING, 'profiles'),
+    Browse.NEWLY_MODERATED: (BaseProject, PROJECTS, Template.Projects.BROWSE_NEWLY_MODERATED, 'projects'),
+    Browse.HIGHEST_MONTH_XP_PROFILES: (Profile, PEOPLE, Template.People.BROWSE_HIGHEST_MONTH_XP_PROFILES, 'profiles'),
+    Browse.LATEST_COMPETITIONS: (Competition, COMPETE, Template.Compete.BROWSE_LATEST_COMP, 'competitions'),
+    Browse.TRENDING_MENTORS: (Profile, PEOPLE, Template.People.BROWSE_TRENDING_MENTORS, 'mentors'),
+    Browse.TRENDING_MODERATORS: (Profile, PEOPLE, Template.People.BROWSE_TRENDING_MODS, 'moderators'),
+    Browse.DISPLAY_MENTORS: (DisplayMentor, PEOPLE, Template.People.BROWSE_DISPLAY_MENTORS, 'dmentors'),
+    Browse.CORE_MEMBERS: (CoreMember, PEOPLE, Template.People.BROWSE_CORE_MEMBERS, 'coremems'),
+    Browse.TRENDING_CORE: (CoreProject, PROJECTS, Template.Projects.BROWSE_TRENDING_CORE, 'projects'),
+    Browse.TRENDING_VERIFIED: (Project, PROJECTS, Template.Projects.BROWSE_TRENDING_VERIFIED, 'projects'),
+    Browse.TRENDING_QUICK: (FreeProject, PROJECTS, Template.Projects.BROWSE_TRENDING_QUICK, 'projects'),
+    Browse.TRENDING_ARTICLES: (Article, HOWTO, Template.Howto.BROWSE_TRENDING_ARTICLES, 'articles'),
+}
+"""Global redis-listed browse types servable by browserBatch, as (model, subapp, template, context key)"""
+
+BROWSER_BATCH_BLOCK_FIELDS = {
+    Profile: 'user__id__in',
+    BaseProject: 'creator__user__id__in',
+    CoreProject: 'creator__user__id__in',
+    Project: 'creator__user__id__in',
+    FreeProject: 'creator__user__id__in',
+    Article: 'author__user__id__in',
+}
+"""Lookup to exclude objects of blocked users, for each model of BROWSER_BATCH_LISTS"""
+
+
+@require_JSON
+def browserBatch(request: WSGIRequest) -> JsonResponse:
+    """To respond with multiple browsable text/html components at once, for the personal feed/home.
+        Global lists are resolved together: blocked users are looked up once, all redis lists are read in
+        a single pipeline, and rows are fetched with one in_bulk query per model.
+        Other browse types are delegated to main.views.browser.
+
+    METHODS: POST
+
+    Args:
+        request (WSGIRequest): The request object
+        types (list<str>): The browse types (attributes of main.strings.Browse) in request body
+
+    Returns:
+        JsonResponse: The response json content with main.strings.Code.OK and html fragments by browse type
+    """
+    try:
+        types = request.POST.get('types', [])
+        if not isinstance(types, list) or not types or len(types) > len(Browse.getAllKeys()):
+            return respondJson(Code.NO, error=Message.INVALID_REQUEST)
+        types = list(dict.fromkeys(filter(lambda t: t != Browse.PROJECT_SNAPSHOTS, map(str, types))))
+        limit = int(request.POST.get('limit', 10))
+        excludeUserIDs = []
+        cacheSuffix = request.LANGUAGE_CODE
+        if request.user.is_authenticated:
+            excludeUserIDs = request.user.profile.blockedIDs()
+            cacheSuffix = f"{cacheSuffix}{request.user.id}"
+        cachekeys = dict(map(lambda t: (t, f"main_browser_{t}{cacheSuffix}"), filter(
+            lambda t: t in BROWSER_BATCH_LISTS, types)))
+        cached = cache.get_many(list(cachekeys.values()))
+        listed = dict(map(lambda t: (t, cached[cachekeys[t]]), filter(
+            lambda t: cached.get(cachekeys[t]), cachekeys.keys())))
+
+        missing = list(filter(lambda t: t not in listed, cachekeys.keys()))
+        if missing:
+            pipe = settings.REDIS_CLIENT.pipeline(transaction=False)
+            for type in missing:
+                pipe.lrange(REDIS_PREFIX+type, 0, limit)
+            listIDs = dict(zip(missing, pipe.execute()))
+            modelIDs = dict()
+            for type in missing:
+                modelIDs.setdefault(
+                    BROWSER_BATCH_LISTS[type][0], set()).update(listIDs[type])
+            objects = dict()
+            for model, ids in modelIDs.items():
+                queryset = model.objects.all()
+                if excludeUserIDs and model in BROWSER_BATCH_BLOCK_FIELDS:
+                    queryset = queryset.exclude(
+                        **{BROWSER_BATCH_BLOCK_FIELDS[model]: excludeUserIDs})
+                objects[model] = dict(map(lambda item: (str(item[0]), item[1]), queryset.in_bulk(list(ids)).items()))
+            tocache = dict()
+            for type in missing:
+                found = objects[BROWSER_BATCH_LISTS[type][0]]
+                items = list(filter(None, map(found.get, listIDs[type])))
+                if type == Browse.NEW_PROFILES:
+                    items = list(filter(lambda p: not p.is_zombie and (
+                        not request.user.is_authenticated or p.user_id != request.user.id), items))
+                listed[type] = items
+                if items:
+                    tocache[cachekeys[type]] = items
+            if tocache:
+                cache.set_many(tocache, settings.CACHE_MINI)
+
+        fragments = dict()
+        for type in types:
+            if type in BROWSER_BATCH_LISTS:
+                _, subapp, template, key = BROWSER_BATCH_LISTS[type]
+                items = listed[type]
+                fragments[type] = renderString(request, template, {
+                                               key: items, 'count': len(items)}, fromApp=subapp)
+            else:
+                try:
+                    response = browser.__wrapped__(request, type)
+                except Http404:
+                    continue
+                if response.status_code == 200 and not isinstance(response, JsonResponse):
+                    fragments[type] = response.content.decode(Code.UTF_8)
+        return respondJson(Code.OK, dict(fragments=fragments))
+    except Exception as e:
+        errorLog(e)
+        return respondJson(Code.NO, error=Message.ERROR_OCCURRED)
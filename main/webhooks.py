@@ -0,0 +1,230 @@
+"""
+Ingestion queue of GitHub webhook deliveries, for all the GitHub listeners (main.views, people.views, projects.views).
+
+A listener only validates a delivery, inserts it raw as a WebhookDelivery (one insert, its unique delivery id drops
+redeliveries), queues its processing and responds at once, so that GitHub never times out on it, even in bursts.
+Deliveries share an order key (e.g. their repository), and drainDeliveries processes the queued ones of a key in the
+order received, holding a lock on the key so that one task at a time does. Each delivery is claimed atomically before
+its attempt (see claimDelivery), so that even a task outliving its lock never processes a delivery twice, and then handed
+to the processor of its source (PROCESSORS), which returns (True, message) when done, or (False, message) when the delivery is invalid and
+should not be retried. A processor raising an error is retried after GH_HOOK_RETRY_DELAY seconds, doubled on every further
+failure, until GH_HOOK_MAX_ATTEMPTS, and later deliveries of its key wait behind it meanwhile. Retries, and deliveries
+whose task died, are picked up by drainDueDeliveries, scheduled every minute (see main.schedules), and also run by the
+processwebhooks management command, which reports webhookMetrics too.
+"""
+from datetime import timedelta
+from json import dumps as json_dumps
+from json import loads as json_loads
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.utils import IntegrityError
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from management.models import WebhookDelivery
+
+from .env import ASYNC_CLUSTER
+from .methods import addMethodToAsyncQueue, errorLog
+
+
+class WebhookSource():
+    """Listeners receiving webhook deliveries"""
+    MARKETPLACE = "marketplace"
+    """GitHub app events, main.views.githubEventsListener"""
+    ORGANIZATION = "organization"
+    """GitHub organization events, people.views.githubEventsListener"""
+    REPOSITORY = "repository"
+    """Core/verified project repository events, projects.views.githubEventsListener"""
+    BOT = "bot"
+    """Events relayed by the GitHub bot, projects.views.githubBotEvents"""
+
+
+class DeliveryStatus():
+    """Processing states of webhook deliveries"""
+    QUEUED = "queued"
+    DONE = "done"
+    FAILED = "failed"
+
+
+PROCESSORS = {
+    WebhookSource.MARKETPLACE: "management.methods.processMarketplaceHook",
+    WebhookSource.ORGANIZATION: "people.methods.processOrganizationHook",
+    WebhookSource.REPOSITORY: "projects.methods.processRepositoryHook",
+    WebhookSource.BOT: "projects.methods.processBotHook",
+}
+"""Path of the processor of deliveries of each source, called with the delivery and its payload"""
+
+
+def drainLockKey(orderKey: str) -> str:
+    """Returns the cache key held while the deliveries of the given order key are being processed"""
+    return f"webhook_drain_{orderKey}"
+
+
+def claimDelivery(delivery: WebhookDelivery) -> bool:
+    """Claims a queued delivery for a processing attempt, counting the attempt and deferring its next one by
+    GH_HOOK_CLAIM_TIMEOUT seconds, in one conditional update, which fails if another task claimed it first.
+    The deferral lets a delivery claimed by a task that died be picked up again once it passes.
+
+    Args:
+        delivery (WebhookDelivery): The delivery, as read before the claim
+
+    Returns:
+        bool: True if claimed, with the delivery updated in memory, False if another task claimed or processed it
+    """
+    attempts = delivery.attempts
+    nextAttemptOn = timezone.now() + timedelta(seconds=settings.GH_HOOK_CLAIM_TIMEOUT)
+    if not WebhookDelivery.objects.filter(id=delivery.id, status=DeliveryStatus.QUEUED, attempts=attempts).update(
+            attempts=attempts+1, nextAttemptOn=nextAttemptOn):
+        return False
+    delivery.attempts = attempts+1
+    delivery.nextAttemptOn = nextAttemptOn
+    return True
+
+
+def ingestDelivery(source: str, deliveryID: str, event: str, payload: dict, orderKey: str, target: str = '') -> bool:
+    """Inserts a received delivery, and queues the processing of its order key.
+
+    Args:
+        source (str): An attribute of WebhookSource
+        deliveryID (str): The delivery id (X-GitHub-Delivery)
+        event (str): The GitHub event
+        payload (dict): The JSON payload
+        orderKey (str): The key of deliveries to be processed in order with this one
+        target (str, optional): The listener's target id. Defaults to ''.
+
+    Returns:
+        bool: True if inserted and queued, False if it was already received
+    """
+    try:
+        WebhookDelivery.objects.create(deliveryID=deliveryID, source=source, event=event, target=str(target),
+                                       orderKey=orderKey, payload=json_dumps(payload, default=str), status=DeliveryStatus.QUEUED)
+    except IntegrityError:
+        return False
+    queueDrain(orderKey)
+    return True
+
+
+def queueDrain(orderKey: str):
+    """Queues drainDeliveries for the given order key, or drains it at once if there is no task cluster
+
+    Args:
+        orderKey (str): The order key
+    """
+    if ASYNC_CLUSTER:
+        addMethodToAsyncQueue(
+            f"main.webhooks.{drainDeliveries.__name__}", orderKey)
+    else:
+        drainDeliveries(orderKey)
+
+
+def processDelivery(delivery: WebhookDelivery) -> bool:
+    """Makes a processing attempt of a delivery claimed by claimDelivery, and records its outcome.
+
+    Args:
+        delivery (WebhookDelivery): The claimed delivery
+
+    Returns:
+        bool: True if the delivery is no longer queued (done or failed), False if it is to be retried
+    """
+    try:
+        done, message = import_string(PROCESSORS[delivery.source])(
+            delivery, json_loads(delivery.payload))
+        delivery.status = DeliveryStatus.DONE if done else DeliveryStatus.FAILED
+        delivery.error = None if done else str(message)
+    except Exception as e:
+        errorLog(f"GH-EVENT {delivery.deliveryID}:", e)
+        delivery.error = str(e)
+        if delivery.attempts >= settings.GH_HOOK_MAX_ATTEMPTS:
+            delivery.status = DeliveryStatus.FAILED
+        else:
+            delivery.nextAttemptOn = timezone.now() + timedelta(
+                seconds=settings.GH_HOOK_RETRY_DELAY*pow(2, delivery.attempts-1))
+    delivery.processedOn = timezone.now()
+    delivery.save(update_fields=['attempts', 'status',
+                  'error', 'nextAttemptOn', 'processedOn'])
+    return delivery.status != DeliveryStatus.QUEUED
+
+
+def _drain(orderKey: str, lockKey: str, lockToken: str) -> int:
+    processed = 0
+    for delivery in WebhookDelivery.objects.filter(orderKey=orderKey, status=DeliveryStatus.QUEUED).order_by('receivedOn', 'id'):
+        if delivery.nextAttemptOn > timezone.now():
+            # later deliveries wait behind the one awaiting its retry
+            break
+        if cache.get(lockKey) != lockToken:
+            # the lock expired and another task took over the key
+            break
+        cache.touch(lockKey, settings.CACHE_MIN)
+        if not claimDelivery(delivery):
+            break
+        if not processDelivery(delivery):
+            break
+        processed = processed + 1
+    return processed
+
+
+def drainDeliveries(orderKey: str) -> int:
+    """Processes the due queued deliveries of an order key, in the order received, unless another task already is.
+
+    Args:
+        orderKey (str): The order key
+
+    Returns:
+        int: The number of deliveries processed (done or failed)
+    """
+    processed = 0
+    lockKey = drainLockKey(orderKey)
+    lockToken = uuid4().hex
+    while cache.add(lockKey, lockToken, settings.CACHE_MIN):
+        try:
+            processed = processed + _drain(orderKey, lockKey, lockToken)
+        except Exception as e:
+            errorLog(e)
+            return processed
+        finally:
+            if cache.get(lockKey) == lockToken:
+                cache.delete(lockKey)
+        # a delivery received while the lock was held may have had its own drain skipped, so check again after releasing it
+        head = WebhookDelivery.objects.filter(orderKey=orderKey, status=DeliveryStatus.QUEUED).order_by(
+            'receivedOn', 'id').values_list('nextAttemptOn', flat=True).first()
+        if head is None or head > timezone.now():
+            break
+    return processed
+
+
+def drainDueDeliveries() -> int:
+    """Drains every order key with due queued deliveries, picking up retries and deliveries whose task was lost.
+
+    Returns:
+        int: The number of deliveries processed (done or failed)
+    """
+    orderKeys = set(WebhookDelivery.objects.filter(status=DeliveryStatus.QUEUED, nextAttemptOn__lte=timezone.now(
+    )).values_list('orderKey', flat=True))
+    return sum(map(drainDeliveries, orderKeys))
+
+
+def webhookMetrics() -> dict:
+    """Returns the throughput and lag of webhook processing, over the last GH_HOOK_METRICS_WINDOW seconds.
+
+    Returns:
+        dict: queued (int) deliveries awaiting processing, retrying (int) of them after failures, lag (float) seconds
+            since the oldest of them was received, processed (int) and failed (int) deliveries in the window,
+            throughput (float) deliveries processed per minute, and latency (float) average seconds from receipt to processing
+    """
+    now = timezone.now()
+    since = now - timedelta(seconds=settings.GH_HOOK_METRICS_WINDOW)
+    queued = WebhookDelivery.objects.filter(status=DeliveryStatus.QUEUED)
+    oldest = queued.order_by('receivedOn').values_list(
+        'receivedOn', flat=True).first()
+    processed = list(WebhookDelivery.objects.filter(processedOn__gte=since).exclude(
+        status=DeliveryStatus.QUEUED).values_list('status', 'receivedOn', 'processedOn'))
+    return dict(
+        queued=queued.count(),
+        retrying=queued.filter(attempts__gt=0).count(),
+        lag=(now - oldest).total_seconds() if oldest else 0,
+        processed=len(processed),
+        failed=len(list(filter(lambda p: p[0] == DeliveryStatus.FAILED, processed))),
+        throughput=len(processed)*60/settings.GH_HOOK_METRICS_WINDOW,
+        latency=(sum(map(lambda p: (p[2] - p[1]).total_seconds(), processed)) / len(processed)) if processed else 0,
+    )
@@ -14,7 +14,9 @@ class FeedbackAdmin(admin.ModelAdmin):
 
 admin.site.register(ReportCategory)
 admin.site.register(ActivityRecord)
+admin.site.register(RatingAggregate)
 admin.site.register(HookRecord)
+admin.site.register(WebhookDelivery)
 admin.site.register(GhMarketApp)
 admin.site.register(GhMarketPlan)
 
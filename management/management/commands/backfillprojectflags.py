@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from projects.methods import backfillProjectFlags
+
+
+class Command(BaseCommand):
+
+    help = """
+        To populate the type (kind) and approval status flags of existing base projects, once.
+        Projects saved afterwards keep these flags updated by themselves.
+        """
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('Backfilling project flags...'))
+        counts = backfillProjectFlags()
+        for kind, count in counts.items():
+            self.stdout.write(f"{count} {kind} projects updated.")
+        self.stdout.write(self.style.SUCCESS('Done.'))
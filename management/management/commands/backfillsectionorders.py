@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from howto.methods import backfillSectionOrders
+
+
+class Command(BaseCommand):
+
+    help = """
+        To number the sections of existing articles in their natural order, once.
+        Sections created or reordered afterwards are numbered by themselves.
+        """
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('Backfilling section orders...'))
+        count = backfillSectionOrders()
+        self.stdout.write(f"Sections of {count} articles numbered.")
+        self.stdout.write(self.style.SUCCESS('Done.'))
@@ -10,6 +10,7 @@ from os import remove, symlink, mkdir, walk, path as ospath
 from pathlib import Path
 from shutil import rmtree
 from main.env import SITE, VERSION
+from main.assets import prepareAssetManifest
 from main.methods import renderData
 from main.context_processors import GlobalContextData
 
@@ -249,6 +250,15 @@ class Command(BaseCommand):
                 print(e)
                 pass
 
+        print("\nPREPARING SERVICE WORKER ASSET MANIFEST\n")
+        try:
+            manifest = prepareAssetManifest()
+            print("ASSET MANIFEST DIGEST: ", manifest['digest'])
+            print("ASSET MANIFEST ASSETS: ", len(manifest['assets']))
+        except Exception as e:
+            print("ASSET MANIFEST ERR: ")
+            print(e)
+
 
 def compress(path):
     """
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from main.webhooks import drainDueDeliveries, webhookMetrics
+
+
+class Command(BaseCommand):
+
+    help = """
+        To process the queued GitHub webhook deliveries that are due, retrying failed ones after their backoff,
+        and to report the throughput and lag of webhook processing. The processing is also scheduled every minute (see main.schedules).
+        """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--metrics', action='store_true',
+                            help='Only report the metrics, without processing')
+
+    def handle(self, *args, **options):
+        if not options['metrics']:
+            self.stdout.write(self.style.WARNING('Processing due webhook deliveries...'))
+            self.stdout.write(f"{drainDueDeliveries()} deliveries processed.")
+        metrics = webhookMetrics()
+        self.stdout.write(
+            f"Queued: {metrics['queued']} ({metrics['retrying']} retrying), lag: {metrics['lag']:.1f}s")
+        self.stdout.write(
+            f"Processed: {metrics['processed']} ({metrics['failed']} failed), {metrics['throughput']:.2f}/min, latency: {metrics['latency']:.1f}s")
+        self.stdout.write(self.style.SUCCESS('Done.'))
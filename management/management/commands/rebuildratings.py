@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from main.ratings import rebuildRatings
+
+
+class Command(BaseCommand):
+
+    help = """
+        To recompute the rating aggregates of all articles, projects and courses from their ratings.
+        Required once for existing ratings, as ratings submitted afterwards keep the aggregates updated by themselves.
+        """
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('Rebuilding rating aggregates...'))
+        counts = rebuildRatings()
+        for kind, count in counts.items():
+            self.stdout.write(f"{count} rated {kind}s aggregated.")
+        self.stdout.write(self.style.SUCCESS('Done.'))
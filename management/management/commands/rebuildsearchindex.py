@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from main.search import rebuildIndex
+
+
+class Command(BaseCommand):
+
+    help = """
+        To build the search index of profiles, projects, competitions and articles from scratch.
+        Until this command has run once, searches are served by database queries.
+        """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=500,
+                            help='number of instances loaded at once.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('Rebuilding search index...'))
+        counts = rebuildIndex(options['batch'])
+        for doctype, count in counts.items():
+            self.stdout.write(f"{count} {doctype} documents indexed.")
+        self.stdout.write(self.style.SUCCESS('Done.'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from main.rankings import refreshBrowseLists
+
+
+class Command(BaseCommand):
+
+    help = """
+        To update the trending, new, latest and monthly XP browse lists from records created since the last run.
+        main.rankings.refreshBrowseLists runs every 5 minutes as a django-q schedule (see main.schedules), this command refreshes them right away.
+        """
+
+    def handle(self, *args, **options):
+        if refreshBrowseLists():
+            self.stdout.write(self.style.SUCCESS('Browse lists refreshed.'))
+        else:
+            self.stdout.write(self.style.ERROR(
+                'Browse lists refresh error.'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from main.allowlist import refreshHookAllowlist
+
+
+class Command(BaseCommand):
+
+    help = """
+        To fetch the GitHub webhook IP networks afresh for the allowlist of webhook deliveries.
+        Useful once after deployment, so that no delivery waits for the GitHub API.
+        """
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('Refreshing GitHub hook IP allowlist...'))
+        cidrs = refreshHookAllowlist()
+        if cidrs is None:
+            self.stdout.write(self.style.ERROR('Failed, the last known allowlist is kept.'))
+            return
+        self.stdout.write(f"{len(cidrs)} networks allowed.")
+        self.stdout.write(self.style.SUCCESS('Done.'))
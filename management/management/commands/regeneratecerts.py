@@ -1,5 +1,9 @@
-from compete.methods import (generateJudgeCertificate, generateModCertificate,
-                             generateParticipantCertificate)
+from itertools import chain
+
+from compete.apps import APPNAME as COMPETE
+from compete.methods import (certificateFileExists, certificateRecordJob,
+                             queueCertificateChunks, renderCertificateChunk)
+from django.conf import settings
 from compete.models import AppreciationCertificate, ParticipantCertificate
 from django.core.management.base import BaseCommand
 from django_q.tasks import async_task
@@ -14,7 +18,9 @@ class Command(BaseCommand):
         To regenerate the certificates based on the latest templates, depends on MEDIA_ROOT setting.
         This command can be used when existing certificates are to be updated with latest changes in design.
         This WILL NOT notify the users about the changes, and will work with the certificate files and their stored records in database only, and only for active users.
-        None of the paths & IDs of any certificate will change, and the certificate records will remain the same after successful regeneration.
+        Certificate files are content addressed, so only the certificates whose template, texts or render revision changed are rendered again,
+        and their records are pointed to the new files, removing the superseded ones. None of the IDs of any certificate will change.
+        With --qcluster, the changed certificates are rendered in parallel by the qcluster, in chunks of CERT_RENDER_CHUNK certificates.
         NOTE: Do not use this command if you are not sure what you are doing.
         NOTE: Trying to stop the execution of this command may result in loss of certificates.
         Pass --please parameter to actually start the command.
@@ -49,7 +55,7 @@ class Command(BaseCommand):
         self.stdout.write(self.style.WARNING('Generating certificates...'))
         if options['qcluster']:
             taskID = async_task(
-                f"{APPNAME}.management.commands.regeneratecerts.{startRegenerationOfAllCertificates.__name__}")
+                f"{APPNAME}.management.commands.regeneratecerts.{startRegenerationOfAllCertificates.__name__}", True)
             self.stdout.write(self.style.SUCCESS(
                 f'Track by task ID: {taskID}'))
             exit(0)
@@ -68,40 +74,41 @@ class Command(BaseCommand):
         exit(0)
 
 
-def startRegenerationOfAllCertificates():
+def startRegenerationOfAllCertificates(queue: bool = False):
     try:
         print("\nStarting regeneration of all certificates according to stored certificate records.\n")
-        print("\nRegenerating certificates for appreciants...")
+        records = []
+        print("\nCollecting changed certificates of appreciants...")
         appcertificates = AppreciationCertificate.objects.exclude(
-            certificate="").exclude(certificate=None)
-        for appcertificate in appcertificates:
-            if appcertificate.appreciatee.is_normal:
-                print(
-                    f"Generating certificate for {appcertificate.competition} {appcertificate.appreciatee}...")
-                if appcertificate.competition.isJudge(appcertificate.appreciatee):
-                    crt = generateJudgeCertificate(
-                        appcertificate.appreciatee, appcertificate.competition, appcertificate.id.hex)
-                else:
-                    crt = generateModCertificate(
-                        appcertificate.competition, appcertificate.id.hex)
-                if crt:
-                    print("done", crt)
-                else:
-                    errorLog("cert regeneration error", appcertificate, crt)
-
-        print("\nRegenerating certificates for participants...")
+            certificate="").exclude(certificate=None).select_related('competition', 'appreciatee__user')
+        print("\nCollecting changed certificates of participants...")
         partcertificates = ParticipantCertificate.objects.exclude(
-            certificate="").exclude(certificate=None)
-        for partcertificate in partcertificates:
-            if partcertificate.profile.is_normal:
-                print(
-                    f"Generating certificate for {partcertificate.profile} {partcertificate.result}...")
-                crt = generateParticipantCertificate(
-                    partcertificate.profile, partcertificate.result, partcertificate.id.hex)
-                if crt:
-                    print("done", crt)
-                else:
-                    errorLog("cert regeneration error", partcertificates, crt)
+            certificate="").exclude(certificate=None).select_related('result__competition', 'profile__user')
+        for certificate in chain(appcertificates, partcertificates):
+            holder = certificate.appreciatee if isinstance(
+                certificate, AppreciationCertificate) else certificate.profile
+            if holder.is_normal:
+                job = certificateRecordJob(certificate)
+                certpath = f"{COMPETE}/certificates/{job['certname']}.pdf"
+                if certpath != certificate.certificate or not certificateFileExists(certpath):
+                    records.append(certificate)
+
+        if queue:
+            print(f"\nQueued {queueCertificateChunks(records, refresh=True)} tasks regenerating {len(records)} changed certificates.")
+            return True
+
+        print(f"\nRegenerating {len(records)} changed certificates...")
+        done = 0
+        for appreciation in (True, False):
+            certIDs = list(map(lambda record: record.id, filter(lambda record: isinstance(
+                record, AppreciationCertificate) == appreciation, records)))
+            for i in range(0, len(certIDs), settings.CERT_RENDER_CHUNK):
+                chunk = certIDs[i:i+settings.CERT_RENDER_CHUNK]
+                rendered = renderCertificateChunk(chunk, appreciation, True)
+                if rendered < len(chunk):
+                    errorLog("cert regeneration error", chunk, rendered)
+                done += len(chunk)
+                print(f"{done}/{len(records)} done")
         print("\nDone.")
         return True
     except Exception as e:
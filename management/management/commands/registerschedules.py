@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from main.schedules import registerSchedules
+
+
+class Command(BaseCommand):
+
+    help = """
+        To register the periodic tasks of the task cluster (see main.schedules) as its schedules.
+        Run on every deployment, after migrations.
+        """
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.WARNING('Registering schedules...'))
+        for func, created in registerSchedules().items():
+            self.stdout.write(f"{func} {'created' if created else 'updated'}.")
+        self.stdout.write(self.style.SUCCESS('Done.'))
@@ -1,4 +1,7 @@
 from uuid import UUID
+from allauth.account.models import EmailAddress
+from allauth.socialaccount.models import SocialAccount
+from allauth.socialaccount.providers.github.provider import GitHubProvider
 from compete.models import Competition, Perk
 from django.conf import settings
 from django.core.cache import cache
@@ -6,14 +9,16 @@ from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.core.handlers.wsgi import WSGIRequest
 from django.db.models import Q
 from django.http.response import HttpResponse
-from main.bots import Discord
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_aware, make_aware
+from main.bots import Discord, Github
 from main.methods import (addMethodToAsyncQueue, errorLog, renderString,
                           renderView)
-from main.strings import Code, Message
-from people.models import Profile, Topic
+from main.strings import Code, Event, Message
+from people.models import GHMarketPurchase, Profile, Topic
 from projects.models import Category
 
-from management.models import Management
+from management.models import GhMarketPlan, Management
 
 from .apps import APPNAME
 
@@ -216,13 +221,13 @@ def competitionManagementRenderData(request: WSGIRequest, compID: UUID) -> dict:
         compete: Competition = Competition.objects.get(
             id=compID, creator=request.user.profile)
         resstatus: str = cache.get(compete.CACHE_KEYS.result_declaration_task)
-        certstatus: str = cache.get(
-            compete.CACHE_KEYS.certificates_allotment_task)
+        certstatus: dict = compete.certificatesAllotmentStatus()
         return dict(
             compete=compete,
             iscreator=(compete.creator == request.user.profile),
             declaring=(resstatus == Message.RESULT_DECLARING),
-            generating=(certstatus == Message.CERTS_GENERATING)
+            generating=(certstatus['status'] == Message.CERTS_GENERATING),
+            certprogress=certstatus
         )
     except (ObjectDoesNotExist, ValidationError):
         pass
@@ -230,3 +235,150 @@ def competitionManagementRenderData(request: WSGIRequest, compID: UUID) -> dict:
         errorLog(e)
         pass
     return False
+
+
+def processMarketplaceHook(delivery, payload: dict) -> tuple:
+    """Processes a GitHub app (marketplace) webhook delivery, received by main.views.githubEventsListener (see main.webhooks).
+
+    Args:
+        delivery (WebhookDelivery): The delivery, targeting the GitHub app id
+        payload (dict): The delivery payload
+
+    Returns:
+        bool, str: True, message if processed, False, error message if the delivery is invalid
+    """
+    ghevent = delivery.event
+    if ghevent != Event.MARKETPLACE_PURCHASE:
+        return False, f"Unhandled '{ghevent}'"
+    action = payload.get('action', None)
+    if not action:
+        return False, f"No '{ghevent}' action"
+    effective_date = parse_datetime(payload['effective_date'])
+    if not is_aware(effective_date):
+        try:
+            effective_date = make_aware(effective_date)
+        except:
+            pass
+    sender = payload['sender']
+    m_purchase = payload['marketplace_purchase']
+    next_billing_date = parse_datetime(m_purchase['next_billing_date'])
+    if not is_aware(next_billing_date):
+        try:
+            next_billing_date = make_aware(next_billing_date)
+        except:
+            pass
+    account = m_purchase['account']
+    if account['type'] == "Organization":
+        used_email = account['organization_billing_email']
+    else:
+        user_gh_id = account["id"]
+        ghsocial = SocialAccount.objects.get(
+            provider=GitHubProvider.id, uid=user_gh_id)
+        if not ghsocial:
+            ghUser = Github.get_user_by_id(int(user_gh_id))
+            used_email = ghUser.email
+        else:
+            used_email = ghsocial.extra_data['email']
+
+    billcycle = m_purchase['billing_cycle']
+    unit_count = m_purchase['unit_count']
+
+    p_id = m_purchase['plan']['id']
+    gh_plan = GhMarketPlan.objects.get(
+        gh_app__gh_id=delivery.target, gh_id=p_id)
+    emailaddr = EmailAddress.objects.filter(email=used_email).first()
+
+    if action == "purchased":
+        if emailaddr:
+            GHMarketPurchase.objects.create(
+                profile=emailaddr.user.profile,
+                effective_date=effective_date,
+                gh_app_plan=gh_plan,
+                units_purchased=(unit_count or 1)
+            )
+        else:
+            GHMarketPurchase.objects.create(
+                email=used_email,
+                effective_date=effective_date,
+                gh_app_plan=gh_plan,
+                units_purchased=(unit_count or 1)
+            )
+
+    elif action == "changed":
+        pre_m_purchase = payload['previous_marketplace_purchase']
+
+        pre_account = pre_m_purchase['account']
+        if pre_account['type'] == "Organization":
+            pre_used_email = pre_account['organization_billing_email']
+        else:
+            pre_user_gh_id = pre_account["id"]
+            pre_ghsocial = SocialAccount.objects.get(
+                provider=GitHubProvider.id, uid=pre_user_gh_id)
+            if not ghsocial:
+                pre_ghUser = Github.get_user_by_id(int(pre_user_gh_id))
+                pre_used_email = pre_ghUser.email
+            else:
+                pre_used_email = pre_ghsocial.extra_data['email']
+
+        pre_p_id = pre_m_purchase['plan']['id']
+        pre_gh_plan = GhMarketPlan.objects.get(
+            gh_app__gh_id=delivery.target, gh_id=pre_p_id)
+        pre_emailaddr = EmailAddress.objects.filter(
+            email=pre_used_email).first()
+        if pre_emailaddr:
+            pre_GHMarketPurchase = GHMarketPurchase.objects.filter(
+                profile=pre_emailaddr.user.profile,
+                gh_app_plan=pre_gh_plan
+            ).first()
+        else:
+            pre_GHMarketPurchase = GHMarketPurchase.objects.filter(
+                email=pre_used_email,
+                gh_app_plan=pre_gh_plan
+            ).first()
+        if pre_GHMarketPurchase:
+            pre_GHMarketPurchase.gh_app_plan = gh_plan
+            pre_GHMarketPurchase.effective_date = effective_date
+            pre_GHMarketPurchase.next_billing_date = next_billing_date
+            pre_GHMarketPurchase.units_purchased = (unit_count or 1)
+            if emailaddr:
+                pre_GHMarketPurchase.profile = emailaddr.user.profile
+            pre_GHMarketPurchase.save()
+        else:
+            if emailaddr:
+                GHMarketPurchase.objects.create(
+                    profile=emailaddr.user.profile,
+                    effective_date=effective_date,
+                    gh_app_plan=gh_plan,
+                    next_billing_date=next_billing_date,
+                    units_purchased=(unit_count or 1)
+                )
+            else:
+                GHMarketPurchase.objects.create(
+                    email=used_email,
+                    effective_date=effective_date,
+                    gh_app_plan=gh_plan,
+                    next_billing_date=next_billing_date,
+                    units_purchased=(unit_count or 1)
+                )
+
+    elif action == "cancelled":
+        if emailaddr:
+            gHMarketPurchase = GHMarketPurchase.objects.filter(
+                profile=emailaddr.user.profile,
+                gh_app_plan=gh_plan
+            ).first()
+        else:
+            gHMarketPurchase = GHMarketPurchase.objects.filter(
+                email=used_email,
+                gh_app_plan=gh_plan
+            ).first()
+        if gHMarketPurchase:
+            gHMarketPurchase.delete()
+
+    elif action == "pending_change":
+        pass
+    elif action == "pending_change_cancelled":
+        pass
+    else:
+        return False, f"Unhandled '{ghevent}' action: {action}"
+    return True, f"{ghevent} {action}"
@@ -146,6 +146,8 @@ class HookRecord(models.Model):
         primary_key=True, default=uuid4, editable=False)
     hookID: str = models.CharField(max_length=60)
     success: bool = models.BooleanField(default=False)
+    steps: str = models.TextField(default='', blank=True)
+    """steps (TextField): Names of the processing steps of the hook already applied, one per line, skipped when its processing is retried"""
 
     def __str__(self):
         return self.hookID
@@ -154,9 +156,64 @@ class HookRecord(models.Model):
     def get_id(self):
         return self.id.hex
 
+    def applyStep(self, step: str, apply: callable) -> bool:
+        """Applies a processing step of the hook, unless it was applied already by an earlier attempt, and records it as applied.
+        As the database backend has no transactions, a retried processing relies on this to not apply any step twice.
+
+        Args:
+            step (str): The name of the step, unique in the processing of the hook
+            apply (callable): The step, without arguments
+
+        Returns:
+            bool: True if applied now, False if it was applied already
+        """
+        applied = list(filter(None, (self.steps or '').split('\n')))
+        if step in applied:
+            return False
+        apply()
+        applied.append(step)
+        self.steps = '\n'.join(applied)
+        HookRecord.objects.filter(id=self.id).update(steps=self.steps)
+        return True
+
+
+class WebhookDelivery(models.Model):
+    """Raw GitHub webhook delivery, inserted once on receipt and processed by the task queue via main.webhooks
+    """
+    id: UUID = models.UUIDField(
+        primary_key=True, default=uuid4, editable=False)
+    deliveryID: str = models.CharField(max_length=60, unique=True)
+    """deliveryID (CharField): The X-GitHub-Delivery header (or relayed hook id) of the delivery, unique so that redeliveries are dropped"""
+    source: str = models.CharField(max_length=20)
+    """source (CharField): The listener that received the delivery, an attribute of main.webhooks.WebhookSource"""
+    event: str = models.CharField(max_length=60)
+    """event (CharField): The GitHub event of the delivery"""
+    target: str = models.CharField(max_length=100, default='', blank=True)
+    """target (CharField): The listener's target (project, bot or app id) of the delivery"""
+    orderKey: str = models.CharField(max_length=100)
+    """orderKey (CharField): Deliveries of the same key (e.g. repository) are processed in the order received"""
+    payload: str = models.TextField()
+    """payload (TextField): The JSON payload of the delivery"""
+    status: str = models.CharField(max_length=10)
+    """status (CharField): An attribute of main.webhooks.DeliveryStatus"""
+    attempts: int = models.IntegerField(default=0)
+    """attempts (IntegerField): The number of processing attempts made"""
+    error: str = models.TextField(null=True, blank=True)
+    """error (TextField): The error of the last failed attempt"""
+    receivedOn: datetime = models.DateTimeField(
+        auto_now=False, default=timezone.now)
+    nextAttemptOn: datetime = models.DateTimeField(
+        auto_now=False, default=timezone.now)
+    """nextAttemptOn (DateTimeField): The time before which a queued delivery is not processed, for backoff after failures"""
+    processedOn: datetime = models.DateTimeField(
+        auto_now=False, null=True, blank=True)
+
+    def __str__(self):
+        return self.deliveryID
+
 
 class ActivityRecord(models.Model):
-    """TODO: Activity record model
+    """Activity record model, inserted in bulk via main.methods.addActivities
     """
     id: UUID = models.UUIDField(
         primary_key=True, default=uuid4, editable=False)
@@ -165,6 +222,8 @@ class ActivityRecord(models.Model):
     request_get: str = models.TextField(max_length=60000)
     request_post: str = models.TextField(max_length=60000)
     response_status: int = models.IntegerField(default=200)
+    createdOn: datetime = models.DateTimeField(
+        auto_now=False, default=timezone.now)
 
     @property
     def get_id(self):
@@ -174,6 +233,29 @@ class ActivityRecord(models.Model):
         return self.get_id
 
 
+class RatingAggregate(models.Model):
+    """Rating aggregate model, one per score bucket of a rated object, maintained via main.ratings
+    """
+    class Meta:
+        unique_together = ('kind', 'objectID', 'bucket')
+
+    id: UUID = models.UUIDField(
+        primary_key=True, default=uuid4, editable=False)
+    kind: str = models.CharField(max_length=20)
+    """kind (CharField): The type of rated object, an attribute of main.ratings.RatingOf"""
+    objectID: UUID = models.UUIDField()
+    """objectID (UUIDField): The id of the rated object"""
+    bucket: int = models.IntegerField()
+    """bucket (IntegerField): The whole score (rounded up) of the ratings in this bucket"""
+    count: int = models.IntegerField(default=0)
+    """count (IntegerField): The number of ratings in this bucket"""
+    total: float = models.FloatField(default=0)
+    """total (FloatField): The sum of scores of the ratings in this bucket"""
+
+    def __str__(self):
+        return f"{self.kind}:{self.objectID}:{self.bucket}"
+
+
 class Management(models.Model):
     """Management model, or organization model
     """
@@ -186,11 +186,8 @@ def getModeratorToAssignModeration(type: str, object: models.Model, ignoreModPro
                 return False
         return False
 
-    finalAvailableModProfiles = availableModProfiles
-
-    for modprof in availableModProfiles:
-        if modprof.isBlockedProfile(creator):
-            finalAvailableModProfiles.remove(modprof)
+    finalAvailableModProfiles = creator.filterBlockedProfiles(
+        availableModProfiles)
 
     finalAvailableModProfiles = sorted(
         finalAvailableModProfiles, key=lambda m: m.xp, reverse=True)
@@ -0,0 +1,123 @@
+"""
+Render bundle of profile pages (templates/people/profile.html, people.methods.profileRenderData).
+
+Everything a profile page shows about the profile itself (labels, topics, tags, admirers count, social links,
+management and GitHub linkage) is loaded together in a fixed number of queries, and cached as one bundle under
+the current version of the profile. Every write to the profile or to its relations replaces that version
+(see people.receivers), so that the next render loads a fresh bundle, while the stale one is never looked up again
+and expires on its own. Only data specific to the requesting user (e.g. whether they admire the profile) is loaded per request.
+"""
+from allauth.socialaccount.models import SocialAccount
+from allauth.socialaccount.providers.github.provider import GitHubProvider
+from django.conf import settings
+from django.core.cache import cache
+from main.methods import bumpVersionTokens, versionTokens
+from management.models import Management
+
+from .models import Profile, ProfileAdmirer, ProfileSocial, ProfileTopic
+
+
+def profileBundleVersionKey(profileID) -> str:
+    """Returns the cache key of the bundle version of a profile
+
+    Args:
+        profileID (UUID, str): The id of the profile
+
+    Returns:
+        str: The cache key
+    """
+    return f"profile_bundle_version_{profileID}"
+
+
+def profileBundleVersion(profileID) -> str:
+    """Returns the current bundle version of a profile (see main.methods.versionTokens)
+
+    Args:
+        profileID (UUID, str): The id of the profile
+
+    Returns:
+        str: The version
+    """
+    cacheKey = profileBundleVersionKey(profileID)
+    return versionTokens([cacheKey])[cacheKey]
+
+
+def bumpProfileBundle(profileID):
+    """Replaces the bundle version of a profile, to be called after (or within the transaction of) every write
+    to the profile or its relations shown on the profile page.
+
+    Args:
+        profileID (UUID, str): The id of the profile
+    """
+    bumpVersionTokens([profileBundleVersionKey(profileID)])
+
+
+def loadProfileBundle(profile: Profile) -> dict:
+    """Loads the render bundle of a profile from the database, in six queries
+    (plus GitHub API calls for linked organizations, cached on their own).
+
+    Args:
+        profile (Profile): The profile
+
+    Returns:
+        dict: See profileBundle
+    """
+    management = Management.objects.filter(profile=profile).first()
+    if management:
+        management.profile = profile
+    topics = list(map(lambda pt: pt.topic, ProfileTopic.objects.filter(
+        profile=profile).select_related('topic').order_by('-points')))
+    tags = list(profile.tags.all())
+    total_admirers = ProfileAdmirer.objects.filter(profile=profile).count()
+    socialsites = list(ProfileSocial.objects.filter(profile=profile))
+    ghAccount = None if profile.is_zombie else SocialAccount.objects.filter(
+        user_id=profile.user_id, provider=GitHubProvider.id).first()
+
+    labels = []
+    if profile.is_moderator:
+        labels.append(dict(name='MOD', theme='accent', text='moderator'))
+    if profile.is_mentor:
+        labels.append(dict(name='MNT', theme='active', text='mentor'))
+    if management:
+        labels.append(dict(name='MGR', theme='vibrant', text='manager'))
+
+    gh_orgID, gh_orgUrl = None, None
+    if management and ghAccount and management.githubOrgID:
+        gh_orgID = management.get_ghorgName()
+        if gh_orgID:
+            gh_orgUrl = management.get_ghorgUrl()
+    return dict(
+        labels=labels,
+        topics=topics,
+        tags=tags,
+        total_admirers=total_admirers,
+        socialsites=socialsites,
+        management=management or False,
+        is_manager=bool(management),
+        has_ghID=bool(ghAccount),
+        ghID=(ghAccount.extra_data.get('login', None)
+              or profile.githubID) if ghAccount else None,
+        gh_url=ghAccount.get_profile_url() if ghAccount else None,
+        gh_orgID=gh_orgID,
+        gh_orgUrl=gh_orgUrl,
+    )
+
+
+def profileBundle(profile: Profile) -> dict:
+    """Returns the render bundle of a profile, from cache if loaded since its last write.
+
+    Args:
+        profile (Profile): The profile
+
+    Returns:
+        dict: labels (list<dict>) as Profile.get_labels, topics (list<Topic>) all topics by points, tags (list<Tag>),
+            total_admirers (int), socialsites (list<ProfileSocial>), management (Management, or False if not a management profile),
+            is_manager (bool), has_ghID (bool), ghID (str) GitHub username, gh_url (str) GitHub profile link,
+            gh_orgID (str) linked GitHub organization name, and gh_orgUrl (str) its link.
+    """
+    cacheKey = f"profile_bundle_{profile.id}_{profileBundleVersion(profile.id)}"
+    bundle = cache.get(cacheKey, None)
+    if bundle is None:
+        bundle = loadProfileBundle(profile)
+        cache.set(cacheKey, bundle, settings.CACHE_MAX)
+    return bundle
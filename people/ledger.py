@@ -0,0 +1,116 @@
+"""
+XP ledger of profiles (Profile.increaseXP, Profile.decreaseXP).
+
+Every XP change is appended as a ProfileXPRecord (signed, negative for decreases), and the XP total of each profile
+is changed by a compare-and-set of its xp and milestone_count (see main.methods.compareAndSet), never by saving the
+whole profile, so that concurrent changes (as in a burst of webhook deliveries for the same project creator) neither
+lose updates nor rewrite unrelated fields. The database backend translates neither F() increments nor transactions,
+so the totals are applied first and the records inserted after them, in one insert for all changes of a call.
+Milestones are detected on the aggregated change of each profile, against the exact total it was applied to.
+Only the cache keys depending upon XP are cleared afterwards (see Profile.CACHE_KEY_DEPS).
+"""
+from copy import copy
+
+from django.core.cache import cache
+from django.db import transaction
+from main.methods import compareAndSet, invalidateOnCommit
+
+from .models import Profile, ProfileXPRecord
+
+
+def milestoneXP(milestone_count: int) -> int:
+    """Returns the XP target of the next milestone, after the given number of milestones achieved
+
+    Args:
+        milestone_count (int): The number of milestones achieved
+
+    Returns:
+        int: The XP target
+    """
+    return 50*(1+pow(milestone_count or 0, 2))
+
+
+def milestonesChange(xp: int, by: int, milestone_count: int) -> tuple:
+    """Computes the milestone count after an XP change, and the milestones newly achieved by it.
+
+    Args:
+        xp (int): The XP after the change
+        by (int): The XP change, negative for a decrease
+        milestone_count (int): The milestone count before the change
+
+    Returns:
+        tuple<int, list<int>>: The milestone count after the change, and the milestone count before each newly achieved milestone
+    """
+    count = milestone_count or 0
+    achieved = []
+    previous = xp - by
+    if by > 0:
+        while xp >= milestoneXP(count) and previous < milestoneXP(count):
+            achieved.append(count)
+            count = count + 1
+    elif by < 0:
+        while count > 0 and previous >= milestoneXP(count-1) and xp < milestoneXP(count-1):
+            count = count - 1
+    return count, achieved
+
+
+def appendXP(changes: list) -> dict:
+    """Appends XP changes of profiles to the ledger, and applies them to their XP totals and milestones, by one compare-and-set
+    of both per profile. Changes of inactive profiles are skipped, and no XP total falls below zero.
+    The given profile instances are updated in memory with their new XP and milestone count.
+
+    Args:
+        changes (list<tuple<Profile, int, str>>): The profile, the XP change (negative for a decrease), and its reason, of each change
+
+    Returns:
+        dict<UUID, int>: The new XP of each changed profile id
+    """
+    records, deltas, instances = [], dict(), dict()
+    for profile, by, reason in changes:
+        if not (by and profile.is_active):
+            continue
+        records.append(ProfileXPRecord(
+            profile=profile, xp=by, reason=reason))
+        deltas[profile.id] = deltas.get(profile.id, 0) + by
+        instances.setdefault(profile.id, []).append(profile)
+    if not records:
+        return dict()
+    totals, milestones = dict(), []
+    for profileID, delta in deltas.items():
+        def change(current, delta=delta):
+            xp = max((current['xp'] or 0)+delta, 0)
+            count, _ = milestonesChange(
+                xp, xp-(current['xp'] or 0), current['milestone_count'])
+            return dict(xp=xp, milestone_count=count)
+        current, values = compareAndSet(Profile.objects.filter(
+            id=profileID), ['xp', 'milestone_count'], change)
+        if values is None:
+            continue
+        _, achieved = milestonesChange(
+            values['xp'], values['xp']-(current['xp'] or 0), current['milestone_count'])
+        totals[profileID] = values['xp']
+        for profile in instances[profileID]:
+            profile.xp = values['xp']
+            profile.milestone_count = values['milestone_count']
+        for before in achieved:
+            # notified of each milestone before counting it, as the milestone count names its target
+            milestone = copy(instances[profileID][0])
+            milestone.milestone_count = before
+            milestones.append(milestone)
+    # recorded after the totals they were applied to, as no transaction spans both
+    ProfileXPRecord.objects.bulk_create(records)
+
+    cachekeys = []
+    for profiles in instances.values():
+        cachekeys.extend(profiles[0].cacheKeysFor(
+            'xp', 'milestone_count'))
+
+    invalidateOnCommit(lambda: cache.delete_many(cachekeys))
+
+    def notify():
+        from .mailers import milestoneNotif
+        for profile in milestones:
+            milestoneNotif(profile)
+    if milestones:
+        transaction.on_commit(notify)
+    return totals
@@ -14,14 +14,17 @@ from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.core.handlers.wsgi import WSGIRequest
 from django.db.models import Q
 from django.http.response import HttpResponse
+from django.utils.translation import get_language
 from main.methods import errorLog, renderString, renderView, addMethodToAsyncQueue
-from main.strings import COMPETE, Code, Browse, Action
+from main.search import SearchDoc, rankedByHits, searchIndex
+from main.strings import COMPETE, Code, Browse, Action, Event
 from main.strings import profile as profileString
 from moderation.models import Moderation
 from projects.models import BaseProject, Project
 from requests import get as getRequest
 from howto.models import Article
 from .apps import APPNAME
+from .bundles import profileBundle
 from .models import (Framework, Profile, ProfileSetting, Topic, User,
                      defaultImagePath, isPictureDeletable)
 from main.env import REDIS_PREFIX
@@ -184,17 +187,14 @@ def profileRenderData(request: WSGIRequest, userID: UUID = None, nickname: str =
                 is_admirer: bool = profile.admirers.filter(
                     user=request.user).exists()
 
-        gh_orgID = None
-        has_ghID = profile.has_ghID()
-        if has_ghID:
-            gh_orgID = profile.gh_orgID()
-        is_manager = profile.is_manager()
+        bundle = profileBundle(profile)
         return dict(
             person=profile.user,
             self=self,
-            has_ghID=has_ghID,
-            gh_orgID=gh_orgID,
-            is_manager=is_manager,
+            bundle=bundle,
+            has_ghID=bundle['has_ghID'],
+            gh_orgID=bundle['gh_orgID'],
+            is_manager=bundle['is_manager'],
             is_admirer=is_admirer
         )
     except (ObjectDoesNotExist, ValidationError):
@@ -237,14 +237,14 @@ def getProfileSectionData(section: str, profile: Profile, requestUser: User,size
             if not selfprofile:
                 projects = projects.filter(suspended=False)
                 data[Code.APPROVED] = list(
-                    filter(lambda p: p.is_approved(), projects))[:size]
+                    projects.filter(BaseProject.approvalQuery(Code.APPROVED))[:size])
             else:
                 data[Code.APPROVED] = list(
-                    filter(lambda p: p.is_approved(), projects))[:4]
+                    projects.filter(BaseProject.approvalQuery(Code.APPROVED))[:4])
                 data[Code.MODERATION] = list(
-                    filter(lambda p: p.is_pending(), projects))
+                    projects.filter(BaseProject.approvalQuery(Code.MODERATION)))
                 data[Code.REJECTED] = list(
-                    filter(lambda p: p.is_rejected(), projects))
+                    projects.filter(BaseProject.approvalQuery(Code.REJECTED)))
             if len(projects):
                 cache.set(cachekey, projects, settings.CACHE_INSTANT)
         elif section == profileString.ACHEIVEMENTS:
@@ -311,11 +311,11 @@ def getProfileSectionData(section: str, profile: Profile, requestUser: User,size
                 data[Code.REJECTED] = mods.filter(
                     resolved=True, status=Code.REJECTED).order_by('-respondOn')
         elif section == profileString.COMPETITIONS:
-            if profile.is_manager():
+            if profileBundle(profile)['is_manager']:
                 data[Code.COMPETITIONS] = Competition.objects.filter(
                     creator=profile).order_by("-createdOn")
         elif section == profileString.PEOPLE:
-            mgm = profile.management()
+            mgm = profileBundle(profile)['management']
             if mgm:
                 data[Code.PEOPLE] = mgm.people.filter(
                     is_active=True, suspended=False, to_be_zombie=False).order_by("user__first_name")
@@ -498,4 +498,131 @@ def topicProfilesList(profiles: list, topics: list = list()):
                 r.delete(f"{REDIS_PREFIX}{Browse.TOPIC_PROFILES}_{profile.id}")
                 r.rpush(f"{REDIS_PREFIX}{Browse.TOPIC_PROFILES}_{profile.id}", *profile_ids)
     except Exception as e:
-        errorLog(e)
\ No newline at end of file
+        errorLog(e)
+
+
+def processOrganizationHook(delivery, payload: dict) -> tuple:
+    """Processes a GitHub organization webhook delivery, received by people.views.githubEventsListener (see main.webhooks).
+
+    Args:
+        delivery (WebhookDelivery): The delivery
+        payload (dict): The delivery payload
+
+    Returns:
+        bool, str: True, message if processed, False, error message if the delivery is invalid
+    """
+    ghevent = delivery.event
+    action = payload.get('action', None)
+    if ghevent == Event.ORG:
+        if action == Event.MEMBER_ADDED:
+            membership = payload.get('membership', None)
+            if membership:
+                member: Profile = Profile.objects.filter(
+                    githubID=membership['user']['login'], is_active=True).first()
+                if member:
+                    member.increaseXP(
+                        by=6, reason="Github Organization Membership Accepted")
+        elif action == Event.MEMBER_REMOVED:
+            membership = payload.get('membership', None)
+            if membership:
+                member: Profile = Profile.objects.filter(
+                    githubID=membership['user']['login']).first()
+                if member:
+                    member.decreaseXP(
+                        by=6, reason="Github Organization Membership Removed")
+    elif ghevent == Event.TEAMS:
+        if action == Event.CREATED:
+            team = payload.get('team', None)
+            # if team:
+            #     team['name']
+    else:
+        return False, f"Unhandled '{ghevent}'"
+    return True, f"{ghevent} {action}"
+
+
+def searchProfiles(query: str, blockedIDs: list = list(), limit: int = 10) -> list:
+    """Returns the profiles matching the search query, ranked by the search index if available, else by a database query,
+    cached for the active language. Special parts of the query (topic:, tag:, xp:, type:) filter by the respective attributes.
+
+    Args:
+        query (str): The search query
+        blockedIDs (list<str>, optional): The user ids blocked by (or blocking) the searching profile, whose results are excluded. Defaults to list().
+        limit (int, optional): The maximum number of results. Defaults to 10.
+
+    Returns:
+        list<Profile>: The matching profiles
+    """
+    cachekey = f'people_browse_search_{query}{get_language()}' + "".join(blockedIDs)
+    profiles = cache.get(cachekey, [])
+
+    if not len(profiles):
+        specials = ('topic:', 'tag:', 'xp:', 'type:')
+        pquery = None
+        hits = None
+        is_moderator = is_mentor = is_verified = is_manager = None
+        dbquery = Q()
+        invalidQuery = False
+        if query.startswith(specials):
+            def specquerieslist(q):
+                return [
+                    Q(topics__name__iexact=q),
+                    Q(tags__name__iexact=q),
+                    Q(xp__gte=q),
+                    Q()
+                ]
+            commaparts = query.split(",")
+            for cpart in commaparts:
+                if cpart.strip().lower().startswith(specials):
+                    special, specialq = cpart.split(':')
+                    if special.strip().lower() == 'type':
+                        is_moderator = specialq.strip().lower() == 'moderator' or is_moderator
+                        is_mentor = specialq.strip().lower() == 'mentor' or is_mentor
+                        is_verified = specialq.strip().lower() == 'verified' or is_verified
+                        is_manager = specialq.strip().lower() == 'manager' or is_manager
+                        if is_moderator != None:
+                            dbquery = Q(dbquery, is_moderator=is_moderator)
+                        if is_mentor != None:
+                            dbquery = Q(dbquery, is_mentor=is_mentor)
+                        if is_verified != None:
+                            dbquery = Q(dbquery, is_verified=is_verified)
+                        if not (is_moderator or is_mentor or is_verified or is_manager):
+                            invalidQuery = True
+                            break
+                    else:
+                        dbquery = Q(dbquery, specquerieslist(specialq.strip())[
+                                    list(specials).index(f"{special.strip()}:")])
+                else:
+                    pquery = cpart.strip()
+                    break
+        else:
+            pquery = query
+        if pquery and not invalidQuery:
+            hits = searchIndex(pquery)
+        if hits is not None:
+            dbquery = Q(dbquery, id__in=hits[SearchDoc.PROFILE])
+        elif pquery and not invalidQuery:
+            fname, lname = convertToFLname(pquery)
+            dbquery = Q(dbquery, Q(
+                Q(user__email__istartswith=pquery)
+                | Q(user__first_name__istartswith=fname)
+                | Q(user__first_name__iendswith=fname)
+                | Q(user__last_name__istartswith=(lname or fname))
+                | Q(user__last_name__iendswith=(lname or fname))
+                | Q(nickname__istartswith=pquery)
+                | Q(nickname__iexact=pquery)
+                | Q(topics__name__istartswith=pquery)
+                | Q(tags__name__istartswith=pquery)
+                | Q(user__email__icontains=pquery)
+            ))
+        if not invalidQuery:
+            profiles = Profile.objects.exclude(user__id__in=blockedIDs).exclude(suspended=True).exclude(
+                to_be_zombie=True).exclude(is_active=False).filter(dbquery).distinct()
+            profiles = profiles[:limit] if hits is None else rankedByHits(
+                profiles, hits[SearchDoc.PROFILE], limit)
+
+            if is_manager:
+                profiles = list(filter(lambda p: p.is_manager(), profiles))
+
+            if len(profiles):
+                cache.set(cachekey, profiles, settings.CACHE_SHORT)
+    return profiles
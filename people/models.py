@@ -4,6 +4,7 @@ from re import sub as re_sub
 from time import time
 from uuid import UUID, uuid4
 import math
+from copy import copy
 
 from allauth.account.models import EmailAddress
 from allauth.socialaccount.models import SocialAccount
@@ -19,6 +20,7 @@ from time import time
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.core.files.base import File
 from djongo import models
+from django.db import transaction
 from django.db.models import Q
 from django.utils import timezone
 from django_otp import devices_for_user
@@ -26,7 +28,7 @@ from github.NamedUser import NamedUser
 from github.Organization import Organization
 from main.bots import GH_API, GHub
 from main.env import BOTMAIL
-from main.methods import errorLog, filterNickname, user_device_notify
+from main.methods import compareAndSet, errorLog, filterNickname, user_device_notify
 from main.strings import MANAGEMENT, PROJECTS, Code, classAttrsToDict, url
 from management.models import (GhMarketPlan, Invitation, Management,
                                ReportCategory)
@@ -540,19 +542,91 @@ class Profile(models.Model):
             pallete_topics = f"pallete_topics_{self.get_userid}"
         return CKEYS()
 
+    CACHE_KEY_DEPS = dict(
+        has_ghID=('user', 'is_zombie', 'socialaccount'),
+        is_manager=('management',),
+        management=('management',),
+        managements=('management',),
+        gh_user=('user', 'githubID', 'is_zombie', 'socialaccount'),
+        gh_link=('user', 'githubID', 'is_zombie', 'socialaccount'),
+        topic_ids=('topics',),
+        blocked_ids=('user',),
+        blocked_profiles=('user',),
+        tags=('topics', 'tags'),
+        recommended_projects=('topics',),
+        recommended_topics=('topics',),
+        gh_socialacc=('user', 'githubID', 'is_zombie', 'socialaccount'),
+        gh_user_data=('user', 'githubID', 'is_zombie', 'socialaccount'),
+        gh_user_ghorgs=('user', 'githubID', 'is_zombie', 'socialaccount'),
+        total_admirations=('admirers',),
+        profile_admirers=('admirers',),
+        profile_socialsites=('socialsites',),
+        socialaccount_gh=('user', 'githubID', 'is_zombie', 'socialaccount'),
+        pallete_topics=('topics',),
+    )
+    """The fields (by name) or relations (topics, tags, admirers, socialsites, socialaccount, management)
+    each of the CACHE_KEYS depends upon, by key name. The cached profile instances depend upon all fields."""
+
+    CACHE_RELATIONS = ('topics', 'tags', 'admirers',
+                       'socialsites', 'socialaccount', 'management')
+    """Relations some CACHE_KEYS depend upon, invalidated by people.receivers on their changes"""
+
     MODEL_CACHE_KEY = f"{APPNAME}_profiledata"
 
     def save(self, *args, **kwargs):
-        try:
-            previous: Profile = Profile.objects.get(id=self.id)
-            if previous.picture != self.picture:
-                if isPictureDeletable(previous.picture):
-                    previous.picture.delete(False)
-        except:
-            pass
-        self.clearCache()
+        update_fields = kwargs.get('update_fields', None)
+        changed = None if update_fields is None else set(update_fields)
+        if changed is None or 'picture' in changed:
+            try:
+                previous: Profile = Profile.objects.get(id=self.id)
+                if previous.picture != self.picture:
+                    if isPictureDeletable(previous.picture):
+                        previous.picture.delete(False)
+                if changed is None:
+                    changed = set(map(lambda f: f.name, filter(lambda f: getattr(previous, f.attname) != getattr(self, f.attname),
+                                                               self._meta.concrete_fields)))
+                if 'nickname' in changed:
+                    cache.delete_many(previous.instanceCacheKeys())
+            except:
+                pass
+        if changed is None:
+            self.clearCache()
+        else:
+            self.invalidateCache(*changed)
+        self._changedFields = changed
         super(Profile, self).save(*args, **kwargs)
 
+    def cacheKeysFor(self, *deps: str) -> list:
+        """Returns the cache keys depending upon any of the given fields or relations (see CACHE_KEY_DEPS)
+
+        Args:
+            *deps (str): The changed field names or relations
+
+        Returns:
+            list<str>: The cache keys
+        """
+        deps = set(deps)
+        if not deps:
+            return []
+        keys = [] if deps.issubset(self.CACHE_RELATIONS) else self.instanceCacheKeys()
+        names = list(filter(lambda n: deps.intersection(
+            self.CACHE_KEY_DEPS[n]), self.CACHE_KEY_DEPS.keys()))
+        if names:
+            ckeys = self.CACHE_KEYS
+            keys.extend(map(lambda n: getattr(ckeys, n), names))
+        return keys
+
+    def invalidateCache(self, *deps: str):
+        """Deletes only the cache keys depending upon any of the given fields or relations (see CACHE_KEY_DEPS),
+        instead of all of them as clearCache does.
+
+        Args:
+            *deps (str): The changed field names or relations
+        """
+        keys = self.cacheKeysFor(*deps)
+        if keys:
+            cache.delete_many(keys)
+
     def is_manager(self) -> bool:
         """Returns True if the profile a management profile.
         This will imply that the profile represents an organization.
@@ -1335,7 +1409,7 @@ class Profile(models.Model):
         return self.get_xp
 
     def increaseXP(self, by: int = 0, notify: bool = True, reason: str = '') -> int:
-        """Increases the user's XP by the given amount.
+        """Increases the user's XP by the given amount, via the XP ledger (see people.ledger).
 
         Args:
             by (int): The amount to increase the user's XP by
@@ -1347,24 +1421,15 @@ class Profile(models.Model):
         """
         if not self.is_active:
             return self.xp
-        if self.xp == None:
-            self.xp = 0
-        if self.milestone_count == None:
-            self.milestone_count = 0
-        self.xp = self.xp + by
-        if self.xp >= 50*(1+pow(self.milestone_count, 2)) and self.xp-by < 50*(1+pow(self.milestone_count, 2)):
-            from .mailers import milestoneNotif
-            milestoneNotif(self)
-            self.milestone_count = self.milestone_count + 1
-        self.save()
+        from .ledger import appendXP
+        appendXP([(self, by, reason)])
         if notify:
             from .mailers import increaseXpAlert
             increaseXpAlert(self, by)
-        ProfileXPRecord.objects.create(profile=self, xp=by, reason=reason)
         return self.xp
 
     def decreaseXP(self, by: int = 0, notify: bool = True, reason: str = '') -> int:
-        """Decreases the user's XP by the given amount.
+        """Decreases the user's XP by the given amount (not below zero), via the XP ledger (see people.ledger).
 
         Args:
             by (int): The amount to decrease the user's XP by
@@ -1376,25 +1441,11 @@ class Profile(models.Model):
         """
         if not self.is_active:
             return self.xp
-        if self.xp == None:
-            self.xp = 0
-            self.save()
-            return self.xp
-        diff = self.xp - by
-
-        if diff < 0:
-            diff = 0
-        if self.xp == diff:
-            return self.xp
-        self.xp = int(diff)
-        if (self.milestone_count != None):
-            if self.xp+by >= 50*(1+pow((self.milestone_count-1), 2)) and self.xp < 50*(1+pow((self.milestone_count-1), 2)):
-                self.milestone_count = self.milestone_count-1
-        self.save()
+        from .ledger import appendXP
+        appendXP([(self, -by, reason)])
         if notify:
             from .mailers import decreaseXpAlert
             decreaseXpAlert(self, by)
-        ProfileXPRecord.objects.create(profile=self, xp=by, reason=reason)
         return self.xp
 
     def increaseTopicPoints(self, topic, by: int = 0, notify: bool = True, reason: str = '') -> int:
@@ -1621,11 +1672,11 @@ class Profile(models.Model):
 
     def isBlocked(self, user: User) -> bool:
         """Returns whether the user is blocked by the given user, or viceversa"""
-        return BlockedUser.objects.filter(Q(profile=self, blockeduser=user) | Q(blockeduser=self.user, profile=user.profile)).exists()
+        return user.id.hex in self.blockedIDSet()
 
     def isBlockedProfile(self, profile: "Profile") -> bool:
         """Returns whether the user is blocked by the given profile, or viceversa (same as isBlocked method)"""
-        return BlockedUser.objects.filter(Q(profile=self, blockeduser=profile.user) | Q(blockeduser=self.user, profile=profile)).exists()
+        return bool(profile.user_id) and profile.user_id.hex in self.blockedIDSet()
 
     def is_blocked(self, user: User) -> bool:
         """Returns whether the user is blocked by the given user, or viceversa"""
@@ -1672,23 +1723,41 @@ class Profile(models.Model):
     def blockUser(self, user: User):
         """Blocks the given user"""
         self.blocklist.add(user)
+        clearBlockGraphCache(self.user_id, user.id)
         return True
 
     def unblockUser(self, user: User):
         """Unblocks the given user"""
         self.blocklist.remove(user)
+        clearBlockGraphCache(self.user_id, user.id)
         return True
 
     def blockedIDs(self) -> list:
-        """Returns the blocked user ids (mutually blocked as well)"""
+        """Returns the blocked user ids (mutually blocked as well), in one query.
+        Cached until a block or unblock involving the user happens (see clearBlockGraphCache).
+        """
         cachekey = self.CACHE_KEYS.blocked_ids
-        ids = cache.get(cachekey, [])
-        if not len(ids):
-            ids = list(map(lambda block: block.profile.get_userid if block.blockeduser == self.user else block.blockeduser.get_id,
-                           BlockedUser.objects.filter(Q(profile=self) | Q(blockeduser=self.user))))
-            cache.set(cachekey, ids, settings.CACHE_INSTANT)
+        ids = cache.get(cachekey, None)
+        if ids is None:
+            ids = set()
+            for blockerUserID, blockedUserID in BlockedUser.objects.filter(
+                Q(profile=self) | Q(blockeduser=self.user)
+            ).values_list('profile__user_id', 'blockeduser_id'):
+                otherUserID = blockerUserID if blockedUserID == self.user_id else blockedUserID
+                if otherUserID:
+                    ids.add(otherUserID.hex)
+            ids = list(ids)
+            cache.set(cachekey, ids, settings.CACHE_MAX)
         return ids
 
+    def blockedIDSet(self) -> set:
+        """Returns the blocked user ids (mutually blocked as well) as a set, for in memory membership checks.
+
+        Returns:
+            set<str>: The blocked user id hexes
+        """
+        return set(self.blockedIDs())
+
     def blockedProfiles(self) -> list:
         """Returns the blocked profiles (mutually blocked as well)
 
@@ -1696,11 +1765,12 @@ class Profile(models.Model):
             list<Profile>: The blocked profiles instances list
         """
         cachekey = self.CACHE_KEYS.blocked_profiles
-        profiles = cache.get(cachekey, [])
-        if not len(profiles):
-            profiles = list(map(lambda block: block.profile if block.blockeduser == self.user else block.blockeduser.profile,
-                                BlockedUser.objects.filter(Q(profile=self) | Q(blockeduser=self.user))))
-            cache.set(cachekey, profiles, settings.CACHE_INSTANT)
+        profiles = cache.get(cachekey, None)
+        if profiles is None:
+            blocked = self.blockedIDs()
+            profiles = list(Profile.objects.filter(
+                user__id__in=blocked)) if blocked else []
+            cache.set(cachekey, profiles, settings.CACHE_MAX)
         return profiles
 
     def filterBlockedProfiles(self, profiles: list) -> list:
@@ -1712,7 +1782,22 @@ class Profile(models.Model):
         Returns:
             list<Profile>: The filtered profiles list
         """
-        return list(filter(lambda p: not self.isBlockedProfile(p), profiles))
+        blocked = self.blockedIDSet()
+        if not blocked:
+            return list(profiles)
+        return list(filter(lambda p: not (p.user_id and p.user_id.hex in blocked), profiles))
+
+    def filterBlockedUserIDs(self, userIDs: list) -> list:
+        """Filters the given user ids list to remove the blocked ones.
+
+        Args:
+            userIDs (list<UUID, str>): The user ids list to filter
+
+        Returns:
+            list<UUID, str>: The filtered user ids list
+        """
+        blocked = self.blockedIDSet()
+        return list(filter(lambda u: UUID(str(u)).hex not in blocked, userIDs))
 
     def all_tags(self) -> list:
         """Returns the user's tags instances (linked or unlinked)"""
@@ -1826,14 +1911,18 @@ class Profile(models.Model):
             cache.set(cacheKey, profile_url, settings.CACHE_SHORT)
         return profile_url
 
+    def instanceCacheKeys(self) -> list:
+        """Returns the cache keys of the cached profile instance (see get_cache_one)"""
+        return [f"{Profile.MODEL_CACHE_KEY}_{self.get_userid}",
+                f"{Profile.MODEL_CACHE_KEY}_{self.nickname}",
+                f"{Profile.MODEL_CACHE_KEY}_{self.get_userid}_{True}", f"{Profile.MODEL_CACHE_KEY}_{self.nickname}_{False}",
+                f"{Profile.MODEL_CACHE_KEY}_{self.nickname}_{True}", f"{Profile.MODEL_CACHE_KEY}_{self.get_userid}_{False}",
+                f"{Profile.MODEL_CACHE_KEY}_{self.user.id}_{False}",
+                f"{Profile.MODEL_CACHE_KEY}_{self.user.id}_{True}"
+                ]
+
     def clearCache(self):
-        cache.delete_many([f"{Profile.MODEL_CACHE_KEY}_{self.get_userid}",
-                           f"{Profile.MODEL_CACHE_KEY}_{self.nickname}",
-                           f"{Profile.MODEL_CACHE_KEY}_{self.get_userid}_{True}", f"{Profile.MODEL_CACHE_KEY}_{self.nickname}_{False}",
-                           f"{Profile.MODEL_CACHE_KEY}_{self.nickname}_{True}", f"{Profile.MODEL_CACHE_KEY}_{self.get_userid}_{False}",
-                           f"{Profile.MODEL_CACHE_KEY}_{self.user.id}_{False}",
-                           f"{Profile.MODEL_CACHE_KEY}_{self.user.id}_{True}"
-                           ])
+        cache.delete_many(self.instanceCacheKeys())
         return cache.delete_many(classAttrsToDict(self.CACHE_KEYS.__class__).values())
 
     def getApprovedModerations(self):
@@ -2000,6 +2089,83 @@ class ProfileTopic(models.Model):
             return f"{self.points//(10**9)}B"
         return
 
+    @staticmethod
+    def increasePointsInBulk(points: dict, reasons: dict = dict()) -> list:
+        """Increases the points/XP of many profiles in many topics, as increasePoints does for each of them without notifying,
+        with one insert for new relations and one compare-and-set per existing relation (see main.methods.compareAndSet).
+        Relations not yet existing are created trashed, as Profile.increaseTopicPoints does. Milestone notifications are sent
+        after the current transaction (if any) commits.
+
+        Args:
+            points (dict<Profile, dict<UUID, int>>): The points to increase by, by topic id, of each profile
+            reasons (dict<Profile, str>, optional): The reason for the change, of each profile. Defaults to dict().
+
+        Returns:
+            list<ProfileTopic>: The changed profile topic relation instances
+        """
+        changes = dict()
+        for profile, topics in points.items():
+            for topicID, by in topics.items():
+                if by:
+                    changes[(profile.id, topicID)] = (profile, by)
+        if not changes:
+            return []
+        profileIDs = set(map(lambda k: k[0], changes.keys()))
+        topicIDs = set(map(lambda k: k[1], changes.keys()))
+        existing = dict(map(lambda pt: ((pt.profile_id, pt.topic_id), pt), filter(lambda pt: (pt.profile_id, pt.topic_id) in changes,
+                        ProfileTopic.objects.filter(profile__in=profileIDs, topic__in=topicIDs))))
+
+        def advance(points, milestone_count_topic, by) -> tuple:
+            points = (points or 0) + by
+            if milestone_count_topic == None:
+                if points <= 50:
+                    milestone_count_topic = 0
+                else:
+                    milestone_count_topic = int(math.sqrt((points/50)-1))
+            target = 50*(1+pow(milestone_count_topic, 2))
+            return points, milestone_count_topic, points >= target and points-by < target
+
+        created, updated, milestones = [], [], []
+        for key, (profile, by) in changes.items():
+            proftop = existing.get(key, None)
+            if proftop is None:
+                proftop = ProfileTopic(profile=profile, topic_id=key[1], trashed=True, points=0)
+                points, count, achieved = advance(0, None, by)
+                created.append(proftop)
+            else:
+                def change(current, by=by):
+                    points, count, achieved = advance(
+                        current['points'], current['milestone_count_topic'], by)
+                    return dict(points=points, milestone_count_topic=count+1 if achieved else count)
+                # a compare-and-set of plain values, as the database backend translates neither F() increments nor bulk_update
+                current, _ = compareAndSet(ProfileTopic.objects.filter(id=proftop.id), [
+                                           'points', 'milestone_count_topic'], change)
+                if current is None:
+                    continue
+                points, count, achieved = advance(
+                    current['points'], current['milestone_count_topic'], by)
+                updated.append(proftop)
+            proftop.points, proftop.milestone_count_topic = points, count
+            if achieved:
+                # notified of the milestone before counting it, as increasePoints does
+                milestones.append(copy(proftop))
+                proftop.milestone_count_topic = count + 1
+        ProfileTopic.objects.bulk_create(created)
+        changed = created + updated
+        ProfileTopicXPRecord.objects.bulk_create(list(map(lambda pt: ProfileTopicXPRecord(
+            profile_topic=pt, xp=changes[(pt.profile_id, pt.topic_id)][1], reason=reasons.get(changes[(pt.profile_id, pt.topic_id)][0], '')), changed)))
+
+        def notify():
+            from .mailers import milestoneNotifTopic
+            for proftop in milestones:
+                milestoneNotifTopic(proftop)
+        if milestones:
+            transaction.on_commit(notify)
+        from .bundles import bumpProfileBundle
+        for profileID in profileIDs:
+            bumpProfileBundle(profileID)
+        return changed
+
 
 class BlockedUser(models.Model):
     """The model for relationship between a profile and a blocked user"""
@@ -2016,6 +2182,21 @@ class BlockedUser(models.Model):
         unique_together = ('profile', 'blockeduser')
 
 
+def clearBlockGraphCache(*userIDs) -> None:
+    """Clears the cached blocked ids and profiles of the given users, to be called on block or unblock
+    for both the users involved.
+
+    Args:
+        *userIDs (UUID, str): The user ids
+    """
+    cachekeys = []
+    for userID in filter(None, userIDs):
+        userID = UUID(str(userID))
+        cachekeys.extend(
+            [f"blocked_userids_{userID}", f"blocked_userprofiles_{userID}"])
+    cache.delete_many(cachekeys)
+
+
 class ReportedUser(models.Model):
     """The model for relationship between a profile and a reported user"""
     class Meta:
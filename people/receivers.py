@@ -5,17 +5,26 @@ from allauth.socialaccount.signals import (pre_social_login,
                                            social_account_added,
                                            social_account_removed,
                                            social_account_updated)
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from auth2.models import EmailNotification
 from main.bots import Sender
 from main.methods import errorLog
+from main.rankings import RANK_WEIGHT_ADMIRATION, bumpScores, forgetMember
+from main.search import (PROFILE_INDEXED_FIELDS, SearchDoc,
+                         queueIndexDocument, queueIndexRelation,
+                         queueIndexUserDocuments, queueRemoveDocument)
+from main.strings import Browse
+from management.models import Management
 
+from .bundles import bumpProfileBundle
 from .mailers import welcomeAlert
 from .methods import (getProfileImageBySocialAccount, getUsernameFromGHSocial,
                       isPictureSocialImage)
-from .models import (Frame, Framework, Profile, ProfileSetting, User,
-                     defaultImagePath, isPictureDeletable)
+from .models import (BlockedUser, Frame, Framework, Profile, ProfileAdmirer,
+                     ProfileSetting, ProfileSocial, ProfileTag, ProfileTopic,
+                     User, clearBlockGraphCache, defaultImagePath,
+                     isPictureDeletable)
 
 
 @receiver(post_save, sender=User)
@@ -29,6 +38,20 @@ def on_user_create(sender, instance: User, created, **kwargs):
         welcomeAlert(instance)
 
 
+USER_INDEXED_FIELDS = ('first_name', 'last_name', 'email')
+"""Fields of users indexed in search documents naming them (see main.search)"""
+
+
+@receiver(post_save, sender=User)
+def on_user_index(sender, instance: User, created, update_fields=None, **kwargs):
+    """
+    User name or email possibly changed, search index update of the documents naming the user.
+    """
+    if created or (update_fields and not set(update_fields).intersection(USER_INDEXED_FIELDS)):
+        return
+    queueIndexUserDocuments(instance.id)
+
+
 @receiver(post_save, sender=Profile)
 def on_profile_create(sender, instance: Profile, created, **kwargs):
     """
@@ -46,6 +69,7 @@ def on_profile_delete(sender, instance: Profile, **kwargs):
     """
     Profile cleanup.
     """
+    forgetMember(instance.id)
     try:
         if isPictureDeletable(instance.picture):
             instance.picture.delete(save=False)
@@ -186,3 +210,164 @@ def on_frame_delete(sender, instance: Frame, **kwargs):
             instance.attachment.delete(save=False)
     except Exception as e:
         pass
+
+
+@receiver(m2m_changed, sender=Profile.admirers.through)
+def on_profile_admired(sender, instance: Profile, action, reverse, pk_set, **kwargs):
+    """
+    Profile admired, bumps its trending scores (as a mentor and moderator too, if so).
+    """
+    if action != "post_add" or not pk_set:
+        return
+    if reverse:
+        admired = Profile.objects.filter(id__in=pk_set).values_list(
+            'id', 'is_mentor', 'is_moderator')
+    else:
+        admired = [(instance.id, instance.is_mentor, instance.is_moderator)]
+    for profileID, is_mentor, is_moderator in admired:
+        browseTypes = [Browse.TRENDING_PROFILES]
+        if is_mentor:
+            browseTypes.append(Browse.TRENDING_MENTORS)
+        if is_moderator:
+            browseTypes.append(Browse.TRENDING_MODERATORS)
+        bumpScores(browseTypes, profileID, RANK_WEIGHT_ADMIRATION)
+
+
+@receiver(post_save, sender=Profile)
+def on_profile_index(sender, instance: Profile, **kwargs):
+    """
+    Profile search index update, only if any of its indexed fields changed (as worked out by Profile.save), or if unknown.
+    A nickname change re-indexes the projects, competitions and articles of the profile too.
+    """
+    changed = getattr(instance, '_changedFields', None)
+    if changed is None:
+        queueIndexDocument(SearchDoc.PROFILE, instance.id)
+    elif 'nickname' in changed:
+        queueIndexUserDocuments(instance.user_id)
+    elif changed.intersection(PROFILE_INDEXED_FIELDS):
+        queueIndexDocument(SearchDoc.PROFILE, instance.id)
+
+
+@receiver(post_delete, sender=Profile)
+def on_profile_unindex(sender, instance: Profile, **kwargs):
+    """
+    Profile search index removal.
+    """
+    queueRemoveDocument(SearchDoc.PROFILE, instance.id)
+
+
+@receiver(post_save, sender=BlockedUser)
+@receiver(post_delete, sender=BlockedUser)
+def on_block_change(sender, instance: BlockedUser, **kwargs):
+    """
+    Block created or removed outside Profile.blockUser/unblockUser (admin, cascades), clears the block graph cache of both users.
+    """
+    try:
+        clearBlockGraphCache(Profile.objects.filter(id=instance.profile_id).values_list(
+            'user_id', flat=True).first(), instance.blockeduser_id)
+    except Exception as e:
+        errorLog(e)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def on_profile_bundle_change(sender, instance: Profile, **kwargs):
+    """
+    Profile changed, replaces its render bundle.
+    """
+    bumpProfileBundle(instance.id)
+
+
+PROFILE_RELATIONS = {
+    ProfileTopic: 'topics',
+    ProfileTag: 'tags',
+    ProfileSocial: 'socialsites',
+    ProfileAdmirer: 'admirers',
+    Management: 'management',
+}
+"""The relation (as in Profile.CACHE_RELATIONS) of each relation model of profiles"""
+
+
+def invalidateProfileRelation(profileID, relation: str):
+    """Deletes the cache keys of a profile depending upon the given relation (see Profile.CACHE_KEY_DEPS)
+
+    Args:
+        profileID (UUID, str): The id of the profile
+        relation (str): The changed relation
+    """
+    try:
+        profile = Profile.objects.filter(id=profileID).select_related('user').first()
+        if profile:
+            profile.invalidateCache(relation)
+    except Exception as e:
+        errorLog(e)
+
+
+@receiver(post_save, sender=ProfileTopic)
+@receiver(post_delete, sender=ProfileTopic)
+@receiver(post_save, sender=ProfileTag)
+@receiver(post_delete, sender=ProfileTag)
+@receiver(post_save, sender=ProfileSocial)
+@receiver(post_delete, sender=ProfileSocial)
+@receiver(post_save, sender=ProfileAdmirer)
+@receiver(post_delete, sender=ProfileAdmirer)
+@receiver(post_save, sender=Management)
+@receiver(post_delete, sender=Management)
+def on_profile_relation_change(sender, instance, **kwargs):
+    """
+    Relation of a profile shown on its page changed, replaces the render bundle of the profile,
+    and deletes its cache keys depending upon the relation.
+    """
+    bumpProfileBundle(instance.profile_id)
+    invalidateProfileRelation(instance.profile_id, PROFILE_RELATIONS[sender])
+
+
+@receiver(m2m_changed, sender=Profile.topics.through)
+@receiver(m2m_changed, sender=Profile.tags.through)
+@receiver(m2m_changed, sender=Profile.admirers.through)
+def on_profile_relations_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Relations of a profile shown on its page changed in bulk, replaces the render bundles of the affected profiles.
+    """
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        bumpProfileBundle(instance.id)
+        instance.invalidateCache(PROFILE_RELATIONS[sender])
+    elif pk_set:
+        for profileID in pk_set:
+            bumpProfileBundle(profileID)
+            invalidateProfileRelation(profileID, PROFILE_RELATIONS[sender])
+
+
+@receiver(post_save, sender=ProfileTopic)
+@receiver(post_delete, sender=ProfileTopic)
+@receiver(post_save, sender=ProfileTag)
+@receiver(post_delete, sender=ProfileTag)
+def on_profile_relation_index(sender, instance, created=True, **kwargs):
+    """
+    Profile topic or tag added or removed, profile search index update.
+    """
+    if created:
+        queueIndexDocument(SearchDoc.PROFILE, instance.profile_id)
+
+
+@receiver(m2m_changed, sender=Profile.topics.through)
+@receiver(m2m_changed, sender=Profile.tags.through)
+def on_profile_relations_index(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Profile topics or tags changed in bulk, search index update of the affected profiles.
+    """
+    queueIndexRelation(SearchDoc.PROFILE, instance, action, reverse, pk_set)
+
+
+@receiver(post_save, sender=SocialAccount)
+@receiver(post_delete, sender=SocialAccount)
+def on_social_account_change(sender, instance: SocialAccount, **kwargs):
+    """
+    Social account linked or unlinked, replaces the render bundle of the profile of its user.
+    """
+    profile = Profile.objects.filter(user_id=instance.user_id).select_related('user').first()
+    if profile:
+        bumpProfileBundle(profile.id)
+        profile.invalidateCache('socialaccount')
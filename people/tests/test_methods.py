@@ -6,6 +6,7 @@ from main.env import BOTMAIL
 from main.strings import Code
 from main.tests.utils import getRandomStr
 from people.methods import *
+from people.models import ProfileSocial
 
 from .utils import getTestBio
 
@@ -65,6 +66,18 @@ class PeopleMethodsTest(TestCase):
         self.assertDictEqual(getProfileSectionData(
             profileString.MODERATION, self.profile, self.user), defdata)
 
+    @tag('profbundle')
+    def test_profileBundle(self):
+        with self.assertNumQueries(6):
+            bundle = profileBundle(self.profile)
+        with self.assertNumQueries(0):
+            self.assertEqual(profileBundle(self.profile), bundle)
+        self.assertFalse(bundle['is_manager'])
+        self.assertEqual(bundle['socialsites'], [])
+        ProfileSocial.objects.create(profile=self.profile, site=f"https://{getRandomStr()}.com")
+        bundle = profileBundle(self.profile)
+        self.assertEqual(len(bundle['socialsites']), 1)
+
     def test_settingSectionData(self):
         defdata = dict()
         self.assertDictEqual(getSettingSectionData(
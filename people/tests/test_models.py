@@ -7,8 +7,13 @@ from auth2.tests.utils import (getTestEmail, getTestGHID, getTestName,
                                getTestPassword)
 from django.core.exceptions import ObjectDoesNotExist
 from django.db.utils import IntegrityError
+from unittest import mock
+
 from django.test import TestCase, tag
 from main.env import BOTMAIL
+from main.rankings import RANK_WEIGHT_ADMIRATION
+from main.search import SearchDoc
+from main.strings import Browse
 from people.apps import APPNAME
 from people.models import *
 
@@ -167,6 +172,89 @@ class ProfileAttributeTest(TestCase):
         self.profile.picture = defaultImagePath()
         self.profile.save()
 
+    def test_profile_block_graph(self):
+        other = Profile.objects.get(user=User.objects.create_user(
+            email=getTestEmail(), password=getTestPassword(), first_name=getTestName()))
+        self.assertEqual(self.profile.blockedIDs(), [])
+        self.assertTrue(self.profile.blockUser(other.user))
+        self.assertTrue(self.profile.isBlocked(other.user))
+        self.assertTrue(other.isBlockedProfile(self.profile))
+        self.assertEqual(self.profile.filterBlockedProfiles(
+            [other, self.profile]), [self.profile])
+        self.assertEqual(other.filterBlockedUserIDs(
+            [self.user.id, other.user.id]), [other.user.id])
+        self.assertTrue(other.unblockUser(self.user) and self.profile.unblockUser(other.user))
+        self.assertFalse(other.isBlockedProfile(self.profile))
+        self.assertEqual(self.profile.blockedProfiles(), [])
+
+    def test_profile_xp_ledger(self):
+        from people.ledger import appendXP
+        other = Profile.objects.get(user=User.objects.create_user(
+            email=getTestEmail(), password=getTestPassword(), first_name=getTestName()))
+        stale = Profile.objects.get(id=self.profile.id)
+        start, otherstart = self.profile.xp or 0, other.xp or 0
+        self.assertEqual(self.profile.increaseXP(
+            49 - start, notify=False), 49)
+        self.assertEqual(stale.increaseXP(6, notify=False), 55)
+        self.assertEqual(Profile.objects.get(
+            id=self.profile.id).milestone_count, 1)
+        totals = appendXP([(self.profile, 10, 'a'), (other, 3, 'b'),
+                           (self.profile, -70, 'c'), (other, 2, 'd')])
+        self.assertEqual(
+            totals, {self.profile.id: 0, other.id: otherstart + 5})
+        profile = Profile.objects.get(id=self.profile.id)
+        self.assertEqual((profile.xp, profile.milestone_count), (0, 0))
+        self.assertEqual(ProfileXPRecord.objects.filter(
+            profile=other).count(), 2)
+        self.assertEqual(self.profile.decreaseXP(5, notify=False), 0)
+
+    def test_profile_cache_invalidation(self):
+        from django.core.cache import cache
+        instanceKey = f"{Profile.MODEL_CACHE_KEY}_{self.profile.nickname}_{True}"
+        self.assertEqual(Profile.get_cache_one(
+            nickname=self.profile.nickname), self.profile)
+        cache.set(self.profile.CACHE_KEYS.topic_ids, ['cached'])
+        self.profile.xp = (self.profile.xp or 0) + 1
+        self.profile.save()
+        self.assertIsNone(cache.get(instanceKey))
+        self.assertEqual(cache.get(self.profile.CACHE_KEYS.topic_ids), ['cached'])
+        self.profile.save(update_fields=['githubID'])
+        self.assertEqual(cache.get(self.profile.CACHE_KEYS.topic_ids), ['cached'])
+        ProfileTopic.objects.create(
+            profile=self.profile, topic=Topic.objects.create(name=getTestTopics(1)[0]))
+        self.assertIsNone(cache.get(self.profile.CACHE_KEYS.topic_ids))
+
+    def test_profile_admiration_trending(self):
+        mentor = Profile.objects.get(user=User.objects.create_user(
+            email=getTestEmail(), password=getTestPassword(), first_name=getTestName()))
+        Profile.objects.filter(id=mentor.id).update(is_mentor=True)
+        mentor = Profile.objects.get(id=mentor.id)
+        with mock.patch('people.receivers.bumpScores') as bumpScores:
+            self.profile.admirer_profiles.add(mentor)
+            bumpScores.assert_called_once_with(
+                [Browse.TRENDING_PROFILES, Browse.TRENDING_MENTORS], mentor.id, RANK_WEIGHT_ADMIRATION)
+            bumpScores.reset_mock()
+            self.profile.admirers.add(mentor)
+            bumpScores.assert_called_once_with(
+                [Browse.TRENDING_PROFILES], self.profile.id, RANK_WEIGHT_ADMIRATION)
+
+    def test_profile_reindex_on_change(self):
+        profile = Profile.objects.get(id=self.profile.id)
+        with mock.patch('people.receivers.queueIndexDocument') as queueIndexDocument, mock.patch('people.receivers.queueIndexUserDocuments') as queueIndexUserDocuments:
+            profile.xp = (profile.xp or 0) + 1
+            profile.save(update_fields=['xp'])
+            profile.bio = getTestName()
+            profile.save()
+            queueIndexDocument.assert_not_called()
+            profile.suspended = True
+            profile.save(update_fields=['suspended'])
+            queueIndexDocument.assert_called_once_with(
+                SearchDoc.PROFILE, profile.id)
+            profile.nickname = f"{profile.nickname}x"
+            profile.save()
+            queueIndexUserDocuments.assert_called_once_with(profile.user_id)
+            self.assertEqual(queueIndexDocument.call_count, 1)
+
     def test_profile_settings_methods(self):
         self.assertEqual(self.setting.__str__(), self.profile.getID())
         self.assertFalse(self.setting.savePreferencesLink().endswith(
@@ -15,7 +15,9 @@ from django.views.decorators.http import require_GET, require_POST
 from main.decorators import (decode_JSON, github_only, normal_profile_required,
                              require_JSON)
 from main.methods import base64ToImageFile, errorLog, respondJson, updatePresentLists
+from main.search import SearchDoc, queueIndexDocument
 from main.strings import Code, Event, Message, Template, setURLAlerts, Browse, COMPETE
+from main.webhooks import WebhookSource, ingestDelivery
 from management.models import ReportCategory
 from projects.methods import addTagToDatabase, tagSearchList, topicSearchList
 from projects.models import Tag, BaseProject, FreeProject,CoreProject,Project
@@ -25,7 +27,7 @@ from compete.models import CompetitionJudge, Result
 from moderation.models import Moderation
 from .methods import (addTopicToDatabase, convertToFLname, filterBio, filterExtendedBio,
                       getProfileSectionHTML, getSettingSectionHTML,
-                      profileRenderData, renderer, rendererstr)
+                      profileRenderData, renderer, rendererstr, searchProfiles)
 from .models import (Profile, ProfileSetting, ProfileSocial, ProfileTag,
                      ProfileTopic, Topic, User)
 from .receivers import *
@@ -559,6 +561,7 @@ def topicsUpdate(request: WSGIRequest) -> HttpResponse:
             updatePresentLists(plist=Browse.TOPIC_PROJECTS, profiles=[profile])
             updatePresentLists(plist=Browse.RECOMMENDED_PROJECTS, profiles=[profile])
             cache.delete(profile.CACHE_KEYS.topic_ids)
+            queueIndexDocument(SearchDoc.PROFILE, profile.id)
 
         if json_body:
             return respondJson(Code.OK)
@@ -843,7 +846,7 @@ def unblockUser(request: WSGIRequest) -> JsonResponse:
 @csrf_exempt
 @github_only
 def githubEventsListener(request: WSGIRequest, type: str, event: str) -> HttpResponse:
-    """To listen to github events
+    """To listen to github organization events, and queue them for processing (see main.webhooks).
 
     METHODS: POST
 
@@ -862,32 +865,11 @@ def githubEventsListener(request: WSGIRequest, type: str, event: str) -> HttpRes
         ghevent = request.POST['ghevent']
         if event != ghevent:
             return HttpResponseBadRequest(f'event mismatch')
-
-        action = request.POST.get('action', None)
-        if ghevent == Event.ORG:
-            if action == Event.MEMBER_ADDED:
-                membership = request.POST.get('membership', None)
-                if membership:
-                    member: Profile = Profile.objects.filter(
-                        githubID=membership['user']['login'], is_active=True).first()
-                    if member:
-                        member.increaseXP(
-                            by=6, reason="Github Organization Membership Accepted")
-            elif action == Event.MEMBER_REMOVED:
-                membership = request.POST.get('membership', None)
-                if membership:
-                    member: Profile = Profile.objects.filter(
-                        githubID=membership['user']['login']).first()
-                    if member:
-                        member.decreaseXP(
-                            by=6, reason="Github Organization Membership Removed")
-        elif ghevent == Event.TEAMS:
-            if action == Event.CREATED:
-                team = request.POST.get('team', None)
-                # if team:
-                #     team['name']
-        else:
+        if ghevent not in [Event.ORG, Event.TEAMS]:
             return HttpResponseBadRequest(ghevent)
+        organization = request.POST.get('organization', None) or dict()
+        if not ingestDelivery(WebhookSource.ORGANIZATION, request.POST['hookID'], ghevent, request.POST, f"org_{organization.get('id', '')}"):
+            return HttpResponse(Code.NO)
         return HttpResponse(Code.OK)
     except Exception as e:
         errorLog(f"GH-EVENT", e)
@@ -919,77 +901,8 @@ def browseSearch(request: WSGIRequest):
         if not query:
             raise KeyError(query)
         limit = request.GET.get('limit', request.POST.get('limit', 10))
-        excludeIDs = []
-        cachekey = f'people_browse_search_{query}{request.LANGUAGE_CODE}'
-        if request.user.is_authenticated:
-            excludeIDs = request.user.profile.blockedIDs()
-            cachekey = f"{cachekey}" + "".join(excludeIDs)
-
-        profiles = cache.get(cachekey, [])
-
-        if not len(profiles):
-            specials = ('topic:', 'tag:', 'xp:', 'type:')
-            pquery = None
-            is_moderator = is_mentor = is_verified = is_manager = None
-            dbquery = Q()
-            invalidQuery = False
-            if query.startswith(specials):
-                def specquerieslist(q):
-                    return [
-                        Q(topics__name__iexact=q),
-                        Q(tags__name__iexact=q),
-                        Q(xp__gte=q),
-                        Q()
-                    ]
-                commaparts = query.split(",")
-                for cpart in commaparts:
-                    if cpart.strip().lower().startswith(specials):
-                        special, specialq = cpart.split(':')
-                        if special.strip().lower() == 'type':
-                            is_moderator = specialq.strip().lower() == 'moderator' or is_moderator
-                            is_mentor = specialq.strip().lower() == 'mentor' or is_mentor
-                            is_verified = specialq.strip().lower() == 'verified' or is_verified
-                            is_manager = specialq.strip().lower() == 'manager' or is_manager
-                            if is_moderator != None:
-                                dbquery = Q(dbquery, is_moderator=is_moderator)
-                            if is_mentor != None:
-                                dbquery = Q(dbquery, is_mentor=is_mentor)
-                            if is_verified != None:
-                                dbquery = Q(dbquery, is_verified=is_verified)
-                            if not (is_moderator or is_mentor or is_verified or is_manager):
-                                invalidQuery = True
-                                break
-                        else:
-                            dbquery = Q(dbquery, specquerieslist(specialq.strip())[
-                                        list(specials).index(f"{special.strip()}:")])
-                    else:
-                        pquery = cpart.strip()
-                        break
-            else:
-                pquery = query
-            if pquery and not invalidQuery:
-                fname, lname = convertToFLname(pquery)
-                dbquery = Q(dbquery, Q(
-                    Q(user__email__istartswith=pquery)
-                    | Q(user__first_name__istartswith=fname)
-                    | Q(user__first_name__iendswith=fname)
-                    | Q(user__last_name__istartswith=(lname or fname))
-                    | Q(user__last_name__iendswith=(lname or fname))
-                    | Q(nickname__istartswith=pquery)
-                    | Q(nickname__iexact=pquery)
-                    | Q(topics__name__istartswith=pquery)
-                    | Q(tags__name__istartswith=pquery)
-                    | Q(user__email__icontains=pquery)
-                ))
-            if not invalidQuery:
-                profiles = Profile.objects.exclude(user__id__in=excludeIDs).exclude(suspended=True).exclude(
-                    to_be_zombie=True).exclude(is_active=False).filter(dbquery).distinct()[:limit]
-
-                if is_manager:
-                    profiles = list(filter(lambda p: p.is_manager(), profiles))
-
-                if len(profiles):
-                    cache.set(cachekey, profiles, settings.CACHE_SHORT)
+        blockedIDs = request.user.profile.blockedIDs() if request.user.is_authenticated else []
+        profiles = searchProfiles(query, blockedIDs, limit)
 
         if json_body:
             return respondJson(Code.OK, dict(
@@ -1,5 +1,4 @@
 from re import sub as re_sub
-from traceback import format_exc
 from uuid import UUID
 
 from allauth.account.models import EmailAddress
@@ -7,26 +6,29 @@ from django.conf import settings
 from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.core.handlers.wsgi import WSGIRequest
-from django.db.models import Sum
 from django.db.models.query_utils import Q
 from django.http.response import HttpResponse
+from django.utils.translation import get_language
 from main.bots import Discord, GithubKnotters
 from main.env import SITE, REDIS_PREFIX
 from main.methods import (addMethodToAsyncQueue, errorLog, renderString,
                           renderView)
+from main.search import SearchDoc, rankedByHits, searchIndex
 from main.strings import Code, Event, Message, url, Browse, Action
-from management.models import HookRecord
+from main.strings import project as PROJECT
+from management.models import GhMarketApp, HookRecord
 from people.methods import addTopicToDatabase
-from people.models import Profile, Topic
+from people.ledger import appendXP
+from people.models import BlockedUser, Profile, ProfileTopic, Topic
 from moderation.models import Moderation
 from compete.models import Submission
 from .apps import APPNAME
-from .mailers import (sendCoreProjectApprovedNotification,
+from .scoring import scorePush
+from .mailers import (githubBotInstalled, sendCoreProjectApprovedNotification,
                       sendProjectApprovedNotification)
-from .models import (BaseProject, Category, CoreProject,
-                     CoreProjectVerificationRequest, FileExtension,
-                     TopicFileExtension, FreeProject, FreeProjectVerificationRequest, 
-                     License, Project, ProjectSocial, Tag, Snapshot)
+from .models import (AppRepository, BaseProject, BotHookRecord, Category, CoreProject, CoreProjectHookRecord,
+                     CoreProjectVerificationRequest, FreeProject, FreeProjectVerificationRequest, FreeRepository,
+                     License, Project, ProjectHookRecord, ProjectSocial, ProjectTopic, Tag, Snapshot)
 from people.models import Topic
 
 
@@ -1058,6 +1060,35 @@ def deleteGhOrgCoreepository(coreproject: CoreProject):
     return True
 
 
+def pushCommitters(authors: list) -> dict:
+    """Returns the active profiles of commit authors of a push, matched by GitHub ID or email, else by verified email address,
+    in at most two queries.
+
+    Args:
+        authors (list<tuple<str, str>>): The GitHub ID and email of the author of each commit
+
+    Returns:
+        dict<str, Profile>: The profile of each matched author, by GitHub ID
+    """
+    authors = dict(authors)
+    if not authors:
+        return dict()
+    profiles = list(Profile.objects.filter(Q(Q(githubID__in=list(authors.keys())) | Q(user__email__in=list(authors.values()))),
+                                           is_active=True, suspended=False, to_be_zombie=False).select_related('user'))
+    byGhID = dict(map(lambda p: (p.githubID, p), profiles))
+    byEmail = dict(map(lambda p: (p.user.email, p), filter(lambda p: p.user, profiles)))
+    committers = dict()
+    for ghID, email in authors.items():
+        profile = byGhID.get(ghID, None) or byEmail.get(email, None)
+        if profile:
+            committers[ghID] = profile
+    unmatched = dict(map(lambda a: (a[1], a[0]), filter(lambda a: a[0] not in committers, authors.items())))
+    if unmatched:
+        for emailaddr in EmailAddress.objects.filter(email__in=list(unmatched.keys()), verified=True).select_related('user__profile'):
+            committers[unmatched[emailaddr.email]] = emailaddr.user.profile
+    return committers
+
+
 def handleGithubKnottersRepoHook(hookrecordID: UUID, ghevent: str, postData: dict, project: BaseProject):
     """Handle github repository hook event for any project
 
@@ -1068,203 +1099,256 @@ def handleGithubKnottersRepoHook(hookrecordID: UUID, ghevent: str, postData: dic
         project (BaseProject): The base project instance
 
     Returns:
-        bool, str: True, message if handled, False, error message if not handled
+        bool, str: True, message if handled, False, error message if not handled (an invalid delivery)
+
+    Raises:
+        Exception: Any unexpected error, for the delivery to be retried
     """
-    import math
-    try:
-        statusKey = f'gh_event_hook_status_{hookrecordID}'
-        status = cache.get(statusKey, Code.NO)
-        if status == Code.OK:
-            return True, 'Processing or processed'
-        cache.set(statusKey, Code.OK, settings.CACHE_LONG)
-        hookrecord: HookRecord = HookRecord.objects.get(
-            id=hookrecordID, success=False)
-        if ghevent == Event.PUSH:
-            commits = postData["commits"]
-            repository = postData["repository"]
-            addTopicToDatabase(repository['language'])
-            committers = {}
-            committer_commits = {}
-            ext_changes = {}
-            un_committers = []
-            for commit in commits:
-                commit_author_ghID = commit["author"]["username"]
-                commit_author_email = commit["author"]["email"]
-                if commit_author_ghID not in un_committers:
-                    commit_committer = committers.get(commit_author_ghID, None)
-                    if not commit_committer:
-                        commit_committer: Profile = Profile.objects.filter(Q(Q(githubID=commit_author_ghID) | Q(
-                            user__email=commit_author_email)), is_active=True, suspended=False, to_be_zombie=False).first()
-                        if not commit_committer:
-                            emailaddr: EmailAddress = EmailAddress.objects.filter(
-                                email=commit_author_email, verified=True).first()
-                            if not emailaddr:
-                                un_committers.append(commit_author_ghID)
-                                continue
-                            else:
-                                commit_committer: Profile = emailaddr.user.profile
-                            committers[commit_author_ghID] = commit_committer
-                        else:
-                            committers[commit_author_ghID] = commit_committer
-                    added = commit.get("added", [])
-                    removed = commit.get("removed", [])
-                    modified = commit.get("modified", [])
-                    changed = added + removed + modified
-                    commit_extensions = set()
-                    for change in changed:
-                        parts = change.split('.')
-                        if len(parts) < 1:
-                            continue
-                        ext = parts[-1]
-                        ext_changes[ext] = ext_changes.get(ext, 0) + 1
-                        commit_extensions.add(ext)
-                    if committer_commits.get(commit_committer, None):
-                        committer_commits[commit_committer].append(commit_extensions)
-                    else:
-                        committer_commits[commit_committer] = [commit_extensions]            
-            extensions = list(ext_changes.keys())
-            proj_topics = project.topics.all() 
-            file_ext = {}
-            for ext in extensions:
-                fileext, _ = FileExtension.objects.get_or_create(
-                    extension__iexact=ext, defaults={'extension' : ext},)
-                file_ext[ext] = fileext
-                topfileext_list = TopicFileExtension.objects.filter(file_extension=fileext, topic__in=proj_topics)
-                existing_topics = set([obj.topic for obj in topfileext_list])
-                new_topics = [topic for topic in proj_topics if topic not in existing_topics]
-                creation_list = [TopicFileExtension(file_extension=fileext, topic=topic, score=ext_changes[ext]) for topic in new_topics]
-                if len(creation_list):
-                    TopicFileExtension.objects.bulk_create(creation_list)
-                if len(topfileext_list):
-                    for topfileext in topfileext_list:
-                        topfileext.score += ext_changes[ext]
-                        topfileext.save()
-                    # TopicFileExtension.objects.bulk_update(topfileext_list, ['score'], batch_size=1000)
-            committers_topic_xp = {}
-            ext_topic_score = {}
-            ext_total_score = {}
-            for committer in committers.values():
-                for ext_set in committer_commits[committer]:
-                    for topic in proj_topics:
-                        ext_top_xp = 1
-                        for ext in ext_set:
-                            ext_tot_score = ext_total_score.get(ext, TopicFileExtension.objects.filter(file_extension=file_ext[ext]).aggregate(Sum('score'))['score__sum'])
-                            if ext_topic_score.get(ext, None):
-                                ext_topic_score[ext][topic] = ext_topic_score[ext].get(topic, TopicFileExtension.objects.get(file_extension=file_ext[ext], topic=topic).score)
-                            else:
-                                ext_topic_score[ext] = {topic : TopicFileExtension.objects.get(file_extension=file_ext[ext], topic=topic).score}
-                            ext_top_score = ext_topic_score[ext][topic]
-                            ext_top_xp = max(ext_top_xp, math.ceil(5*ext_top_score/ext_tot_score))
-                        if committers_topic_xp.get(committer, None):
-                            committers_topic_xp[committer][topic] = committers_topic_xp[committer].get(topic, 0) + ext_top_xp
-                        else:
-                            committers_topic_xp[committer] = {topic : ext_top_xp}
-            for committer_ghID, committer in committers.items():
-                for topic in proj_topics:
-                    committer.increaseTopicPoints(
-                        topic=topic, by=committers_topic_xp[committer][topic], notify=False, reason=f"{committer_ghID} committed to {project.name}")
-            if len(changed) > 1:
-                project.creator.increaseXP(
-                    by=(((len(commits)//len(committers))//2) or 1), notify=False, reason=f"Commits pushed to {project.name}")
-                if project.is_not_free():
-                    project.get_moderator().increaseXP(
-                        by=(((len(commits)//len(committers))//3) or 1), notify=False, reason=f"Commits pushed to {project.name}")
-        elif ghevent == Event.PR:
-            pr = postData.get('pull_request', None)
-            action = postData.get('action', None)
-            pr_creator_ghID = pr['user']['login']
-            if action == 'opened':
-                pr_creator: Profile = Profile.objects.filter(
-                    githubID=pr_creator_ghID, is_active=True, suspended=False, to_be_zombie=False).first()
-                if pr_creator:
-                    pr_creator.increaseXP(
-                        by=2, notify=False, reason=f"PR opened by {pr_creator_ghID} on {project.name}")
-            elif action == 'closed':
-                pr_creator: Profile = Profile.objects.filter(
-                    githubID=pr_creator_ghID, is_active=True, suspended=False, to_be_zombie=False).first()
-                if pr['merged']:
-                    if pr_creator:
-                        pr_creator.increaseXP(
-                            by=3, notify=False, reason=f"PR by {pr_creator_ghID} merged on {project.name}")
-                    project.creator.increaseXP(
-                        by=1, notify=False, reason=f"PR by {pr_creator_ghID} merged on {project.name}")
-                    if project.is_not_free():
-                        project.get_moderator().increaseXP(
-                            by=1, notify=False, reason=f"PR by {pr_creator_ghID} merged on {project.name}")
-                else:
-                    if pr_creator:
-                        pr_creator.decreaseXP(
-                            by=2, notify=False, reason=f"PR by {pr_creator_ghID} closed unmerged on {project.name}")
-            elif action == 'reopened':
-                pr_creator: Profile = Profile.objects.filter(
-                    githubID=pr_creator_ghID, is_active=True, suspended=False, to_be_zombie=False).first()
+    hookrecord: HookRecord = HookRecord.objects.filter(
+        id=hookrecordID, success=False).first()
+    if not hookrecord:
+        return False, f"objectdoesnotexist hook record ID: {hookrecordID}"
+    # unexpected errors are raised to the webhook queue (main.webhooks) to be retried, and as the database backend has no
+    # transactions, each change is applied as a step of the hook record, which a retry skips if already applied
+    step = hookrecord.applyStep
+    if ghevent == Event.PUSH:
+        commits = postData["commits"]
+        repository = postData["repository"]
+        addTopicToDatabase(repository['language'])
+        committers = pushCommitters(list(map(lambda c: (
+            c["author"]["username"], c["author"]["email"]), commits)))
+        changed = []
+        committed = []
+        for commit in commits:
+            committer = committers.get(commit["author"]["username"], None)
+            if not committer:
+                continue
+            paths = commit.get("added", []) + commit.get("removed", []) + commit.get("modified", [])
+            changed.extend(paths)
+            committed.append((committer, paths))
+        step("score", lambda: scorePush(project, committed, dict(
+            map(lambda c: (c[1], f"{c[0]} committed to {project.name}"), committers.items()))))
+        if len(changed) > 1:
+            xpchanges = [(project.creator, (((len(commits)//len(committers))//2) or 1),
+                          f"Commits pushed to {project.name}")]
+            if project.is_not_free():
+                xpchanges.append((project.get_moderator(), (((len(commits)//len(committers))//3) or 1),
+                                  f"Commits pushed to {project.name}"))
+            step("xp", lambda: appendXP(xpchanges))
+    elif ghevent == Event.PR:
+        pr = postData.get('pull_request', None)
+        action = postData.get('action', None)
+        pr_creator_ghID = pr['user']['login']
+        if action == 'opened':
+            pr_creator: Profile = Profile.objects.filter(
+                githubID=pr_creator_ghID, is_active=True, suspended=False, to_be_zombie=False).first()
+            if pr_creator:
+                step("xp", lambda: pr_creator.increaseXP(
+                    by=2, notify=False, reason=f"PR opened by {pr_creator_ghID} on {project.name}"))
+        elif action == 'closed':
+            pr_creator: Profile = Profile.objects.filter(
+                githubID=pr_creator_ghID, is_active=True, suspended=False, to_be_zombie=False).first()
+            if pr['merged']:
+                reason = f"PR by {pr_creator_ghID} merged on {project.name}"
+                xpchanges = [(project.creator, 1, reason)]
                 if pr_creator:
-                    pr_creator.increaseXP(
-                        by=2, notify=False, reason=f"PR by {pr_creator_ghID} reopened on {project.name}")
-            elif action == 'review_requested':
-                reviewer_gh_id = pr['requested_reviewer']['login']
-                pr_reviewer: Profile = Profile.objects.filter(
-                    githubID=reviewer_gh_id, is_active=True, suspended=False, to_be_zombie=False).first()
-                if pr_reviewer:
-                    pr_reviewer.increaseXP(
-                        by=2, notify=False, reason=f"PR by {pr_creator_ghID} requested review by {reviewer_gh_id} on {project.name}")
-            elif action == 'review_request_removed':
-                reviewer_gh_id = pr['requested_reviewer']['login']
-                pr_reviewer: Profile = Profile.objects.filter(
-                    githubID=reviewer_gh_id, is_active=True, suspended=False, to_be_zombie=False).first()
-                if pr_reviewer:
-                    pr_reviewer.decreaseXP(
-                        by=2, notify=False, reason=f"PR by {pr_creator_ghID} removed review by {reviewer_gh_id} on {project.name}")
-            else:
-                return False, f"Unhandled '{ghevent}' action: {action}"
-        elif ghevent == Event.PR_REVIEW:
-            pr = postData.get('pull_request', None)
-            pr_creator_ghID = pr['user']['login']
-            review = postData.get('review', None)
-            action = postData.get('action', None)
-            reviewer_gh_id = review['user']['login']
-            # pr['requested_reviewers']
-            if action == 'submitted':
-                pr_reviewer: Profile = Profile.objects.filter(
-                    githubID=reviewer_gh_id, is_active=True, suspended=False, to_be_zombie=False).first()
-                if pr_reviewer:
-                    for topic in project.topics.all():
-                        pr_reviewer.increaseTopicPoints(
-                            topic=topic, by=1, notify=False, reason=f"PR by {pr_creator_ghID} reviewed by {reviewer_gh_id} on {project.name}")
-            elif action == 'dismissed':
-                pr_reviewer: Profile = Profile.objects.filter(
-                    githubID=reviewer_gh_id, is_active=True, suspended=False, to_be_zombie=False).first()
-                if pr_reviewer:
-                    for topic in project.topics.all():
-                        pr_reviewer.decreaseTopicPoints(
-                            topic=topic, by=1, notify=False, reason=f"PR by {pr_creator_ghID} dismissed review by {reviewer_gh_id} on {project.name}")
-            else:
-                return False, f"Unhandled '{ghevent}' action: {action}"
-        elif ghevent == Event.STAR:
-            action = postData.get('action', None)
-            if action == 'created':
-                project.creator.increaseXP(
-                    by=1, notify=False, reason=f"Starred {project.name}")
-                if project.is_not_free():
-                    project.get_moderator().increaseXP(
-                        by=1, notify=False, reason=f"Starred {project.name}")
-            elif action == 'deleted':
-                project.creator.decreaseXP(
-                    by=1, notify=False, reason=f"Unstarred {project.name}")
+                    xpchanges.append((pr_creator, 3, reason))
                 if project.is_not_free():
-                    project.get_moderator().decreaseXP(
-                        by=1, notify=False, reason=f"Unstarred {project.name}")
+                    xpchanges.append((project.get_moderator(), 1, reason))
+                step("xp", lambda: appendXP(xpchanges))
             else:
-                return False, f"Unhandled '{ghevent}' action: {action}"
+                if pr_creator:
+                    step("xp", lambda: pr_creator.decreaseXP(
+                        by=2, notify=False, reason=f"PR by {pr_creator_ghID} closed unmerged on {project.name}"))
+        elif action == 'reopened':
+            pr_creator: Profile = Profile.objects.filter(
+                githubID=pr_creator_ghID, is_active=True, suspended=False, to_be_zombie=False).first()
+            if pr_creator:
+                step("xp", lambda: pr_creator.increaseXP(
+                    by=2, notify=False, reason=f"PR by {pr_creator_ghID} reopened on {project.name}"))
+        elif action == 'review_requested':
+            reviewer_gh_id = pr['requested_reviewer']['login']
+            pr_reviewer: Profile = Profile.objects.filter(
+                githubID=reviewer_gh_id, is_active=True, suspended=False, to_be_zombie=False).first()
+            if pr_reviewer:
+                step("xp", lambda: pr_reviewer.increaseXP(
+                    by=2, notify=False, reason=f"PR by {pr_creator_ghID} requested review by {reviewer_gh_id} on {project.name}"))
+        elif action == 'review_request_removed':
+            reviewer_gh_id = pr['requested_reviewer']['login']
+            pr_reviewer: Profile = Profile.objects.filter(
+                githubID=reviewer_gh_id, is_active=True, suspended=False, to_be_zombie=False).first()
+            if pr_reviewer:
+                step("xp", lambda: pr_reviewer.decreaseXP(
+                    by=2, notify=False, reason=f"PR by {pr_creator_ghID} removed review by {reviewer_gh_id} on {project.name}"))
+        else:
+            return False, f"Unhandled '{ghevent}' action: {action}"
+    elif ghevent == Event.PR_REVIEW:
+        pr = postData.get('pull_request', None)
+        pr_creator_ghID = pr['user']['login']
+        review = postData.get('review', None)
+        action = postData.get('action', None)
+        reviewer_gh_id = review['user']['login']
+        # pr['requested_reviewers']
+        if action == 'submitted':
+            pr_reviewer: Profile = Profile.objects.filter(
+                githubID=reviewer_gh_id, is_active=True, suspended=False, to_be_zombie=False).first()
+            if pr_reviewer:
+                for topic in project.topics.all():
+                    step(f"topic_{topic.id}", lambda: pr_reviewer.increaseTopicPoints(
+                        topic=topic, by=1, notify=False, reason=f"PR by {pr_creator_ghID} reviewed by {reviewer_gh_id} on {project.name}"))
+        elif action == 'dismissed':
+            pr_reviewer: Profile = Profile.objects.filter(
+                githubID=reviewer_gh_id, is_active=True, suspended=False, to_be_zombie=False).first()
+            if pr_reviewer:
+                for topic in project.topics.all():
+                    step(f"topic_{topic.id}", lambda: pr_reviewer.decreaseTopicPoints(
+                        topic=topic, by=1, notify=False, reason=f"PR by {pr_creator_ghID} dismissed review by {reviewer_gh_id} on {project.name}"))
+        else:
+            return False, f"Unhandled '{ghevent}' action: {action}"
+    elif ghevent == Event.STAR:
+        action = postData.get('action', None)
+        if action in ['created', 'deleted']:
+            by = 1 if action == 'created' else -1
+            reason = f"{'Starred' if by > 0 else 'Unstarred'} {project.name}"
+            xpchanges = [(project.creator, by, reason)]
+            if project.is_not_free():
+                xpchanges.append((project.get_moderator(), by, reason))
+            step("xp", lambda: appendXP(xpchanges))
         else:
-            return False, f"Unhandled '{ghevent}'"
+            return False, f"Unhandled '{ghevent}' action: {action}"
+    else:
+        return False, f"Unhandled '{ghevent}'"
+    hookrecord.success = True
+    hookrecord.save(update_fields=['success'])
+    return True, f"hook record ID: {hookrecordID}"
+
+
+def processRepositoryHook(delivery, payload: dict) -> tuple:
+    """Processes a core/verified project repository webhook delivery, received by projects.views.githubEventsListener (see main.webhooks).
+
+    Args:
+        delivery (WebhookDelivery): The delivery, targeting the project id
+        payload (dict): The delivery payload
+
+    Returns:
+        bool, str: True, message if processed, False, error message if the delivery is invalid
+    """
+    reponame = payload["repository"]["name"]
+    project = Project.objects.filter(
+        id=delivery.target, reponame=reponame, trashed=False, is_archived=False, suspended=False).first()
+    if project:
+        hookrecord, _ = ProjectHookRecord.objects.get_or_create(hookID=delivery.deliveryID, defaults=dict(
+            success=False,
+            project=project,
+        ))
+    else:
+        project = CoreProject.objects.filter(
+            id=delivery.target, codename=reponame, trashed=False, is_archived=False, suspended=False).first()
+        if not project:
+            return False, f"No project of repository {reponame}"
+        hookrecord, _ = CoreProjectHookRecord.objects.get_or_create(hookID=delivery.deliveryID, defaults=dict(
+            success=False,
+            coreproject=project,
+        ))
+    if hookrecord.success:
+        return True, f"hook record ID: {hookrecord.id}"
+    return handleGithubKnottersRepoHook(hookrecord.id, delivery.event, payload, project.base())
+
+
+def processBotHook(delivery, payload: dict) -> tuple:
+    """Processes a webhook delivery relayed by the GitHub bot, received by projects.views.githubBotEvents (see main.webhooks).
+
+    Args:
+        delivery (WebhookDelivery): The delivery, targeting the GitHub app id of the bot
+        payload (dict): The delivery payload
+
+    Returns:
+        bool, str: True, message if processed, False, error message if the delivery is invalid
+    """
+    event = delivery.event
+    ghapp: GhMarketApp = GhMarketApp.objects.get(gh_id=delivery.target)
+    hookrecord, _ = BotHookRecord.objects.get_or_create(
+        hookID=delivery.deliveryID,
+        ghmarketapp=ghapp,
+        defaults=dict(
+            success=False,
+        )
+    )
+    if hookrecord.success:
+        return True, f"hook record ID: {hookrecord.id}"
+    if event == "installation":
+        action = payload['action']
+        installation = payload['installation']
+        account = installation['account']
+        permissions = installation['permissions']
+        frepos = FreeRepository.objects.filter(
+            free_project__creator__githubID=account["login"])
+        if action == 'created':
+            repositories = payload['repositories']
+            repo_ids = map(lambda r: r['id'], repositories)
+            frepos = FreeRepository.objects.filter(repo_id__in=repo_ids)
+            githubBotInstalled(frepos)
+            apprepos = []
+            for frepo in frepos:
+                if not AppRepository.objects.filter(free_repo=frepo).exists():
+                    apprepos.append(AppRepository(
+                        free_repo=frepo,
+                        gh_app=ghapp,
+                        permissions=permissions
+                    ))
+            AppRepository.objects.bulk_create(apprepos)
+        elif action == 'deleted':
+            AppRepository.objects.filter(
+                free_repo__in=list(frepos), gh_app=ghapp).delete()
+        elif action == 'suspend':
+            AppRepository.objects.filter(free_repo__in=list(
+                frepos), gh_app=ghapp).update(suspended=True)
+        elif action == 'unsuspend':
+            AppRepository.objects.filter(free_repo__in=list(
+                frepos), gh_app=ghapp).update(suspended=False)
+        elif action == 'new_permissions_accepted':
+            AppRepository.objects.filter(free_repo__in=list(
+                frepos), gh_app=ghapp).update(permissions=permissions)
+        else:
+            return False, f"Unhandled '{event}' action: {action}"
         hookrecord.success = True
         hookrecord.save()
-        return True, f"hook record ID: {hookrecordID}"
-    except ObjectDoesNotExist:
-        return False, f"objectdoesnotexist hook record ID: {hookrecordID}"
-    except:
-        return False, format_exc()
+    elif event == "installation_repositories":
+        action = payload['action']
+        installation = payload['installation']
+        permissions = installation['permissions']
+        account = installation['account']
+        if action == 'added':
+            repositories = payload['repositories_added']
+            repo_ids = map(lambda r: r['id'], repositories)
+            frepos = FreeRepository.objects.filter(repo_id__in=repo_ids)
+            githubBotInstalled(frepos)
+            apprepos = []
+            for frepo in frepos:
+                if not AppRepository.objects.filter(free_repo=frepo).exists():
+                    apprepos.append(AppRepository(
+                        free_repo=frepo,
+                        gh_app=ghapp,
+                        permissions=permissions
+                    ))
+            AppRepository.objects.bulk_create(apprepos)
+        elif action == 'removed':
+            repositories = payload['repositories_removed']
+            repo_ids = map(lambda r: r['id'], repositories)
+            frepos = FreeRepository.objects.filter(repo_id__in=repo_ids)
+            AppRepository.objects.filter(
+                free_repo__in=list(frepos), gh_app=ghapp).delete()
+        else:
+            return False, f"Unhandled '{event}' action: {action}"
+        hookrecord.success = True
+        hookrecord.save()
+    else:
+        frepo: FreeRepository = FreeRepository.objects.filter(
+            repo_id=payload["repository"]["id"]).select_related('free_project').first()
+        if not frepo:
+            return False, f"No project of repository {payload['repository']['id']}"
+        return handleGithubKnottersRepoHook(hookrecord.id, event, payload, frepo.free_project.base())
+    return True, f"hook record ID: {hookrecord.id}"
 
 
 def topicSearchList(query: str, excluding, limit: int, cacheKey: str):
@@ -1337,99 +1421,357 @@ def transfer_approved_repositories(newmoderator, oldmoderator, approved_moderati
     return True
 
 
+def approvedProjects() -> dict:
+    """Returns all approved and visible projects with their creators, in one query,
+    instead of checking BaseProject.is_approved for each project.
+
+    Returns:
+        dict<UUID, tuple<UUID, UUID>>: (creator profile id, creator user id) by project id
+    """
+    return dict(map(lambda row: (row[0], (row[1], row[2])), BaseProject.objects.filter(
+        BaseProject.approvalQuery(Code.APPROVED), trashed=False, suspended=False
+    ).values_list('id', 'creator_id', 'creator__user_id').distinct()))
+
+
+def backfillProjectFlags() -> dict:
+    """Populates the denormalized BaseProject.kind and BaseProject.approval of existing projects not having them yet,
+    with one update query per project type and status. New and updated projects maintain these on save.
+    Run on every deployment, until then BaseProject.approvalQuery and BaseProject.kindQuery fall back to the child projects.
+
+    Returns:
+        dict<str, int>: Number of base projects updated per kind
+    """
+    unflagged = BaseProject.objects.filter(Q(kind__isnull=True) | Q(approval__isnull=True))
+    counts = dict()
+    counts[PROJECT.FREE] = unflagged.filter(id__in=list(FreeProject.objects.values_list(
+        'id', flat=True))).update(kind=PROJECT.FREE, approval=Code.APPROVED)
+    for model, kind in ((Project, PROJECT.VERIFIED), (CoreProject, PROJECT.CORE)):
+        counts[kind] = 0
+        for status in PROJECT.PROJECTSTATES:
+            counts[kind] += unflagged.filter(id__in=list(model.objects.filter(
+                status=status).values_list('id', flat=True))).update(kind=kind, approval=status)
+    return counts
+
+
+def blockedUserIDsOf(profileIDs: set) -> dict:
+    """Returns the blocked user ids (mutually blocked as well) of each of the given profiles, in one query.
+
+    Args:
+        profileIDs (set<UUID>): The profile ids
+
+    Returns:
+        dict<UUID, set<UUID>>: Blocked user ids by profile id
+    """
+    blocked = dict()
+    for profileID, userID, blockedUserID, blockedProfileID in BlockedUser.objects.filter(
+        Q(profile__id__in=profileIDs) | Q(blockeduser__profile__id__in=profileIDs)
+    ).values_list('profile_id', 'profile__user_id', 'blockeduser_id', 'blockeduser__profile__id'):
+        if profileID in profileIDs:
+            blocked.setdefault(profileID, set()).add(blockedUserID)
+        if blockedProfileID in profileIDs:
+            blocked.setdefault(blockedProfileID, set()).add(userID)
+    return blocked
+
+
+def _affectedProfileIDs(profiles: list, topics: list) -> set:
+    """Returns ids of the given profiles, along with those of all profiles having any of the given topics."""
+    profileIDs = set(map(lambda profile: profile.id, profiles))
+    if topics and len(topics):
+        profileIDs.update(ProfileTopic.objects.filter(
+            topic__in=topics).values_list('profile_id', flat=True))
+    return profileIDs
+
+
+def _topicProjectIDs(topicIDs: set, approved: dict) -> dict:
+    """Returns the approved project ids of each of the given topics, in one query."""
+    topicProjects = dict()
+    for projectID, topicID in ProjectTopic.objects.filter(topic__id__in=topicIDs, project__trashed=False,
+                                                          project__suspended=False).values_list('project_id', 'topic_id'):
+        if projectID in approved:
+            topicProjects.setdefault(topicID, set()).add(projectID)
+    return topicProjects
+
+
 def recommendedProjectsList(profiles: list, topics: list = list()):
     """
     Updates present list of recommended projects for a list of profiles.
+    Projects matching more of a profile's topics come first, and if none matches, all approved projects are recommended.
     """
     try:
         r = settings.REDIS_CLIENT
-        if len(topics):
-            profiles.extend(list(Profile.objects.filter(topics__in=topics).exclude(id__in=[profile.id for profile in profiles])))
-        for profile in profiles:
-            excludeUserIDs = profile.blockedIDs()
-            query = Q(topics__in=profile.getTopics())
-            authquery = ~Q(creator=profile)
-
-            projects = BaseProject.objects.filter(Q(trashed=False, suspended=False), authquery, query).exclude(creator__user__id__in=excludeUserIDs)
-            projects = list(
-                set(list(filter(lambda p: p.is_approved(), projects))))
-            count = len(projects)
-            if count < 1:
-                projects = BaseProject.objects.filter(Q(trashed=False, suspended=False), authquery).exclude(
-                    creator__user__id__in=excludeUserIDs)
-                projects = list(
-                    set(list(filter(lambda p: p.is_approved(), projects))))
-            project_ids = [str(project.id) for project in projects]
-            if project_ids:
-                r.delete(f"{REDIS_PREFIX}{Browse.RECOMMENDED_PROJECTS}_{profile.id}")
-                r.rpush(f"{REDIS_PREFIX}{Browse.RECOMMENDED_PROJECTS}_{profile.id}", *project_ids)
+        profileIDs = _affectedProfileIDs(profiles, topics)
+        if not profileIDs:
+            return
+        profileTopics = dict()
+        for profileID, topicID in ProfileTopic.objects.filter(profile__id__in=profileIDs, trashed=False).values_list('profile_id', 'topic_id'):
+            profileTopics.setdefault(profileID, set()).add(topicID)
+        approved = approvedProjects()
+        topicProjects = _topicProjectIDs(
+            set().union(*profileTopics.values()), approved)
+        blocked = blockedUserIDsOf(profileIDs)
+
+        pipe = r.pipeline(transaction=False)
+        for profileID in profileIDs:
+            excludeUserIDs = blocked.get(profileID, set())
+
+            def visible(projectID):
+                creatorID, creatorUserID = approved[projectID]
+                return creatorID != profileID and creatorUserID not in excludeUserIDs
+
+            matches = dict()
+            for topicID in profileTopics.get(profileID, []):
+                for projectID in topicProjects.get(topicID, []):
+                    matches[projectID] = matches.get(projectID, 0) + 1
+            projectIDs = sorted(filter(visible, matches.keys()),
+                                key=lambda projectID: -matches[projectID])
+            if not projectIDs:
+                projectIDs = list(filter(visible, approved.keys()))
+            if projectIDs:
+                key = f"{REDIS_PREFIX}{Browse.RECOMMENDED_PROJECTS}_{profileID}"
+                pipe.delete(key)
+                pipe.rpush(key, *map(str, projectIDs))
+        pipe.execute()
     except Exception as e:
         errorLog(e)
 
 
+def _recommendedTopicIDs(profiles: list) -> dict:
+    """Returns the first recommended topic id (see Profile.recommended_topics) of each of the given profiles having no topics,
+    from their cached recommendations, or else from one query shared by all of them, as none of their recommendations exclude any topic."""
+    cacheKeys = dict(map(lambda profile: (
+        profile.CACHE_KEYS.recommended_topics, profile.id), profiles))
+    if not cacheKeys:
+        return dict()
+    cached = cache.get_many(list(cacheKeys.keys()))
+    missing = list(filter(lambda key: not cached.get(key), cacheKeys.keys()))
+    if missing:
+        topics = list(Topic.objects.all()[:5])
+        if topics:
+            cache.set_many(dict(map(lambda key: (key, topics), missing)), settings.CACHE_MINI)
+            cached.update(dict(map(lambda key: (key, topics), missing)))
+    recommended = dict()
+    for key, profileID in cacheKeys.items():
+        if cached.get(key):
+            recommended[profileID] = cached[key][0].id
+    return recommended
+
+
 def topicProjectsList(profiles: list, topics: list = None):
     """
-    Updates present list of topic related projects for given profile.
+    Updates present list of topic related projects for given profiles.
+    The topic of each profile is its highest points topic, or a recommended topic if it has none.
     """
     try:
         r = settings.REDIS_CLIENT
-        if len(topics):
-            profiles.extend(list(Profile.objects.filter(topics__in=topics).exclude(id__in=[profile.id for profile in profiles])))
-        for profile in profiles:
-            excludeUserIDs = profile.blockedIDs()
-            if profile.totalAllTopics():
-                topic = profile.getAllTopics()[0]
-            else:
-                topic = profile.recommended_topics()[0]
-            r.set(f"{REDIS_PREFIX}{Browse.TOPIC_PROJECTS}_{profile.id}_topic", topic.get_id)
-            projects = BaseProject.objects.filter(trashed=False, suspended=False, topics=topic).exclude(
-                creator__user__id__in=excludeUserIDs)
-            projects = list(
-                set(list(filter(lambda p: p.is_approved(), projects))))
-            project_ids = [str(project.id) for project in projects]
-            if project_ids:
-                r.delete(f"{REDIS_PREFIX}{Browse.TOPIC_PROJECTS}_{profile.id}")
-                r.rpush(f"{REDIS_PREFIX}{Browse.TOPIC_PROJECTS}_{profile.id}", *project_ids)
+        profileIDs = _affectedProfileIDs(profiles, topics)
+        if not profileIDs:
+            return
+        profileTopic = dict()
+        for profileID, topicID in ProfileTopic.objects.filter(profile__id__in=profileIDs).order_by('-points').values_list('profile_id', 'topic_id'):
+            profileTopic.setdefault(profileID, topicID)
+        profileTopic.update(_recommendedTopicIDs(
+            list(filter(lambda profile: profile.id not in profileTopic, profiles))))
+        approved = approvedProjects()
+        topicProjects = _topicProjectIDs(set(profileTopic.values()), approved)
+        blocked = blockedUserIDsOf(profileIDs)
+
+        pipe = r.pipeline(transaction=False)
+        for profileID in profileIDs:
+            topicID = profileTopic.get(profileID, None)
+            if not topicID:
+                continue
+            excludeUserIDs = blocked.get(profileID, set())
+            pipe.set(f"{REDIS_PREFIX}{Browse.TOPIC_PROJECTS}_{profileID}_topic", topicID.hex)
+            projectIDs = list(filter(lambda projectID: approved[projectID][1] not in excludeUserIDs,
+                                     topicProjects.get(topicID, [])))
+            if projectIDs:
+                key = f"{REDIS_PREFIX}{Browse.TOPIC_PROJECTS}_{profileID}"
+                pipe.delete(key)
+                pipe.rpush(key, *map(str, projectIDs))
+        pipe.execute()
     except Exception as e:
         errorLog(e)
 
 
+def _snapshotTimelineKey(profileID) -> str:
+    return f"{REDIS_PREFIX}{Browse.PROJECT_SNAPSHOTS}_{profileID}"
+
+
+def _snapshotTimelineIDs(profileID, excludeUserIDs: set) -> list:
+    """Returns the latest snapshot ids for the timeline of a profile, for full rebuilds of cold timelines."""
+    projIDs = Submission.objects.filter(competition__admirers__id=profileID).exclude(
+        free_project=None).values_list("free_project__id", flat=True)
+    snaps = Snapshot.objects.filter(
+        Q(
+            Q(creator__id=profileID)
+            | Q(base_project__creator__id=profileID)
+            | Q(base_project__co_creators__id=profileID)
+            | Q(base_project__id__in=list(projIDs))
+            | Q(creator__admirers__id=profileID)
+            | Q(base_project__admirers__id=profileID)
+        ),
+        base_project__suspended=False, base_project__trashed=False, base_project__is_archived=False, suspended=False
+    ).exclude(creator__user__id__in=list(excludeUserIDs)).distinct().order_by("-created_on").values_list('id', flat=True)
+    return list(map(str, snaps[:settings.SNAPSHOTS_TIMELINE_SIZE]))
+
+
+def _snapshotFollowerIDs(project: BaseProject, creator: Profile = None) -> set:
+    """Returns ids of profiles whose timelines show the snapshots of the given project by the given creator."""
+    followerIDs = {project.creator_id}
+    followerIDs.update(project.co_creators.values_list('id', flat=True))
+    followerIDs.update(project.admirers.values_list('id', flat=True))
+    followerIDs.update(Submission.objects.filter(free_project__id=project.id).exclude(
+        competition__admirers=None).values_list('competition__admirers__id', flat=True))
+    if creator:
+        followerIDs.add(creator.id)
+        followerIDs.update(creator.admirers.values_list('id', flat=True))
+    followerIDs.discard(None)
+    return followerIDs
+
+
 def snapshotsList(profiles: list, project: BaseProject = None, creator: Profile = None, snapID: str = None, action: str = None):
     """
-    Updates present list of snapshots for a given profile.
+    Updates present timelines of snapshots.
+
+    With a project and snapID, the snapshot is pushed to (action=main.strings.Action.CREATE),
+    or removed from (action=main.strings.Action.REMOVE) the timelines of all followers of the project and creator, in one pipeline.
+    Timelines of the given profiles, and cold (absent) timelines of followers are rebuilt from the database.
     """
     try:
         r = settings.REDIS_CLIENT
-        if project:
-            if creator:
-                profiles.append(creator)
-                profiles.extend(list(creator.admirers.all()))
-            profiles.append(project.creator)
-            profiles.extend(list(project.co_creators.all()))
-            profiles.extend(list(project.admirers.all()))
-            profiles = list(set(profiles))
-        if action==Action.REMOVE and snapID:
-            for profile in profiles:
-                r.lrem(f"{REDIS_PREFIX}{Browse.PROJECT_SNAPSHOTS}_{profile.id}", 0, snapID)
-            return
-        for profile in profiles:
-            excludeUserIDs = profile.blockedIDs()
-            projIDs = Submission.objects.filter(competition__admirers=profile).exclude(
-                                free_project=None).values_list("free_project__id", flat=True)
-            snaps = Snapshot.objects.filter(
-                Q(
-                    Q(creator=profile)
-                    | Q(base_project__creator=profile)
-                    | Q(base_project__co_creators=profile)
-                    | Q(base_project__id__in=list(projIDs))
-                    | Q(creator__admirers=profile)
-                    | Q(base_project__admirers=profile)
-                ),
-                base_project__suspended=False, base_project__trashed=False, base_project__is_archived=False, suspended=False
-            ).exclude(creator__user__id__in=excludeUserIDs).distinct().order_by("-created_on")
-            snap_ids = [str(snap.id) for snap in snaps]
+        rebuildIDs = set(map(lambda profile: profile.id, profiles))
+        pipe = r.pipeline(transaction=False)
+        if project and snapID and action in [Action.CREATE, Action.REMOVE]:
+            followerIDs = _snapshotFollowerIDs(project, creator)
+            if action == Action.REMOVE:
+                for profileID in followerIDs:
+                    pipe.lrem(_snapshotTimelineKey(profileID), 0, snapID)
+            else:
+                blockedUserIDs = blockedUserIDsOf(
+                    {creator.id}).get(creator.id, set()) if creator else set()
+                followerIDs = set(Profile.objects.filter(id__in=followerIDs).exclude(
+                    user__id__in=list(blockedUserIDs)).values_list('id', flat=True))
+                followerIDs = list(followerIDs.difference(rebuildIDs))
+                existing = r.pipeline(transaction=False)
+                for profileID in followerIDs:
+                    existing.exists(_snapshotTimelineKey(profileID))
+                for profileID, warm in zip(followerIDs, existing.execute()):
+                    if warm:
+                        pipe.lpush(_snapshotTimelineKey(profileID), snapID)
+                        pipe.ltrim(_snapshotTimelineKey(profileID), 0,
+                                   settings.SNAPSHOTS_TIMELINE_SIZE-1)
+                    else:
+                        rebuildIDs.add(profileID)
+        elif project:
+            rebuildIDs.update(_snapshotFollowerIDs(project, creator))
+
+        blocked = blockedUserIDsOf(rebuildIDs) if rebuildIDs else dict()
+        for profileID in rebuildIDs:
+            snap_ids = _snapshotTimelineIDs(
+                profileID, blocked.get(profileID, set()))
+            pipe.delete(_snapshotTimelineKey(profileID))
             if snap_ids:
-                r.delete(f"{REDIS_PREFIX}{Browse.PROJECT_SNAPSHOTS}_{profile.id}")
-                r.rpush(f"{REDIS_PREFIX}{Browse.PROJECT_SNAPSHOTS}_{profile.id}", *snap_ids)
+                pipe.rpush(_snapshotTimelineKey(profileID), *snap_ids)
+        pipe.execute()
     except Exception as e:
-        errorLog(e)
\ No newline at end of file
+        errorLog(e)
+
+
+def searchProjects(query: str, blockedIDs: list = list(), limit: int = 10) -> list:
+    """Returns the approved projects matching the search query, ranked by the search index if available, else by a database query,
+    cached for the active language. Special parts of the query (tag:, category:, topic:, creator:, license:, type:) filter by the respective attributes.
+
+    Args:
+        query (str): The search query
+        blockedIDs (list<str>, optional): The user ids blocked by (or blocking) the searching profile, whose results are excluded. Defaults to list().
+        limit (int, optional): The maximum number of results. Defaults to 10.
+
+    Returns:
+        list<BaseProject>: The matching approved projects
+    """
+    cachekey = f"project_browse_search_{query}{get_language()}{''.join(blockedIDs)}"
+    projects = cache.get(cachekey, [])
+
+    if not len(projects):
+        specials = ('tag:', 'category:', 'topic:',
+                    'creator:', 'license:', 'type:')
+        verified = None
+        core = None
+        pquery = None
+        hits = None
+        dbquery = Q()
+        invalidQuery = False
+        if query.startswith(specials):
+            def specquerieslist(q):
+                return [
+                    Q(tags__name__iexact=q),
+                    Q(category__name__iexact=q),
+                    Q(topics__name__iexact=q),
+                    Q(
+                        Q(creator__user__first_name__iexact=q) | Q(creator__user__last_name__iexact=q) | Q(
+                            creator__user__email__iexact=q) | Q(creator__nickname__iexact=q)
+                    ),
+                    Q(Q(license__name__iexact=q) | Q(
+                        license__name__istartswith=q)),
+                    Q()
+                ]
+            commaparts = query.split(",")
+            for cpart in commaparts:
+                if cpart.strip().lower().startswith(specials):
+                    special, specialq = cpart.split(':')
+                    if special.strip().lower() == 'type':
+                        verified = specialq.strip().lower() == 'verified'
+                        core = specialq.strip().lower() == 'core'
+                        if not verified and not core:
+                            invalidQuery = True
+                            break
+                    else:
+                        dbquery = Q(dbquery, specquerieslist(specialq.strip())[
+                            list(specials).index(f"{special.strip()}:")])
+                else:
+                    pquery = cpart.strip()
+                    break
+        else:
+            pquery = query
+        if pquery and not invalidQuery:
+            hits = searchIndex(pquery)
+        if hits is not None:
+            dbquery = Q(dbquery, id__in=hits[SearchDoc.PROJECT])
+        elif pquery and not invalidQuery:
+            dbquery = Q(dbquery, Q(
+                Q(name__istartswith=pquery)
+                | Q(creator__user__first_name__istartswith=pquery)
+                | Q(creator__user__last_name__istartswith=pquery)
+                | Q(creator__user__email__istartswith=pquery)
+                | Q(creator__nickname__istartswith=pquery)
+                | Q(category__name__iexact=pquery)
+                | Q(topics__name__iexact=pquery)
+                | Q(tags__name__iexact=pquery)
+                | Q(category__name__istartswith=pquery)
+                | Q(topics__name__istartswith=pquery)
+                | Q(tags__name__istartswith=pquery)
+                | Q(license__name__istartswith=pquery)
+                | Q(name__icontains=pquery)
+                | Q(description__icontains=pquery)
+            ))
+        if not invalidQuery:
+            dbquery = Q(dbquery, BaseProject.approvalQuery(Code.APPROVED))
+            if verified:
+                dbquery = Q(dbquery, BaseProject.kindQuery(PROJECT.VERIFIED))
+            if core:
+                dbquery = Q(dbquery, BaseProject.kindQuery(PROJECT.CORE))
+            projects: BaseProject = BaseProject.objects.exclude(trashed=True).exclude(
+                suspended=True).exclude(creator__user__id__in=blockedIDs).filter(dbquery).distinct()
+            projects = projects[0:limit] if hits is None else rankedByHits(
+                projects, hits[SearchDoc.PROJECT], limit)
+            if not len(projects) and pquery and hits is None:
+                projects: BaseProject = BaseProject.objects.exclude(trashed=True).exclude(suspended=True).exclude(creator__user__id__in=blockedIDs).filter(
+                    BaseProject.approvalQuery(Code.APPROVED)).filter(
+                    Q(co_creators__user__last_name__istartswith=pquery)
+                    | Q(co_creators__user__email__istartswith=pquery)
+                    | Q(co_creators__nickname__istartswith=pquery)
+                ).distinct()[:limit]
+
+            if len(projects):
+                cache.set(cachekey, projects, settings.CACHE_SHORT)
+    return projects
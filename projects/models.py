@@ -14,6 +14,7 @@ from jsonfield import JSONField
 from main.bots import Github, GithubKnotters
 from main.env import BOTMAIL
 from main.methods import errorLog, human_readable_size, maxLengthInList
+from main.ratings import RatingOf, averageRating, ratingSummary
 from main.strings import (CORE_PROJECT, DOCS, MANAGEMENT, Code, Message,
                           project, url)
 from management.models import (GhMarketApp, HookRecord, Invitation,
@@ -343,6 +344,12 @@ class BaseProject(models.Model):
     """admirers (ManyToManyField<Profile>): The admirers of the project"""
     prime_collaborators = models.ManyToManyField(Profile, through='BaseProjectPrimeCollaborator', default=[
     ], related_name='base_project_prime_collaborator')
+    kind: str = models.CharField(choices=project.PROJECTKINDSCHOICES, max_length=maxLengthInList(
+        project.PROJECTKINDS), null=True, blank=True, help_text='Type of the child project, maintained on save.')
+    """kind (CharField): Type of the child project (main.strings.Project.PROJECTKINDS), maintained on save"""
+    approval: str = models.CharField(choices=project.PROJECTSTATESCHOICES, max_length=maxLengthInList(
+        project.PROJECTSTATES), null=True, blank=True, help_text='Status of the child project (approved if quick), maintained on save.')
+    """approval (CharField): Moderation status of the child project (approved for Quick projects), maintained on save"""
     """prime_collaborators (ManyToManyField<Profile>): The prime collaborators of the project"""
 
     is_archived: bool = models.BooleanField(default=False)
@@ -380,6 +387,12 @@ class BaseProject(models.Model):
         assert self.acceptedTerms is True
         self.modifiedOn = timezone.now()
         self.sub_save()
+        if type(self) != BaseProject:
+            self.kind = project.CORE if self.core else project.VERIFIED if self.verified else project.FREE
+            self.approval = getattr(self, 'status', Code.APPROVED)
+            if kwargs.get('update_fields', None) is not None:
+                kwargs['update_fields'] = list(
+                    set(kwargs['update_fields']).union(['kind', 'approval']))
         super(BaseProject, self).save(*args, **kwargs)
 
     @property
@@ -573,6 +586,8 @@ class BaseProject(models.Model):
 
     def is_free(self) -> bool:
         """Returns True if the project is of type Quick (Freeproject)"""
+        if self.kind:
+            return self.kind == project.FREE
         cacheKey = self.CACHE_KEYS.baseproject_isfree
         isFree = cache.get(cacheKey, None)
         if isFree is None:
@@ -586,6 +601,8 @@ class BaseProject(models.Model):
 
     def is_verified(self) -> bool:
         """Returns True if the project is of type Verified"""
+        if self.kind:
+            return self.kind == project.VERIFIED
         cacheKey = self.CACHE_KEYS.baseproject_isverified
         isVerified = cache.get(cacheKey, None)
         if isVerified is None:
@@ -595,6 +612,8 @@ class BaseProject(models.Model):
 
     def is_core(self) -> bool:
         """Returns True if the project is of type Core"""
+        if self.kind:
+            return self.kind == project.CORE
         cacheKey = self.CACHE_KEYS.baseproject_iscore
         isCore = cache.get(cacheKey, None)
         if isCore is None:
@@ -604,6 +623,8 @@ class BaseProject(models.Model):
 
     def is_approved(self) -> bool:
         """Returns True if the project is approved (or Free)"""
+        if self.approval:
+            return self.approval == Code.APPROVED
         cacheKey = self.CACHE_KEYS.baseproject_is_approved
         isApproved = cache.get(cacheKey, None)
         if isApproved is None:
@@ -615,6 +636,8 @@ class BaseProject(models.Model):
 
     def is_pending(self) -> bool:
         """Returns True if the project is pending"""
+        if self.approval:
+            return self.approval == Code.MODERATION
         cacheKey = self.CACHE_KEYS.baseproject_is_pending
         isPending = cache.get(cacheKey, None)
         if isPending is None:
@@ -626,6 +649,8 @@ class BaseProject(models.Model):
 
     def is_rejected(self) -> bool:
         """Returns True if the project is rejected"""
+        if self.approval:
+            return self.approval == Code.REJECTED
         cacheKey = self.CACHE_KEYS.baseproject_is_rejected
         isRejected = cache.get(cacheKey, None)
         if isRejected is None:
@@ -1039,41 +1064,58 @@ class BaseProject(models.Model):
             return self.is_normal() and (profile == self.creator or profile == self.get_moderator() or self.is_cocreator(profile))
         return self.is_normal()
 
+    @staticmethod
+    def approvalQuery(status: str) -> Q:
+        """Returns the query of base projects of the given moderation status, by their maintained approval flag,
+        or by the status of their child project for those whose flags are not backfilled yet (see projects.methods.backfillProjectFlags).
+
+        Args:
+            status (str): The moderation status (Code.APPROVED, Code.MODERATION or Code.REJECTED)
+
+        Returns:
+            Q: The query
+        """
+        legacy = Q(project__status=status) | Q(coreproject__status=status)
+        if status == Code.APPROVED:
+            legacy = legacy | Q(freeproject__isnull=False)
+        return Q(approval=status) | Q(Q(approval__isnull=True), legacy)
+
+    @staticmethod
+    def kindQuery(kind: str) -> Q:
+        """Returns the query of base projects of the given type, by their maintained kind flag,
+        or by their child project for those whose flags are not backfilled yet (see projects.methods.backfillProjectFlags).
+
+        Args:
+            kind (str): The project type (main.strings.Project.PROJECTKINDS)
+
+        Returns:
+            Q: The query
+        """
+        legacy = {project.FREE: Q(freeproject__isnull=False), project.VERIFIED: Q(
+            project__isnull=False), project.CORE: Q(coreproject__isnull=False)}[kind]
+        return Q(kind=kind) | Q(Q(kind__isnull=True), legacy)
+
     def get_approved_projects(*args, query: Q, limit: int = 5) -> list:
         """Returns only the approved and valid projects that match the query."""
-        return list(filter(lambda p: p.is_approved(), BaseProject.objects.filter(
-            Q(query), Q(suspended=False, is_archived=False,
-                        trashed=False)).annotate(num_admirers=models.Count('admirers')).order_by('-num_admirers')[:limit]
-        ))
+        return list(BaseProject.objects.filter(
+            Q(query), Q(suspended=False, is_archived=False, trashed=False), BaseProject.approvalQuery(Code.APPROVED)
+        ).annotate(num_admirers=models.Count('admirers')).order_by('-num_admirers')[:limit])
             
+    def rating_summary(self) -> dict:
+        """Returns the maintained rating summary of the project (see main.ratings.ratingSummary)"""
+        return ratingSummary(RatingOf.PROJECT, self.id)
+
     def total_ratings(self):
         """Returns the total numbers of Rating of the project"""
-        return ProjectUserRating.objects.filter(base_project=self).count()
+        return self.rating_summary()['count']
     
     def get_rating_out_of_ten(self):
         """Returns the Rating out of 10 of the project"""
-        rating_list=ProjectUserRating.objects.filter(base_project=self)
-        num_of_ratings=self.total_ratings()
-        total_sum=0
-        for rating in rating_list:
-            total_sum += rating.score
-        return round(total_sum/(num_of_ratings))
+        return averageRating(self.rating_summary(), scale=1, digits=None)
     
     def get_avg_rating(self):
         """Returns the average Rating of the project"""
-        cacheKey = self.CACHE_KEYS.baseproject_avgratings
-        avgrating = cache.get(cacheKey, None)
-        if not avgrating:
-            rating_list=ProjectUserRating.objects.filter(base_project=self)
-            num_of_ratings=len(rating_list)
-            if (num_of_ratings==0):
-                return 0.0
-            total_sum=0
-            for rating in rating_list:
-                total_sum += rating.score
-            avgrating = round(total_sum/(2*num_of_ratings),1)
-            cache.set(cacheKey, avgrating, settings.CACHE_INSTANT)
-        return avgrating
+        return averageRating(self.rating_summary())
     
     def is_rated_by(self, profile):
         """To check whether user has rated or not"""
@@ -1,11 +1,16 @@
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
 from django.dispatch import receiver
+from main.rankings import (RANK_WEIGHT_ADMIRATION, bumpScores, forgetMember,
+                           projectTrendingTypes)
+from main.ratings import RatingOf, previousScore, ratingSaved, recordRating
+from main.search import (SearchDoc, queueIndexDocument, queueIndexRelation,
+                         queueRemoveDocument)
 
 from .mailers import freeProjectCreated, freeProjectDeleted
 from .models import (Asset, BaseProject, BaseProjectCoCreator,
                      BaseProjectCoCreatorInvitation, Category, CoreProject,
-                     FreeProject, LegalDoc, Project, Snapshot,
-                     defaultImagePath)
+                     FreeProject, LegalDoc, Project, ProjectTag, ProjectTopic,
+                     ProjectUserRating, Snapshot, defaultImagePath)
 
 
 @receiver(post_delete, sender=Category)
@@ -53,6 +58,7 @@ def on_project_delete(sender, instance: Project, **kwargs):
     """
     Verified Project cleanup.
     """
+    forgetMember(instance.id)
     try:
         if instance.image != defaultImagePath() and not BaseProject.objects.filter(image=instance.image).exists():
             instance.image.delete(save=False)
@@ -66,6 +72,7 @@ def on_freeproject_delete(sender, instance: FreeProject, **kwargs):
     Project cleanup.
     """
 
+    forgetMember(instance.id)
     try:
         if instance.image != defaultImagePath() and not BaseProject.objects.filter(image=instance.image).exists():
             instance.image.delete(save=False)
@@ -80,6 +87,7 @@ def on_coreproject_delete(sender, instance: CoreProject, **kwargs):
     Project cleanup.
     """
 
+    forgetMember(instance.id)
     try:
         if instance.image != defaultImagePath() and not BaseProject.objects.filter(image=instance.image).exists():
             instance.image.delete(save=False)
@@ -130,3 +138,80 @@ def on_projectcocreator_delete(sender, instance: BaseProjectCoCreator, **kwargs)
     """
     BaseProjectCoCreatorInvitation.objects.filter(
         receiver=instance.co_creator, base_project=instance.base_project).delete()
+
+
+@receiver(m2m_changed, sender=BaseProject.admirers.through)
+def on_project_admired(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Project admired, bumps its trending score.
+    """
+    if action != "post_add" or not pk_set:
+        return
+    projectIDs = pk_set if reverse else [instance.id]
+    for projectID, browseTypes in projectTrendingTypes(projectIDs).items():
+        bumpScores(browseTypes, projectID, RANK_WEIGHT_ADMIRATION)
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=FreeProject)
+@receiver(post_save, sender=CoreProject)
+def on_project_index(sender, instance: BaseProject, **kwargs):
+    """
+    Project search index update.
+    """
+    queueIndexDocument(SearchDoc.PROJECT, instance.id)
+
+
+@receiver(post_save, sender=ProjectTopic)
+@receiver(post_delete, sender=ProjectTopic)
+@receiver(post_save, sender=ProjectTag)
+@receiver(post_delete, sender=ProjectTag)
+def on_project_relation_index(sender, instance, **kwargs):
+    """
+    Project topic or tag added or removed, project search index update.
+    """
+    if instance.project_id:
+        queueIndexDocument(SearchDoc.PROJECT, instance.project_id)
+
+
+@receiver(m2m_changed, sender=BaseProject.topics.through)
+@receiver(m2m_changed, sender=BaseProject.tags.through)
+def on_project_relations_index(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Project topics or tags changed in bulk, search index update of the affected projects.
+    """
+    queueIndexRelation(SearchDoc.PROJECT, instance, action, reverse, pk_set)
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=FreeProject)
+@receiver(post_delete, sender=CoreProject)
+def on_project_unindex(sender, instance: BaseProject, **kwargs):
+    """
+    Project search index removal.
+    """
+    queueRemoveDocument(SearchDoc.PROJECT, instance.id)
+
+
+@receiver(pre_save, sender=ProjectUserRating)
+def on_project_rating_change(sender, instance: ProjectUserRating, **kwargs):
+    """
+    Project rating to be saved, remembers its stored score for the rating aggregates.
+    """
+    instance._previousScore = previousScore(instance)
+
+
+@receiver(post_save, sender=ProjectUserRating)
+def on_project_rating_save(sender, instance: ProjectUserRating, created, **kwargs):
+    """
+    Project rating created or changed (also by the admin), adds it to the rating aggregates of the project.
+    """
+    ratingSaved(RatingOf.PROJECT, instance.base_project_id, instance, created)
+
+
+@receiver(post_delete, sender=ProjectUserRating)
+def on_project_rating_delete(sender, instance: ProjectUserRating, **kwargs):
+    """
+    Project rating deleted (also by cascade), removes it from the rating aggregates of the project.
+    """
+    recordRating(RatingOf.PROJECT, instance.base_project_id, previous=instance.score)
@@ -0,0 +1,152 @@
+"""
+Scoring engine of push events to project repositories (projects.methods.handleGithubKnottersRepoHook).
+
+Every file extension changed by a push scores for each topic of the project, by the number of its changes
+(TopicFileExtension.score), so that extensions learn which topics they belong to. Then each committer earns XP in
+each topic of the project, per commit, by how much the extensions changed in that commit belong to the topic:
+the highest ceil(PUSH_TOPIC_XP_SCALE * extension score in topic / extension score in all topics), at least 1.
+
+All the scores involved are loaded in one query, the committer × topic XP matrix is computed in memory (pushTopicXP),
+and the score and XP changes are applied with one insert of new rows and one compare-and-set of plain values per changed
+row (scorePush), as the database backend translates neither F() increments, bulk_update, row locks nor transactions.
+"""
+from functools import reduce
+from math import ceil
+
+from django.db.models import Q
+from main.methods import compareAndSet
+from people.models import ProfileTopic
+
+from .models import BaseProject, FileExtension, TopicFileExtension
+
+PUSH_TOPIC_XP_SCALE = 5
+"""The maximum XP in a topic per commit"""
+
+
+def changedExtension(path: str) -> str:
+    """Returns the extension of a changed file path, as scored (the file name itself if it has no extension)
+
+    Args:
+        path (str): The changed file path
+
+    Returns:
+        str: The extension, without the dot
+    """
+    return path.split('.')[-1]
+
+
+def pushExtensionChanges(commits: list) -> tuple:
+    """Counts the changed files of a push by extension.
+
+    Args:
+        commits (list<tuple<Profile, list<str>>>): The committer and the changed file paths of each commit
+
+    Returns:
+        tuple<dict<str, int>, dict<Profile, list<set<str>>>>: The number of changes by extension,
+            and the set of changed extensions of each commit, by committer
+    """
+    changes, committerCommits = dict(), dict()
+    for committer, paths in commits:
+        extensions = set()
+        for path in paths:
+            ext = changedExtension(path)
+            changes[ext] = changes.get(ext, 0) + 1
+            extensions.add(ext)
+        committerCommits.setdefault(committer, []).append(extensions)
+    return changes, committerCommits
+
+
+def pushTopicXP(committerCommits: dict, topicIDs: list, scores: dict, totals: dict) -> dict:
+    """Computes the XP each committer earns in each topic for a push.
+
+    Args:
+        committerCommits (dict<Profile, list<set>>): The set of changed extension keys of each commit, by committer
+        topicIDs (list<UUID>): The ids of topics of the project
+        scores (dict<tuple, int>): The score of each (extension key, topic id)
+        totals (dict): The score of each extension key in all topics
+
+    Returns:
+        dict<Profile, dict<UUID, int>>: The XP by topic id, of each committer
+    """
+    matrix = dict()
+    for committer, commits in committerCommits.items():
+        topicXP = matrix.setdefault(committer, dict())
+        for extensions in commits:
+            for topicID in topicIDs:
+                xp = 1
+                for ext in extensions:
+                    if totals.get(ext, 0) > 0:
+                        xp = max(xp, ceil(PUSH_TOPIC_XP_SCALE *
+                                 scores.get((ext, topicID), 0)/totals[ext]))
+                topicXP[topicID] = topicXP.get(topicID, 0) + xp
+    return matrix
+
+
+def _fileExtensions(extensions: list) -> dict:
+    """Returns the file extension instance of each extension, matched case insensitively, creating the missing ones in bulk"""
+    known = dict()
+    for fileext in FileExtension.objects.filter(reduce(lambda q, ext: q | Q(extension__iexact=ext), extensions, Q(pk__in=[]))):
+        known[fileext.extension.lower()] = fileext
+    missing = dict()
+    for ext in extensions:
+        if ext.lower() not in known:
+            missing.setdefault(ext.lower(), FileExtension(extension=ext))
+    if missing:
+        FileExtension.objects.bulk_create(list(missing.values()))
+        known.update(missing)
+    return dict(map(lambda ext: (ext, known[ext.lower()]), extensions))
+
+
+def scorePush(project: BaseProject, commits: list, reasons: dict = dict()) -> dict:
+    """Scores the extensions changed by a push for the topics of the project, and increases the topic XP of the
+    committers accordingly.
+
+    Args:
+        project (BaseProject): The project pushed to
+        commits (list<tuple<Profile, list<str>>>): The committer and the changed file paths of each commit, of known committers only
+        reasons (dict<Profile, str>, optional): The reason for the XP increase, of each committer. Defaults to dict().
+
+    Returns:
+        dict<Profile, dict<UUID, int>>: The XP increased by topic id, of each committer
+    """
+    changes, committerCommits = pushExtensionChanges(commits)
+    if not changes:
+        return dict()
+    topicIDs = list(project.topics.values_list('id', flat=True))
+    fileexts = _fileExtensions(list(changes.keys()))
+    # extensions matching the same file extension instance count together, keyed by its id
+    extChanges = dict()
+    for ext, count in changes.items():
+        extChanges[fileexts[ext].id] = extChanges.get(
+            fileexts[ext].id, 0) + count
+    committerCommits = dict(map(lambda c: (c[0], list(map(lambda exts: set(
+        map(lambda ext: fileexts[ext].id, exts)), c[1]))), committerCommits.items()))
+
+    rows = list(TopicFileExtension.objects.filter(
+        file_extension__in=list(extChanges.keys())))
+    scored = set()
+    for row in rows:
+        if row.topic_id in topicIDs:
+            count = extChanges[row.file_extension_id]
+            _, values = compareAndSet(TopicFileExtension.objects.filter(id=row.id), [
+                                      'score'], lambda c, count=count: dict(score=c['score'] + count))
+            if values:
+                row.score = values['score']
+                scored.add((row.file_extension_id, row.topic_id))
+    created = []
+    for fileextID, count in extChanges.items():
+        for topicID in topicIDs:
+            if (fileextID, topicID) not in scored:
+                created.append(TopicFileExtension(
+                    file_extension_id=fileextID, topic_id=topicID, score=count))
+    TopicFileExtension.objects.bulk_create(created)
+
+    scores, totals = dict(), dict()
+    for row in rows + created:
+        key = (row.file_extension_id, row.topic_id)
+        scores[key] = scores.get(key, 0) + row.score
+        totals[row.file_extension_id] = totals.get(
+            row.file_extension_id, 0) + row.score
+    matrix = pushTopicXP(committerCommits, topicIDs, scores, totals)
+    ProfileTopic.increasePointsInBulk(matrix, reasons)
+    return matrix
@@ -1,10 +1,16 @@
+from unittest import mock, skipUnless
+
 from auth2.tests.utils import getTestPassword
-from django.test import TestCase, tag
+from django.conf import settings
+from django.test import TestCase, override_settings, tag
 from main.env import BOTMAIL
-from main.strings import Code
+from main.strings import Action, Code
 from people.models import User
 from people.tests.utils import getTestUsersInst
 from projects.methods import *
+from projects.methods import _recommendedTopicIDs, _snapshotTimelineKey
+from projects.models import FileExtension, TopicFileExtension
+from projects.scoring import scorePush
 
 from .utils import (getLicDesc, getLicName, getProjCategory, getProjDesc,
                     getProjName, getProjRepo, getTag)
@@ -40,6 +46,50 @@ class ProjectsMethodTest(TestCase):
     def test_addTagToDatabase(self):
         self.assertIsInstance(addTagToDatabase(getTag(), self.bot.profile), Tag)
 
+    def test_approvedProjects(self):
+        category = addCategoryToDatabase(getProjCategory(), self.bot.profile)
+        pending = Project.objects.create(name=getProjName(), creator=self.creator, reponame=getProjRepo(
+        ), category=category, license=self.license)
+        self.assertNotIn(pending.id, approvedProjects())
+        pending.status = Code.APPROVED
+        pending.save()
+        self.assertEqual(approvedProjects()[pending.id], (self.creator.id, self.creator.user.id))
+        self.assertEqual(blockedUserIDsOf({self.creator.id}), dict())
+
+    def test_recommendedTopicIDs(self):
+        Topic.objects.create(name=getTag())
+        self.assertEqual(_recommendedTopicIDs([self.creator, self.mod]), {
+            self.creator.id: self.creator.recommended_topics()[0].id,
+            self.mod.id: self.mod.recommended_topics()[0].id,
+        })
+
+    @tag('scorepush')
+    def test_scorePush(self):
+        category = addCategoryToDatabase(getProjCategory(), self.bot.profile)
+        project = Project.objects.create(name=getProjName(), creator=self.creator, reponame=getProjRepo(
+        ), category=category, license=self.license)
+        python, web = Topic.objects.create(name=getTag()), Topic.objects.create(name=getTag())
+        ProjectTopic.objects.bulk_create([ProjectTopic(project=project, topic=python), ProjectTopic(project=project, topic=web)])
+        other = Topic.objects.create(name=getTag())
+        pyext = FileExtension.objects.create(extension='py')
+        TopicFileExtension.objects.create(file_extension=pyext, topic=other, score=8)
+        matrix = scorePush(project, [
+            (self.creator, ['main.py', 'util.PY', 'index.html']),
+            (self.mod, ['README']),
+            (self.creator, []),
+        ])
+        self.assertEqual(TopicFileExtension.objects.get(file_extension=pyext, topic=python).score, 2)
+        self.assertEqual(TopicFileExtension.objects.get(file_extension=pyext, topic=other).score, 8)
+        self.assertEqual(TopicFileExtension.objects.filter(topic__in=[python, web]).count(), 6)
+        self.assertEqual(FileExtension.objects.filter(extension__iexact='py').count(), 1)
+        # html: 1/2 of its score in each topic, so 3 XP, and 1 XP for the empty commit
+        self.assertDictEqual(matrix[self.creator], {python.id: 4, web.id: 4})
+        self.assertDictEqual(matrix[self.mod], {python.id: 3, web.id: 3})
+        self.assertEqual(ProfileTopic.objects.get(profile=self.creator, topic=python).points, 4)
+        self.assertTrue(ProfileTopic.objects.get(profile=self.mod, topic=web).trashed)
+        self.assertEqual(scorePush(project, [(self.creator, ['a.py'])], {self.creator: 'pushed'})[self.creator][python.id], 2)
+        self.assertEqual(ProfileTopic.objects.get(profile=self.creator, topic=python).points, 6)
+
     @tag('create')
     def _test_createProject(self):
         self.assertIsInstance(createProject(getProjName(), getProjCategory(
@@ -55,3 +105,60 @@ class ProjectsMethodTest(TestCase):
         project.status = Code.APPROVED
         project.save()
         self.assertTrue(setupApprovedProject(project, self.mod))
+
+
+@tag(Code.Test.METHOD, APPNAME)
+@skipUnless(settings.REDIS_CLIENT, "requires redis (REDIS_LOCATION)")
+@override_settings(SNAPSHOTS_TIMELINE_SIZE=3)
+class SnapshotTimelineTest(TestCase):
+    @classmethod
+    def setUpTestData(self) -> None:
+        self.bot, _ = User.objects.get_or_create(email=BOTMAIL, defaults=dict(
+            first_name='knottersbot', email=BOTMAIL, password=getTestPassword()))
+        users = User.objects.bulk_create(getTestUsersInst(4))
+        self.creator = Profile.objects.create(user=users[0])
+        self.warm = Profile.objects.create(user=users[1])
+        self.cold = Profile.objects.create(user=users[2])
+        self.blocker = Profile.objects.create(user=users[3])
+        self.license = License.objects.create(
+            name=getLicName(), description=getLicDesc(), creator=self.bot.profile, public=True)
+        self.project = Project.objects.create(name=getProjName(), creator=self.creator, reponame=getProjRepo(),
+                                              category=addCategoryToDatabase(getProjCategory(), self.bot.profile), license=self.license)
+        self.creator.admirers.add(self.warm, self.cold, self.blocker)
+        self.blocker.blockUser(self.creator.user)
+        return super().setUpTestData()
+
+    def setUp(self) -> None:
+        r = settings.REDIS_CLIENT
+        for profile in (self.creator, self.warm, self.blocker):
+            r.delete(_snapshotTimelineKey(profile.id))
+            r.rpush(_snapshotTimelineKey(profile.id), 'a', 'b', 'c')
+        r.delete(_snapshotTimelineKey(self.cold.id))
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        settings.REDIS_CLIENT.delete(*map(lambda profile: _snapshotTimelineKey(profile.id),
+                                          (self.creator, self.warm, self.cold, self.blocker)))
+        return super().tearDown()
+
+    def timeline(self, profile) -> list:
+        return settings.REDIS_CLIENT.lrange(_snapshotTimelineKey(profile.id), 0, -1)
+
+    def test_push_snapshot(self):
+        with mock.patch('projects.methods._snapshotTimelineIDs', return_value=['x']) as rebuild:
+            snapshotsList([], self.project, self.creator, 'new', Action.CREATE)
+        self.assertEqual(self.timeline(self.warm), ['new', 'a', 'b'])
+        self.assertEqual(self.timeline(self.creator), ['new', 'a', 'b'])
+        self.assertEqual(self.timeline(self.blocker), ['a', 'b', 'c'])
+        self.assertEqual(self.timeline(self.cold), ['x'])
+        self.assertEqual(list(map(lambda call: call.args[0], rebuild.call_args_list)), [self.cold.id])
+
+    def test_remove_snapshot(self):
+        settings.REDIS_CLIENT.lpush(_snapshotTimelineKey(self.warm.id), 'gone')
+        with mock.patch('projects.methods._snapshotTimelineIDs', return_value=['x']) as rebuild:
+            snapshotsList([], self.project, self.creator, 'gone', Action.REMOVE)
+            snapshotsList([], self.project, self.creator, 'b', Action.REMOVE)
+        self.assertEqual(self.timeline(self.warm), ['a', 'c'])
+        self.assertEqual(self.timeline(self.blocker), ['a', 'c'])
+        self.assertEqual(self.timeline(self.cold), [])
+        rebuild.assert_not_called()
@@ -7,6 +7,7 @@ from moderation.methods import requestModerationForObject
 from people.models import Profile, Topic, User
 from people.tests.utils import getTestTopicsInst, getTestUsersInst
 from projects.models import *
+from projects.methods import backfillProjectFlags
 
 from .utils import (getLicDesc, getLicName, getProjCategory, getProjImage,
                     getProjName, getProjRepo, getTag, getTestTagsInst)
@@ -87,6 +88,33 @@ class ProjectAttributeTest(TestCase):
         self.assertEqual(self.project.moderationRetriesLeft(), 0)
         self.assertFalse(self.project.canRetryModeration())
 
+    def test_project_flags(self):
+        base = BaseProject.objects.get(id=self.project.id)
+        self.assertEqual(base.kind, project.VERIFIED)
+        self.assertEqual(base.approval, Code.MODERATION)
+        self.assertTrue(base.is_pending())
+        self.project.status = Code.APPROVED
+        self.project.save(update_fields=['status'])
+        base = BaseProject.objects.get(id=self.project.id)
+        self.assertEqual(base.approval, Code.APPROVED)
+        self.assertTrue(base.is_approved())
+        self.assertTrue(base.is_verified())
+        self.assertFalse(base.is_core())
+
+    def test_project_unflagged_queries(self):
+        BaseProject.objects.filter(id=self.project.id).update(
+            kind=None, approval=None)
+        self.assertTrue(BaseProject.objects.filter(
+            BaseProject.approvalQuery(Code.MODERATION), BaseProject.kindQuery(project.VERIFIED), id=self.project.id).exists())
+        self.assertFalse(BaseProject.objects.filter(
+            BaseProject.approvalQuery(Code.APPROVED), id=self.project.id).exists())
+        self.assertFalse(BaseProject.objects.filter(
+            BaseProject.kindQuery(project.CORE), id=self.project.id).exists())
+        backfillProjectFlags()
+        base = BaseProject.objects.get(id=self.project.id)
+        self.assertEqual(base.kind, project.VERIFIED)
+        self.assertEqual(base.approval, Code.MODERATION)
+
     def test_project_modified_methods(self):
         self.project.image = projectImagePath(self.project, getProjImage())
         self.project.save()
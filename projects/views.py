@@ -23,8 +23,13 @@ from main.exceptions import InvalidUserOrProfile
 from main.methods import (addMethodToAsyncQueue, base64ToFile,
                           base64ToImageFile, errorLog, renderString,
                           respondJson, respondRedirect, updatePresentLists)
-from main.strings import URL, Action, Code, Message, Template, setURLAlerts, Browse
-from management.models import GhMarketApp, ReportCategory
+from main.ratings import rateObject, unrateObject
+from main.search import SearchDoc, queueIndexDocument
+from main.webhooks import WebhookSource, ingestDelivery
+from main.strings import (URL, Action, Browse, Code, Message, Template,
+                          setURLAlerts)
+from main.strings import project as PROJECT
+from management.models import ReportCategory
 from moderation.methods import (assignModeratorToObject,
                                 requestModerationForCoreProject,
                                 requestModerationForObject)
@@ -40,8 +45,8 @@ from .methods import (addTagToDatabase, coreProfileData,
                       createFreeProject, createProject,
                       deleteGhOrgCoreepository, deleteGhOrgVerifiedRepository,
                       freeProfileData, getProjectLiveData,
-                      handleGithubKnottersRepoHook, renderer, renderer_stronly,
-                      rendererstr, uniqueRepoName, verifiedProfileData, tagSearchList, topicSearchList)
+                      renderer, renderer_stronly,
+                      rendererstr, searchProjects, uniqueRepoName, verifiedProfileData, tagSearchList, topicSearchList)
 from .models import *
 from .receivers import *
 
@@ -1092,6 +1097,7 @@ def topicsUpdate(request: WSGIRequest, projID: UUID) -> HttpResponse:
                     topic=topic, project=project))
             if len(projecttopics) > 0:
                 ProjectTopic.objects.bulk_create(projecttopics)
+                queueIndexDocument(SearchDoc.PROJECT, project.id)
         updatePresentLists(plist=Browse.RECOMMENDED_PROJECTS, topics=topics)
         updatePresentLists(plist=Browse.TOPIC_PROJECTS, topics=topics)
         if json_body:
@@ -1568,8 +1574,7 @@ def liveData(request: WSGIRequest, projID: UUID) -> HttpResponse:
 @csrf_exempt
 @github_bot_only
 def githubBotEvents(request: WSGIRequest, botID: str) -> HttpResponse:
-    """[Webhook] To receive github webhook events for knottersbot on github account actions.
-
+    """[Webhook] To receive github webhook events for knottersbot on github account actions, and queue them for processing (see main.webhooks).
 
     METHODS: POST
 
@@ -1587,90 +1592,15 @@ def githubBotEvents(request: WSGIRequest, botID: str) -> HttpResponse:
         hookID = request.POST['id']
         event = request.POST['name']
         payload = request.POST['payload']
-        ghapp: GhMarketApp = GhMarketApp.objects.get(gh_id=botID)
-        hookrecord, _ = BotHookRecord.objects.get_or_create(
-            hookID=hookID,
-            ghmarketapp=ghapp,
-            defaults=dict(
-                success=False,
-            )
-        )
-        if hookrecord.success:
-            return HttpResponse(Code.NO)
-        if event == "installation":
-            action = payload['action']
-            installation = payload['installation']
-            account = installation['account']
-            permissions = installation['permissions']
-            frepos = FreeRepository.objects.filter(
-                free_project__creator__githubID=account["login"])
-            if action == 'created':
-                repositories = payload['repositories']
-                repo_ids = map(lambda r: r['id'], repositories)
-                frepos = FreeRepository.objects.filter(repo_id__in=repo_ids)
-                githubBotInstalled(frepos)
-                apprepos = []
-                for frepo in frepos:
-                    if not AppRepository.objects.filter(free_repo=frepo).exists():
-                        apprepos.append(AppRepository(
-                            free_repo=frepo,
-                            gh_app=ghapp,
-                            permissions=permissions
-                        ))
-                AppRepository.objects.bulk_create(apprepos)
-            elif action == 'deleted':
-                AppRepository.objects.filter(
-                    free_repo__in=list(frepos), gh_app=ghapp).delete()
-            elif action == 'suspend':
-                AppRepository.objects.filter(free_repo__in=list(
-                    frepos), gh_app=ghapp).update(suspended=True)
-            elif action == 'unsuspend':
-                AppRepository.objects.filter(free_repo__in=list(
-                    frepos), gh_app=ghapp).update(suspended=False)
-            elif action == 'new_permissions_accepted':
-                AppRepository.objects.filter(free_repo__in=list(
-                    frepos), gh_app=ghapp).update(permissions=permissions)
-            else:
-                raise Exception("Invalid action", event, action)
-            hookrecord.success = True
-            hookrecord.save()
-        elif event == "installation_repositories":
-            action = payload['action']
-            installation = payload['installation']
-            permissions = installation['permissions']
-            account = installation['account']
-            if action == 'added':
-                repositories = payload['repositories_added']
-                repo_ids = map(lambda r: r['id'], repositories)
-                frepos = FreeRepository.objects.filter(repo_id__in=repo_ids)
-                githubBotInstalled(frepos)
-                apprepos = []
-                for frepo in frepos:
-                    if not AppRepository.objects.filter(free_repo=frepo).exists():
-                        apprepos.append(AppRepository(
-                            free_repo=frepo,
-                            gh_app=ghapp,
-                            permissions=permissions
-                        ))
-                AppRepository.objects.bulk_create(apprepos)
-            elif action == 'removed':
-                repositories = payload['repositories_removed']
-                repo_ids = map(lambda r: r['id'], repositories)
-                frepos = FreeRepository.objects.filter(repo_id__in=repo_ids)
-                AppRepository.objects.filter(
-                    free_repo__in=list(frepos), gh_app=ghapp).delete()
-            else:
-                raise Exception("Invalid action", event, action)
-            hookrecord.success = True
-            hookrecord.save()
+        repository = payload.get("repository", None)
+        if repository:
+            orderKey = f"repo_{repository['id']}"
+        elif event in ["installation", "installation_repositories"]:
+            orderKey = f"installation_{payload['installation']['id']}"
         else:
-            repository = payload.get("repository", None)
-            if not repository:
-                return HttpResponseBadRequest(event)
-            freeproject: FreeProject = (FreeRepository.objects.get(
-                repo_id=repository["id"])).free_project
-            addMethodToAsyncQueue(
-                f"{APPNAME}.methods.{handleGithubKnottersRepoHook.__name__}", hookrecord.id, event, payload, freeproject.base())
+            return HttpResponseBadRequest(event)
+        if not ingestDelivery(WebhookSource.BOT, hookID, event, payload, orderKey, botID):
+            return HttpResponse(Code.NO)
         return HttpResponse(Code.OK)
     except Exception as e:
         errorLog(f"GH-EVENT:", e)
@@ -1680,7 +1610,7 @@ def githubBotEvents(request: WSGIRequest, botID: str) -> HttpResponse:
 @csrf_exempt
 @github_only
 def githubEventsListener(request: WSGIRequest, type: str, projID: UUID) -> HttpResponse:
-    """[Webhook] To receive github webhook events for a core/verified project repository.
+    """[Webhook] To receive github webhook events for a core/verified project repository, and queue them for processing (see main.webhooks).
 
     METHODS: POST
 
@@ -1700,41 +1630,12 @@ def githubEventsListener(request: WSGIRequest, type: str, projID: UUID) -> HttpR
             return HttpResponseBadRequest('Invaild link type')
         ghevent = request.POST['ghevent']
 
-        reponame = request.POST["repository"]["name"]
         owner_ghID = request.POST["repository"]["owner"]["login"]
         hookID = request.POST['hookID']
         if owner_ghID != PUBNAME:
             return HttpResponseBadRequest('Invalid owner')
-        isCore = False
-        try:
-            project: Project = Project.objects.get(
-                id=projID, reponame=reponame, trashed=False, is_archived=False, suspended=False)
-        except Exception:
-            try:
-                project: CoreProject = CoreProject.objects.get(
-                    id=projID, codename=reponame, trashed=False, is_archived=False, suspended=False)
-                isCore = True
-            except ObjectDoesNotExist:
-                return HttpResponse(Code.NO)
-            except Exception as e:
-                errorLog("GH HOOK:", e)
-                return HttpResponse(Code.NO)
-
-        if isCore:
-            hookrecord, _ = CoreProjectHookRecord.objects.get_or_create(hookID=hookID, defaults=dict(
-                success=False,
-                coreproject=project,
-            ))
-        else:
-            hookrecord, _ = ProjectHookRecord.objects.get_or_create(hookID=hookID, defaults=dict(
-                success=False,
-                project=project,
-            ))
-        if hookrecord.success:
+        if not ingestDelivery(WebhookSource.REPOSITORY, hookID, ghevent, request.POST, f"repo_{request.POST['repository']['id']}", projID):
             return HttpResponse(Code.NO)
-        postData = request.POST
-        addMethodToAsyncQueue(
-            f"{APPNAME}.methods.{handleGithubKnottersRepoHook.__name__}", hookrecord.id, ghevent, postData, project.base())
         return HttpResponse(Code.OK)
     except Exception as e:
         errorLog(f"GH-EVENT", e)
@@ -1765,92 +1666,8 @@ def browseSearch(request: WSGIRequest) -> HttpResponse:
         if not query:
             raise KeyError(query)
         limit = request.GET.get('limit', request.POST.get('limit', 10))
-        excludecreatorIDs = []
-        cachekey = f'project_browse_search_{query}{request.LANGUAGE_CODE}'
-        if request.user.is_authenticated:
-            excludecreatorIDs = request.user.profile.blockedIDs()
-            cachekey = f"{cachekey}{''.join(excludecreatorIDs)}"
-
-        projects = cache.get(cachekey, [])
-
-        if not len(projects):
-            specials = ('tag:', 'category:', 'topic:',
-                        'creator:', 'license:', 'type:')
-            verified = None
-            core = None
-            pquery = None
-            dbquery = Q()
-            invalidQuery = False
-            if query.startswith(specials):
-                def specquerieslist(q):
-                    return [
-                        Q(tags__name__iexact=q),
-                        Q(category__name__iexact=q),
-                        Q(topics__name__iexact=q),
-                        Q(
-                            Q(creator__user__first_name__iexact=q) | Q(creator__user__last_name__iexact=q) | Q(
-                                creator__user__email__iexact=q) | Q(creator__nickname__iexact=q)
-                        ),
-                        Q(Q(license__name__iexact=q) | Q(
-                            license__name__istartswith=q)),
-                        Q()
-                    ]
-                commaparts = query.split(",")
-                for cpart in commaparts:
-                    if cpart.strip().lower().startswith(specials):
-                        special, specialq = cpart.split(':')
-                        if special.strip().lower() == 'type':
-                            verified = specialq.strip().lower() == 'verified'
-                            core = specialq.strip().lower() == 'core'
-                            if not verified and not core:
-                                invalidQuery = True
-                                break
-                        else:
-                            dbquery = Q(dbquery, specquerieslist(specialq.strip())[
-                                list(specials).index(f"{special.strip()}:")])
-                    else:
-                        pquery = cpart.strip()
-                        break
-            else:
-                pquery = query
-            if pquery and not invalidQuery:
-                dbquery = Q(dbquery, Q(
-                    Q(name__istartswith=pquery)
-                    | Q(creator__user__first_name__istartswith=pquery)
-                    | Q(creator__user__last_name__istartswith=pquery)
-                    | Q(creator__user__email__istartswith=pquery)
-                    | Q(creator__nickname__istartswith=pquery)
-                    | Q(category__name__iexact=pquery)
-                    | Q(topics__name__iexact=pquery)
-                    | Q(tags__name__iexact=pquery)
-                    | Q(category__name__istartswith=pquery)
-                    | Q(topics__name__istartswith=pquery)
-                    | Q(tags__name__istartswith=pquery)
-                    | Q(license__name__istartswith=pquery)
-                    | Q(name__icontains=pquery)
-                    | Q(description__icontains=pquery)
-                ))
-            if not invalidQuery:
-                projects: BaseProject = BaseProject.objects.exclude(trashed=True).exclude(
-                    suspended=True).exclude(creator__user__id__in=excludecreatorIDs).filter(dbquery).distinct()[0:limit]
-                if not len(projects) and pquery:
-                    projects: BaseProject = BaseProject.objects.exclude(trashed=True).exclude(suspended=True).exclude(creator__user__id__in=excludecreatorIDs).filter(
-                        Q(co_creators__user__last_name__istartswith=pquery)
-                        | Q(co_creators__user__email__istartswith=pquery)
-                        | Q(co_creators__nickname__istartswith=pquery)
-                    ).distinct()[:limit]
-
-                if len(projects):
-                    projects = list(
-                        filter(lambda m: m.is_approved(), list(projects)))
-                    if verified != None and verified:
-                        projects = list(
-                            filter(lambda m: m.is_verified(), list(projects)))
-                    if core != None and core:
-                        projects = list(
-                            filter(lambda m: m.is_core(), list(projects)))
-                    if len(projects):
-                        cache.set(cachekey, projects, settings.CACHE_SHORT)
+        blockedIDs = request.user.profile.blockedIDs() if request.user.is_authenticated else []
+        projects = searchProjects(query, blockedIDs, limit)
 
         if json_body:
             return respondJson(Code.OK, dict(
@@ -2044,7 +1861,7 @@ def snapshot(request: WSGIRequest, projID: UUID, action: str) -> JsonResponse:
                 video=videofile
             )
             snapshotCreated(baseproject, snapshot)
-            updatePresentLists(plist=Browse.PROJECT_SNAPSHOTS, project=baseproject, creator=request.user.profile)
+            updatePresentLists(plist=Browse.PROJECT_SNAPSHOTS, project=baseproject, creator=request.user.profile, snapID=str(snapshot.id), action=Action.CREATE)
             return redirect(baseproject.getProject().getLink(alert=Message.SNAP_CREATED))
 
         id = request.POST['snapid'][:50]
@@ -3229,11 +3046,11 @@ def submitProjectRating(request: WSGIRequest, projectID: UUID) -> JsonResponse:
         if action == Action.CREATE:
             score: float= float(request.POST['score'])
             if (1 <= score <= 10):
-                ProjectUserRating.objects.update_or_create(profile=profile, base_project=project, defaults=dict(score=score),)
+                rateObject(ProjectUserRating, 'base_project', project, 'profile', profile, score)
             else:
                 raise ValidationError(score)       
         elif action==Action.REMOVE:
-            ProjectUserRating.objects.filter(profile=profile, base_project=project).delete()        
+            unrateObject(ProjectUserRating, profile=profile, base_project=project)
         else:
             raise ValidationError(action)
         return respondJson(Code.OK)
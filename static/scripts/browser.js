@@ -47,26 +47,48 @@ const loadBrowserSwiper = () => {
     setTimeout(x, 800);
 };
 
-const loadBrowsers = () => {
+const loadBrowsers = async () => {
     let browseList = randomizeArray(Object.values(BROWSE));
     let browseIndex = -1;
+    const views = getElements("browser-view");
+    const viewKeys = views.map((view) => {
+        browseList = browseList.filter(
+            (t) =>
+                t != view.getAttribute("data-type") &&
+                t != BROWSE.PROJECT_SNAPSHOTS
+        );
+        browseIndex++;
+        return view.getAttribute("data-type") || browseList[browseIndex];
+    });
+    views.forEach((view) =>
+        setHtmlContent(view, loaderHTML(`${view.id}-loader`))
+    );
+    const batch = await postRequest2({
+        path: URLS.BROWSER_BATCH,
+        data: {
+            types: viewKeys.filter((key) => key),
+        },
+        retainCache: true,
+        silent: true,
+    });
+    const fragments = (batch && batch.code === code.OK && batch.fragments) || {};
     Promise.all(
-        getElements("browser-view").map(async (view) => {
-            browseList = browseList.filter(
-                (t) =>
-                    t != view.getAttribute("data-type") &&
-                    t != BROWSE.PROJECT_SNAPSHOTS
-            );
-            browseIndex++;
-            let method = async () => {
-                let browsekey =
-                    view.getAttribute("data-type") || browseList[browseIndex];
+        views.map(async (view, index) => {
+            let browsekey = viewKeys[index];
+            let method = async (prefetched = undefined) => {
                 if (!browsekey) return;
-                setHtmlContent(view, loaderHTML(`${view.id}-loader`));
-                const data = await getRequest2({
-                    path: setUrlParams(URLS.BROWSER, browsekey),
-                    silent: true,
-                });
+                if (prefetched === "") {
+                    setHtmlContent(view, "");
+                    return;
+                }
+                let data = prefetched;
+                if (data === undefined) {
+                    setHtmlContent(view, loaderHTML(`${view.id}-loader`));
+                    data = await getRequest2({
+                        path: setUrlParams(URLS.BROWSER, browsekey),
+                        silent: true,
+                    });
+                }
                 if (browseIndex >= browseList.length) {
                     browseList = randomizeArray(Object.values(browseList));
                     browseIndex = 0;
@@ -207,7 +229,7 @@ const loadBrowsers = () => {
                     };
                 });
             };
-            return await method();
+            return await method(fragments[browsekey]);
         })
     )
         .then(() => {
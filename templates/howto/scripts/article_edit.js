@@ -1,6 +1,7 @@
 const self = "{{ self }}"==='True'
 const isRater = "{{isRater}}"==='True'
 const articleID = "{{ article.id }}"
+let sectionsRevision = Number("{{ article.sectionsRevision }}")
 const canEdit = "{{ article.isEditable }}"==="True"
 
 
@@ -98,6 +99,7 @@ const createImageSection = async(imageData) => {
     });
     if (resp.code === code.OK) 
     {
+        sectionsRevision = resp.revision
         appendHtmlContent(getElement("section-edit-inputs"), article_content.image_content(resp.sectionID, imageData))
         appendHtmlContent(getElement("sidenav-edit"), article_content.sidenav_mini_content(resp.sectionID))
         appendHtmlContent(getElement("sidenav2-edit"), article_content.sidenav_content(resp.sectionID, true, false))
@@ -117,6 +119,7 @@ const createVideoSection = async(videoData) => {
     });
     if (resp.code === code.OK) 
     {
+        sectionsRevision = resp.revision
         appendHtmlContent(getElement("section-edit-inputs"), article_content.video_content(resp.sectionID, videoData))
         appendHtmlContent(getElement("sidenav-edit"), article_content.sidenav_mini_content(resp.sectionID))
         appendHtmlContent(getElement("sidenav2-edit"), article_content.sidenav_content(resp.sectionID, false, true))
@@ -183,6 +186,7 @@ const handleSectionCreation = () => {
             });
             if (resp.code === code.OK) 
             {
+                sectionsRevision = resp.revision
                 hide(getElement('sync-button'))
                 temp_element.classList.remove('temp-paragraphs')
                 temp_element.classList.add('section-edit')
@@ -228,6 +232,7 @@ const handleSectionDeletion = async(sectionID) => {
             });
             if (resp.code === code.OK) 
             {
+                sectionsRevision = resp.revision
                 success(STRING.section_deleted)
                 return true
             }
@@ -252,6 +257,7 @@ const updateSection = async({sectionID, subheading="", paragraph="", image="", v
     });
     if (resp.code === code.OK) 
     {
+        sectionsRevision = resp.revision
         hide(getElement('sync-button'))
         if(subheading) {
             getElement(`${sectionID}-subheading`).defaultValue = subheading
@@ -528,10 +534,12 @@ const sync = async() => {
         data: {
             article_update,
             section_create_paragraph,
-            section_update
+            section_update,
+            revision: sectionsRevision
         }
     })
     if(resp.code === code.OK) {
+        sectionsRevision = resp.revision
         if(section_create_paragraph) {
             appendHtmlContent(getElement("section-edit-inputs"), article_content.paragraph_content(resp.sectionID, section_create_paragraph))
             appendHtmlContent(getElement("sidenav-edit"), article_content.sidenav_mini_content(resp.sectionID))
@@ -564,6 +572,19 @@ const sync = async() => {
         hide(getElement('sync-button'))
         return
     }
+    if(resp.revision !== undefined) {
+        // sections were changed elsewhere: the unsynced changes stay in sessionStorage, and are synced upon the latest revision after a reload
+        sectionsRevision = resp.revision
+        const res = await Swal.fire({
+            title: resp.error,
+            showCancelButton: true,
+            confirmButtonText: 'Reload',
+            cancelButtonText: 'Later',
+        })
+        if(res.isConfirmed)
+            return window.location.reload()
+        return
+    }
     error(resp.error)
 }
 sync();
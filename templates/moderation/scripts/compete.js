@@ -13,6 +13,7 @@ const resolved = "{{moderation.resolved}}" === "True";
 if (allsubsMarked) {
 } else if (!ismoderator) {
     let finalData = [];
+    const markingBatchSize = 100;
     const localStorageKey =
         "{{moderation.getID}}{{moderation.type}}{{request.user.getID}}finalData";
     const eachTopicMaxPoint = Number(
@@ -217,12 +218,37 @@ if (allsubsMarked) {
                     message('{% trans "Sending for ranking" %}...');
                     loader(true);
                     subLoader(true);
-                    const data = await postRequest(
-                        "{{moderation.competition.submissionPointsLink}}",
-                        {
-                            submissions: finalData,
+                    let data = null;
+                    for (
+                        let start = 0;
+                        start < finalData.length;
+                        start += markingBatchSize
+                    ) {
+                        const batch = finalData.slice(
+                            start,
+                            start + markingBatchSize
+                        );
+                        data = await postRequest(
+                            "{{moderation.competition.submissionPointsLink}}",
+                            {
+                                submissions: batch,
+                                partial:
+                                    start + markingBatchSize < finalData.length,
+                            }
+                        );
+                        if (data.code !== code.OK) {
+                            if (data.subID && data.topicID) {
+                                const input = getElement(
+                                    `${data.subID}${data.topicID}`
+                                );
+                                if (input) {
+                                    input.disabled = false;
+                                    input.focus();
+                                }
+                            }
+                            break;
                         }
-                    );
+                    }
                     if (data.code === code.OK) {
                         success(
                             '{% trans "Submissions marked" %} & {% trans "submitted for ranking" %}.'
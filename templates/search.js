@@ -29,6 +29,8 @@ getElement("browse-search-exec").onclick = async () => {
     setHtmlContent(getElement("compete"), data.compete, loadBrowserSwiper)
     setHtmlContent(getElement("howto"), data.howto, loadBrowserSwiper)
     setHtmlContent(getElement("snapshot"), data.snapshot, loadBrowserSwiper)
+    if (data.partial && data.partial.length)
+        message('{% trans "Some results took too long to load, try searching again for more." %}');
 };
 getElement("search-projects-form").onsubmit = (e) => {
     getElement("browse-search-exec").click();
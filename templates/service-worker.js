@@ -6,12 +6,15 @@ const _VERSION = "{{VERSION}}",
     X_RETAINCACHE = "X-KNOT-RETAIN-CACHE",
     X_SCRIPTFETCH = "X-KNOT-REQ-SCRIPT",
     _ASSETS_ = {{assets|safe}},
+    _ASSET_HASHES_ = {{assetHashes|safe}},
+    _ASSET_SET_ = new Set(_ASSETS_),
+    _ASSET_HASHES_PATH = "/__sw-asset-hashes__",
     _IGNORELIST_ = {{ignorelist|safe}},
     _RECACHELIST_ = {{recacheList|safe}},
     _NOOFFLINELIST_ = {{noOfflineList|safe}},
     _NETFIRSTLIST_ = {{netFirstList|safe}},
     _PARAMREGEX = "[a-zA-Z0-9./\\-_?=&%#:@]",
-    _STAT_CACHE_NAME = `static-cache-${_VERSION}`,
+    _STAT_CACHE_NAME = `static-cache`,
     _DYN_CACHE_NAME = `dynamic-cache-${_VERSION}`,
     EVENTS = {
         ACTIVATE: "activate",
@@ -80,58 +83,65 @@ const isNetFirst = (path) =>
             event.request.headers.get(X_SCRIPTFETCH) == H_TRUE
         );
 
-// To add static _ASSETS_ in static cache DB on service worker installation/update
+// To add static _ASSETS_ in static cache DB on service worker installation/update.
+// Only assets whose content hash changed are fetched again, unchanged ones are reused from the previous static cache,
+// even if their URL changed with the version.
 self.addEventListener(EVENTS.ACTIVATE, (event) =>
     event.waitUntil(
         caches
             .keys()
-            .then(
-                async (keys) =>
+            .then(async (keys) => {
+                await Promise.all(
+                    keys
+                        .filter((key) => key != _STAT_CACHE_NAME)
+                        .map(async (key) => await caches.delete(key))
+                );
+                try {
+                    const cache = await caches.open(_STAT_CACHE_NAME);
+                    const oldManifest = await cache.match(_ASSET_HASHES_PATH);
+                    const oldHashes = oldManifest ? await oldManifest.json() : {};
+                    const oldByHash = {};
+                    Object.keys(oldHashes).forEach((asset) => {
+                        oldByHash[oldHashes[asset]] = asset;
+                    });
                     await Promise.all(
-                        keys
-                            .filter((key) => key != _STAT_CACHE_NAME)
-                            .map(async (key) => await caches.delete(key))
-                    )
-                        .then(
-                            async (_) =>
-                                await caches
-                                    .open(_STAT_CACHE_NAME)
-                                    .then(
-                                        async (cache) =>
-                                            await Promise.all(
-                                                _ASSETS_.map(async (asset) => {
-                                                    const matched =
-                                                        await cache.match(
-                                                            asset
-                                                        );
-                                                    if (
-                                                        !(
-                                                            matched &&
-                                                            matched.status ===
-                                                                200
-                                                        )
-                                                    ) {
-                                                        try {
-                                                            await cache.add(
-                                                                asset
-                                                            );
-                                                        } catch (e) {
-                                                            {% if DEBUG %}debug_log(`static: ${asset} not added: ${e}`);{% endif %}
-                                                        }
-                                                    }
-                                                })
-                                            )
-                                    )
-                                    .catch((e) => {
-                                        console.error(e);
-                                        return caches.delete(_STAT_CACHE_NAME);
-                                    })
-                        )
-                        .catch((err) => {
-                            console.error(err);
-                            return err;
+                        _ASSETS_.map(async (asset) => {
+                            const hash = _ASSET_HASHES_[asset];
+                            if (oldHashes[asset] === hash) {
+                                const matched = await cache.match(asset);
+                                if (matched && matched.status === 200) return;
+                            }
+                            const previous = oldByHash[hash];
+                            if (previous) {
+                                const matched = await cache.match(previous);
+                                if (matched && matched.status === 200) {
+                                    await cache.put(asset, matched);
+                                    return;
+                                }
+                            }
+                            try {
+                                await cache.add(asset);
+                            } catch (e) {
+                                {% if DEBUG %}debug_log(`static: ${asset} not added: ${e}`);{% endif %}
+                            }
                         })
-            )
+                    );
+                    await Promise.all(
+                        Object.keys(oldHashes)
+                            .filter((asset) => !_ASSET_SET_.has(asset))
+                            .map(async (asset) => await cache.delete(asset))
+                    );
+                    await cache.put(
+                        _ASSET_HASHES_PATH,
+                        new Response(JSON.stringify(_ASSET_HASHES_), {
+                            headers: { "Content-Type": "application/json" },
+                        })
+                    );
+                } catch (e) {
+                    console.error(e);
+                    return caches.delete(_STAT_CACHE_NAME);
+                }
+            })
             .catch((err) => {
                 console.error(err);
                 return err;
@@ -146,7 +156,7 @@ const netFetchResponseHandler = async (path, event, FetchRes) => {
             {% if DEBUG %}debug_log(`${path} can clear dyn cache`);{% endif %}
             await caches.delete(_DYN_CACHE_NAME);
         }
-        if (_ASSETS_.includes(path)) {
+        if (_ASSET_SET_.has(path)) {
             {% if DEBUG %}debug_log(`${path} is static asset`);{% endif %}
             try {
                 const cache = await caches.open(_STAT_CACHE_NAME);
@@ -241,7 +251,7 @@ const cacheFetchResponseHandler = async (path, event, CachedRes) => {
         {% if DEBUG %}debug_log(`${path} can clear dyn cache`);{% endif %}
         await caches.delete(_DYN_CACHE_NAME);
     }
-    if (_ASSETS_.includes(path)) {
+    if (_ASSET_SET_.has(path)) {
         {% if DEBUG %}debug_log(`${path} is static asset`);{% endif %}
         try {
             const cache = await caches.open(_STAT_CACHE_NAME);